@@ -0,0 +1,34 @@
+"""add check-in lookup indexes
+
+Revision ID: 4e7b2d9c1a55
+Revises: 9c1e4f7a2b10
+Create Date: 2026-10-18 14:40:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "4e7b2d9c1a55"
+down_revision: Union[str, Sequence[str], None] = "9c1e4f7a2b10"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Back the typed application and check-in lookups in app/routers/checkins.py
+    op.create_index("ix_applications_event_user", "applications", ["event_id", "user_id"])
+    op.create_index(
+        "ix_event_checkins_event_application",
+        "event_checkins",
+        ["event_id", "application_id"],
+    )
+    op.create_index("ix_event_checkins_event_vendor", "event_checkins", ["event_id", "vendor_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_event_checkins_event_vendor", table_name="event_checkins")
+    op.drop_index("ix_event_checkins_event_application", table_name="event_checkins")
+    op.drop_index("ix_applications_event_user", table_name="applications")
@@ -0,0 +1,30 @@
+"""add events listing index
+
+Revision ID: 9c1e4f7a2b10
+Revises: 27553ab565ea
+Create Date: 2026-10-18 10:12:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9c1e4f7a2b10"
+down_revision: Union[str, Sequence[str], None] = "27553ab565ea"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Backs the published/archived/end-date filter on /events and /public/events
+    op.create_index(
+        "ix_events_listing",
+        "events",
+        ["published", "archived", "end_date", "start_date"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_events_listing", table_name="events")
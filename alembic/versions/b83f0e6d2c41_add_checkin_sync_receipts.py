@@ -0,0 +1,39 @@
+"""add check-in sync receipts
+
+Revision ID: b83f0e6d2c41
+Revises: 4e7b2d9c1a55
+Create Date: 2026-10-18 16:05:00.000000
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b83f0e6d2c41"
+down_revision: Union[str, Sequence[str], None] = "4e7b2d9c1a55"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Idempotency receipts for POST /events/{event_id}/checkins/sync
+    op.create_table(
+        "checkin_sync_receipts",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("event_id", sa.Integer(), nullable=False),
+        sa.Column("idempotency_key", sa.String(length=200), nullable=False),
+        sa.Column("device_id", sa.String(), nullable=True),
+        sa.Column("application_id", sa.BigInteger(), nullable=True),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("result", sa.JSON(), nullable=False),
+        sa.Column("scanned_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.UniqueConstraint("event_id", "idempotency_key", name="uq_checkin_sync_receipts_event_key"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("checkin_sync_receipts")
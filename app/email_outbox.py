@@ -0,0 +1,377 @@
+# app/email_outbox.py
+#
+# Durable outbox for transactional email. Request handlers call
+# enqueue_email(), which writes the message to a SQLite spool in DATA_DIR and
+# returns; a small pool of worker threads claims due messages in batches and
+# hands them to the transport (Resend by default, or whatever set_transport()
+# installed). Failed sends are retried with exponential backoff and parked as
+# "dead" after EMAIL_OUTBOX_MAX_ATTEMPTS. Any process sharing DATA_DIR can
+# drain the spool; claims are leased so a crashed worker's batch is retried.
+from __future__ import annotations
+
+import collections
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Protocol
+
+DATA_DIR = Path(os.getenv("DATA_DIR", "/data/vendorconnect"))
+_OUTBOX_PATH = DATA_DIR / "_email_outbox.sqlite3"
+
+EMAIL_OUTBOX_ENABLED = os.getenv("EMAIL_OUTBOX", "1").strip().lower() not in {"0", "false", "no", "off"}
+EMAIL_OUTBOX_WORKERS = max(1, int(os.getenv("EMAIL_OUTBOX_WORKERS", "2")))
+EMAIL_OUTBOX_BATCH_SIZE = max(1, min(100, int(os.getenv("EMAIL_OUTBOX_BATCH_SIZE", "50"))))
+EMAIL_OUTBOX_MAX_ATTEMPTS = max(1, int(os.getenv("EMAIL_OUTBOX_MAX_ATTEMPTS", "8")))
+EMAIL_OUTBOX_BACKOFF_SECONDS = float(os.getenv("EMAIL_OUTBOX_BACKOFF_SECONDS", "5"))
+EMAIL_OUTBOX_MAX_BACKOFF_SECONDS = float(os.getenv("EMAIL_OUTBOX_MAX_BACKOFF_SECONDS", "1800"))
+EMAIL_OUTBOX_LEASE_SECONDS = float(os.getenv("EMAIL_OUTBOX_LEASE_SECONDS", "300"))
+EMAIL_OUTBOX_POLL_SECONDS = float(os.getenv("EMAIL_OUTBOX_POLL_SECONDS", "1"))
+EMAIL_OUTBOX_RETAIN_SECONDS = float(os.getenv("EMAIL_OUTBOX_RETAIN_SECONDS", str(7 * 24 * 3600)))
+
+RESEND_API_BASE = (os.getenv("RESEND_API_BASE") or "https://api.resend.com").strip().rstrip("/")
+DEFAULT_FROM_EMAIL = "VendCore Support <support@vendcore.co>"
+
+
+class TransportError(Exception):
+    """A send failure; ``retryable`` is False for errors a retry cannot fix."""
+
+    def __init__(self, message: str, *, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class EmailTransport(Protocol):
+    def send_batch(self, messages: List[Dict[str, Any]]) -> None:
+        """Deliver every message or raise TransportError."""
+
+
+class ResendTransport:
+    """Resend over one pooled HTTP session, using /emails/batch for several messages."""
+
+    def __init__(self, api_key: str, base_url: str = RESEND_API_BASE, timeout: float = 10.0):
+        import requests
+
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._session = requests.Session()
+        self._session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        })
+
+    def send_batch(self, messages: List[Dict[str, Any]]) -> None:
+        if len(messages) == 1:
+            url, body = f"{self.base_url}/emails", messages[0]
+        else:
+            url, body = f"{self.base_url}/emails/batch", messages
+        try:
+            response = self._session.post(url, json=body, timeout=self.timeout)
+        except Exception as exc:
+            raise TransportError(str(exc)) from exc
+        if response.status_code >= 400:
+            retryable = response.status_code == 429 or response.status_code >= 500
+            raise TransportError(f"{response.status_code} {response.text}", retryable=retryable)
+
+
+_TRANSPORT: Optional[EmailTransport] = None
+_TRANSPORT_LOCK = threading.Lock()
+
+
+def set_transport(transport: Optional[EmailTransport]) -> None:
+    """Install the transport workers send through; None restores Resend."""
+    global _TRANSPORT
+    with _TRANSPORT_LOCK:
+        _TRANSPORT = transport
+
+
+def _get_transport() -> Optional[EmailTransport]:
+    global _TRANSPORT
+    with _TRANSPORT_LOCK:
+        if _TRANSPORT is None:
+            api_key = (os.getenv("RESEND_API_KEY") or "").strip()
+            if not api_key:
+                return None
+            _TRANSPORT = ResendTransport(api_key)
+        return _TRANSPORT
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    message TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    claimed_until REAL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS ix_outbox_due ON outbox (status, next_attempt_at);
+"""
+
+_LOCAL = threading.local()
+_SCHEMA_READY: set[str] = set()
+
+_STATS_LOCK = threading.Lock()
+_STATS: Dict[str, int] = {"enqueued": 0, "sent": 0, "failed_attempts": 0, "dead": 0, "batches": 0}
+_LATENCIES: "collections.deque[float]" = collections.deque(maxlen=500)
+
+_WAKE = threading.Event()
+_WORKERS: List[threading.Thread] = []
+_WORKERS_LOCK = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    path = str(_OUTBOX_PATH)
+    conn = getattr(_LOCAL, "conn", None)
+    if conn is not None and getattr(_LOCAL, "path", None) == path:
+        return conn
+    _OUTBOX_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    if path not in _SCHEMA_READY:
+        conn.executescript(_SCHEMA)
+        _SCHEMA_READY.add(path)
+    _LOCAL.conn, _LOCAL.path = conn, path
+    return conn
+
+
+def _bump(key: str, amount: int = 1) -> None:
+    with _STATS_LOCK:
+        _STATS[key] = _STATS.get(key, 0) + amount
+
+
+def build_message(
+    *,
+    to_email: str,
+    subject: str,
+    html: str,
+    text: str = "",
+    from_email: Optional[str] = None,
+    reply_to: Optional[str] = None,
+) -> Dict[str, Any]:
+    message: Dict[str, Any] = {
+        "from": (from_email or os.getenv("FROM_EMAIL") or DEFAULT_FROM_EMAIL).strip(),
+        "to": [to_email],
+        "subject": subject,
+        "html": html,
+        "text": text or subject,
+    }
+    if reply_to:
+        message["reply_to"] = reply_to
+    return message
+
+
+def enqueue_email(message: Dict[str, Any]) -> Optional[int]:
+    """Spool ``message`` for delivery and return its outbox id.
+
+    With EMAIL_OUTBOX=0 the message is sent inline instead and None is
+    returned. Errors are reported, never raised, so email can't break the
+    calling workflow.
+    """
+    recipient = ", ".join(message.get("to") or [])
+    if _get_transport() is None:
+        print(f"Email skipped to {recipient or 'unknown'}: RESEND_API_KEY not set")
+        return None
+
+    if not EMAIL_OUTBOX_ENABLED:
+        try:
+            _send([message])
+            print(f"Email sent to {recipient}: {message.get('subject')}")
+        except Exception as exc:
+            print(f"Email failed to {recipient}: {exc}")
+        return None
+
+    now = time.time()
+    try:
+        cursor = _connect().execute(
+            "INSERT INTO outbox (message, next_attempt_at, created_at) VALUES (?, ?, ?)",
+            (json.dumps(message, ensure_ascii=False), now, now),
+        )
+    except Exception as exc:
+        print(f"Email outbox write failed for {recipient}: {exc}")
+        return None
+    _bump("enqueued")
+    start_workers()
+    _WAKE.set()
+    return int(cursor.lastrowid)
+
+
+def _send(messages: List[Dict[str, Any]]) -> None:
+    transport = _get_transport()
+    if transport is None:
+        raise TransportError("RESEND_API_KEY not set")
+    started = time.perf_counter()
+    transport.send_batch(messages)
+    with _STATS_LOCK:
+        _LATENCIES.append((time.perf_counter() - started) * 1000)
+        _STATS["batches"] += 1
+
+
+def _claim_batch(limit: int) -> List[tuple]:
+    now = time.time()
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rows = conn.execute(
+            """
+            SELECT id, message, attempts FROM outbox
+            WHERE (status = 'pending' AND next_attempt_at <= ?)
+               OR (status = 'sending' AND claimed_until <= ?)
+            ORDER BY next_attempt_at, id
+            LIMIT ?
+            """,
+            (now, now, limit),
+        ).fetchall()
+        if rows:
+            conn.executemany(
+                "UPDATE outbox SET status = 'sending', claimed_until = ? WHERE id = ?",
+                [(now + EMAIL_OUTBOX_LEASE_SECONDS, row[0]) for row in rows],
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return rows
+
+
+def _backoff_seconds(attempts: int) -> float:
+    delay = min(EMAIL_OUTBOX_MAX_BACKOFF_SECONDS, EMAIL_OUTBOX_BACKOFF_SECONDS * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _mark_sent(ids: List[int]) -> None:
+    now = time.time()
+    _connect().executemany(
+        "UPDATE outbox SET status = 'sent', sent_at = ?, claimed_until = NULL, last_error = NULL WHERE id = ?",
+        [(now, outbox_id) for outbox_id in ids],
+    )
+    _bump("sent", len(ids))
+
+
+def _mark_failed(outbox_id: int, attempts: int, error: TransportError) -> None:
+    attempts += 1
+    dead = not error.retryable or attempts >= EMAIL_OUTBOX_MAX_ATTEMPTS
+    _connect().execute(
+        "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, claimed_until = NULL, last_error = ? WHERE id = ?",
+        (
+            "dead" if dead else "pending",
+            attempts,
+            time.time() + (0 if dead else _backoff_seconds(attempts)),
+            str(error)[:2000],
+            outbox_id,
+        ),
+    )
+    _bump("failed_attempts")
+    if dead:
+        _bump("dead")
+        print(f"Email outbox message {outbox_id} dead after {attempts} attempts: {error}")
+
+
+def _deliver(rows: List[tuple]) -> None:
+    messages = [json.loads(row[1]) for row in rows]
+    try:
+        _send(messages)
+    except TransportError as exc:
+        if len(rows) > 1 and not exc.retryable:
+            # Resend validates batches as a whole; isolate the bad message.
+            for row in rows:
+                _deliver([row])
+            return
+        for outbox_id, _, attempts in rows:
+            _mark_failed(outbox_id, attempts, exc)
+        return
+    except Exception as exc:
+        for outbox_id, _, attempts in rows:
+            _mark_failed(outbox_id, attempts, TransportError(str(exc)))
+        return
+    _mark_sent([row[0] for row in rows])
+
+
+def drain_outbox(max_batches: Optional[int] = None) -> int:
+    """Deliver due messages on the calling thread; return the number claimed."""
+    claimed = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        rows = _claim_batch(EMAIL_OUTBOX_BATCH_SIZE)
+        if not rows:
+            break
+        _deliver(rows)
+        claimed += len(rows)
+        batches += 1
+    return claimed
+
+
+def _prune_sent() -> None:
+    _connect().execute(
+        "DELETE FROM outbox WHERE status = 'sent' AND sent_at < ?",
+        (time.time() - EMAIL_OUTBOX_RETAIN_SECONDS,),
+    )
+
+
+def _worker_loop() -> None:
+    pruned_at = 0.0
+    while True:
+        _WAKE.wait(EMAIL_OUTBOX_POLL_SECONDS)
+        _WAKE.clear()
+        try:
+            drain_outbox()
+            if time.monotonic() - pruned_at > 3600:
+                _prune_sent()
+                pruned_at = time.monotonic()
+        except Exception as exc:
+            print(f"Email outbox worker error: {exc}")
+            time.sleep(EMAIL_OUTBOX_POLL_SECONDS)
+
+
+def start_workers() -> None:
+    with _WORKERS_LOCK:
+        _WORKERS[:] = [worker for worker in _WORKERS if worker.is_alive()]
+        while len(_WORKERS) < EMAIL_OUTBOX_WORKERS:
+            worker = threading.Thread(
+                target=_worker_loop,
+                name=f"email-outbox-{len(_WORKERS) + 1}",
+                daemon=True,
+            )
+            worker.start()
+            _WORKERS.append(worker)
+
+
+def email_outbox_stats() -> Dict[str, Any]:
+    depth: Dict[str, int] = {"pending": 0, "sending": 0, "dead": 0}
+    oldest_pending_age = None
+    try:
+        conn = _connect()
+        for status, count in conn.execute(
+            "SELECT status, COUNT(*) FROM outbox WHERE status != 'sent' GROUP BY status"
+        ):
+            depth[str(status)] = int(count)
+        oldest = conn.execute("SELECT MIN(created_at) FROM outbox WHERE status = 'pending'").fetchone()[0]
+        if oldest is not None:
+            oldest_pending_age = round(time.time() - float(oldest), 3)
+    except Exception as exc:
+        print(f"Email outbox stats skipped: {exc}")
+
+    with _STATS_LOCK:
+        counters = dict(_STATS)
+        latencies = sorted(_LATENCIES)
+    latency: Dict[str, Any] = {"samples": len(latencies)}
+    if latencies:
+        latency["p50_ms"] = round(latencies[len(latencies) // 2], 3)
+        latency["p95_ms"] = round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 3)
+        latency["max_ms"] = round(latencies[-1], 3)
+
+    return {
+        "enabled": EMAIL_OUTBOX_ENABLED,
+        "workers": sum(1 for worker in _WORKERS if worker.is_alive()),
+        "queue_depth": depth,
+        "oldest_pending_age_seconds": oldest_pending_age,
+        "send_latency": latency,
+        **counters,
+    }
@@ -0,0 +1,213 @@
+# app/loop_lag.py
+#
+# Event loop health for the API workers. Route handlers that do blocking work
+# are plain ``def`` functions (FastAPI runs them in AnyIO's worker threads);
+# async handlers hand blocking calls to run_in_threadpool. THREADPOOL_MAX_WORKERS
+# bounds how many of those threads run at once.
+#
+# The lag monitor checks that this holds. A heartbeat task ticks every
+# LOOP_LAG_INTERVAL_MS; a watchdog thread notices when a tick is overdue by
+# more than LOOP_LAG_THRESHOLD_MS and, while the loop is still stuck, records
+# the loop thread's stack and the requests in flight, so the report names the
+# handler that blocked it.
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_MONITOR_ENABLED = os.getenv("LOOP_LAG_MONITOR", "1").strip().lower() not in {"0", "false", "no", "off"}
+LOOP_LAG_INTERVAL_MS = max(5.0, float(os.getenv("LOOP_LAG_INTERVAL_MS", "50") or 50))
+LOOP_LAG_THRESHOLD_MS = max(1.0, float(os.getenv("LOOP_LAG_THRESHOLD_MS", "100") or 100))
+LOOP_LAG_MAX_REPORTS = max(1, int(os.getenv("LOOP_LAG_MAX_REPORTS", "50") or 50))
+# 0 keeps AnyIO's default (40 threads).
+THREADPOOL_MAX_WORKERS = int(os.getenv("THREADPOOL_MAX_WORKERS", "0") or 0)
+
+_APP_ROOT = str(Path(__file__).resolve().parent)
+_STACK_DEPTH = 12
+
+
+def configure_threadpool(max_workers: int = THREADPOOL_MAX_WORKERS) -> Optional[int]:
+    """Bound the threads sync handlers and run_in_threadpool share; returns the limit.
+
+    Must run inside the event loop (an app startup hook).
+    """
+    import anyio.to_thread
+
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    if max_workers > 0:
+        limiter.total_tokens = max_workers
+    return int(limiter.total_tokens)
+
+
+def _blocking_site(frames: List[traceback.FrameSummary]) -> Optional[str]:
+    # Innermost frame in this package, skipping this module.
+    for frame in reversed(frames):
+        if frame.filename.startswith(_APP_ROOT) and not frame.filename.endswith("loop_lag.py"):
+            module = Path(frame.filename).relative_to(Path(_APP_ROOT).parent).with_suffix("")
+            return f"{'.'.join(module.parts)}:{frame.name}:{frame.lineno}"
+    return None
+
+
+class LoopLagMonitor:
+    """Heartbeat task plus watchdog thread for one event loop."""
+
+    def __init__(
+        self,
+        *,
+        interval_ms: float = LOOP_LAG_INTERVAL_MS,
+        threshold_ms: float = LOOP_LAG_THRESHOLD_MS,
+        max_reports: int = LOOP_LAG_MAX_REPORTS,
+    ):
+        self.interval = interval_ms / 1000.0
+        self.threshold = threshold_ms / 1000.0
+        self.reports: Deque[Dict[str, Any]] = deque(maxlen=max_reports)
+        self._lock = threading.Lock()
+        self._inflight: Dict[int, Dict[str, Any]] = {}
+        self._beat = time.monotonic()
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._pending: Optional[Dict[str, Any]] = None
+        self.stats: Dict[str, Any] = {"ticks": 0, "stalls": 0, "max_lag_ms": 0.0, "total_stalled_ms": 0.0}
+
+    # -- lifecycle ----------------------------------------------------------
+
+    def start(self) -> None:
+        """Start monitoring the running loop; call from inside it."""
+        if self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        self._stop.set()
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    # -- requests -----------------------------------------------------------
+
+    def request_started(self, token: int, method: str, path: str) -> None:
+        with self._lock:
+            self._inflight[token] = {"method": method, "path": path, "started": time.monotonic()}
+
+    def request_finished(self, token: int) -> None:
+        with self._lock:
+            self._inflight.pop(token, None)
+
+    # -- monitoring ---------------------------------------------------------
+
+    async def _heartbeat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = now - expected
+            with self._lock:
+                self._beat = now
+                self.stats["ticks"] += 1
+                pending, self._pending = self._pending, None
+            if lag >= self.threshold:
+                self._finish_stall(lag, pending)
+
+    def _watch(self) -> None:
+        poll = min(self.interval, self.threshold) / 2
+        while not self._stop.wait(poll):
+            with self._lock:
+                overdue = time.monotonic() - self._beat - self.interval
+                if overdue < self.threshold or self._pending is not None:
+                    continue
+                requests = [
+                    {"method": r["method"], "path": r["path"], "running_ms": round((time.monotonic() - r["started"]) * 1000, 1)}
+                    for r in self._inflight.values()
+                ]
+            frame = sys._current_frames().get(self._loop_thread) if self._loop_thread else None
+            stack = traceback.extract_stack(frame)[-_STACK_DEPTH:] if frame is not None else []
+            with self._lock:
+                self._pending = {
+                    "site": _blocking_site(stack),
+                    "stack": [f"{f.filename}:{f.lineno} in {f.name}" for f in stack],
+                    "requests": requests,
+                }
+
+    def _finish_stall(self, lag: float, captured: Optional[Dict[str, Any]]) -> None:
+        lag_ms = round(lag * 1000, 1)
+        report: Dict[str, Any] = {"at": time.time(), "lag_ms": lag_ms, "site": None, "requests": [], "stack": []}
+        if captured:
+            report.update(captured)
+        with self._lock:
+            self.reports.append(report)
+            self.stats["stalls"] += 1
+            self.stats["max_lag_ms"] = max(self.stats["max_lag_ms"], lag_ms)
+            self.stats["total_stalled_ms"] = round(self.stats["total_stalled_ms"] + lag_ms, 1)
+        where = report["site"] or "unknown code"
+        paths = ", ".join(f"{r['method']} {r['path']}" for r in report["requests"]) or "no request"
+        logger.warning("event loop blocked for %.0f ms in %s (%s)", lag_ms, where, paths)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats["inflight_requests"] = len(self._inflight)
+            stats["recent"] = list(self.reports)[::-1]
+        stats["running"] = self._task is not None
+        stats["interval_ms"] = self.interval * 1000
+        stats["threshold_ms"] = self.threshold * 1000
+        return stats
+
+
+MONITOR = LoopLagMonitor()
+
+
+class LoopLagMiddleware:
+    """Tells the monitor which requests are in flight."""
+
+    def __init__(self, app, *, monitor: LoopLagMonitor = MONITOR):
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = id(scope)
+        self.monitor.request_started(token, scope.get("method") or "", scope.get("path") or "")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.request_finished(token)
+
+
+async def start_loop_lag_monitor() -> None:
+    limit = configure_threadpool()
+    if LOOP_LAG_MONITOR_ENABLED:
+        MONITOR.start()
+    logger.info("threadpool limit %s, loop lag monitor %s", limit, "on" if LOOP_LAG_MONITOR_ENABLED else "off")
+
+
+async def stop_loop_lag_monitor() -> None:
+    await MONITOR.stop()
+
+
+def loop_lag_stats() -> Dict[str, Any]:
+    stats = MONITOR.snapshot()
+    stats["enabled"] = LOOP_LAG_MONITOR_ENABLED
+    return stats
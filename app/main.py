@@ -7,6 +7,9 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 
+from app.loop_lag import LoopLagMiddleware, start_loop_lag_monitor, stop_loop_lag_monitor
+from app.webhook_inbox import start_workers as start_webhook_inbox_workers
+
 logger = logging.getLogger(__name__)
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -44,6 +47,28 @@ def _load_store_if_available() -> None:
         logger.warning("Store loader unavailable: %s", exc)
 
 
+def _sync_store_per_request_if_shared() -> None:
+    # With a store shared between workers, each request first pulls what the
+    # other workers wrote.
+    try:
+        from app import store
+        from app.store_sqlite import StoreSyncMiddleware
+    except Exception as exc:
+        logger.warning("Store sync unavailable: %s", exc)
+        return
+    if store._BACKEND is not None:
+        app.add_middleware(StoreSyncMiddleware, sync=store.sync)
+
+
+def _warm_vendor_category_index() -> None:
+    try:
+        from app.routers.events import warm_vendor_category_index
+    except Exception as exc:
+        logger.warning("Vendor category index unavailable: %s", exc)
+        return
+    _safe_call(warm_vendor_category_index, "vendor category index")
+
+
 def _init_db_if_available() -> None:
     try:
         from app.db import init_db
@@ -73,6 +98,12 @@ if frontend_origin:
 
 allowed_origins = list(dict.fromkeys([origin for origin in allowed_origins if origin]))
 
+# Must be added before CORS (see app/rate_limit.py).
+if os.getenv("RATE_LIMIT_ENABLED", "").strip().lower() in {"1", "true", "yes"}:
+    from app.rate_limit import RateLimitMiddleware
+
+    app.add_middleware(RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -83,10 +114,20 @@ app.add_middleware(
 )
 
 _load_store_if_available()
+_sync_store_per_request_if_shared()
+
+app.add_middleware(LoopLagMiddleware)
+app.add_event_handler("startup", start_loop_lag_monitor)
+app.add_event_handler("shutdown", stop_loop_lag_monitor)
+
+# Events spooled before a restart are processed without waiting for the next
+# webhook to arrive.
+app.add_event_handler("startup", start_webhook_inbox_workers)
 
 app.mount("/uploads", StaticFiles(directory=str(UPLOADS_DIR)), name="uploads")
 
 _init_db_if_available()
+app.add_event_handler("startup", _warm_vendor_category_index)
 
 
 @app.get("/")
@@ -9,6 +9,10 @@ from app.db import Base
 
 class Application(Base):
     __tablename__ = "applications"
+    __table_args__ = (
+        # Check-in scans resolve a pass by event plus application or vendor id.
+        sa.Index("ix_applications_event_user", "event_id", "user_id"),
+    )
 
     id = sa.Column(Integer, primary_key=True, index=True)
 
@@ -9,6 +9,10 @@ from app.db import Base
 
 class Event(Base):
     __tablename__ = "events"
+    __table_args__ = (
+        # Public listings filter on these and page by id.
+        sa.Index("ix_events_listing", "published", "archived", "end_date", "start_date"),
+    )
 
     id = sa.Column(Integer, primary_key=True, index=True)
 
@@ -9,6 +9,12 @@ from app.db import TimestampMixin
 
 class EventCheckIn(Base, TimestampMixin):
     __tablename__ = "event_checkins"
+    __table_args__ = (
+        # Every scan looks up the event's row by application, then by vendor.
+        sa.Index("ix_event_checkins_event_application", "event_id", "application_id"),
+        sa.Index("ix_event_checkins_event_vendor", "event_id", "vendor_id"),
+        {"extend_existing": True},
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
 
@@ -24,3 +30,26 @@ class EventCheckIn(Base, TimestampMixin):
     checked_in_by: Mapped[int] = mapped_column(sa.Integer, nullable=True)
 
     notes: Mapped[str] = mapped_column(sa.Text, nullable=True)
+
+
+class CheckInSyncReceipt(Base):
+    """Outcome of one offline scan, kept so a re-sent batch replays it."""
+
+    __tablename__ = "checkin_sync_receipts"
+    __table_args__ = (
+        sa.UniqueConstraint("event_id", "idempotency_key", name="uq_checkin_sync_receipts_event_key"),
+        {"extend_existing": True},
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+
+    event_id: Mapped[int] = mapped_column(sa.Integer, nullable=False)
+    idempotency_key: Mapped[str] = mapped_column(sa.String(200), nullable=False)
+    device_id: Mapped[str] = mapped_column(sa.String, nullable=True)
+    application_id: Mapped[int] = mapped_column(sa.BigInteger, nullable=True)
+
+    status: Mapped[str] = mapped_column(sa.String, nullable=False)
+    result: Mapped[dict] = mapped_column(sa.JSON, nullable=False, default=dict)
+
+    scanned_at: Mapped[sa.DateTime] = mapped_column(sa.DateTime, nullable=True)
+    created_at: Mapped[sa.DateTime] = mapped_column(sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False)
@@ -0,0 +1,386 @@
+# app/payment_ledger.py
+#
+# Running totals over the payments collection: platform-wide, per event and
+# per organizer, each with a per-day breakdown for date-range rollups.
+# app.store keeps the ledger current. Every payment save, reload and worker
+# sync passes the changed records through apply(), which takes back the
+# payment's previous contribution and adds its new one, so reading totals
+# never scans every payment.
+#
+# Only paid payments count, as on the earnings and payout pages, and amounts
+# are summed in cents. A payment belongs to its event and to the organizer
+# named on it (falling back to the event's owner), matching by email or id
+# the way organizer_earnings always has.
+from __future__ import annotations
+
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Set, Tuple
+
+# Vector slots.
+PAYMENTS, GROSS, FEES, NET, PAID_OUT, OWED, PAID_COUNT, UNPAID_COUNT = range(8)
+_WIDTH = 8
+_DAY = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+Vector = List[int]
+
+
+class Contribution(NamedTuple):
+    event_id: int
+    email: str
+    organizer_id: str
+    day: str
+    vector: Tuple[int, ...]
+
+
+def _cents(value: Any) -> int:
+    try:
+        return int(round(float(value or 0) * 100))
+    except Exception:
+        return 0
+
+
+def _int(value: Any) -> int:
+    try:
+        return int(value or 0)
+    except Exception:
+        try:
+            return int(float(value))
+        except Exception:
+            return 0
+
+
+def contribution(payment: Any, event: Any = None) -> Optional[Contribution]:
+    """What one payment adds to the ledger; None unless it is paid."""
+    if not isinstance(payment, dict):
+        return None
+    if str(payment.get("status") or "").strip().lower() != "paid":
+        return None
+    event = event if isinstance(event, dict) else {}
+
+    amount = _cents(payment.get("amount"))
+    fee = _cents(payment.get("platform_fee"))
+    payout = _cents(payment.get("organizer_payout"))
+    paid_out = str(payment.get("payout_status") or "unpaid").strip().lower() == "paid"
+    vector = (
+        1,
+        amount,
+        fee,
+        payout,
+        payout if paid_out else 0,
+        0 if paid_out else payout,
+        1 if paid_out else 0,
+        0 if paid_out else 1,
+    )
+
+    email = str(
+        payment.get("organizer_email")
+        or event.get("organizer_email")
+        or event.get("owner_email")
+        or event.get("email")
+        or ""
+    ).strip().lower()
+    owner = (
+        payment.get("organizer_id")
+        or event.get("organizer_id")
+        or event.get("owner_id")
+        or event.get("created_by")
+    )
+    day = str(payment.get("paid_at") or payment.get("updated_at") or payment.get("created_at") or "")[:10]
+    return Contribution(
+        event_id=_int(payment.get("event_id")),
+        email=email,
+        organizer_id="" if owner is None else str(owner),
+        day=day if _DAY.match(day) else "",
+        vector=vector,
+    )
+
+
+def as_totals(vector: Optional[Iterable[int]]) -> Dict[str, Any]:
+    v = list(vector or [0] * _WIDTH)
+    return {
+        "payments": v[PAYMENTS],
+        "gross_sales": round(v[GROSS] / 100, 2),
+        "platform_fees": round(v[FEES] / 100, 2),
+        "net_earnings": round(v[NET] / 100, 2),
+        "payouts_paid": round(v[PAID_OUT] / 100, 2),
+        "payouts_owed": round(v[OWED] / 100, 2),
+        "paid_count": v[PAID_COUNT],
+        "unpaid_count": v[UNPAID_COUNT],
+    }
+
+
+def _add(target: Vector, vector: Iterable[int], sign: int = 1) -> None:
+    for i, value in enumerate(vector):
+        target[i] += sign * value
+
+
+def _in_range(day: str, start: Optional[str], end: Optional[str]) -> bool:
+    if start is None and end is None:
+        return True
+    if not day:
+        return False
+    return (start is None or day >= start) and (end is None or day <= end)
+
+
+class _Bucket:
+    __slots__ = ("totals", "days")
+
+    def __init__(self) -> None:
+        self.totals: Vector = [0] * _WIDTH
+        self.days: Dict[str, Vector] = {}
+
+    def add(self, c: Contribution, sign: int) -> None:
+        _add(self.totals, c.vector, sign)
+        day = self.days.setdefault(c.day, [0] * _WIDTH)
+        _add(day, c.vector, sign)
+        if not day[PAYMENTS]:
+            del self.days[c.day]
+
+    def total(self, start: Optional[str] = None, end: Optional[str] = None) -> Vector:
+        if start is None and end is None:
+            return list(self.totals)
+        out = [0] * _WIDTH
+        for day, vector in self.days.items():
+            if _in_range(day, start, end):
+                _add(out, vector)
+        return out
+
+    def state(self) -> Tuple[Tuple[int, ...], Tuple[Tuple[str, Tuple[int, ...]], ...]]:
+        return tuple(self.totals), tuple(sorted((d, tuple(v)) for d, v in self.days.items()))
+
+
+class PaymentLedger:
+    """Incrementally maintained payment aggregates.
+
+    Organizer buckets are kept per event under ("email", e), ("id", i) and
+    ("both", e, i); totals for an organizer known by email and id are
+    email + id - both, so a payment naming both is counted once.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._contributions: Dict[str, Contribution] = {}
+        self._all = _Bucket()
+        self._events: Dict[int, _Bucket] = {}
+        self._event_keys: Dict[int, Set[str]] = {}
+        self._organizers: Dict[Tuple[str, ...], Dict[int, _Bucket]] = {}
+
+    # -- updates ------------------------------------------------------------
+
+    def apply(self, key: Any, payment: Any, events: Mapping[Any, Any]) -> None:
+        """Bring one payment's contribution up to date; None payment removes it."""
+        key = str(key)
+        event = None
+        if isinstance(payment, dict):
+            event_id = _int(payment.get("event_id"))
+            event = events.get(event_id) or events.get(str(event_id))
+        new = contribution(payment, event)
+        with self._lock:
+            old = self._contributions.pop(key, None)
+            if old == new:
+                if new is not None:
+                    self._contributions[key] = new
+                return
+            if old is not None:
+                self._add(key, old, -1)
+            if new is not None:
+                self._contributions[key] = new
+                self._add(key, new, 1)
+
+    def _add(self, key: str, c: Contribution, sign: int) -> None:
+        self._all.add(c, sign)
+        self._bucket(self._events, c.event_id, c, sign)
+        keys = self._event_keys.setdefault(c.event_id, set())
+        if sign > 0:
+            keys.add(key)
+        else:
+            keys.discard(key)
+            if not keys:
+                del self._event_keys[c.event_id]
+        for organizer in self._organizer_keys(c.email, c.organizer_id):
+            self._bucket(self._organizers.setdefault(organizer, {}), c.event_id, c, sign)
+            if not self._organizers[organizer]:
+                del self._organizers[organizer]
+
+    @staticmethod
+    def _bucket(table: Dict[int, _Bucket], event_id: int, c: Contribution, sign: int) -> None:
+        bucket = table.setdefault(event_id, _Bucket())
+        bucket.add(c, sign)
+        if not bucket.totals[PAYMENTS]:
+            del table[event_id]
+
+    @staticmethod
+    def _organizer_keys(email: str, organizer_id: str) -> List[Tuple[str, ...]]:
+        keys: List[Tuple[str, ...]] = []
+        if email:
+            keys.append(("email", email))
+        if organizer_id:
+            keys.append(("id", organizer_id))
+        if email and organizer_id:
+            keys.append(("both", email, organizer_id))
+        return keys
+
+    # -- reads --------------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._contributions)
+
+    def event_payment_keys(self, event_id: Any) -> List[str]:
+        with self._lock:
+            return list(self._event_keys.get(_int(event_id), ()))
+
+    def payment_keys(self, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        """Keys of every paid payment, optionally only those paid in [start, end]."""
+        with self._lock:
+            return [key for key, c in self._contributions.items() if _in_range(c.day, start, end)]
+
+    def totals(self, start: Optional[str] = None, end: Optional[str] = None) -> Vector:
+        with self._lock:
+            return self._all.total(start, end)
+
+    def event_totals(
+        self, event_ids: Optional[Iterable[Any]] = None, start: Optional[str] = None, end: Optional[str] = None
+    ) -> Dict[int, Vector]:
+        """Totals per event, for the given events or every event with payments."""
+        with self._lock:
+            ids = self._events if event_ids is None else {_int(e) for e in event_ids}
+            out = {}
+            for event_id in ids:
+                bucket = self._events.get(event_id)
+                if bucket is not None:
+                    vector = bucket.total(start, end)
+                    if vector[PAYMENTS]:
+                        out[event_id] = vector
+            return out
+
+    def _organizer_parts(
+        self, email: str, organizer_id: str, owned: Set[int]
+    ) -> Dict[int, List[Tuple[int, _Bucket]]]:
+        parts: Dict[int, List[Tuple[int, _Bucket]]] = {}
+        for event_id in owned:
+            bucket = self._events.get(event_id)
+            if bucket is not None:
+                parts[event_id] = [(1, bucket)]
+        for organizer in self._organizer_keys(email, organizer_id):
+            sign = -1 if organizer[0] == "both" else 1
+            for event_id, bucket in self._organizers.get(organizer, {}).items():
+                if event_id not in owned:
+                    parts.setdefault(event_id, []).append((sign, bucket))
+        return parts
+
+    def organizer_totals(
+        self,
+        *,
+        email: Any = None,
+        organizer_id: Any = None,
+        event_ids: Iterable[Any] = (),
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> Dict[int, Vector]:
+        """Totals per event for one organizer.
+
+        Every payment on the events in ``event_ids`` (the ones they own)
+        counts, plus payments on other events that name the organizer.
+        """
+        email = str(email or "").strip().lower()
+        organizer_id = "" if organizer_id is None else str(organizer_id)
+        owned = {_int(e) for e in event_ids}
+        with self._lock:
+            out = {}
+            for event_id, parts in self._organizer_parts(email, organizer_id, owned).items():
+                vector = [0] * _WIDTH
+                for sign, bucket in parts:
+                    _add(vector, bucket.total(start, end), sign)
+                if vector[PAYMENTS]:
+                    out[event_id] = vector
+            return out
+
+    def organizer_payment_keys(
+        self,
+        *,
+        email: Any = None,
+        organizer_id: Any = None,
+        event_ids: Iterable[Any] = (),
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> List[str]:
+        """Keys of the payments organizer_totals() counts."""
+        email = str(email or "").strip().lower()
+        organizer_id = "" if organizer_id is None else str(organizer_id)
+        owned = {_int(e) for e in event_ids}
+        with self._lock:
+            keys: List[str] = []
+            for event_id in self._organizer_parts(email, organizer_id, owned):
+                for key in self._event_keys.get(event_id, ()):
+                    c = self._contributions[key]
+                    if not _in_range(c.day, start, end):
+                        continue
+                    if (
+                        event_id in owned
+                        or (email and c.email == email)
+                        or (organizer_id and c.organizer_id == organizer_id)
+                    ):
+                        keys.append(key)
+            return keys
+
+    def rollup(
+        self,
+        *,
+        email: Any = None,
+        organizer_id: Any = None,
+        event_ids: Optional[Iterable[Any]] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        period: str = "day",
+    ) -> List[Tuple[str, Vector]]:
+        """Totals per day ("day") or month ("month"), oldest first.
+
+        With no organizer and no events this is platform-wide; with only
+        ``event_ids`` it covers those events.
+        """
+        width = 7 if period == "month" else 10
+        with self._lock:
+            if email or organizer_id:
+                parts = self._organizer_parts(
+                    str(email or "").strip().lower(),
+                    "" if organizer_id is None else str(organizer_id),
+                    {_int(e) for e in event_ids or ()},
+                )
+                selected = [part for event_parts in parts.values() for part in event_parts]
+            elif event_ids is not None:
+                selected = [(1, self._events[e]) for e in {_int(e) for e in event_ids} if e in self._events]
+            else:
+                selected = [(1, self._all)]
+            periods: Dict[str, Vector] = {}
+            for sign, bucket in selected:
+                for day, vector in bucket.days.items():
+                    if day and _in_range(day, start, end):
+                        _add(periods.setdefault(day[:width], [0] * _WIDTH), vector, sign)
+        return sorted((p, v) for p, v in periods.items() if v[PAYMENTS])
+
+    # -- reconciliation -----------------------------------------------------
+
+    def state(self) -> Dict[str, Any]:
+        with self._lock:
+            state: Dict[str, Any] = {"all": self._all.state()}
+            for event_id, bucket in self._events.items():
+                state[f"event:{event_id}"] = bucket.state()
+            for organizer, events in self._organizers.items():
+                for event_id, bucket in events.items():
+                    state[f"{':'.join(organizer)}:event:{event_id}"] = bucket.state()
+            return state
+
+    def diff(self, expected: "PaymentLedger", limit: int = 20) -> Tuple[int, List[Dict[str, Any]]]:
+        """Buckets whose totals differ from ``expected``: (count, first ``limit``)."""
+        mine, theirs = self.state(), expected.state()
+        mismatched = sorted(k for k in set(mine) | set(theirs) if mine.get(k) != theirs.get(k))
+        sample = [
+            {
+                "bucket": k,
+                "ledger": as_totals(mine[k][0] if k in mine else None),
+                "expected": as_totals(theirs[k][0] if k in theirs else None),
+            }
+            for k in mismatched[:limit]
+        ]
+        return len(mismatched), sample
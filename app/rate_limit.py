@@ -1,82 +1,227 @@
 # app/rate_limit.py
+#
+# Pure ASGI rate limiter using GCRA (a token bucket stored as one
+# "theoretical arrival time" per client). Each client, keyed by API key header
+# or client IP, may spend RATE_LIMIT_PER_MIN units per minute with bursts of up
+# to RATE_LIMIT_BURST; a request costs the weight of the first matching
+# RATE_LIMIT_ROUTE_COSTS fragment (default 1).
+#
+# State lives in a backend: an LRU-bounded in-process table by default, or a
+# SQLite file shared by every worker on the host with
+# RATE_LIMIT_BACKEND=sqlite:///path/to/file. The SQLite backend may wait on
+# other workers' locks, so it runs in a worker thread, never on the event loop.
+#
+# Add the middleware before CORSMiddleware so CORS wraps it: 429 responses
+# then carry CORS headers and preflights are answered without spending
+# tokens. OPTIONS requests are never limited either way.
 from __future__ import annotations
 
+import json
 import os
+import sqlite3
 import threading
 import time
-from typing import Dict
-
-from starlette.middleware.base import BaseHTTPMiddleware, RequestResponseEndpoint
-from starlette.requests import Request
-from starlette.responses import JSONResponse, Response
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Protocol, Tuple
 
 RATE_LIMIT_PER_MIN = int(os.getenv("RATE_LIMIT_PER_MIN", "120"))
 RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "200"))
 RATE_LIMIT_HEADER = os.getenv("RATE_LIMIT_HEADER", "x-api-key").lower()
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory").strip()
+
+# "fragment=cost" pairs; a request path containing the fragment costs that
+# many units. AI assist calls and checkout session creation are expensive.
+RATE_LIMIT_ROUTE_COSTS = os.getenv("RATE_LIMIT_ROUTE_COSTS", "/vendor/ai/=5,checkout=10")
+
+
+def _parse_route_costs(raw: str) -> List[Tuple[str, float]]:
+    costs: List[Tuple[str, float]] = []
+    for part in raw.split(","):
+        fragment, _, cost = part.partition("=")
+        fragment = fragment.strip()
+        if not fragment:
+            continue
+        try:
+            costs.append((fragment, max(0.0, float(cost))))
+        except ValueError:
+            continue
+    return costs
+
+
+class RateLimitBackend(Protocol):
+    def acquire(self, key: str, now: float, cost: float, interval: float, tolerance: float) -> Tuple[bool, float]:
+        """Spend ``cost`` units for ``key``; return (allowed, new or current TAT)."""
+
+
+def _gcra(tat: Optional[float], now: float, cost: float, interval: float, tolerance: float) -> Tuple[bool, float]:
+    base = now if tat is None or tat < now else tat
+    new_tat = base + cost * interval
+    if new_tat - now > tolerance:
+        return False, base
+    return True, new_tat
 
-print("[rate_limit] module imported")
 
+class MemoryBackend:
+    """Per-process table of TATs, evicting the least recently seen key past ``max_keys``.
 
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app):
-        super().__init__(app)
-        self._state: Dict[str, Dict[str, float | int]] = {}
-        self._lock = threading.Lock()
-        print("[rate_limit] RateLimitMiddleware __init__ called")
+    Only touched from the event loop thread, so it needs no lock.
+    """
 
-    def _key_for(self, request: Request) -> str:
-        api_key = request.headers.get(RATE_LIMIT_HEADER)
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max(1, int(max_keys))
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+    def acquire(self, key: str, now: float, cost: float, interval: float, tolerance: float) -> Tuple[bool, float]:
+        tats = self._tats
+        allowed, tat = _gcra(tats.get(key), now, cost, interval, tolerance)
+        tats[key] = tat
+        tats.move_to_end(key)
+        if len(tats) > self.max_keys:
+            tats.popitem(last=False)
+        return allowed, tat
+
+
+class SQLiteBackend:
+    """TATs in a SQLite file so every worker process on the host shares limits."""
+
+    _PRUNE_EVERY = 10_000
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        self._ops = 0
+        conn = self._connect()
+        conn.execute("CREATE TABLE IF NOT EXISTS rate_limit (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # Limiter state is disposable; skip fsync.
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def acquire(self, key: str, now: float, cost: float, interval: float, tolerance: float) -> Tuple[bool, float]:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tat FROM rate_limit WHERE key = ?", (key,)).fetchone()
+            allowed, tat = _gcra(row[0] if row else None, now, cost, interval, tolerance)
+            conn.execute(
+                "INSERT INTO rate_limit (key, tat) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                (key, tat),
+            )
+            self._ops += 1
+            if self._ops % self._PRUNE_EVERY == 0:
+                # A key whose TAT has passed is back to a full bucket.
+                conn.execute("DELETE FROM rate_limit WHERE tat < ?", (now,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return allowed, tat
+
+
+def backend_from_url(url: str) -> RateLimitBackend:
+    """``sqlite:///relative/path`` or ``sqlite:////absolute/path``; anything else is in-process."""
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):])
+    return MemoryBackend()
+
+
+def _header(scope: Dict[str, Any], name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers") or ():
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class RateLimitMiddleware:
+    def __init__(
+        self,
+        app,
+        *,
+        per_minute: int = RATE_LIMIT_PER_MIN,
+        burst: int = RATE_LIMIT_BURST,
+        backend: Optional[RateLimitBackend] = None,
+        route_costs: Optional[List[Tuple[str, float]]] = None,
+    ):
+        self.app = app
+        self.limit = max(1, int(per_minute))
+        self.burst = max(int(burst), self.limit)
+        self.interval = 60.0 / self.limit
+        self.tolerance = self.burst * self.interval
+        self.backend = backend if backend is not None else backend_from_url(RATE_LIMIT_BACKEND)
+        self.route_costs = route_costs if route_costs is not None else _parse_route_costs(RATE_LIMIT_ROUTE_COSTS)
+        self._header_name = RATE_LIMIT_HEADER.encode("latin-1")
+
+    def _key_for(self, scope: Dict[str, Any]) -> str:
+        api_key = _header(scope, self._header_name)
         if api_key:
             return f"api:{api_key}"
-        ip = request.client.host if request.client else "unknown"
-        return f"ip:{ip}"
-
-    async def dispatch(
-        self, request: Request, call_next: RequestResponseEndpoint
-    ) -> Response:
-        # PROOF the middleware is running:
-        # we'll always add X-RL-MW: on to responses.
+        client = scope.get("client")
+        return f"ip:{client[0] if client else 'unknown'}"
+
+    def _cost_for(self, path: str) -> float:
+        for fragment, cost in self.route_costs:
+            if fragment in path:
+                return cost
+        return 1.0
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope.get("method") == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
         now = time.time()
-        key = self._key_for(request)
-
-        with self._lock:
-            b = self._state.get(key)
-            if not b:
-                b = {"window_start": now, "count": 0}
-                self._state[key] = b
-
-            window_start = float(b["window_start"])
-            count = int(b["count"])
-
-            if now - window_start >= 60.0:
-                window_start, count = now, 0
-
-            limit = RATE_LIMIT_PER_MIN
-            burst = max(RATE_LIMIT_BURST, limit)
-            allowed = count < limit or count < burst
-
-            if not allowed:
-                resp = JSONResponse(
-                    status_code=429,
-                    content={"detail": "Rate limit exceeded. Try again later."},
-                )
-                resp.headers["Retry-After"] = str(max(1, 60 - int(now - window_start)))
-                resp.headers["X-RateLimit-Limit"] = str(limit)
-                resp.headers["X-RateLimit-Remaining"] = "0"
-                resp.headers["X-RL-MW"] = "on"
-                return resp
-
-            count += 1
-            b["window_start"] = window_start
-            b["count"] = count
-            remaining = max(0, limit - count)
-
-        resp = await call_next(request)
-        # Always tag the response so we can see it from clients
+        cost = self._cost_for(scope.get("path") or "")
+        args = (self._key_for(scope), now, cost, self.interval, self.tolerance)
         try:
-            resp.headers["X-RateLimit-Limit"] = str(RATE_LIMIT_PER_MIN)
-            resp.headers["X-RateLimit-Remaining"] = str(remaining)
-            resp.headers["X-RL-MW"] = "on"
-        except Exception:
-            pass
-        return resp
+            if isinstance(self.backend, MemoryBackend):
+                allowed, tat = self.backend.acquire(*args)
+            else:
+                import anyio.to_thread
+
+                allowed, tat = await anyio.to_thread.run_sync(self.backend.acquire, *args)
+        except Exception as exc:
+            # Never turn a limiter outage into an API outage.
+            print(f"[rate_limit] backend error, allowing request: {exc}")
+            await self.app(scope, receive, send)
+            return
+
+        remaining = max(0, int((self.tolerance - (tat - now)) / self.interval)) if allowed else 0
+        limit_headers = [
+            (b"x-ratelimit-limit", str(self.limit).encode()),
+            (b"x-ratelimit-remaining", str(remaining).encode()),
+        ]
+
+        if not allowed:
+            retry_after = max(1, int(tat + cost * self.interval - self.tolerance - now + 0.999))
+            body = json.dumps({"detail": "Rate limit exceeded. Try again later."}).encode()
+            await send({
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(retry_after).encode()),
+                    *limit_headers,
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        async def send_with_headers(message) -> None:
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), *limit_headers]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
@@ -0,0 +1,221 @@
+# app/response_cache.py
+#
+# Read-through cache for anonymous, read-heavy JSON endpoints. A cached
+# response is the rendered body plus a strong ETag, keyed by request path and
+# query string, held in an in-process LRU for RESPONSE_CACHE_TTL seconds.
+#
+# Routes tag their entries ("events", "event:12", "wall:12", ...) and the
+# mutation paths drop them with invalidate(); a route may also pass a cheap
+# version value that must match for an entry to be reused. Every response,
+# cached or not, carries the ETag and a matching If-None-Match gets a 304.
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE", "1").strip().lower() not in {"0", "false", "no", "off"}
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30") or 0)
+RESPONSE_CACHE_MAX_ENTRIES = max(1, int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2048") or 2048))
+# Browser/CDN freshness; clients revalidate with If-None-Match afterwards.
+RESPONSE_CACHE_MAX_AGE = max(0, int(os.getenv("RESPONSE_CACHE_MAX_AGE", "15") or 0))
+
+CacheKey = Tuple[str, Tuple[Tuple[str, str], ...]]
+
+_ENTRIES: "OrderedDict[CacheKey, Dict[str, Any]]" = OrderedDict()
+_KEYS_BY_TAG: Dict[str, Set[CacheKey]] = {}
+# Sequence number of the latest invalidation per tag, so a response built
+# while its data was being changed is not stored.
+_TAG_INVALIDATED_AT: Dict[str, int] = {}
+_CLEARED_AT = 0
+_SEQ = 0
+_LOCK = threading.Lock()
+
+_STATS: Dict[str, int] = {
+    "hits": 0,
+    "misses": 0,
+    "not_modified": 0,
+    "stores": 0,
+    "invalidations": 0,
+    "invalidated_entries": 0,
+    "evictions": 0,
+}
+
+
+def _request_key(request: Any) -> CacheKey:
+    params = tuple(sorted((str(k), str(v)) for k, v in request.query_params.multi_items()))
+    return request.url.path, params
+
+
+def _render(payload: Any) -> bytes:
+    # Same encoding as FastAPI's JSONResponse.
+    return json.dumps(
+        jsonable_encoder(payload),
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {part.strip().removeprefix("W/") for part in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+def _unlink(key: CacheKey, entry: Dict[str, Any]) -> None:
+    for tag in entry["tags"]:
+        keys = _KEYS_BY_TAG.get(tag)
+        if keys is None:
+            continue
+        keys.discard(key)
+        if not keys:
+            _KEYS_BY_TAG.pop(tag, None)
+
+
+def _lookup(key: CacheKey, version: Hashable, now: float) -> Optional[Dict[str, Any]]:
+    with _LOCK:
+        entry = _ENTRIES.get(key)
+        if entry is None:
+            return None
+        if entry["expires"] <= now or entry["version"] != version:
+            _ENTRIES.pop(key, None)
+            _unlink(key, entry)
+            return None
+        _ENTRIES.move_to_end(key)
+        return entry
+
+
+def _store(key: CacheKey, entry: Dict[str, Any], seq: int) -> None:
+    with _LOCK:
+        if _CLEARED_AT > seq or any(_TAG_INVALIDATED_AT.get(tag, 0) > seq for tag in entry["tags"]):
+            return
+        previous = _ENTRIES.pop(key, None)
+        if previous is not None:
+            _unlink(key, previous)
+        _ENTRIES[key] = entry
+        for tag in entry["tags"]:
+            _KEYS_BY_TAG.setdefault(tag, set()).add(key)
+        _STATS["stores"] += 1
+        while len(_ENTRIES) > RESPONSE_CACHE_MAX_ENTRIES:
+            old_key, old_entry = _ENTRIES.popitem(last=False)
+            _unlink(old_key, old_entry)
+            _STATS["evictions"] += 1
+
+
+def cached_json(
+    request: Any,
+    build: Callable[[], Any],
+    *,
+    tags: Iterable[str] = (),
+    version: Hashable = None,
+    ttl: Optional[float] = None,
+) -> Response:
+    """Serve ``build()`` as JSON through the cache.
+
+    ``build`` runs only on a miss; exceptions it raises (404s) propagate and
+    are never cached. ``version`` is compared on lookup, so routes can tie an
+    entry to a change counter they can read cheaply.
+    """
+    ttl = RESPONSE_CACHE_TTL if ttl is None else ttl
+    enabled = RESPONSE_CACHE_ENABLED and ttl > 0
+    key = _request_key(request)
+    now = time.monotonic()
+
+    entry = _lookup(key, version, now) if enabled else None
+    if entry is None:
+        with _LOCK:
+            _STATS["misses"] += 1
+            seq = _SEQ
+        body = _render(build())
+        entry = {
+            "body": body,
+            "etag": make_etag(body),
+            "tags": frozenset(tags),
+            "version": version,
+            "expires": now + ttl,
+        }
+        if enabled:
+            _store(key, entry, seq)
+    else:
+        with _LOCK:
+            _STATS["hits"] += 1
+
+    headers = {
+        "ETag": entry["etag"],
+        "Cache-Control": f"public, max-age={RESPONSE_CACHE_MAX_AGE}, must-revalidate",
+    }
+    if etag_matches(request.headers.get("if-none-match"), entry["etag"]):
+        with _LOCK:
+            _STATS["not_modified"] += 1
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry["body"], media_type="application/json", headers=headers)
+
+
+def invalidate(*tags: str) -> int:
+    """Drop every cached response carrying any of ``tags``; returns how many."""
+    global _SEQ
+
+    dropped = 0
+    with _LOCK:
+        _SEQ += 1
+        for tag in tags:
+            _TAG_INVALIDATED_AT[tag] = _SEQ
+            for key in list(_KEYS_BY_TAG.get(tag, ())):
+                entry = _ENTRIES.pop(key, None)
+                if entry is not None:
+                    _unlink(key, entry)
+                    dropped += 1
+        _STATS["invalidations"] += 1
+        _STATS["invalidated_entries"] += dropped
+    return dropped
+
+
+def invalidate_event(event_id: Any = None) -> int:
+    """Drop event listings and, when given, one event's detail responses."""
+    if event_id is None:
+        return clear()
+    try:
+        eid = int(event_id)
+    except Exception:
+        return invalidate("events")
+    return invalidate("events", f"event:{eid}")
+
+
+def clear() -> int:
+    global _SEQ, _CLEARED_AT
+
+    with _LOCK:
+        _SEQ += 1
+        _CLEARED_AT = _SEQ
+        dropped = len(_ENTRIES)
+        _ENTRIES.clear()
+        _KEYS_BY_TAG.clear()
+        _STATS["invalidations"] += 1
+        _STATS["invalidated_entries"] += dropped
+    return dropped
+
+
+def response_cache_stats() -> Dict[str, Any]:
+    with _LOCK:
+        stats: Dict[str, Any] = dict(_STATS)
+        stats["entries"] = len(_ENTRIES)
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_ratio"] = round(stats["hits"] / lookups, 4) if lookups else None
+    stats["enabled"] = RESPONSE_CACHE_ENABLED and RESPONSE_CACHE_TTL > 0
+    stats["ttl_seconds"] = RESPONSE_CACHE_TTL
+    stats["max_entries"] = RESPONSE_CACHE_MAX_ENTRIES
+    return stats
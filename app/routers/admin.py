@@ -14,8 +14,21 @@ from app.routers.auth import (
     list_all_users,
 )
 from app.db import get_db
+from app.email_outbox import email_outbox_stats
+from app.loop_lag import loop_lag_stats
 from app.models.profile import EventAlert, Profile
-from app.store import get_store_snapshot, load_store, save_store
+from app.payment_ledger import as_totals as as_ledger_totals
+from app.response_cache import response_cache_stats
+from app.store import (
+    get_store_snapshot,
+    payment_ledger,
+    payment_ledger_stats,
+    reconcile_payment_ledger,
+    reload_store_if_changed,
+    save_records,
+    store_write_stats,
+)
+from app.webhook_inbox import webhook_inbox_stats
 from app import store as store_module
 
 router = APIRouter(prefix="/admin", tags=["admin"])
@@ -101,7 +114,15 @@ def _row_identity_matches(row: Any, *, email: str, role: str = "", user_id: str
     return False
 
 
-def _delete_matching_from_dict(mapping: Any, *, email: str, role: str = "", user_id: str = "", keys: set[str] | None = None) -> int:
+def _delete_matching_from_dict(
+    mapping: Any,
+    *,
+    email: str,
+    role: str = "",
+    user_id: str = "",
+    keys: set[str] | None = None,
+    removed_keys: list | None = None,
+) -> int:
     if not isinstance(mapping, dict):
         return 0
 
@@ -115,6 +136,8 @@ def _delete_matching_from_dict(mapping: Any, *, email: str, role: str = "", user
         if remove:
             mapping.pop(key, None)
             removed += 1
+            if removed_keys is not None:
+                removed_keys.append(key)
     return removed
 
 
@@ -157,8 +180,10 @@ def _store_event_ids_for_owner(email: str, user_id: str) -> set[str]:
 
 
 def _delete_from_runtime_store(*, email: str, role: str, user_id: str, db_event_ids: set[str] | None = None) -> Dict[str, int]:
-    load_store()
+    reload_store_if_changed()
     removed: Dict[str, int] = {}
+    # Store keys removed per collection; only those records are persisted.
+    deleted: Dict[str, list] = {}
     event_ids = set(db_event_ids or set())
 
     if role == "organizer":
@@ -172,6 +197,7 @@ def _delete_from_runtime_store(*, email: str, role: str, user_id: str, db_event_
             role="vendor",
             user_id=user_id,
             keys={email},
+            removed_keys=deleted.setdefault("vendors", []),
         )
 
     reviews = getattr(store_module, "_REVIEWS", None)
@@ -182,6 +208,7 @@ def _delete_from_runtime_store(*, email: str, role: str, user_id: str, db_event_
             role="vendor",
             user_id=user_id,
             keys={email},
+            removed_keys=deleted.setdefault("reviews", []),
         )
 
     events = getattr(store_module, "_EVENTS", None)
@@ -192,6 +219,7 @@ def _delete_from_runtime_store(*, email: str, role: str, user_id: str, db_event_
             value_event_id = _safe_str(value.get("id")) if isinstance(value, dict) else ""
             if key_text in event_ids or value_event_id in event_ids or (isinstance(value, dict) and _row_identity_matches(value, email=email, role="organizer", user_id=user_id)):
                 events.pop(key, None)
+                deleted.setdefault("events", []).append(key)
                 removed_count += 1
         removed["events"] = removed_count
 
@@ -202,6 +230,7 @@ def _delete_from_runtime_store(*, email: str, role: str, user_id: str, db_event_
             event_id = _safe_str(value.get("event_id") or value.get("eventId")) if isinstance(value, dict) else ""
             if isinstance(value, dict) and (_row_identity_matches(value, email=email, role=role, user_id=user_id) or (event_id and event_id in event_ids)):
                 applications.pop(key, None)
+                deleted.setdefault("applications", []).append(key)
                 removed_count += 1
         removed["applications"] = removed_count
     elif isinstance(applications, list):
@@ -214,6 +243,7 @@ def _delete_from_runtime_store(*, email: str, role: str, user_id: str, db_event_
             event_id = _safe_str(value.get("event_id") or value.get("eventId")) if isinstance(value, dict) else ""
             if isinstance(value, dict) and (_row_identity_matches(value, email=email, role=role, user_id=user_id) or (event_id and event_id in event_ids)):
                 payments.pop(key, None)
+                deleted.setdefault("payments", []).append(key)
                 removed_count += 1
         removed["payments"] = removed_count
     elif isinstance(payments, list):
@@ -225,22 +255,31 @@ def _delete_from_runtime_store(*, email: str, role: str, user_id: str, db_event_
         for key in list(requirements.keys()):
             if _safe_str(key) in event_ids:
                 requirements.pop(key, None)
+                deleted.setdefault("requirements", []).append(key)
                 removed_count += 1
         removed["requirements"] = removed_count
 
     # Some older store snapshots keep these as dynamic globals. Handle them if present.
-    for attr_name, label in (
-        ("_VERIFICATIONS", "verification_records"),
-        ("_HOMEPAGE_FEATURES", "homepage_features"),
-        ("_WAITLIST", "waitlist_rows"),
+    for attr_name, label, collection in (
+        ("_VERIFICATIONS", "verification_records", "verifications"),
+        ("_HOMEPAGE_FEATURES", "homepage_features", None),
+        ("_WAITLIST", "waitlist_rows", None),
     ):
         obj = getattr(store_module, attr_name, None)
         if isinstance(obj, dict):
-            removed[label] = _delete_matching_from_dict(obj, email=email, role=role, user_id=user_id)
+            removed[label] = _delete_matching_from_dict(
+                obj,
+                email=email,
+                role=role,
+                user_id=user_id,
+                removed_keys=deleted.setdefault(collection, []) if collection else None,
+            )
         elif isinstance(obj, list):
             removed[label] = _delete_matching_from_list(obj, email=email, role=role, user_id=user_id, event_ids=event_ids)
 
-    save_store()
+    for collection, keys in deleted.items():
+        if keys:
+            save_records(collection, *keys)
     return {key: value for key, value in removed.items() if value}
 
 
@@ -439,8 +478,7 @@ def _cascade_delete_account_data(*, account: Dict[str, Any], db: Session) -> Dic
 
 
 @router.get("/dashboard")
-async def admin_dashboard(user: dict = Depends(require_admin)):
-    load_store()
+def admin_dashboard(user: dict = Depends(require_admin)):
     store = get_store_snapshot()
 
     accounts = list_all_users()
@@ -470,21 +508,7 @@ async def admin_dashboard(user: dict = Depends(require_admin)):
         a for a in verification_items if str(a.get("status") or "").lower() == "pending"
     ]
 
-    gross_sales = 0.0
-    platform_revenue = 0.0
-    organizer_payouts = 0.0
-
-    for p in payment_items:
-        if str(p.get("status", "")).lower() != "paid":
-            continue
-
-        amount = float(p.get("amount", 0) or 0)
-        fee = float(p.get("platform_fee", 0) or 0)
-        payout = float(p.get("organizer_payout", 0) or 0)
-
-        gross_sales += amount
-        platform_revenue += fee
-        organizer_payouts += payout
+    totals = as_ledger_totals(payment_ledger().totals())
 
     recent_payments = sorted(
         payment_items,
@@ -501,9 +525,9 @@ async def admin_dashboard(user: dict = Depends(require_admin)):
             "approved_awaiting_payment": len(approved_unpaid),
             "paid_applications": len(paid_apps),
             "pending_verifications": len(pending_items),
-            "gross_sales": round(gross_sales, 2),
-            "platform_revenue": round(platform_revenue, 2),
-            "organizer_payouts_owed": round(organizer_payouts, 2),
+            "gross_sales": totals["gross_sales"],
+            "platform_revenue": totals["platform_fees"],
+            "organizer_payouts_owed": totals["net_earnings"],
         },
         "recent_activity": [],
         "pending_verifications": pending_items[:5],
@@ -512,13 +536,13 @@ async def admin_dashboard(user: dict = Depends(require_admin)):
 
 
 @router.get("/accounts")
-async def admin_accounts(user: dict = Depends(require_admin)):
+def admin_accounts(user: dict = Depends(require_admin)):
     accounts = list_all_users()
     return {"accounts": accounts}
 
 
 @router.post("/accounts")
-async def admin_accounts_create(
+def admin_accounts_create(
     payload: AdminAccountCreateRequest,
     user: dict = Depends(require_admin),
 ):
@@ -562,7 +586,7 @@ def _resolve_admin_delete_account(user_key: str) -> Dict[str, Any]:
 
 
 @router.delete("/accounts/{user_key}")
-async def admin_accounts_delete(
+def admin_accounts_delete(
     user_key: str,
     user: dict = Depends(require_admin),
     db: Session = Depends(get_db),
@@ -589,8 +613,7 @@ async def admin_accounts_delete(
 
 
 @router.get("/payments")
-async def admin_payments(user: dict = Depends(require_admin)):
-    load_store()
+def admin_payments(user: dict = Depends(require_admin)):
     store = get_store_snapshot()
 
     payments = store.get("payments", {})
@@ -625,17 +648,15 @@ async def admin_payments(user: dict = Depends(require_admin)):
 
 
 @router.put("/payments/{payment_id}/mark-payout-paid")
-async def mark_payout_paid(payment_id: int, user: dict = Depends(require_admin)):
-    load_store()
-    store = get_store_snapshot()
+def mark_payout_paid(payment_id: int, user: dict = Depends(require_admin)):
+    reload_store_if_changed()
 
-    payments = store.get("payments", {})
-    payment = None
+    # Snapshots are read-only; update the live record and save it.
+    payments = store_module._PAYMENTS
+    payment = payments.get(payment_id) or payments.get(str(payment_id))
 
-    if isinstance(payments, dict):
-        payment = payments.get(str(payment_id)) or payments.get(payment_id)
-    elif isinstance(payments, list):
-        for p in payments:
+    if payment is None:
+        for p in payments.values():
             if not isinstance(p, dict):
                 continue
             if str(p.get("id")) == str(payment_id) or str(p.get("payment_id")) == str(payment_id):
@@ -648,7 +669,9 @@ async def mark_payout_paid(payment_id: int, user: dict = Depends(require_admin))
     payment["payout_status"] = "paid"
     payment["payout_sent_at"] = utc_now_iso()
 
-    save_store()
+    save_records("payments", payment.get("id") or payment_id)
+    # Payout state is money state: durable before we answer.
+    store_module.flush(sync=True)
 
     return {
         "ok": True,
@@ -656,3 +679,38 @@ async def mark_payout_paid(payment_id: int, user: dict = Depends(require_admin))
         "payout_status": payment["payout_status"],
         "payout_sent_at": payment["payout_sent_at"],
     }
+
+
+@router.get("/store/stats")
+def admin_store_stats(user: dict = Depends(require_admin)):
+    return store_write_stats()
+
+
+@router.get("/ledger")
+def admin_payment_ledger_stats(user: dict = Depends(require_admin)):
+    return payment_ledger_stats()
+
+
+@router.post("/ledger/reconcile")
+def admin_reconcile_payment_ledger(repair: bool = True, user: dict = Depends(require_admin)):
+    return reconcile_payment_ledger(repair=repair)
+
+
+@router.get("/email/outbox")
+def admin_email_outbox_stats(user: dict = Depends(require_admin)):
+    return email_outbox_stats()
+
+
+@router.get("/webhooks/inbox")
+def admin_webhook_inbox_stats(user: dict = Depends(require_admin)):
+    return webhook_inbox_stats()
+
+
+@router.get("/cache/responses")
+def admin_response_cache_stats(user: dict = Depends(require_admin)):
+    return response_cache_stats()
+
+
+@router.get("/runtime/loop-lag")
+def admin_loop_lag_stats(user: dict = Depends(require_admin)):
+    return loop_lag_stats()
@@ -4,14 +4,21 @@ from __future__ import annotations
 
 import os
 import re
+import threading
 import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
  
 
 from fastapi import APIRouter, Body, Header, HTTPException, Request, Depends
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 
+from app import response_cache, webhook_inbox
+
 try:
     from jose import jwt  # type: ignore
 except Exception:
@@ -52,6 +59,14 @@ except Exception:
         def save_store() -> None:
             return None
 
+        @staticmethod
+        def save_records(name: str, *keys: Any) -> None:
+            return None
+
+        @staticmethod
+        def flush(sync: bool = True) -> None:
+            return None
+
     store = _FallbackStore()  # type: ignore
 
 
@@ -118,11 +133,7 @@ def _row_to_event_dict(row: Any) -> Dict[str, Any]:
     return payload
 
 
-def _get_event_from_postgres(event_id: Any) -> Optional[Dict[str, Any]]:
-    try:
-        eid = int(event_id)
-    except Exception:
-        return None
+def _load_event_from_postgres(eid: int) -> Optional[Dict[str, Any]]:
     db = _db_session_or_none()
     if db is None:
         return None
@@ -140,11 +151,7 @@ def _get_event_from_postgres(event_id: Any) -> Optional[Dict[str, Any]]:
             pass
 
 
-def _get_diagram_from_postgres(event_id: Any) -> Optional[Dict[str, Any]]:
-    try:
-        eid = int(event_id)
-    except Exception:
-        return None
+def _load_diagram_from_postgres(eid: int) -> Optional[Dict[str, Any]]:
     db = _db_session_or_none()
     if db is None:
         return None
@@ -158,18 +165,199 @@ def _get_diagram_from_postgres(event_id: Any) -> Optional[Dict[str, Any]]:
         )
         if not row:
             return None
-        diagram = getattr(row, "diagram", None)
-        if isinstance(diagram, dict):
-            return {"diagram": diagram, "version": int(getattr(row, "version", 0) or 0)}
+        return _row_to_diagram_dict(row)
+    except Exception:
         return None
+    finally:
+        try:
+            db.close()
+        except Exception:
+            pass
+
+
+def _row_to_diagram_dict(row: Any) -> Optional[Dict[str, Any]]:
+    diagram = getattr(row, "diagram", None)
+    if isinstance(diagram, dict):
+        return {
+            "diagram": diagram,
+            "version": int(getattr(row, "version", 0) or 0),
+            # Server-side: a save either updates this row or inserts a newer one.
+            "revision": (getattr(row, "id", None), str(getattr(row, "updated_at", None) or "")),
+        }
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Event / diagram resolution cache
+# ---------------------------------------------------------------------------
+#
+# Serializing one application resolves its event and diagram several times
+# (booth category, booth price, requirement status). Inside a resolution
+# scope each event id hits Postgres at most once. The process-level cache is
+# off unless APPLICATION_RESOLUTION_CACHE_TTL (seconds) is set; entries are
+# dropped by invalidate_event_resolution() when an event or diagram is saved.
+
+APPLICATION_RESOLUTION_CACHE_TTL = float(os.getenv("APPLICATION_RESOLUTION_CACHE_TTL", "0") or 0)
+APPLICATION_RESOLUTION_CACHE_SIZE = max(1, int(os.getenv("APPLICATION_RESOLUTION_CACHE_SIZE", "512") or 512))
+
+_RESOLUTION_SCOPE: ContextVar[Optional[Dict[Tuple[str, int], Any]]] = ContextVar(
+    "application_resolution_scope", default=None
+)
+_RESOLUTION_CACHE: "OrderedDict[Tuple[str, int], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+_RESOLUTION_CACHE_LOCK = threading.Lock()
+
+# Compiled booth lookups, one per event, reused while the map's server-side
+# revision is unchanged; see BoothIndex and _booth_map_revision().
+_BOOTH_INDEX_CACHE_SIZE = 256
+_BOOTH_INDEXES: "OrderedDict[int, BoothIndex]" = OrderedDict()
+_BOOTH_INDEX_LOCK = threading.Lock()
+
+
+@contextmanager
+def _resolution_scope() -> Iterator[None]:
+    """Share event/diagram lookups until the outermost scope exits."""
+    if _RESOLUTION_SCOPE.get() is not None:
+        yield
+        return
+    token = _RESOLUTION_SCOPE.set({})
+    try:
+        yield
+    finally:
+        _RESOLUTION_SCOPE.reset(token)
+
+
+def _resolution_cache_get(key: Tuple[str, int]) -> Optional[Dict[str, Any]]:
+    if APPLICATION_RESOLUTION_CACHE_TTL <= 0:
+        return None
+    with _RESOLUTION_CACHE_LOCK:
+        entry = _RESOLUTION_CACHE.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            _RESOLUTION_CACHE.pop(key, None)
+            return None
+        _RESOLUTION_CACHE.move_to_end(key)
+        return entry[1]
+
+
+def _resolution_cache_put(key: Tuple[str, int], value: Optional[Dict[str, Any]]) -> None:
+    # Misses are not cached process-wide so a newly created event or
+    # diagram shows up on the next request.
+    if APPLICATION_RESOLUTION_CACHE_TTL <= 0 or not isinstance(value, dict):
+        return
+    with _RESOLUTION_CACHE_LOCK:
+        _RESOLUTION_CACHE[key] = (time.monotonic() + APPLICATION_RESOLUTION_CACHE_TTL, value)
+        _RESOLUTION_CACHE.move_to_end(key)
+        while len(_RESOLUTION_CACHE) > APPLICATION_RESOLUTION_CACHE_SIZE:
+            _RESOLUTION_CACHE.popitem(last=False)
+
+
+def invalidate_event_resolution(event_id: Any = None) -> None:
+    """Forget cached event and diagram rows (all events when omitted)."""
+    with _RESOLUTION_CACHE_LOCK:
+        if event_id is None:
+            _RESOLUTION_CACHE.clear()
+        else:
+            try:
+                eid = int(event_id)
+            except Exception:
+                return
+            _RESOLUTION_CACHE.pop(("event", eid), None)
+            _RESOLUTION_CACHE.pop(("diagram", eid), None)
+    with _BOOTH_INDEX_LOCK:
+        if event_id is None:
+            _BOOTH_INDEXES.clear()
+        else:
+            _BOOTH_INDEXES.pop(eid, None)
+    scope = _RESOLUTION_SCOPE.get()
+    if scope is not None:
+        scope.clear()
+
+
+def _resolve_cached(kind: str, event_id: Any, loader) -> Optional[Dict[str, Any]]:
+    try:
+        eid = int(event_id)
     except Exception:
         return None
+    key = (kind, eid)
+    scope = _RESOLUTION_SCOPE.get()
+    if scope is not None and key in scope:
+        return scope[key]
+    value = _resolution_cache_get(key)
+    if value is None:
+        value = loader(eid)
+        _resolution_cache_put(key, value)
+    if scope is not None:
+        scope[key] = value
+    return value
+
+
+def _get_event_from_postgres(event_id: Any) -> Optional[Dict[str, Any]]:
+    return _resolve_cached("event", event_id, _load_event_from_postgres)
+
+
+def _get_diagram_from_postgres(event_id: Any) -> Optional[Dict[str, Any]]:
+    return _resolve_cached("diagram", event_id, _load_diagram_from_postgres)
+
+
+def _prime_resolution_scope(apps: Iterable[Dict[str, Any]]) -> None:
+    """Batch-load events and latest diagrams for apps into the current scope.
+
+    One query for the events and one for their newest diagrams, instead of
+    two per application. No-op outside a resolution scope.
+    """
+    scope = _RESOLUTION_SCOPE.get()
+    if scope is None:
+        return
+    event_ids = set()
+    for app in apps:
+        if not isinstance(app, dict):
+            continue
+        eid = _event_id_from_app(app)
+        if eid is None or ("event", eid) in scope:
+            continue
+        cached_event = _resolution_cache_get(("event", eid))
+        cached_diagram = _resolution_cache_get(("diagram", eid))
+        if cached_event is not None and cached_diagram is not None:
+            scope[("event", eid)] = cached_event
+            scope[("diagram", eid)] = cached_diagram
+            continue
+        event_ids.add(eid)
+    if not event_ids:
+        return
+
+    db = _db_session_or_none()
+    if db is None:
+        return
+    try:
+        from sqlalchemy import func  # type: ignore
+        from app.models.diagram import Diagram  # type: ignore
+        from app.models.event import Event  # type: ignore
+
+        ids = sorted(event_ids)
+        events = {row.id: _row_to_event_dict(row) or None for row in db.query(Event).filter(Event.id.in_(ids)).all()}
+        latest_ids = (
+            db.query(func.max(Diagram.id))
+            .filter(Diagram.event_id.in_(ids))
+            .group_by(Diagram.event_id)
+        )
+        diagrams = {row.event_id: _row_to_diagram_dict(row) for row in db.query(Diagram).filter(Diagram.id.in_(latest_ids)).all()}
+    except Exception:
+        return
     finally:
         try:
             db.close()
         except Exception:
             pass
 
+    for eid in event_ids:
+        event = events.get(eid)
+        diagram = diagrams.get(eid)
+        scope[("event", eid)] = event
+        scope[("diagram", eid)] = diagram
+        _resolution_cache_put(("event", eid), event)
+        _resolution_cache_put(("diagram", eid), diagram)
+
 try:
     from app.routers.verifications import get_vendor_doc_vault  # type: ignore
 except Exception:
@@ -194,14 +382,77 @@ def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def _save_store() -> None:
-    store.save_store()
+def _save_store(*apps: Dict[str, Any]) -> None:
+    """Persist the given application records, and only those.
+
+    Records are addressed by their id; one without an id is located by its
+    store key instead.
+    """
+    keys: List[Any] = []
+    for app in apps:
+        if not isinstance(app, dict):
+            continue
+        app_id = _normalize_id(app.get("id"))
+        if app_id:
+            keys.append(app_id)
+        else:
+            keys.extend(key for key, value in _APPLICATIONS.items() if value is app)
+    _save_records("applications", *keys)
+
+
+def _save_records(name: str, *keys: Any) -> None:
+    if not keys:
+        return
+    save_records = getattr(store, "save_records", None)
+    if not callable(save_records):
+        store.save_store()
+        response_cache.invalidate_event()
+        return
+    save_records(name, *keys)
+    if name == "applications":
+        _invalidate_public_responses(*keys)
+
+
+def _invalidate_public_responses(*app_ids: Any) -> None:
+    """Drop cached public event pages whose booth/vendor data these applications feed."""
+    get_application = getattr(store, "get_application", None)
+    event_ids = set()
+    for app_id in app_ids:
+        app = get_application(app_id) if callable(get_application) else _APPLICATIONS.get(app_id)
+        event_id = _event_id_from_app(app) if isinstance(app, dict) else None
+        if event_id is None:
+            response_cache.invalidate("events")
+            continue
+        event_ids.add(event_id)
+    for event_id in event_ids:
+        response_cache.invalidate_event(event_id)
+
+
+def _flush_store() -> None:
+    """Block until pending write-behind saves are durable (payment paths)."""
+    flush = getattr(store, "flush", None)
+    if callable(flush):
+        flush(sync=True)
 
 
 def _applications_store() -> Dict[Any, Dict[str, Any]]:
     return store._APPLICATIONS
 
 
+def _vendor_applications(vendor_id: Any, vendor_email: Any) -> List[Dict[str, Any]]:
+    lookup = getattr(store, "applications_for_vendor", None)
+    if callable(lookup):
+        return _iter_dict_values(lookup(vendor_email, vendor_id))
+    return _iter_dict_values(_applications_store())
+
+
+def _event_applications(event_id: Any) -> List[Dict[str, Any]]:
+    lookup = getattr(store, "applications_for_event", None)
+    if callable(lookup):
+        return _iter_dict_values(lookup(event_id))
+    return _iter_dict_values(_applications_store())
+
+
 def _events_store() -> Dict[Any, Dict[str, Any]]:
     return store._EVENTS
 
@@ -938,6 +1189,13 @@ def _get_application_or_404(app_id: Any) -> Dict[str, Any]:
     if not key:
         raise HTTPException(status_code=404, detail="Application not found")
 
+    lookup = getattr(store, "get_application", None)
+    if callable(lookup):
+        app = lookup(key)
+        if isinstance(app, dict):
+            return app
+        raise HTTPException(status_code=404, detail="Application not found")
+
     for stored_key, app in _applications_store().items():
         if _normalize_id(stored_key) == key:
             return app
@@ -1204,6 +1462,136 @@ def _extract_booths_from_diagram(diagram: Optional[Dict[str, Any]]) -> List[Dict
     return deduped
 
 
+def _booth_category_for_price_match(booth: Dict[str, Any]) -> str:
+    meta = booth.get("meta") if isinstance(booth.get("meta"), dict) else {}
+    return _as_str(
+        booth.get("category")
+        or booth.get("booth_category")
+        or booth.get("category_name")
+        or booth.get("categoryName")
+        or booth.get("category_label")
+        or booth.get("categoryLabel")
+        or booth.get("vendor_category")
+        or booth.get("vendorCategory")
+        or meta.get("category")
+        or meta.get("booth_category")
+        or meta.get("categoryName")
+    ).lower()
+
+
+class BoothIndex:
+    """Booth price and category lookups for one event map.
+
+    Diagram booths come first, then booths embedded in the event row, as in
+    the linear scans this replaces. For every match value (label, number,
+    internal id) the index keeps the position of the first booth that has a
+    price and of the first that has a useful category, so a set of
+    candidates resolves to the same booth a scan in map order would find.
+    """
+
+    __slots__ = (
+        "event_id",
+        "revision",
+        "_prices",
+        "_categories",
+        "_price_pos",
+        "_category_pos",
+        "_price_by_category",
+    )
+
+    def __init__(
+        self,
+        event_id: Optional[int],
+        revision: Any,
+        diagram: Optional[Dict[str, Any]],
+        event: Optional[Dict[str, Any]],
+    ) -> None:
+        self.event_id = event_id
+        self.revision = revision
+        self._prices: List[Optional[int]] = []
+        self._categories: List[str] = []
+        self._price_pos: Dict[str, int] = {}
+        self._category_pos: Dict[str, int] = {}
+        self._price_by_category: Dict[str, int] = {}
+
+        booths = _extract_booths_from_diagram(diagram)
+        if isinstance(event, dict):
+            booths.extend(_extract_booths_from_event(event))
+
+        for pos, booth in enumerate(booths):
+            cents = _booth_price_cents_from_record_for_save(booth)
+            category = _booth_category_from_record_for_save(booth)
+            self._prices.append(cents)
+            self._categories.append(category)
+            if not cents and not category:
+                continue
+            for value in _booth_match_values(booth):
+                if cents:
+                    self._price_pos.setdefault(value, pos)
+                if category:
+                    self._category_pos.setdefault(value, pos)
+            if cents:
+                match_category = _booth_category_for_price_match(booth)
+                if match_category:
+                    self._price_by_category.setdefault(match_category, cents)
+
+    @staticmethod
+    def _first_position(positions: Dict[str, int], values: Iterable[str]) -> Optional[int]:
+        best: Optional[int] = None
+        for value in values:
+            pos = positions.get(value)
+            if pos is not None and (best is None or pos < best):
+                best = pos
+        return best
+
+    def price_for(self, values: Iterable[str]) -> Optional[int]:
+        pos = self._first_position(self._price_pos, values)
+        return self._prices[pos] if pos is not None else None
+
+    def category_for(self, values: Iterable[str]) -> Optional[str]:
+        pos = self._first_position(self._category_pos, values)
+        return self._categories[pos] if pos is not None else None
+
+    def price_for_category(self, category: str) -> Optional[int]:
+        return self._price_by_category.get(category)
+
+
+def _booth_map_revision(diagram: Optional[Dict[str, Any]]) -> Optional[Tuple[Any, ...]]:
+    """Server-side revision of the rows an event's BoothIndex is built from.
+
+    Postgres diagrams carry their row id and updated_at; the client-supplied
+    version is not bumped on every save. Store diagrams and store events
+    (Postgres event rows hold no booths) follow their collection's change
+    counter. None when the store has no such counter.
+    """
+    generation = getattr(store, "collection_generation", None)
+    if not callable(generation):
+        return None
+    diagram_revision = diagram.get("revision") if isinstance(diagram, dict) else None
+    return (diagram_revision, generation("diagrams"), generation("events"))
+
+
+def _booth_index_for_app(app: Dict[str, Any]) -> BoothIndex:
+    diagram = _get_diagram_for_event(app)
+    event = _get_event_for_app(app)
+    event_id = _event_id_from_app(app)
+    revision = _booth_map_revision(diagram)
+    if event_id is None or revision is None:
+        return BoothIndex(event_id, revision, diagram, event)
+
+    with _BOOTH_INDEX_LOCK:
+        index = _BOOTH_INDEXES.get(event_id)
+        if index is not None and index.revision == revision:
+            _BOOTH_INDEXES.move_to_end(event_id)
+            return index
+
+    index = BoothIndex(event_id, revision, diagram, event)
+    with _BOOTH_INDEX_LOCK:
+        _BOOTH_INDEXES[event_id] = index
+        _BOOTH_INDEXES.move_to_end(event_id)
+        while len(_BOOTH_INDEXES) > _BOOTH_INDEX_CACHE_SIZE:
+            _BOOTH_INDEXES.popitem(last=False)
+    return index
 
 
 def _find_event_booth_category(app: Dict[str, Any]) -> Optional[str]:
@@ -1225,46 +1613,19 @@ def _find_event_booth_category(app: Dict[str, Any]) -> Optional[str]:
     if not human_candidates and not internal_candidates:
         return None
 
-    diagram = _get_diagram_for_event(app)
-    event = _get_event_for_app(app)
-    booths = _extract_booths_from_diagram(diagram)
-    if isinstance(event, dict):
-        booths.extend(_extract_booths_from_event(event))
-
-    def category_from_booth(booth: Dict[str, Any]) -> str:
-        category = _booth_category_from_record_for_save(booth)
-        return category if _is_useful_category(category) else ""
+    index = _booth_index_for_app(app)
 
     # Human-facing labels/numbers win first. This keeps Booth 6 from matching
     # the wrong booth solely because another booth shares a category/default.
     if human_candidates:
-        for booth in booths:
-            if not isinstance(booth, dict):
-                continue
-            booth_values = _booth_match_values(booth)
-            if human_candidates.intersection(booth_values):
-                category = category_from_booth(booth)
-                if category:
-                    return category
-
         # A human booth was selected, but the map did not contain a matching
         # label. Do not fall through to loose/category-only matching here; that
         # is how the app drifted back to General or another booth category.
-        return None
+        return index.category_for(human_candidates)
 
     # Generated canvas ids are valid only as an internal lookup fallback when no
     # human label is available. They should never replace booth_id for display.
-    if internal_candidates:
-        for booth in booths:
-            if not isinstance(booth, dict):
-                continue
-            booth_values = _booth_match_values(booth)
-            if internal_candidates.intersection(booth_values):
-                category = category_from_booth(booth)
-                if category:
-                    return category
-
-    return None
+    return index.category_for(internal_candidates)
 
 
 def _persist_booth_category(app: Dict[str, Any]) -> Optional[str]:
@@ -1307,82 +1668,28 @@ def _find_event_booth_price_cents(app: Dict[str, Any]) -> Optional[int]:
         or app.get("category")
     ).lower()
 
+    index = _booth_index_for_app(app)
     event = _get_event_for_app(app)
-    diagram = _get_diagram_for_event(app)
-
-    def booth_price(booth: Dict[str, Any]) -> Optional[int]:
-        meta = booth.get("meta") if isinstance(booth.get("meta"), dict) else {}
-        for source in (booth, meta):
-            for key in (
-                "price_cents",
-                "priceCents",
-                "amount_cents",
-                "amountCents",
-                "booth_price_cents",
-                "boothPriceCents",
-                "price",
-                "amount",
-                "booth_price",
-                "boothPrice",
-            ):
-                cents = _price_to_cents(source.get(key))
-                if cents:
-                    return cents
-        return None
-
-    def booth_category(booth: Dict[str, Any]) -> str:
-        meta = booth.get("meta") if isinstance(booth.get("meta"), dict) else {}
-        return _as_str(
-            booth.get("category")
-            or booth.get("booth_category")
-            or booth.get("category_name")
-            or booth.get("categoryName")
-            or booth.get("category_label")
-            or booth.get("categoryLabel")
-            or booth.get("vendor_category")
-            or booth.get("vendorCategory")
-            or meta.get("category")
-            or meta.get("booth_category")
-            or meta.get("categoryName")
-        ).lower()
-
-    diagram_booths = _extract_booths_from_diagram(diagram)
-    event_booths = _extract_booths_from_event(event) if isinstance(event, dict) else []
-    all_booths = diagram_booths + event_booths
 
     human_candidates = _human_booth_candidates_from_app(app)
     internal_candidates = _internal_booth_candidates_from_app(app)
 
     # 1) Exact human label/number match. "Booth 6" also matches "6".
     if human_candidates:
-        for booth in all_booths:
-            if human_candidates & _booth_match_values(booth):
-                cents = booth_price(booth)
-                if cents:
-                    return cents
-
         # A human booth was selected but no exact map match was found. Do NOT
         # fall through to category matching, because that is how Booth 6 became
         # A2/$150. Let explicit saved payload cents win instead.
-        return None
+        return index.price_for(human_candidates)
 
     # 2) Internal generated canvas id only when no human label is available.
     if internal_candidates:
-        for booth in all_booths:
-            if internal_candidates & _booth_match_values(booth):
-                cents = booth_price(booth)
-                if cents:
-                    return cents
-        return None
+        return index.price_for(internal_candidates)
 
     # 3) Category fallback only for category-only flows with no booth selected.
     if selected_category:
-        for booth in all_booths:
-            category = booth_category(booth)
-            if category and category == selected_category:
-                cents = booth_price(booth)
-                if cents:
-                    return cents
+        cents = index.price_for_category(selected_category)
+        if cents:
+            return cents
 
     if isinstance(event, dict):
         for root_key in ("payment_settings", "paymentSettings"):
@@ -2123,6 +2430,11 @@ def _normalize_service_quote_payload(raw: Any, payload: Optional[Dict[str, Any]]
 
 
 def _serialize_application(app: Dict[str, Any]) -> Dict[str, Any]:
+    with _resolution_scope():
+        return _serialize_application_in_scope(app)
+
+
+def _serialize_application_in_scope(app: Dict[str, Any]) -> Dict[str, Any]:
     category = _persist_booth_category(app)
     cents = _persist_resolved_booth_price(app)
     booth_price = round(cents / 100, 2) if cents else None
@@ -2369,7 +2681,7 @@ def _create_payment_record(
     }
 
     _payments_store()[payment_id] = record
-    _save_store()
+    _save_records("payments", payment_id)
     return record
 
 
@@ -2397,7 +2709,8 @@ def _mark_application_paid(
     if not _payment_exists_for_application(normalized_app_id):
         _create_payment_record(app, amount, source=source, session_id=session_id)
 
-    _save_store()
+    _save_store(app)
+    _flush_store()
     return app
 
 
@@ -2418,7 +2731,7 @@ def _get_frontend_base_url() -> str:
 
 def expire_reservations_if_needed() -> int:
     now_ts = time.time()
-    expired_count = 0
+    expired: List[Dict[str, Any]] = []
 
     for app in _iter_dict_values(_applications_store()):
         expires_at = app.get("reservation_expires_at")
@@ -2443,12 +2756,12 @@ def expire_reservations_if_needed() -> int:
         if status in {"approved", "reserved", "pending_payment"}:
             app["status"] = "expired"
 
-        expired_count += 1
+        expired.append(app)
 
-    if expired_count:
-        _save_store()
+    if expired:
+        _save_store(*expired)
 
-    return expired_count
+    return len(expired)
 
 
 def _message_user_role(user: Dict[str, Any]) -> str:
@@ -2610,7 +2923,7 @@ def post_application_message(
 
     existing.append(message)
     app["updated_at"] = _now_iso()
-    _save_store()
+    _save_store(app)
     return {"ok": True, "message": message, "messages": existing}
 
 
@@ -2625,42 +2938,45 @@ def list_vendor_applications(authorization: Optional[str] = Header(default=None)
         return []
 
     filtered_apps: List[Dict[str, Any]] = []
+    candidates = _vendor_applications(vendor_id, vendor_email)
 
-    for app in _iter_dict_values(_applications_store()):
-        try:
-            if app.get("archived") is True:
-                continue
-
-            app_vendor_id = _normalize_id(
-                app.get("vendor_id") or app.get("vendorId") or app.get("user_id") or app.get("userId")
-            )
-            app_vendor_email = _as_str(app.get("vendor_email")).lower()
-
-            matches_vendor = False
-            if vendor_id and app_vendor_id and app_vendor_id == vendor_id:
-                matches_vendor = True
-            elif vendor_email and app_vendor_email and app_vendor_email == vendor_email:
-                matches_vendor = True
+    with _resolution_scope():
+        _prime_resolution_scope(candidates)
+        for app in candidates:
+            try:
+                if app.get("archived") is True:
+                    continue
 
-            if not matches_vendor:
-                continue
+                app_vendor_id = _normalize_id(
+                    app.get("vendor_id") or app.get("vendorId") or app.get("user_id") or app.get("userId")
+                )
+                app_vendor_email = _as_str(app.get("vendor_email")).lower()
 
-            serialized = _serialize_application(app)
+                matches_vendor = False
+                if vendor_id and app_vendor_id and app_vendor_id == vendor_id:
+                    matches_vendor = True
+                elif vendor_email and app_vendor_email and app_vendor_email == vendor_email:
+                    matches_vendor = True
 
-            if not serialized.get("event_id"):
-                fallback_event_id = (
-                    app.get("event_id")
-                    or app.get("eventId")
-                    or app.get("event")
-                    or app.get("eventID")
-                )
-                if fallback_event_id is not None:
-                    serialized["event_id"] = fallback_event_id
+                if not matches_vendor:
+                    continue
 
-            filtered_apps.append(serialized)
-        except Exception as e:
-            print("Skipping bad application record:", e)
-            continue
+                serialized = _serialize_application(app)
+
+                if not serialized.get("event_id"):
+                    fallback_event_id = (
+                        app.get("event_id")
+                        or app.get("eventId")
+                        or app.get("event")
+                        or app.get("eventID")
+                    )
+                    if fallback_event_id is not None:
+                        serialized["event_id"] = fallback_event_id
+
+                filtered_apps.append(serialized)
+            except Exception as e:
+                print("Skipping bad application record:", e)
+                continue
 
     return filtered_apps
 
@@ -2754,7 +3070,7 @@ def vendor_update_application(app_id: str, payload: Dict[str, Any] = Body(...))
     app["progress_percent"] = requirement_status["progress_percent"]
 
     app["updated_at"] = _now_iso()
-    _save_store()
+    _save_store(app)
     return {"ok": True, "application": _serialize_application(app)}
 
 
@@ -2816,7 +3132,7 @@ def vendor_submit_application(app_id: str) -> Dict[str, Any]:
     if cents:
         app["booth_price"] = round(cents / 100, 2)
 
-    _save_store()
+    _save_store(app)
     return {"ok": True, "application": _serialize_application(app)}
 
 
@@ -2922,7 +3238,7 @@ def vendor_pay_now(app_id: str) -> Dict[str, Any]:
     app["checkout_organizer_payout_cents"] = int(organizer_payout_cents)
     if organizer_stripe_account_id:
         app["checkout_organizer_stripe_account_id"] = organizer_stripe_account_id
-    _save_store()
+    _save_store(app)
 
     return {
         "ok": True,
@@ -2995,7 +3311,7 @@ def create_vendor_application(
                 app["booth_price"] = round(app["resolved_price_cents"] / 100, 2)
             _merge_vendor_doc_vault(app)
             app["updated_at"] = _now_iso()
-            _save_store()
+            _save_store(app)
             return {"ok": True, "application": _serialize_application(app)}
 
     new_id = str(int(time.time() * 1000))
@@ -3048,8 +3364,10 @@ def create_vendor_application(
 
     _merge_vendor_doc_vault(app)
 
-    _applications_store()[new_id] = app
-    _save_store()
+    # Snapshots reload application keys as ints; insert the same way so a
+    # record has one key type before and after a restart.
+    _applications_store()[int(new_id)] = app
+    _save_store(app)
     return {"ok": True, "application": _serialize_application(app)}
 
 
@@ -3074,8 +3392,13 @@ async def stripe_webhook(request: Request) -> Dict[str, Any]:
     if not sig_header:
         raise HTTPException(status_code=400, detail="Missing stripe-signature header")
 
+    # Spooling the event is a durable SQLite write; keep it off the event loop.
+    return await run_in_threadpool(_receive_stripe_webhook, stripe, payload, sig_header, webhook_secret)
+
+
+def _receive_stripe_webhook(stripe: Any, payload: bytes, sig_header: str, webhook_secret: str) -> Dict[str, Any]:
     try:
-        event = stripe.Webhook.construct_event(
+        stripe.Webhook.construct_event(
             payload=payload,
             sig_header=sig_header,
             secret=webhook_secret,
@@ -3083,6 +3406,24 @@ async def stripe_webhook(request: Request) -> Dict[str, Any]:
     except Exception as exc:
         raise HTTPException(status_code=400, detail=f"Invalid webhook: {exc}")
 
+    # Applied by the webhook inbox workers (_process_stripe_event).
+    return {"ok": True, **webhook_inbox.ingest("applications", payload)}
+
+
+def _process_stripe_event(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply one verified Stripe event from the webhook inbox.
+
+    Exceptions propagate so the inbox retries the event.
+    """
+    secret_key = _as_str(os.getenv("STRIPE_SECRET_KEY"))
+    if not secret_key:
+        raise RuntimeError("Missing STRIPE_SECRET_KEY")
+
+    import stripe  # type: ignore
+
+    stripe.api_key = secret_key
+    event = stripe.Event.construct_from(payload, secret_key)
+
     etype = str(event["type"]).strip()
     data_obj = event["data"]["object"]
 
@@ -3144,6 +3485,9 @@ async def stripe_webhook(request: Request) -> Dict[str, Any]:
     return {"ok": True, "ignored": etype}
 
 
+webhook_inbox.register_handler("applications", _process_stripe_event)
+
+
 @router.post("/organizer/applications/{app_id}/reserve-booth")
 def organizer_reserve_booth(
     app_id: str,
@@ -3164,7 +3508,7 @@ def organizer_reserve_booth(
         tz=timezone.utc,
     ).isoformat()
     _persist_resolved_booth_price(app)
-    _save_store()
+    _save_store(app)
     return {"ok": True, "application": _serialize_application(app)}
 
 
@@ -3182,7 +3526,7 @@ def organizer_change_booth(
     if not category:
         raise HTTPException(status_code=400, detail="Booth category could not be determined")
     _persist_resolved_booth_price(app)
-    _save_store()
+    _save_store(app)
     return {"ok": True, "application": _serialize_application(app)}
 
 
@@ -3207,7 +3551,7 @@ def organizer_extend_reservation(
         base_ts + minutes * 60,
         tz=timezone.utc,
     ).isoformat()
-    _save_store()
+    _save_store(app)
     return {"ok": True, "application": _serialize_application(app)}
 
 
@@ -3216,7 +3560,7 @@ def organizer_release_reservation(app_id: str) -> Dict[str, Any]:
     app = _get_application_or_404(app_id)
     app.pop("reservation_expires_at", None)
     app.pop("booth_id", None)
-    _save_store()
+    _save_store(app)
     return {"ok": True, "application": _serialize_application(app)}
 
 
@@ -3274,7 +3618,7 @@ def organizer_request_document(
         },
     )
 
-    _save_store()
+    _save_store(app)
 
     return {
         "ok": True,
@@ -3349,7 +3693,7 @@ def vendor_upload_requested_document(
         },
     )
 
-    _save_store()
+    _save_store(app)
 
     return {"ok": True, "application": _serialize_application(app)}
 
@@ -3379,38 +3723,39 @@ def organizer_list_applications(event_id: str) -> Dict[str, Any]:
 
     event_id_str = str(event_id)
     apps = []
-    for app in _iter_dict_values(_applications_store()):
-        if app.get("archived") is True:
-            continue
+    with _resolution_scope():
+        for app in _event_applications(event_id_str):
+            if app.get("archived") is True:
+                continue
 
-        aid = _normalize_id(app.get("event_id") or app.get("eventId"))
-        if aid != event_id_str:
-            continue
+            aid = _normalize_id(app.get("event_id") or app.get("eventId"))
+            if aid != event_id_str:
+                continue
 
-        serialized = _serialize_application(app)
-        enriched = {
-            **serialized,
-            "id": app.get("id"),
-            "event_id": event_id_str,
-            "status": app.get("status"),
-            "payment_status": app.get("payment_status"),
-            "booth_id": app.get("booth_id"),
-            "requested_booth_id": app.get("requested_booth_id"),
-            "booth_category": app.get("booth_category") or app.get("requested_booth_category"),
-            "requested_booth_category": app.get("requested_booth_category"),
-            "vendor_category": app.get("vendor_category"),
-            "vendor_categories": app.get("vendor_categories") or [],
-            "vendor_id": app.get("vendor_id"),
-            "vendor_email": app.get("vendor_email"),
-            "vendor_name": app.get("vendor_name"),
-            "updated_at": app.get("updated_at") or app.get("submitted_at"),
-            "amount_due": serialized.get("amount_due"),
-            "booth_price": serialized.get("booth_price"),
-            "amount_cents": serialized.get("amount_cents"),
-            "resolved_price_cents": serialized.get("resolved_price_cents"),
-            "total_cents": serialized.get("total_cents"),
-        }
-        apps.append(enriched)
+            serialized = _serialize_application(app)
+            enriched = {
+                **serialized,
+                "id": app.get("id"),
+                "event_id": event_id_str,
+                "status": app.get("status"),
+                "payment_status": app.get("payment_status"),
+                "booth_id": app.get("booth_id"),
+                "requested_booth_id": app.get("requested_booth_id"),
+                "booth_category": app.get("booth_category") or app.get("requested_booth_category"),
+                "requested_booth_category": app.get("requested_booth_category"),
+                "vendor_category": app.get("vendor_category"),
+                "vendor_categories": app.get("vendor_categories") or [],
+                "vendor_id": app.get("vendor_id"),
+                "vendor_email": app.get("vendor_email"),
+                "vendor_name": app.get("vendor_name"),
+                "updated_at": app.get("updated_at") or app.get("submitted_at"),
+                "amount_due": serialized.get("amount_due"),
+                "booth_price": serialized.get("booth_price"),
+                "amount_cents": serialized.get("amount_cents"),
+                "resolved_price_cents": serialized.get("resolved_price_cents"),
+                "total_cents": serialized.get("total_cents"),
+            }
+            apps.append(enriched)
 
     return {"applications": apps}
 
@@ -3434,7 +3779,7 @@ def organizer_get_application(event_id: str, app_id: str) -> Dict[str, Any]:
 def organizer_approve_application(app_id: str) -> Dict[str, Any]:
     app = _get_application_or_404(app_id)
     app["status"] = "approved"
-    _save_store()
+    _save_store(app)
     return _serialize_application(app)
 
 
@@ -3442,7 +3787,7 @@ def organizer_approve_application(app_id: str) -> Dict[str, Any]:
 def organizer_reject_application(app_id: str) -> Dict[str, Any]:
     app = _get_application_or_404(app_id)
     app["status"] = "rejected"
-    _save_store()
+    _save_store(app)
     return _serialize_application(app)
 
 
@@ -3458,7 +3803,7 @@ def organizer_delete_application_for_event(event_id: str, app_id: str) -> Dict[s
     if not deleted:
         return {"ok": True, "already_deleted": True}
 
-    _save_store()
+    _save_records("applications", app_id)
     return {"ok": True}
 
 
@@ -3468,7 +3813,7 @@ def organizer_delete_application(app_id: str) -> Dict[str, Any]:
     if not deleted:
         return {"ok": True, "already_deleted": True}
 
-    _save_store()
+    _save_records("applications", app_id)
     return {"ok": True}
 
 
@@ -3491,12 +3836,13 @@ def vendor_confirm_payment(
                 source="confirm_payment_repair",
                 session_id=_as_str(app.get("stripe_session_id")) or _as_str(app.get("checkout_session_id")),
             )
-            _save_store()
+            _save_store(app)
+            _flush_store()
         return {"ok": True, "already_paid": True, "application": _serialize_application(app)}
 
     if _payment_exists_for_application(normalized_app_id):
         app["payment_status"] = "paid"
-        _save_store()
+        _save_store(app)
         return {"ok": True, "already_paid": True, "application": _serialize_application(app)}
 
     session_id = (
@@ -3543,7 +3889,7 @@ def vendor_confirm_payment(
         source="confirm_payment",
         session_id=session_id,
     )
-    _save_store()
+    _save_store(app)
 
     return {"ok": True, "application": _serialize_application(app)}
 @router.delete("/vendor/applications/{app_id}")
@@ -3574,7 +3920,7 @@ def delete_vendor_application(
     if not deleted:
         return {"ok": True, "already_deleted": True}
 
-    _save_store()
+    _save_records("applications", app_id)
     return {"ok": True}
 
 
@@ -3715,7 +4061,7 @@ def mark_messages_read(
                 normalized_existing.add(marker)
         msg["read_by"] = read_by
 
-    _save_store()
+    _save_store(app)
     return {"success": True}
 
 @router.get("/debug/applications")
@@ -3733,7 +4079,7 @@ def admin_debug_delete_application(app_id: str):
     """
     removed = _delete_application_record(app_id)
     if removed:
-        _save_store()
+        _save_records("applications", app_id)
     return {
         "ok": True,
         "deleted": bool(removed),
@@ -3785,7 +4131,7 @@ def admin_debug_repair_application(app_id: str, payload: Dict[str, Any] = Body(d
     app["requirements_category"] = status["requirements_category"]
     app["updated_at"] = _now_iso()
 
-    _save_store()
+    _save_store(app)
     return {"ok": True, "application": _serialize_application(app)}
 
 @router.get("/admin/debug/applications/{app_id}/raw")
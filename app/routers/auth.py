@@ -1,13 +1,15 @@
 
 from __future__ import annotations
 
+import atexit
 import json
 import os
 import re
-import requests
 import tempfile
+import threading
 import time
 import secrets
+from collections import OrderedDict
 from pathlib import Path
 from typing import Any, Dict, List, Optional
 
@@ -18,6 +20,7 @@ from fastapi.responses import HTMLResponse
 
 from sqlalchemy import func
 from app.db import SessionLocal
+from app.email_outbox import build_message, enqueue_email
 from app.models.profile import Profile
 
 try:
@@ -38,6 +41,11 @@ bearer = HTTPBearer(auto_error=False)
 _USERS: Dict[int, Dict[str, Any]] = {}
 _USERS_BY_EMAIL: Dict[str, int] = {}
 _USERS_BY_USERNAME: Dict[str, int] = {}
+_USERS_BY_VERIFICATION_TOKEN: Dict[str, int] = {}
+_USERS_BY_STRIPE_CUSTOMER: Dict[str, int] = {}
+# user id -> (email, username, verification token, stripe customer id) as last
+# indexed, so a re-index can drop keys the user no longer has.
+_USER_INDEX_KEYS: Dict[int, tuple] = {}
 _NEXT_ID = 1
 
 
@@ -45,6 +53,13 @@ AUTH_DATA_DIR = Path(os.getenv("DATA_DIR", "/data/vendorconnect"))
 AUTH_DATA_DIR.mkdir(parents=True, exist_ok=True)
 _AUTH_USERS_PATH = AUTH_DATA_DIR / "_auth_users.json"
 
+# _auth_users.json is a full snapshot. Changes since it are appended to
+# _auth_users.journal as one line per user put/delete and folded back into the
+# snapshot once the journal passes AUTH_USERS_JOURNAL_COMPACT_BYTES.
+_AUTH_USERS_JOURNAL_PATH = AUTH_DATA_DIR / "_auth_users.journal"
+AUTH_USERS_JOURNAL_COMPACT_BYTES = int(os.getenv("AUTH_USERS_JOURNAL_COMPACT_BYTES", str(4 * 1024 * 1024)))
+_USERS_WRITE_LOCK = threading.RLock()
+
 
 PUBLIC_DATA_DIR = Path("/data") if Path("/data").exists() else AUTH_DATA_DIR
 ORGANIZER_PROFILE_STORE_PATH = PUBLIC_DATA_DIR / "organizer_profiles.json"
@@ -158,14 +173,7 @@ def _ensure_public_profile_for_user(user: Dict[str, Any]) -> None:
 
 
 def send_welcome_email(email: str, role: str, full_name: Optional[str] = None) -> None:
-    """Send a welcome email through Resend. Never let email failure break signup."""
-    api_key = (os.getenv("RESEND_API_KEY") or "").strip()
-    from_email = (os.getenv("FROM_EMAIL") or "VendCore Support <support@vendcore.co>").strip()
-
-    if not api_key:
-        print("Welcome email skipped: RESEND_API_KEY not set")
-        return
-
+    """Queue a welcome email through the outbox. Never let email failure break signup."""
     recipient = _norm(email)
     if not recipient:
         print("Welcome email skipped: missing recipient")
@@ -225,66 +233,17 @@ def send_welcome_email(email: str, role: str, full_name: Optional[str] = None) -
         "— VendCore Support"
     )
 
-    try:
-        response = requests.post(
-            "https://api.resend.com/emails",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "from": from_email,
-                "to": [recipient],
-                "subject": subject,
-                "html": html,
-                "text": text,
-            },
-            timeout=10,
-        )
-        if response.status_code >= 400:
-            print(f"Welcome email failed: {response.status_code} {response.text}")
-            return
-        print(f"Welcome email sent to {recipient}")
-    except Exception as exc:
-        print(f"Welcome email failed: {exc}")
+    enqueue_email(build_message(to_email=recipient, subject=subject, html=html, text=text))
 
 
 
 def _send_resend_email(*, to_email: str, subject: str, html: str, text: str = "") -> None:
-    """Send a transactional email through Resend without breaking app workflows."""
-    api_key = (os.getenv("RESEND_API_KEY") or "").strip()
-    from_email = (os.getenv("FROM_EMAIL") or "VendCore Support <support@vendcore.co>").strip()
+    """Queue a transactional email through the outbox without breaking app workflows."""
     recipient = _norm(to_email)
-
-    if not api_key:
-        print(f"Email skipped to {recipient or 'unknown'}: RESEND_API_KEY not set")
-        return
     if not recipient:
         print("Email skipped: missing recipient")
         return
-
-    try:
-        response = requests.post(
-            "https://api.resend.com/emails",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json",
-            },
-            json={
-                "from": from_email,
-                "to": [recipient],
-                "subject": subject,
-                "html": html,
-                "text": text or subject,
-            },
-            timeout=10,
-        )
-        if response.status_code >= 400:
-            print(f"Email failed to {recipient}: {response.status_code} {response.text}")
-            return
-        print(f"Email sent to {recipient}: {subject}")
-    except Exception as exc:
-        print(f"Email failed to {recipient}: {exc}")
+    enqueue_email(build_message(to_email=recipient, subject=subject, html=html, text=text))
 
 
 
@@ -460,18 +419,38 @@ def _norm(s: Optional[str]) -> str:
     return (s or "").strip().lower()
 
 
+def _user_index_tables() -> tuple:
+    return (_USERS_BY_EMAIL, _USERS_BY_USERNAME, _USERS_BY_VERIFICATION_TOKEN, _USERS_BY_STRIPE_CUSTOMER)
+
+
+def _unindex_user(uid: int) -> None:
+    keys = _USER_INDEX_KEYS.pop(int(uid), None)
+    if keys is None:
+        return
+    for table, key in zip(_user_index_tables(), keys, strict=True):
+        if key and table.get(key) == int(uid):
+            table.pop(key, None)
+
+
 def _index_user(u: Dict[str, Any]) -> None:
-    e = _norm(u.get("email"))
-    if e:
-        _USERS_BY_EMAIL[e] = int(u["id"])
-    un = _norm(u.get("username"))
-    if un:
-        _USERS_BY_USERNAME[un] = int(u["id"])
+    uid = int(u["id"])
+    _unindex_user(uid)
+    keys = (
+        _norm(u.get("email")),
+        _norm(u.get("username")),
+        str(u.get("email_verification_token") or "").strip(),
+        str(u.get("stripe_customer_id") or "").strip(),
+    )
+    for table, key in zip(_user_index_tables(), keys, strict=True):
+        if key:
+            table[key] = uid
+    _USER_INDEX_KEYS[uid] = keys
 
 
 def _rebuild_indexes() -> None:
-    _USERS_BY_EMAIL.clear()
-    _USERS_BY_USERNAME.clear()
+    for table in _user_index_tables():
+        table.clear()
+    _USER_INDEX_KEYS.clear()
     for user in _USERS.values():
         if isinstance(user, dict):
             _index_user(user)
@@ -532,45 +511,119 @@ def _serialize_user(user: Dict[str, Any]) -> Dict[str, Any]:
     return serialized
 
 
-def _persist_users() -> None:
+def _write_users_snapshot() -> None:
     payload = {
         "users": [dict(user) for _, user in sorted(_USERS.items(), key=lambda item: int(item[0]))],
         "next_id": _NEXT_ID,
     }
     _atomic_write_json(_AUTH_USERS_PATH, payload)
+    try:
+        _AUTH_USERS_JOURNAL_PATH.unlink()
+    except FileNotFoundError:
+        pass
 
 
-def _load_users() -> None:
-    global _NEXT_ID
+def _persist_users(*user_ids: Any) -> None:
+    """Persist auth users.
 
-    if not _AUTH_USERS_PATH.exists():
-        _rebuild_indexes()
-        return
+    Each of ``user_ids`` is re-indexed and appended to the journal as a put,
+    or as a delete once it is gone from _USERS. Without ids the full snapshot
+    is rewritten.
+    """
+    with _USERS_WRITE_LOCK:
+        if not user_ids:
+            _write_users_snapshot()
+            return
 
+        lines = []
+        for raw_id in user_ids:
+            uid = int(raw_id)
+            user = _USERS.get(uid)
+            if isinstance(user, dict):
+                _index_user(user)
+                entry = {"op": "put", "user": user, "next_id": _NEXT_ID}
+            else:
+                _unindex_user(uid)
+                entry = {"op": "del", "id": uid, "next_id": _NEXT_ID}
+            lines.append(json.dumps(entry, ensure_ascii=False, default=str, separators=(",", ":")) + "\n")
+
+        _AUTH_USERS_JOURNAL_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(_AUTH_USERS_JOURNAL_PATH, "a", encoding="utf-8") as f:
+            f.write("".join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+            journal_size = f.tell()
+
+        if journal_size >= AUTH_USERS_JOURNAL_COMPACT_BYTES:
+            _write_users_snapshot()
+
+
+def _normalize_loaded_user(item: Any) -> Optional[Dict[str, Any]]:
+    if not isinstance(item, dict):
+        return None
     try:
-        raw = json.loads(_AUTH_USERS_PATH.read_text(encoding="utf-8"))
+        uid = int(item.get("id"))
     except Exception:
-        _rebuild_indexes()
-        return
+        return None
+    normalized = dict(item)
+    normalized["id"] = uid
+    normalized["email"] = _norm(normalized.get("email"))
+    normalized["username"] = _norm(normalized.get("username") or normalized.get("email"))
+    normalized["role"] = _norm(normalized.get("role") or "vendor")
+    normalized["is_active"] = bool(normalized.get("is_active", True))
+    return normalized
+
+
+def _replay_users_journal() -> int:
+    """Apply journaled user changes over the loaded snapshot; return the highest next_id seen."""
+    next_id = 1
+    if not _AUTH_USERS_JOURNAL_PATH.exists():
+        return next_id
+    with open(_AUTH_USERS_JOURNAL_PATH, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except Exception:
+                # A torn final write from a crash; everything before it is intact.
+                print(f"⚠️ Ignoring unreadable auth users journal line {line_no}")
+                break
+            if not isinstance(entry, dict):
+                continue
+            next_id = max(next_id, int(entry.get("next_id") or 1))
+            if entry.get("op") == "del":
+                try:
+                    _USERS.pop(int(entry.get("id")), None)
+                except Exception:
+                    pass
+                continue
+            normalized = _normalize_loaded_user(entry.get("user"))
+            if normalized is not None:
+                _USERS[normalized["id"]] = normalized
+    return next_id
 
-    _USERS.clear()
-    for item in raw.get("users", []):
-        if not isinstance(item, dict):
-            continue
+
+def _load_users() -> None:
+    global _NEXT_ID
+
+    raw: Dict[str, Any] = {}
+    if _AUTH_USERS_PATH.exists():
         try:
-            uid = int(item.get("id"))
+            raw = json.loads(_AUTH_USERS_PATH.read_text(encoding="utf-8"))
         except Exception:
-            continue
-        normalized = dict(item)
-        normalized["id"] = uid
-        normalized["email"] = _norm(normalized.get("email"))
-        normalized["username"] = _norm(normalized.get("username") or normalized.get("email"))
-        normalized["role"] = _norm(normalized.get("role") or "vendor")
-        normalized["is_active"] = bool(normalized.get("is_active", True))
-        _USERS[uid] = normalized
+            _rebuild_indexes()
+            return
+
+    _USERS.clear()
+    for item in raw.get("users", []):
+        normalized = _normalize_loaded_user(item)
+        if normalized is not None:
+            _USERS[normalized["id"]] = normalized
+    journal_next_id = _replay_users_journal()
 
     _rebuild_indexes()
-    _NEXT_ID = max(int(raw.get("next_id", 1) or 1), _next_user_id())
+    _NEXT_ID = max(int(raw.get("next_id", 1) or 1), journal_next_id, _next_user_id())
 
 
 def _hash_password(pw: str) -> str:
@@ -602,6 +655,8 @@ def _add_user(
     full_name: Optional[str] = None,
     persist: bool = True,
 ) -> Dict[str, Any]:
+    global _NEXT_ID
+
     now = int(time.time())
     u = {
         "id": int(user_id),
@@ -616,8 +671,9 @@ def _add_user(
     }
     _USERS[int(user_id)] = u
     _index_user(u)
+    _NEXT_ID = max(_NEXT_ID, int(user_id) + 1)
     if persist:
-        _persist_users()
+        _persist_users(int(user_id))
     return u
 
 
@@ -706,6 +762,7 @@ def _decode_token(token: str) -> Dict[str, Any]:
             email = parts[1] if len(parts) > 1 else ""
             role = parts[2] if len(parts) > 2 else "vendor"
             raw_user_id = parts[3] if len(parts) > 3 else ""
+            raw_iat = parts[4] if len(parts) > 4 else ""
             try:
                 user_id = int(raw_user_id) if raw_user_id else _USERS_BY_EMAIL.get(_norm(email))
             except Exception:
@@ -717,6 +774,7 @@ def _decode_token(token: str) -> Dict[str, Any]:
                 "is_active": True,
                 "user_id": int(user_id) if user_id is not None else None,
                 "id": int(user_id) if user_id is not None else None,
+                "iat": int(raw_iat) if raw_iat.isdigit() else None,
             }
         raise HTTPException(status_code=401, detail="Invalid token")
 
@@ -726,6 +784,14 @@ def _decode_token(token: str) -> Dict[str, Any]:
         raise HTTPException(status_code=401, detail="Invalid token")
 
 
+def _user_by_verification_token(token: str) -> Optional[Dict[str, Any]]:
+    user_id = _USERS_BY_VERIFICATION_TOKEN.get(token)
+    user = _USERS.get(int(user_id)) if user_id is not None else None
+    if isinstance(user, dict) and str(user.get("email_verification_token") or "") == token:
+        return user
+    return None
+
+
 def list_all_users() -> List[Dict[str, Any]]:
     return [_serialize_user(user) for _, user in sorted(_USERS.items(), key=lambda item: int(item[0]))]
 
@@ -777,14 +843,12 @@ def admin_create_user(
         role=normalized_role,
         username=normalized_username,
         full_name=full_name,
-        persist=True,
+        persist=False,
     )
     user["email_verified"] = False
     user["email_verification_token"] = email_verification_token
     user["email_verification_expires_at"] = email_verification_expires_at
-
-    _NEXT_ID = max(_NEXT_ID + 1, _next_user_id())
-    _persist_users()
+    _persist_users(user["id"])
     try:
         _ensure_public_profile_for_user(user)
     except Exception as exc:
@@ -799,15 +863,10 @@ def admin_delete_user(user_id: int) -> Dict[str, Any]:
         raise HTTPException(status_code=404, detail="Account not found")
 
     email = _norm(user.get("email"))
-    username = _norm(user.get("username"))
 
     _USERS.pop(uid, None)
-    if email:
-        _USERS_BY_EMAIL.pop(email, None)
-    if username:
-        _USERS_BY_USERNAME.pop(username, None)
-
-    _persist_users()
+    _persist_users(uid)
+    invalidate_principal_cache(email)
     return _serialize_user(user)
 
 
@@ -880,13 +939,97 @@ def _merge_durable_subscription_state(user: Dict[str, Any]) -> Dict[str, Any]:
                 target[key] = value
                 changed = True
         if changed:
-            try:
-                _persist_users()
-            except Exception:
-                pass
+            _index_user(target)
+            _schedule_users_persist(int(user_id))
     return user
 
 
+# Profile refreshes only touch mirrored subscription fields, so the users file
+# is rewritten off the request path, at most once per
+# AUTH_USERS_PERSIST_DELAY_SECONDS, and on shutdown.
+AUTH_USERS_PERSIST_DELAY_SECONDS = float(os.getenv("AUTH_USERS_PERSIST_DELAY_SECONDS", "2") or 2)
+
+_USERS_PERSIST_LOCK = threading.Lock()
+_USERS_PERSIST_TIMER: Optional[threading.Timer] = None
+_USERS_PERSIST_PENDING: set[int] = set()
+
+
+def _flush_users_persist() -> None:
+    global _USERS_PERSIST_TIMER
+    with _USERS_PERSIST_LOCK:
+        if _USERS_PERSIST_TIMER is not None:
+            _USERS_PERSIST_TIMER.cancel()
+            _USERS_PERSIST_TIMER = None
+        pending = sorted(_USERS_PERSIST_PENDING)
+        _USERS_PERSIST_PENDING.clear()
+    if pending:
+        try:
+            _persist_users(*pending)
+        except Exception as exc:
+            print("⚠️ Auth users persist skipped:", str(exc))
+
+
+def _schedule_users_persist(user_id: int) -> None:
+    global _USERS_PERSIST_TIMER
+    with _USERS_PERSIST_LOCK:
+        _USERS_PERSIST_PENDING.add(int(user_id))
+        if _USERS_PERSIST_TIMER is not None:
+            return
+        timer = threading.Timer(AUTH_USERS_PERSIST_DELAY_SECONDS, _flush_users_persist)
+        timer.daemon = True
+        _USERS_PERSIST_TIMER = timer
+    timer.start()
+
+
+atexit.register(_flush_users_persist)
+
+
+# Resolved principals keyed by (email, role, token iat). Entries live for
+# AUTH_PRINCIPAL_CACHE_TTL seconds (0 disables the cache) and are dropped by
+# invalidate_principal_cache() wherever subscription, premium or verification
+# state changes.
+AUTH_PRINCIPAL_CACHE_TTL = float(os.getenv("AUTH_PRINCIPAL_CACHE_TTL", "15") or 0)
+AUTH_PRINCIPAL_CACHE_SIZE = int(os.getenv("AUTH_PRINCIPAL_CACHE_SIZE", "4096") or 4096)
+
+_PRINCIPAL_CACHE: "OrderedDict[tuple, tuple[float, Dict[str, Any]]]" = OrderedDict()
+_PRINCIPAL_CACHE_LOCK = threading.Lock()
+
+
+def invalidate_principal_cache(email: Optional[str] = None) -> None:
+    """Drop cached principals for ``email``, or all of them."""
+    normalized_email = _norm(email)
+    with _PRINCIPAL_CACHE_LOCK:
+        if not normalized_email:
+            _PRINCIPAL_CACHE.clear()
+            return
+        for key in [key for key in _PRINCIPAL_CACHE if key[0] == normalized_email]:
+            _PRINCIPAL_CACHE.pop(key, None)
+
+
+def _cached_principal(key: tuple) -> Optional[Dict[str, Any]]:
+    if AUTH_PRINCIPAL_CACHE_TTL <= 0:
+        return None
+    with _PRINCIPAL_CACHE_LOCK:
+        hit = _PRINCIPAL_CACHE.get(key)
+        if hit is None:
+            return None
+        if hit[0] <= time.monotonic():
+            _PRINCIPAL_CACHE.pop(key, None)
+            return None
+        _PRINCIPAL_CACHE.move_to_end(key)
+        return dict(hit[1])
+
+
+def _remember_principal(key: tuple, user: Dict[str, Any]) -> None:
+    if AUTH_PRINCIPAL_CACHE_TTL <= 0:
+        return
+    with _PRINCIPAL_CACHE_LOCK:
+        _PRINCIPAL_CACHE[key] = (time.monotonic() + AUTH_PRINCIPAL_CACHE_TTL, dict(user))
+        _PRINCIPAL_CACHE.move_to_end(key)
+        while len(_PRINCIPAL_CACHE) > AUTH_PRINCIPAL_CACHE_SIZE:
+            _PRINCIPAL_CACHE.popitem(last=False)
+
+
 def get_current_user(
     creds: HTTPAuthorizationCredentials | None = Depends(bearer),
 ) -> Dict[str, Any]:
@@ -905,6 +1048,11 @@ def get_current_user(
             status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated"
         )
 
+    cache_key = (email, role, payload.get("iat"))
+    cached = _cached_principal(cache_key)
+    if cached is not None:
+        return cached
+
     user_id = _USERS_BY_EMAIL.get(email)
     stored_user: Dict[str, Any] = {}
     full_name = None
@@ -930,7 +1078,9 @@ def get_current_user(
         "full_name": full_name,
     }
 
-    return _merge_durable_subscription_state(current)
+    resolved = _merge_durable_subscription_state(current)
+    _remember_principal(cache_key, resolved)
+    return resolved
 
 
 class LoginRequest(BaseModel):
@@ -971,14 +1121,7 @@ def verify_email(token: str):
         raise HTTPException(status_code=400, detail="Missing verification token")
 
     now = int(time.time())
-    matched_user: Optional[Dict[str, Any]] = None
-
-    for user in _USERS.values():
-        if not isinstance(user, dict):
-            continue
-        if str(user.get("email_verification_token") or "") == clean_token:
-            matched_user = user
-            break
+    matched_user = _user_by_verification_token(clean_token)
 
     if not matched_user:
         raise HTTPException(status_code=404, detail="Invalid or expired verification link")
@@ -992,7 +1135,8 @@ def verify_email(token: str):
     matched_user["email_verification_token"] = None
     matched_user["email_verification_expires_at"] = None
     matched_user["updated_at"] = now
-    _persist_users()
+    _persist_users(matched_user["id"])
+    invalidate_principal_cache(matched_user.get("email"))
 
     safe_email = _norm(matched_user.get("email"))
 
@@ -1035,22 +1179,9 @@ def verify_email_json(token: str) -> Dict[str, Any]:
         raise HTTPException(status_code=400, detail="Missing verification token")
 
     now = int(time.time())
-    matched_user: Optional[Dict[str, Any]] = None
-
-    for user in _USERS.values():
-        if not isinstance(user, dict):
-            continue
-        if str(user.get("email_verification_token") or "") == clean_token:
-            matched_user = user
-            break
+    matched_user = _user_by_verification_token(clean_token)
 
     if not matched_user:
-        # If the user already clicked the link, treat it as confirmed instead
-        # of permanently blocking login with a confusing error.
-        for user in _USERS.values():
-            if isinstance(user, dict) and user.get("email_verified") is True:
-                if not user.get("email_verification_token"):
-                    continue
         raise HTTPException(status_code=404, detail="Invalid or expired verification link")
 
     expires_at = int(matched_user.get("email_verification_expires_at") or 0)
@@ -1062,7 +1193,8 @@ def verify_email_json(token: str) -> Dict[str, Any]:
     matched_user["email_verification_token"] = None
     matched_user["email_verification_expires_at"] = None
     matched_user["updated_at"] = now
-    _persist_users()
+    _persist_users(matched_user["id"])
+    invalidate_principal_cache(matched_user.get("email"))
 
     return {
         "ok": True,
@@ -1110,7 +1242,7 @@ def resend_verification(payload: ResendVerificationRequest) -> Dict[str, Any]:
     user["email_verification_token"] = token
     user["email_verification_expires_at"] = now + (60 * 60 * 24)
     user["updated_at"] = now
-    _persist_users()
+    _persist_users(user["id"])
 
     try:
         send_email_confirmation_email(
@@ -1387,8 +1519,9 @@ def debug_force_premium(email: str):
         user["featured"] = True
         user["promoted"] = True
         user["updated_at"] = int(time.time())
-        _persist_users()
+        _persist_users(uid)
         auth_updated = True
+    invalidate_principal_cache(normalized_email)
 
     # ---------- POSTGRES PROFILE ----------
     profile_updated = False
@@ -1447,6 +1580,7 @@ def debug_force_premium(email: str):
         }
 
         db.commit()
+        invalidate_principal_cache(normalized_email)
         profile_updated = True
 
         return {
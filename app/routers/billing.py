@@ -5,14 +5,23 @@ from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import func
 
+from app import webhook_inbox
 from app.db import SessionLocal
 from app.models.profile import Profile
 from app.models.event import Event
-from app.store import _EVENTS, save_store
-from app.routers.auth import _USERS, _USERS_BY_EMAIL, _persist_users, get_current_user
+from app.store import _EVENTS, flush, save_records
+from app.routers.auth import (
+    _USERS,
+    _USERS_BY_EMAIL,
+    _USERS_BY_STRIPE_CUSTOMER,
+    _persist_users,
+    get_current_user,
+    invalidate_principal_cache,
+)
 
 try:
     import stripe
@@ -399,8 +408,14 @@ def _sync_profile_subscription_from_user(user: Dict[str, Any]) -> None:
 
 def _save_user_updates(user: Dict[str, Any]) -> None:
     user["updated_at"] = int(datetime.now(tz=timezone.utc).timestamp())
-    _persist_users()
+    try:
+        user_id = int(user.get("id"))
+    except Exception:
+        user_id = None
+    if user_id is not None and _USERS.get(user_id) is user:
+        _persist_users(user_id)
     _sync_profile_subscription_from_user(user)
+    invalidate_principal_cache(user.get("email"))
 
 
 def _set_customer_fields(
@@ -707,7 +722,7 @@ def _mark_private_workspace_paid(session: Any) -> bool:
                 eid = int(event_id)
                 _EVENTS[eid] = dict(payload)
                 _EVENTS[str(eid)] = dict(payload)
-                save_store()
+                save_records("events", eid)
             except Exception as exc:
                 print("⚠️ Private Event Workspace event-store sync failed:", str(exc))
 
@@ -834,10 +849,9 @@ def _sync_from_subscription_object(subscription: Any) -> bool:
     user = _lookup_user(user_id=metadata.get("user_id"), email=metadata.get("email"), role=metadata.get("role"))
 
     if user is None and customer_id:
-        for candidate in _USERS.values():
-            if isinstance(candidate, dict) and str(candidate.get("stripe_customer_id") or "").strip() == customer_id:
-                user = candidate
-                break
+        matched_user_id = _USERS_BY_STRIPE_CUSTOMER.get(customer_id)
+        if matched_user_id is not None:
+            user = _USERS.get(int(matched_user_id))
 
     if user is None:
         return False
@@ -1532,11 +1546,29 @@ async def stripe_webhook(request: Request):
     if not signature:
         raise HTTPException(status_code=400, detail="Missing Stripe signature header")
 
+    # Spooling the event is a durable SQLite write; keep it off the event loop.
+    return await run_in_threadpool(_receive_billing_webhook, stripe_sdk, payload, signature, webhook_secret)
+
+
+def _receive_billing_webhook(stripe_sdk: Any, payload: bytes, signature: str, webhook_secret: str) -> Dict[str, Any]:
     try:
         event = stripe_sdk.Webhook.construct_event(payload, signature, webhook_secret)
     except Exception as exc:
         raise HTTPException(status_code=400, detail=f"Invalid Stripe webhook: {exc}")
 
+    # Applied by the webhook inbox workers (_process_billing_event).
+    receipt = webhook_inbox.ingest("billing", payload)
+    return {"received": True, "event_type": str(getattr(event, "type", "") or ""), **receipt}
+
+
+def _process_billing_event(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply one verified Stripe event from the webhook inbox.
+
+    Exceptions propagate so the inbox retries the event.
+    """
+    stripe_sdk = _require_stripe()
+    event = stripe_sdk.Event.construct_from(payload, stripe_sdk.api_key)
+
     event_type = str(getattr(event, "type", "") or "")
 
     event_data = getattr(event, "data", None)
@@ -1551,35 +1583,34 @@ async def stripe_webhook(request: Request):
         data_object = {}
 
     if event_type == "checkout.session.completed":
-        try:
-            metadata = _extract_metadata(data_object)
-            if _is_verification_checkout(metadata):
-                _mark_verification_checkout_paid(data_object)
-            elif _is_private_workspace_checkout(metadata):
-                _mark_private_workspace_paid(data_object)
+        metadata = _extract_metadata(data_object)
+        if _is_verification_checkout(metadata):
+            _mark_verification_checkout_paid(data_object)
+        elif _is_private_workspace_checkout(metadata):
+            _mark_private_workspace_paid(data_object)
+        else:
+            subscription_id = str(_stripe_get(data_object, "subscription", "") or "").strip()
+            if not subscription_id:
+                print("⚠️ Non-subscription checkout ignored by billing webhook")
             else:
-                subscription_id = str(_stripe_get(data_object, "subscription", "") or "").strip()
-                if not subscription_id:
-                    print("⚠️ Non-subscription checkout ignored by billing webhook")
+                user = _find_user_from_checkout_session(data_object)
+                if user:
+                    _apply_checkout_session_to_user(data_object, user_hint=user)
                 else:
-                    user = _find_user_from_checkout_session(data_object)
-                    if user:
-                        _apply_checkout_session_to_user(data_object, user_hint=user)
-                    else:
-                        print("⚠️ No user found for checkout session")
-        except Exception as exc:
-            print("🔥 WEBHOOK ERROR (checkout.session.completed):", str(exc))
+                    print("⚠️ No user found for checkout session")
 
     elif event_type in {
         "customer.subscription.created",
         "customer.subscription.updated",
         "customer.subscription.deleted",
     }:
-        try:
-            success = _sync_from_subscription_object(data_object)
-            if not success:
-                print("⚠️ Subscription sync failed (no user match)")
-        except Exception as exc:
-            print("🔥 WEBHOOK ERROR (subscription):", str(exc))
+        success = _sync_from_subscription_object(data_object)
+        if not success:
+            print("⚠️ Subscription sync failed (no user match)")
 
+    invalidate_principal_cache(_extract_metadata(data_object).get("email"))
+    flush(sync=True)
     return {"received": True, "event_type": event_type}
+
+
+webhook_inbox.register_handler("billing", _process_billing_event)
@@ -6,7 +6,7 @@ from typing import Optional
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, ConfigDict, Field
 
-from app.store import _BOOTHS, _EVENTS, next_booth_id, save_store
+from app.store import _BOOTHS, _EVENTS, next_booth_id, save_records
 
 router = APIRouter(prefix="/events/{event_id}/booths", tags=["Booths"])
 
@@ -69,7 +69,7 @@ def create_booth(event_id: int, body: BoothCreate):
     }
 
     _BOOTHS[bid] = booth
-    save_store()  # ✅ persist booths
+    save_records("booths", bid)  # ✅ persist booths
     return booth
 
 
@@ -81,5 +81,5 @@ def delete_booth(event_id: int, booth_id: int):
         raise HTTPException(status_code=404, detail="Booth not found")
 
     del _BOOTHS[booth_id]
-    save_store()  # ✅ persist deletion
+    save_records("booths", booth_id)  # ✅ persist deletion
     return {"ok": True}
@@ -1,16 +1,24 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
 from urllib.parse import parse_qs, urlparse
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func, or_, text, cast, String
+from sqlalchemy import case, func, or_, text
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
 from app.db import get_db
-from app.models.event_checkin import EventCheckIn
+from app.models.event_checkin import CheckInSyncReceipt, EventCheckIn
 from app.models.application import Application
+from app.routers.auth import get_current_user
+from app.routers.events import _get_owned_event_or_404
 try:
     from app.models.event import Event
 except Exception:  # pragma: no cover
@@ -334,7 +342,339 @@ def _debug_application_lookup_payload(
     }
 
 
+# ---------------------------------------------------------------------------
+# Event-day roster
+# ---------------------------------------------------------------------------
+#
+# A busy gate scans passes for one event hundreds of times a minute. Each
+# event's Postgres applications, legacy store applications and check-in rows
+# are loaded once into an EventRoster so scans resolve their application and
+# spot duplicate check-ins without touching the whole roster. Legacy records
+# follow the store's application change counter. Postgres rows are reloaded
+# when the event's application count or latest updated_at moves (one
+# aggregate query per lookup; applications are written by other services, so
+# there is no local hook to call), and at the latest after CHECKIN_ROSTER_TTL
+# seconds for an edit whose updated_at does not move the max (0 disables the
+# roster). Check-ins written here are recorded as they happen.
+
+CHECKIN_ROSTER_TTL = float(os.getenv("CHECKIN_ROSTER_TTL", "300") or 0)
+CHECKIN_ROSTER_MISS_REFRESH_SECONDS = float(os.getenv("CHECKIN_ROSTER_MISS_REFRESH_SECONDS", "5") or 0)
+CHECKIN_ROSTER_MAX_EVENTS = max(1, int(os.getenv("CHECKIN_ROSTER_MAX_EVENTS", "32") or 32))
+
+_ROSTERS: "OrderedDict[int, EventRoster]" = OrderedDict()
+_ROSTERS_LOCK = threading.Lock()
+
+_APPLICATION_COLUMNS = tuple(column.key for column in Application.__table__.columns)
+
+
+class _CheckinSnapshot(NamedTuple):
+    id: Optional[int]
+    application_id: Optional[int]
+    vendor_id: Optional[int]
+    status: Optional[str]
+    checked_in_at: Optional[datetime]
+
+
+def _checkin_snapshot(row: Any) -> _CheckinSnapshot:
+    return _CheckinSnapshot(
+        getattr(row, "id", None),
+        getattr(row, "application_id", None),
+        getattr(row, "vendor_id", None),
+        getattr(row, "status", None),
+        getattr(row, "checked_in_at", None),
+    )
+
+
+def _application_snapshot(row: Application) -> Dict[str, Any]:
+    # Plain dicts outlive the request session; every helper above reads
+    # dicts and models alike.
+    return {name: getattr(row, name, None) for name in _APPLICATION_COLUMNS}
+
+
+def _legacy_applications_for_event(event_id: int) -> List[Dict[str, Any]]:
+    event_id_text = _safe_str(event_id)
+    for_event = getattr(legacy_store, "applications_for_event", None)
+    if not callable(for_event):
+        return [app for app in _iter_legacy_applications() if _legacy_app_event_id(app) == event_id_text]
+    out = []
+    for key, value in for_event(event_id).items():
+        merged = {"id": value.get("id") or key, **value}
+        if _legacy_app_event_id(merged) == event_id_text:
+            out.append(merged)
+    return out
+
+
+def _legacy_generation(event_id: int) -> Any:
+    generation = getattr(legacy_store, "application_generation", None)
+    return generation(event_id) if callable(generation) else None
+
+
+class EventRoster:
+    """Application and check-in lookups for one event.
+
+    For every match value the roster keeps the position of the first record
+    holding it, so a lookup returns the record _find_application_uncached
+    would reach first when walking the same rows in order.
+    """
+
+    __slots__ = (
+        "event_id",
+        "db_loaded_at",
+        "db_signature",
+        "legacy_generation",
+        "db_apps",
+        "legacy_apps",
+        "_db_first",
+        "_legacy_first",
+        "_legacy_eligible",
+        "_checkins_by_app",
+        "_checkins_by_vendor",
+        "_lock",
+    )
+
+    def __init__(self, event_id: int) -> None:
+        self.event_id = int(event_id)
+        self.db_loaded_at = 0.0
+        self.db_signature: Any = None
+        self.legacy_generation: Any = None
+        self.db_apps: List[Dict[str, Any]] = []
+        self.legacy_apps: List[Dict[str, Any]] = []
+        self._db_first: Dict[Tuple[str, Any], int] = {}
+        self._legacy_first: Dict[str, int] = {}
+        self._legacy_eligible: List[int] = []
+        self._checkins_by_app: Dict[int, _CheckinSnapshot] = {}
+        self._checkins_by_vendor: Dict[int, _CheckinSnapshot] = {}
+        self._lock = threading.Lock()
+
+    def age(self) -> float:
+        return time.monotonic() - self.db_loaded_at
+
+    def load_db(self, db: Session, signature: Any = None) -> None:
+        rows = (
+            db.query(Application)
+            .filter(Application.event_id == self.event_id)
+            .order_by(Application.id.desc())
+            .all()
+        )
+        checkins = db.query(EventCheckIn).filter(EventCheckIn.event_id == self.event_id).all()
+
+        db_apps = [_application_snapshot(row) for row in rows]
+        first: Dict[Tuple[str, Any], int] = {}
+        for pos, app in enumerate(db_apps):
+            first.setdefault(("id", _safe_str(_application_id(app))), pos)
+            first.setdefault(("vendor", _safe_str(_application_vendor_id(app))), pos)
+            email = _application_email(app)
+            if email:
+                first.setdefault(("email", email), pos)
+            if app.get("user_id") is not None:
+                first.setdefault(("user", app.get("user_id")), pos)
+
+        with self._lock:
+            self.db_apps = db_apps
+            self._db_first = first
+            self._checkins_by_app = {}
+            self._checkins_by_vendor = {}
+            for row in checkins:
+                self._record_checkin_locked(_checkin_snapshot(row), replace=False)
+            self.db_signature = signature
+            self.db_loaded_at = time.monotonic()
+
+    def load_legacy(self, generation: Any) -> None:
+        legacy_apps = _legacy_applications_for_event(self.event_id)
+        first: Dict[str, int] = {}
+        eligible: List[int] = []
+        for pos, app in enumerate(legacy_apps):
+            for value in _legacy_app_match_values(app):
+                first.setdefault(value, pos)
+            if _is_approved_or_ready(app):
+                eligible.append(pos)
+        with self._lock:
+            self.legacy_apps = legacy_apps
+            self._legacy_first = first
+            self._legacy_eligible = eligible
+            self.legacy_generation = generation
+
+    def find(self, application_id: Any = None, vendor_id: Any = None) -> Any:
+        """Same precedence as _find_application_uncached."""
+        app_id_int = _to_int(application_id)
+        app_id_text = _safe_str(application_id)
+        vendor_id_text = _safe_str(vendor_id)
+        vendor_id_int = _to_int(vendor_id)
+        with self._lock:
+            db_apps, first = self.db_apps, self._db_first
+            legacy_apps, legacy_first, legacy_eligible = self.legacy_apps, self._legacy_first, self._legacy_eligible
+
+        if app_id_int is not None:
+            pos = first.get(("id", _safe_str(app_id_int)))
+            if pos is not None:
+                return db_apps[pos]
+
+        probes: List[Tuple[str, Any]] = []
+        if app_id_text:
+            probes.append(("id", app_id_text))
+            if "@" in app_id_text:
+                probes.append(("email", _safe_lower(app_id_text)))
+        if vendor_id_text and "@" in vendor_id_text:
+            probes.append(("email", _safe_lower(vendor_id_text)))
+        if vendor_id_int is not None:
+            probes.append(("vendor", _safe_str(vendor_id_int)))
+        if app_id_int is not None:
+            probes.append(("vendor", _safe_str(app_id_int)))
+        positions = [first[probe] for probe in probes if probe in first]
+        if positions:
+            return db_apps[min(positions)]
+
+        if vendor_id_int is not None and ("user", vendor_id_int) in first:
+            return db_apps[first[("user", vendor_id_int)]]
+
+        wanted = {value for value in (_safe_lower(application_id), _safe_lower(vendor_id)) if value}
+        positions = [legacy_first[value] for value in wanted if value in legacy_first]
+        if positions:
+            return legacy_apps[min(positions)]
+        if len(legacy_eligible) == 1:
+            return legacy_apps[legacy_eligible[0]]
+        if len(legacy_apps) == 1:
+            return legacy_apps[0]
+        return None
+
+    def checkin_for(self, application_id: Any, vendor_id: Any) -> Optional[_CheckinSnapshot]:
+        """Mirror of the application-then-vendor row lookup in _upsert_checkin_row."""
+        known = self._checkins_by_app.get(_to_int(application_id) or 0)
+        if known is None and vendor_id:
+            known = self._checkins_by_vendor.get(_to_int(vendor_id) or 0)
+        return known
+
+    def record_checkin(self, row: Any) -> None:
+        with self._lock:
+            self._record_checkin_locked(_checkin_snapshot(row), replace=True)
+
+    def _record_checkin_locked(self, snapshot: _CheckinSnapshot, *, replace: bool) -> None:
+        # The first row per id wins, as with .first() on an unordered query.
+        if snapshot.application_id is not None:
+            key = int(snapshot.application_id)
+            if replace or key not in self._checkins_by_app:
+                self._checkins_by_app[key] = snapshot
+        if snapshot.vendor_id is not None:
+            key = int(snapshot.vendor_id)
+            if replace or key not in self._checkins_by_vendor:
+                self._checkins_by_vendor[key] = snapshot
+
+
+def _cached_roster(event_id: Any) -> Optional[EventRoster]:
+    if CHECKIN_ROSTER_TTL <= 0:
+        return None
+    try:
+        eid = int(event_id)
+    except Exception:
+        return None
+    with _ROSTERS_LOCK:
+        return _ROSTERS.get(eid)
+
+
+def _application_signature(db: Session, event_id: int) -> Tuple[Any, ...]:
+    """Count and latest updated_at of the event's Postgres applications."""
+    return tuple(
+        db.query(func.count(Application.id), func.max(Application.updated_at))
+        .filter(Application.event_id == int(event_id))
+        .one()
+    )
+
+
+def _event_roster(db: Session, event_id: int, *, refresh: bool = False) -> Optional[EventRoster]:
+    """The event's roster, loading whichever part is missing or stale."""
+    if CHECKIN_ROSTER_TTL <= 0:
+        return None
+    eid = int(event_id)
+    with _ROSTERS_LOCK:
+        roster = _ROSTERS.get(eid)
+        if roster is None:
+            roster = EventRoster(eid)
+            _ROSTERS[eid] = roster
+        _ROSTERS.move_to_end(eid)
+        while len(_ROSTERS) > CHECKIN_ROSTER_MAX_EVENTS:
+            _ROSTERS.popitem(last=False)
+
+    # Taken before the rows are read, so a write landing in between is
+    # picked up by the next lookup.
+    signature = _application_signature(db, eid)
+    if (
+        refresh
+        or not roster.db_loaded_at
+        or roster.age() >= CHECKIN_ROSTER_TTL
+        or signature != roster.db_signature
+    ):
+        roster.load_db(db, signature)
+    generation = _legacy_generation(eid)
+    if refresh or generation is None or generation != roster.legacy_generation:
+        roster.load_legacy(generation)
+    return roster
+
+
+def invalidate_checkin_roster(event_id: Any = None) -> None:
+    """Forget loaded rosters (all events when omitted).
+
+    Lookups already reload after application changes; this also drops the
+    loaded check-in rows, e.g. after a check-in failed to persist.
+    """
+    with _ROSTERS_LOCK:
+        if event_id is None:
+            _ROSTERS.clear()
+            return
+        try:
+            _ROSTERS.pop(int(event_id), None)
+        except Exception:
+            pass
+
+
 def _find_application(db: Session, event_id: int, application_id: Any = None, vendor_id: Any = None) -> Any:
+    roster = _event_roster(db, event_id)
+    if roster is None:
+        return _find_application_uncached(db, event_id, application_id=application_id, vendor_id=vendor_id)
+
+    app = roster.find(application_id, vendor_id)
+    if app is None and roster.age() >= CHECKIN_ROSTER_MISS_REFRESH_SECONDS:
+        # A vendor approved after the roster was loaded; reload once.
+        roster = _event_roster(db, event_id, refresh=True) or roster
+        app = roster.find(application_id, vendor_id)
+    if app is not None:
+        return app
+
+    raise _application_not_found(
+        event_id,
+        application_id,
+        vendor_id,
+        db_count=len(roster.db_apps),
+        legacy_count=len(roster.legacy_apps),
+    )
+
+
+def _application_not_found(
+    event_id: int,
+    application_id: Any,
+    vendor_id: Any,
+    *,
+    db_count: int,
+    legacy_count: int,
+) -> HTTPException:
+    return HTTPException(
+        status_code=403,
+        detail={
+            "message": (
+                "Vendor is not approved or ready for this event. "
+                "No matching event/application record was found for this QR pass."
+            ),
+            "lookup": _debug_application_lookup_payload(
+                event_id=event_id,
+                application_id=application_id,
+                vendor_id=vendor_id,
+                db_count=db_count,
+                legacy_count=legacy_count,
+            ),
+        },
+    )
+
+
+def _find_application_uncached(db: Session, event_id: int, application_id: Any = None, vendor_id: Any = None) -> Any:
     app_id_int = _to_int(application_id)
     app_id_text = _safe_str(application_id)
     vendor_id_text = _safe_str(vendor_id)
@@ -343,30 +683,12 @@ def _find_application(db: Session, event_id: int, application_id: Any = None, ve
 
     query = db.query(Application).filter(Application.event_id == int(event_id))
 
-    # First try direct SQL lookups for normal records.
-    if app_id_text:
-        app_filters = []
-
-        if hasattr(Application, "id"):
-            app_filters.append(cast(Application.id, String) == app_id_text)
-            if app_id_int is not None:
-                app_filters.append(Application.id == app_id_int)
-
-        for attr_name in ("application_id", "applicationId", "app_id", "appId", "app_ref", "appRef"):
-            if hasattr(Application, attr_name):
-                column = getattr(Application, attr_name)
-                app_filters.append(cast(column, String) == app_id_text)
-
-        if app_filters:
-            app = (
-                db.query(Application)
-                .filter(cast(Application.event_id, String) == event_id_text)
-                .filter(or_(*app_filters))
-                .order_by(Application.id.desc())
-                .first()
-            )
-            if app:
-                return app
+    # First try a primary-key lookup for normal records. Compare typed values
+    # so the (event_id, id) indexes are usable.
+    if app_id_int is not None:
+        app = query.filter(Application.id == app_id_int).first()
+        if app:
+            return app
 
     # IMPORTANT FALLBACK:
     # The live roster already proves these applications exist for this event.
@@ -431,28 +753,56 @@ def _find_application(db: Session, event_id: int, application_id: Any = None, ve
     ])
     db_count = len(event_apps)
 
-    raise HTTPException(
-        status_code=403,
-        detail={
-            "message": (
-                "Vendor is not approved or ready for this event. "
-                "No matching event/application record was found for this QR pass."
-            ),
-            "lookup": _debug_application_lookup_payload(
-                event_id=event_id,
-                application_id=application_id,
-                vendor_id=vendor_id,
-                db_count=db_count,
-                legacy_count=legacy_count,
-            ),
-        },
+    raise _application_not_found(
+        event_id,
+        application_id,
+        vendor_id,
+        db_count=db_count,
+        legacy_count=legacy_count,
     )
 
 
-def _upsert_checkin(db: Session, event_id: int, app: Application) -> tuple[EventCheckIn, bool]:
+def _upsert_checkin(
+    db: Session,
+    event_id: int,
+    app: Application,
+    *,
+    checked_in_at: Optional[datetime] = None,
+    commit: bool = True,
+) -> tuple[Any, bool]:
+    """Mark the application checked in; returns (row, already_checked_in).
+
+    ``checked_in_at`` records when the vendor arrived (offline scans upload
+    later). With ``commit=False`` the row is only flushed and the caller
+    commits, then records it in the roster.
+    """
     vendor_id = _application_vendor_id(app)
     application_id = _application_id(app)
 
+    roster = _cached_roster(event_id)
+    if roster is not None:
+        known = roster.checkin_for(application_id, vendor_id)
+        if known is not None and known.status == "checked_in":
+            # Duplicate scan; global_check_in still re-reads the row.
+            return known, True
+
+    checkin, already_checked_in = _upsert_checkin_row(
+        db, event_id, application_id, vendor_id, checked_in_at=checked_in_at, commit=commit
+    )
+    if roster is not None and commit:
+        roster.record_checkin(checkin)
+    return checkin, already_checked_in
+
+
+def _upsert_checkin_row(
+    db: Session,
+    event_id: int,
+    application_id: int,
+    vendor_id: int,
+    *,
+    checked_in_at: Optional[datetime] = None,
+    commit: bool = True,
+) -> tuple[EventCheckIn, bool]:
     existing = (
         db.query(EventCheckIn)
         .filter(
@@ -475,10 +825,9 @@ def _upsert_checkin(db: Session, event_id: int, app: Application) -> tuple[Event
     if existing:
         if existing.status != "checked_in":
             existing.status = "checked_in"
-            existing.checked_in_at = existing.checked_in_at or _now_utc()
+            existing.checked_in_at = existing.checked_in_at or checked_in_at or _now_utc()
             db.add(existing)
-            db.commit()
-            db.refresh(existing)
+            _commit_or_flush(db, existing, commit)
             return existing, False
         return existing, True
 
@@ -487,14 +836,22 @@ def _upsert_checkin(db: Session, event_id: int, app: Application) -> tuple[Event
         vendor_id=int(vendor_id or 0),
         application_id=int(application_id),
         status="checked_in",
-        checked_in_at=_now_utc(),
+        checked_in_at=checked_in_at or _now_utc(),
     )
     db.add(checkin)
-    db.commit()
-    db.refresh(checkin)
+    _commit_or_flush(db, checkin, commit)
     return checkin, False
 
 
+def _commit_or_flush(db: Session, row: Any, commit: bool) -> None:
+    if commit:
+        db.commit()
+        db.refresh(row)
+    else:
+        # Later lookups in the same transaction must see this row.
+        db.flush()
+
+
 # Generate QR by flexible vendor/application identifier.
 # Accepts:
 # - vendor/user id
@@ -585,6 +942,7 @@ def global_check_in(data: Dict[str, Any], db: Session = Depends(get_db)):
     )
 
     if persisted is None:
+        invalidate_checkin_roster(event_id)
         raise HTTPException(status_code=500, detail="Check-in could not be persisted. Please try again.")
 
     row = _row_payload(app, persisted)
@@ -608,19 +966,306 @@ def global_check_in(data: Dict[str, Any], db: Session = Depends(get_db)):
     }
 
 
+# ---------------------------------------------------------------------------
+# Offline scanner sync
+# ---------------------------------------------------------------------------
+#
+# Scanners on poor venue Wi-Fi download a roster bundle, accept passes
+# offline by matching the ids a QR carries (JWT claims or vendcore://
+# parameters) against it, and upload their scans in batches. The QR signing
+# secret stays on the server: tokens are verified when the batch arrives,
+# against the time of the scan. Each scan carries an idempotency key and
+# accepted scans leave a receipt, so a batch re-sent after a dropped
+# response replays the same results.
+
+CHECKIN_SYNC_MAX_BATCH = max(1, int(os.getenv("CHECKIN_SYNC_MAX_BATCH", "500") or 500))
+# Scan clocks further ahead of the server than this are treated as "now".
+CHECKIN_SYNC_MAX_CLOCK_SKEW_SECONDS = 300
+_IDEMPOTENCY_KEY_MAX_LENGTH = 200
+
+
+@router.get("/events/{event_id}/checkins/bundle")
+def checkin_roster_bundle(
+    event_id: int,
+    db: Session = Depends(get_db),
+    user: dict = Depends(get_current_user),
+):
+    """Roster a scanner needs to accept passes offline; the event's organizer or an admin only."""
+    _get_owned_event_or_404(db, event_id, user)
+    stats = _checkin_stats_payload(event_id, db, slim=True)
+    passes = []
+    for row in stats["rows"]:
+        keys = {
+            _safe_str(row.get("application_id")),
+            _safe_str(row.get("vendor_id")),
+            _safe_lower(row.get("vendor_email")),
+        }
+        keys.discard("")
+        passes.append({
+            "application_id": row.get("application_id"),
+            "vendor_id": row.get("vendor_id"),
+            "vendor_email": row.get("vendor_email"),
+            "vendor_name": row.get("vendor_name"),
+            "booth_id": row.get("booth_id"),
+            "booth_category": row.get("booth_category"),
+            "ready_for_checkin": row.get("ready_for_checkin"),
+            "checked_in": row.get("checked_in"),
+            "checked_in_at": row.get("checked_in_at"),
+            "match_keys": sorted(keys),
+        })
+
+    return {
+        "ok": True,
+        "event_id": int(event_id),
+        "generated_at": _now_utc().isoformat() + "Z",
+        "total": len(passes),
+        "checked_in": stats["checked_in"],
+        "passes": passes,
+        "sync": {
+            "url": f"/events/{int(event_id)}/checkins/sync",
+            "max_batch": CHECKIN_SYNC_MAX_BATCH,
+        },
+    }
+
+
+def _parse_scan_time(value: Any, now: datetime) -> datetime:
+    """Naive UTC time of a scan; missing, unreadable or far-future values mean now."""
+    parsed: Optional[datetime] = None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        seconds = float(value) / 1000 if value > 10_000_000_000 else float(value)
+        try:
+            parsed = datetime.fromtimestamp(seconds, tz=timezone.utc)
+        except (OverflowError, OSError, ValueError):
+            parsed = None
+    elif _safe_str(value):
+        try:
+            parsed = datetime.fromisoformat(_safe_str(value).replace("Z", "+00:00"))
+        except ValueError:
+            parsed = None
+    if parsed is None:
+        return now
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    if (parsed - now).total_seconds() > CHECKIN_SYNC_MAX_CLOCK_SKEW_SECONDS:
+        return now
+    return parsed
+
+
+def _scan_idempotency_key(scan: Dict[str, Any], device_id: str) -> str:
+    key = _safe_str(
+        scan.get("idempotency_key")
+        or scan.get("idempotencyKey")
+        or scan.get("scan_id")
+        or scan.get("scanId")
+    )
+    if key:
+        return key
+    # Older scanner builds send no key; the same scan re-sent hashes the same.
+    basis = "|".join(
+        _safe_str(scan.get(name))
+        for name in ("token", "qr_code", "qrCode", "application_id", "applicationId", "vendor_id", "vendorId", "scanned_at", "scannedAt")
+    )
+    return "auto:" + hashlib.sha256(f"{device_id}|{basis}".encode("utf-8")).hexdigest()
+
+
+def _looks_like_jwt(value: str) -> bool:
+    return value.count(".") == 2 and not value.startswith(("vendcore://", "http://", "https://"))
+
+
+def _resolve_scan(db: Session, event_id: int, scan: Dict[str, Any], scanned_at: datetime) -> Tuple[Any, Optional[str], str]:
+    """Return (application, error code, message) for one uploaded scan."""
+    payload = _parse_payload(scan, fallback_event_id=event_id)
+    token = _safe_str(payload.get("token"))
+    if token and _looks_like_jwt(token):
+        try:
+            claims = verify_qr_token(token, at=scanned_at)
+        except Exception as exc:
+            code = "expired_pass" if type(exc).__name__ == "ExpiredSignatureError" else "invalid_token"
+            return None, code, "QR pass could not be verified"
+        payload = {
+            "event_id": claims.get("event_id"),
+            "vendor_id": claims.get("vendor_id") or payload.get("vendor_id"),
+            "application_id": claims.get("application_id") or payload.get("application_id"),
+        }
+
+    pass_event_id = _to_int(payload.get("event_id"))
+    if pass_event_id is not None and pass_event_id != int(event_id):
+        return None, "wrong_event", "QR pass belongs to a different event"
+
+    try:
+        app = _find_application(
+            db,
+            event_id,
+            application_id=payload.get("application_id"),
+            vendor_id=payload.get("vendor_id"),
+        )
+    except HTTPException as exc:
+        detail = exc.detail if isinstance(exc.detail, dict) else {"message": exc.detail}
+        return None, "not_found", _safe_str(detail.get("message"))
+    return app, None, ""
+
+
+def _sync_scans(db: Session, event_id: int, device_id: str, scans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    now = _now_utc()
+    keyed = [(_scan_idempotency_key(scan, device_id), scan) for scan in scans]
+    if any(len(key) > _IDEMPOTENCY_KEY_MAX_LENGTH for key, _ in keyed):
+        raise HTTPException(status_code=400, detail=f"idempotency_key must be at most {_IDEMPOTENCY_KEY_MAX_LENGTH} characters")
+
+    receipts = {
+        row.idempotency_key: row
+        for row in db.query(CheckInSyncReceipt)
+        .filter(
+            CheckInSyncReceipt.event_id == int(event_id),
+            CheckInSyncReceipt.idempotency_key.in_({key for key, _ in keyed}),
+        )
+        .all()
+    }
+
+    results: List[Dict[str, Any]] = []
+    by_key: Dict[str, Dict[str, Any]] = {}
+    by_application: Dict[int, Dict[str, Any]] = {}
+    written: List[_CheckinSnapshot] = []
+
+    for key, scan in keyed:
+        if key in by_key:
+            results.append({**by_key[key], "duplicate": True})
+            continue
+        if key in receipts:
+            result = {**dict(receipts[key].result or {}), "replayed": True}
+            by_key[key] = result
+            results.append(result)
+            continue
+
+        scanned_at = _parse_scan_time(scan.get("scanned_at") or scan.get("scannedAt"), now)
+        result: Dict[str, Any] = {
+            "idempotency_key": key,
+            "scanned_at": scanned_at.isoformat() + "Z",
+        }
+        app, error, message = _resolve_scan(db, event_id, scan, scanned_at)
+        if app is None:
+            # Rejections are not receipted: the vendor may be approved before
+            # the scanner retries.
+            result.update({"ok": False, "status": "rejected", "error": error, "message": message})
+            by_key[key] = result
+            results.append(result)
+            continue
+
+        application_id = _application_id(app)
+        first = by_application.get(application_id)
+        if first is not None:
+            already, checked_in_at = True, first["checked_in_at"]
+        else:
+            checkin, already = _upsert_checkin(db, event_id, app, checked_in_at=scanned_at, commit=False)
+            if not already:
+                written.append(_checkin_snapshot(checkin))
+            checked_in_at = checkin.checked_in_at.isoformat() if checkin.checked_in_at else None
+
+        result.update({
+            "ok": True,
+            "status": "already_checked_in" if already else "checked_in",
+            "application_id": application_id,
+            "vendor_id": _application_vendor_id(app),
+            "vendor_name": _application_name(app),
+            "checked_in_at": checked_in_at,
+        })
+        by_application.setdefault(application_id, result)
+        by_key[key] = result
+        results.append(result)
+        db.add(CheckInSyncReceipt(
+            event_id=int(event_id),
+            idempotency_key=key,
+            device_id=device_id or None,
+            application_id=application_id,
+            status=result["status"],
+            result=result,
+            scanned_at=scanned_at,
+        ))
+
+    try:
+        db.commit()
+    except IntegrityError as exc:
+        db.rollback()
+        # Another upload of the same scans committed first; its receipts
+        # answer the retry.
+        raise HTTPException(status_code=409, detail="These scans are already being synced. Retry the batch.") from exc
+    except Exception:
+        db.rollback()
+        raise
+
+    roster = _cached_roster(event_id)
+    if roster is not None:
+        for snapshot in written:
+            roster.record_checkin(snapshot)
+    return results
+
+
+@router.post("/events/{event_id}/checkins/sync")
+def sync_checkin_scans(
+    event_id: int,
+    data: Dict[str, Any],
+    db: Session = Depends(get_db),
+    user: dict = Depends(get_current_user),
+):
+    """Apply a batch of offline scans in one transaction; results are per scan, in order.
+
+    Only the event's organizer (or an admin) may sync scans for it.
+    """
+    _get_owned_event_or_404(db, event_id, user)
+    scans = (data or {}).get("scans")
+    if not isinstance(scans, list) or not all(isinstance(scan, dict) for scan in scans):
+        raise HTTPException(status_code=400, detail="scans must be a list of objects")
+    if len(scans) > CHECKIN_SYNC_MAX_BATCH:
+        raise HTTPException(status_code=413, detail=f"At most {CHECKIN_SYNC_MAX_BATCH} scans per batch")
+
+    device_id = _safe_str((data or {}).get("device_id") or (data or {}).get("deviceId"))
+    results = _sync_scans(db, int(event_id), device_id, scans)
+
+    summary: Dict[str, int] = {}
+    for result in results:
+        status = "duplicate" if result.get("duplicate") else result["status"]
+        summary[status] = summary.get(status, 0) + 1
+    return {
+        "ok": True,
+        "event_id": int(event_id),
+        "device_id": device_id,
+        "synced_at": _now_utc().isoformat() + "Z",
+        "summary": summary,
+        "results": results,
+    }
+
+
 # Durable stats + roster endpoint used by the check-in dashboard.
+#
+# Dashboards poll this all event long. Each event keeps a CheckinStats: the
+# roster rows, their counters and a change sequence. A poll costs two
+# aggregate queries; new or updated check-ins are then fetched on their own
+# and patched into their rows, and only application or legacy store changes
+# rebuild the roster (diffed, so unchanged rows keep their sequence).
+# ``since`` takes the cursor of the previous response and returns only rows
+# changed after it; ``slim`` drops the alias copies of the roster.
 @router.get("/events/{event_id}/checkins")
-def checkin_stats(event_id: int, db: Session = Depends(get_db)):
-    return _checkin_stats_payload(event_id, db)
+def checkin_stats(event_id: int, since: Optional[str] = None, slim: bool = False, db: Session = Depends(get_db)):
+    return _checkin_stats_payload(event_id, db, since=since, slim=slim)
 
 
 # Compatibility with current frontend hyphenated URL: /events/:id/check-ins
 @router.get("/events/{event_id}/check-ins")
-def checkin_stats_hyphen(event_id: int, db: Session = Depends(get_db)):
-    return _checkin_stats_payload(event_id, db)
+def checkin_stats_hyphen(event_id: int, since: Optional[str] = None, slim: bool = False, db: Session = Depends(get_db)):
+    return _checkin_stats_payload(event_id, db, since=since, slim=slim)
+
+
+CHECKIN_STATS_TTL = float(os.getenv("CHECKIN_STATS_TTL", "120") or 0)
+# Check-ins updated this long before the newest one seen are fetched again,
+# so a row committed by a slower transaction is not missed.
+CHECKIN_STATS_RESCAN_SECONDS = 30.0
+CHECKIN_STATS_MAX_TOMBSTONES = 1000
+_CHECKIN_STATUSES = ("checked_in", "late", "no_show", "rejected", "pending")
+
+_STATS: "OrderedDict[int, CheckinStats]" = OrderedDict()
+_STATS_LOCK = threading.Lock()
 
 
-def _checkin_stats_payload(event_id: int, db: Session) -> Dict[str, Any]:
+def _stats_applications(event_id: int, db: Session) -> List[Any]:
     event_id_int = int(event_id)
     event_id_text = _safe_str(event_id_int)
 
@@ -655,80 +1300,361 @@ def _checkin_stats_payload(event_id: int, db: Session) -> Dict[str, Any]:
             seen_keys.add(key)
         applications.append(app)
 
-    approved_apps = [app for app in applications if _is_approved_or_ready(app)]
+    return [app for app in applications if _is_approved_or_ready(app)]
 
-    checkins = db.query(EventCheckIn).filter(EventCheckIn.event_id == event_id_int).all()
-    checkins_by_app = {
-        int(row.application_id): row
-        for row in checkins
-        if row.application_id is not None
+
+def _fallback_application(checkin: Any, event_id: int) -> Dict[str, Any]:
+    # A persisted check-in whose application record cannot be loaded is still
+    # surfaced so the dashboard count does not drop back to zero.
+    return {
+        "id": int(checkin.application_id or 0),
+        "application_id": int(checkin.application_id or 0),
+        "event_id": int(event_id),
+        "vendor_id": int(checkin.vendor_id or 0),
+        "status": "approved",
+        "payment_status": "paid",
+        "vendor_email": "",
+        "vendor_name": f"Vendor #{int(checkin.vendor_id or 0)}",
+        "business_name": f"Vendor #{int(checkin.vendor_id or 0)}",
+        "booth_id": "",
+        "booth_category": "General",
+        "category": "General",
     }
 
-    rows = []
-    matched_checkin_ids: set[int] = set()
 
-    for app in approved_apps:
-        app_id = _application_id(app)
-        vendor_id = _application_vendor_id(app)
+class CheckinStats:
+    """Roster rows and counters for one event's check-in dashboard."""
+
+    __slots__ = (
+        "event_id",
+        "epoch",
+        "seq",
+        "floor",
+        "rows",
+        "order",
+        "changes",
+        "counts",
+        "apps",
+        "checkins",
+        "checkin_for_app",
+        "app_signature",
+        "checkin_signature",
+        "legacy_generation",
+        "built_at",
+        "_lock",
+    )
 
+    def __init__(self, event_id: int) -> None:
+        self.event_id = int(event_id)
+        # Cursors from another process or an evicted state start over.
+        self.epoch = os.urandom(4).hex()
+        self.seq = 0
+        self.floor = 0
+        self.rows: Dict[str, Dict[str, Any]] = {}
+        self.order: List[str] = []
+        # Row key -> sequence of its last change, oldest first. Keys missing
+        # from ``rows`` are removals.
+        self.changes: "OrderedDict[str, int]" = OrderedDict()
+        self.counts: Dict[str, int] = dict.fromkeys(("total", "checked_in", "ready_total", "late", "no_show"), 0)
+        # Application id -> (row key, application); None when ids collide.
+        self.apps: Dict[int, Optional[Tuple[str, Any]]] = {}
+        self.checkins: Dict[int, _CheckinSnapshot] = {}
+        self.checkin_for_app: Dict[int, int] = {}
+        self.app_signature: Any = None
+        self.checkin_signature: Any = None
+        self.legacy_generation: Any = None
+        self.built_at = 0.0
+        self._lock = threading.Lock()
+
+    # -- loading ------------------------------------------------------------
+
+    def refresh(self, db: Session) -> None:
+        app_signature = _application_signature(db, self.event_id)
+        # Status counts catch an update whose updated_at does not move the
+        # max (same clock tick, or a transaction that started earlier).
+        checkin_signature = tuple(
+            db.query(
+                func.count(EventCheckIn.id),
+                func.max(EventCheckIn.updated_at),
+                func.max(EventCheckIn.id),
+                *(func.sum(case((EventCheckIn.status == status, 1), else_=0)) for status in _CHECKIN_STATUSES),
+            )
+            .filter(EventCheckIn.event_id == self.event_id)
+            .one()
+        )
+        generation = _legacy_generation(self.event_id)
+
+        with self._lock:
+            stale = (
+                not self.built_at
+                or time.monotonic() - self.built_at >= CHECKIN_STATS_TTL
+                or app_signature != self.app_signature
+                or generation is None
+                or generation != self.legacy_generation
+            )
+            if stale or (
+                checkin_signature != self.checkin_signature
+                and not self._apply_checkin_changes(db, checkin_signature)
+            ):
+                self._rebuild(db)
+                self.built_at = time.monotonic()
+            self.app_signature = app_signature
+            self.checkin_signature = checkin_signature
+            self.legacy_generation = generation
+
+    def _rebuild(self, db: Session) -> None:
+        approved_apps = _stats_applications(self.event_id, db)
+        checkins = [
+            _checkin_snapshot(row)
+            for row in db.query(EventCheckIn)
+            .filter(EventCheckIn.event_id == self.event_id)
+            .order_by(EventCheckIn.id)
+            .all()
+        ]
         # STRICT MATCH:
-        # Only treat this application as checked in if its exact
+        # Only treat an application as checked in if its exact
         # application_id exists in event_checkins. Do not fall back to
         # vendor_id here because multiple applications can share the same
         # vendor/user id, which makes the whole roster appear checked in.
-        checkin = checkins_by_app.get(app_id)
-        if checkin is not None and getattr(checkin, "id", None) is not None:
-            matched_checkin_ids.add(int(checkin.id))
-        rows.append(_row_payload(app, checkin))
-
-    # If a persisted check-in exists but its application record cannot be loaded,
-    # still surface it so the dashboard count does not drop back to zero.
-    for checkin in checkins:
-        if getattr(checkin, "id", None) is not None and int(checkin.id) in matched_checkin_ids:
-            continue
+        checkins_by_app = {
+            int(row.application_id): row
+            for row in checkins
+            if row.application_id is not None
+        }
 
-        fallback = {
-            "id": int(checkin.application_id or 0),
-            "application_id": int(checkin.application_id or 0),
-            "event_id": event_id_int,
-            "vendor_id": int(checkin.vendor_id or 0),
-            "status": "approved",
-            "payment_status": "paid",
-            "vendor_email": "",
-            "vendor_name": f"Vendor #{int(checkin.vendor_id or 0)}",
-            "business_name": f"Vendor #{int(checkin.vendor_id or 0)}",
-            "booth_id": "",
-            "booth_category": "General",
-            "category": "General",
+        entries: List[Tuple[str, Dict[str, Any]]] = []
+        apps: Dict[int, Optional[Tuple[str, Any]]] = {}
+        checkin_for_app: Dict[int, int] = {}
+        matched: set[int] = set()
+        for app in approved_apps:
+            app_id = _application_id(app)
+            key = f"app:{app_id}"
+            if app_id in apps:
+                apps[app_id] = None
+                key = f"app:{app_id}:{len(entries)}"
+            else:
+                apps[app_id] = (key, app)
+            checkin = checkins_by_app.get(app_id)
+            if checkin is not None and checkin.id is not None:
+                matched.add(int(checkin.id))
+                checkin_for_app[app_id] = int(checkin.id)
+            entries.append((key, _row_payload(app, checkin)))
+        for checkin in checkins:
+            if checkin.id is not None and int(checkin.id) in matched:
+                continue
+            entries.append((f"checkin:{checkin.id}", _row_payload(_fallback_application(checkin, self.event_id), checkin)))
+
+        previous, self.rows = self.rows, {}
+        for key, row in entries:
+            row = {**row, "row_key": key}
+            if previous.get(key) != row:
+                self._touch(key)
+            self.rows[key] = row
+        for key in previous:
+            if key not in self.rows:
+                self._touch(key)
+        self.order = [key for key, _ in entries]
+        self.apps = apps
+        self.checkin_for_app = checkin_for_app
+        self.checkins = {int(row.id): row for row in checkins if row.id is not None}
+
+        self.counts = dict.fromkeys(self.counts, 0)
+        for row in self.rows.values():
+            self._count_row(row, 1)
+        for row in checkins:
+            self._count_checkin(row, 1)
+        self._prune()
+
+    def _apply_checkin_changes(self, db: Session, signature: Tuple[Any, ...]) -> bool:
+        """Patch new and updated check-ins into their rows; False means rebuild."""
+        if self.checkin_signature is None:
+            return False
+        count = signature[0]
+        old_count, old_max_updated, old_max_id = self.checkin_signature[:3]
+        changed = [EventCheckIn.id > int(old_max_id or 0)]
+        if old_max_updated is not None:
+            changed.append(EventCheckIn.updated_at >= old_max_updated - timedelta(seconds=CHECKIN_STATS_RESCAN_SECONDS))
+        rows = [
+            _checkin_snapshot(row)
+            for row in db.query(EventCheckIn)
+            .filter(EventCheckIn.event_id == self.event_id, or_(*changed))
+            .order_by(EventCheckIn.id)
+            .all()
+        ]
+        added = sum(1 for row in rows if row.id is not None and int(row.id) not in self.checkins)
+        if old_count + added != count:
+            # Rows were deleted.
+            return False
+        return all(self._apply_checkin(row) for row in rows)
+
+    def _apply_checkin(self, checkin: _CheckinSnapshot) -> bool:
+        if checkin.id is None:
+            return False
+        checkin_id = int(checkin.id)
+        previous = self.checkins.get(checkin_id)
+        if previous == checkin:
+            return True
+        if previous is not None and previous.application_id != checkin.application_id:
+            return False
+
+        app_id = int(checkin.application_id or 0)
+        if app_id in self.apps:
+            known = self.apps[app_id]
+            if known is None or self.checkin_for_app.get(app_id, checkin_id) != checkin_id:
+                # Several applications or check-ins share the id; the full
+                # build decides which row wins.
+                return False
+            key, app = known
+            self.checkin_for_app[app_id] = checkin_id
+            row = _row_payload(app, checkin)
+        else:
+            key = f"checkin:{checkin_id}"
+            row = _row_payload(_fallback_application(checkin, self.event_id), checkin)
+
+        if previous is not None:
+            self._count_checkin(previous, -1)
+        self._count_checkin(checkin, 1)
+        self.checkins[checkin_id] = checkin
+        if key not in self.rows:
+            self.order.append(key)
+        self._set_row(key, row)
+        return True
+
+    # -- bookkeeping --------------------------------------------------------
+
+    def _touch(self, key: str) -> None:
+        self.seq += 1
+        self.changes[key] = self.seq
+        self.changes.move_to_end(key)
+
+    def _set_row(self, key: str, row: Dict[str, Any]) -> None:
+        row = {**row, "row_key": key}
+        previous = self.rows.get(key)
+        if previous == row:
+            return
+        if previous is not None:
+            self._count_row(previous, -1)
+        self._count_row(row, 1)
+        self.rows[key] = row
+        self._touch(key)
+
+    def _count_row(self, row: Dict[str, Any], sign: int) -> None:
+        self.counts["total"] += sign
+        if row.get("checked_in") is True:
+            self.counts["checked_in"] += sign
+        if row.get("ready_for_checkin") is not False:
+            self.counts["ready_total"] += sign
+
+    def _count_checkin(self, checkin: _CheckinSnapshot, sign: int) -> None:
+        if checkin.status in ("late", "no_show"):
+            self.counts[checkin.status] += sign
+
+    def _prune(self) -> None:
+        removed = [key for key in self.changes if key not in self.rows]
+        for key in removed[: max(0, len(removed) - CHECKIN_STATS_MAX_TOMBSTONES)]:
+            self.floor = max(self.floor, self.changes.pop(key))
+
+    # -- responses ----------------------------------------------------------
+
+    def _since_seq(self, since: Optional[str]) -> Optional[int]:
+        epoch, _, seq = _safe_str(since).partition(".")
+        value = _to_int(seq)
+        if epoch != self.epoch or value is None or value < self.floor or value > self.seq:
+            return None
+        return value
+
+    def payload(self, *, since: Optional[str] = None, slim: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(self.counts)
+            since_seq = self._since_seq(since) if since else None
+            removed: List[str] = []
+            if since_seq is None:
+                rows = [self.rows[key] for key in self.order]
+            else:
+                rows = []
+                for key in reversed(self.changes):
+                    if self.changes[key] <= since_seq:
+                        break
+                    if key in self.rows:
+                        rows.append(self.rows[key])
+                    else:
+                        removed.append(key)
+                rows.reverse()
+            cursor = f"{self.epoch}.{self.seq}"
+
+        checked_in = counts["checked_in"]
+        total = counts["total"]
+        waiting = max(total - checked_in - counts["late"] - counts["no_show"], 0)
+        payload: Dict[str, Any] = {
+            "ok": True,
+            "total": total,
+            "checked_in": checked_in,
+            "checkedIn": checked_in,
+            "not_checked_in": waiting,
+            "notCheckedIn": waiting,
+            "late": counts["late"],
+            "no_show": counts["no_show"],
+            "pending": waiting,
+            "approved_total": total,
+            "approvedTotal": total,
+            "ready_total": counts["ready_total"],
+            "readyTotal": counts["ready_total"],
+            "cursor": cursor,
+            # False when ``rows`` only holds changes since the given cursor;
+            # otherwise it is the whole roster and replaces the client's copy.
+            "full": since_seq is None,
+            "rows": rows,
         }
-        rows.append(_row_payload(fallback, checkin))
+        if since_seq is not None or slim:
+            payload["removed"] = removed
+            return payload
+        payload["checkins"] = rows
+        payload["applications"] = rows
+        payload["vendors"] = rows
+        return payload
+
+
+def _event_stats(db: Session, event_id: int) -> CheckinStats:
+    eid = int(event_id)
+    if CHECKIN_STATS_TTL <= 0:
+        stats = CheckinStats(eid)
+    else:
+        with _STATS_LOCK:
+            stats = _STATS.get(eid)
+            if stats is None:
+                stats = CheckinStats(eid)
+                _STATS[eid] = stats
+            _STATS.move_to_end(eid)
+            while len(_STATS) > CHECKIN_ROSTER_MAX_EVENTS:
+                _STATS.popitem(last=False)
+    stats.refresh(db)
+    return stats
+
+
+def invalidate_checkin_stats(event_id: Any = None) -> None:
+    """Forget maintained dashboard stats (all events when omitted).
+
+    refresh() already follows the application and check-in signatures; this
+    is for scripts and tests that need a cold rebuild.
+    """
+    with _STATS_LOCK:
+        if event_id is None:
+            _STATS.clear()
+            return
+        try:
+            _STATS.pop(int(event_id), None)
+        except Exception:
+            pass
 
-    checked_in = len([row for row in rows if row.get("checked_in") is True])
-    late = len([row for row in checkins if row.status == "late"])
-    no_show = len([row for row in checkins if row.status == "no_show"])
-    total = len(rows)
-    waiting = max(total - checked_in - late - no_show, 0)
-    ready_total = len([row for row in rows if row.get("ready_for_checkin") is not False])
 
-    return {
-        "ok": True,
-        "total": total,
-        "checked_in": checked_in,
-        "checkedIn": checked_in,
-        "not_checked_in": waiting,
-        "notCheckedIn": waiting,
-        "late": late,
-        "no_show": no_show,
-        "pending": waiting,
-        "approved_total": total,
-        "approvedTotal": total,
-        "ready_total": ready_total,
-        "readyTotal": ready_total,
-        "rows": rows,
-        "checkins": rows,
-        "applications": rows,
-        "vendors": rows,
-    }
+def _checkin_stats_payload(
+    event_id: int,
+    db: Session,
+    *,
+    since: Optional[str] = None,
+    slim: bool = False,
+) -> Dict[str, Any]:
+    return _event_stats(db, event_id).payload(since=since, slim=slim)
 
 
 # ---------------------------------------------------------------------------
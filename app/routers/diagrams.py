@@ -8,11 +8,13 @@ from typing import Any, Dict
 from fastapi import APIRouter, Body, Depends, HTTPException
 from sqlalchemy.orm import Session
 
+from app import response_cache
 from app.db import get_db
 from app.models.diagram import Diagram
 from app.models.event import Event
-from app.routers.applications import _APPLICATIONS
-from app.store import _DIAGRAMS, save_store
+from app.routers.applications import _APPLICATIONS, invalidate_event_resolution
+from app.routers.events import invalidate_marketplace_stats
+from app.store import _DIAGRAMS, save_records
 
 router = APIRouter(tags=["Diagrams"])
 
@@ -202,13 +204,16 @@ def _save_diagram(db: Session, event_id: int, payload: Dict[str, Any]) -> Dict[s
 
     db.commit()
     db.refresh(slot)
+    invalidate_event_resolution(eid)
+    invalidate_marketplace_stats(eid)
+    response_cache.invalidate_event(eid)
 
     # Keep the legacy runtime store in sync for any old helpers still reading it.
     # Postgres remains the source of truth, but this prevents empty _DIAGRAMS
     # from breaking older application flows during the transition.
     try:
         _DIAGRAMS[int(eid)] = {"diagram": slot.diagram, "version": int(slot.version or 0)}
-        save_store()
+        save_records("diagrams", int(eid))
     except Exception:
         pass
 
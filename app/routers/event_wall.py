@@ -4,11 +4,12 @@ from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 from uuid import uuid4
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel, ConfigDict
 from sqlalchemy import func
 from sqlalchemy.orm import Session
 
+from app import response_cache
 from app.db import get_db
 from app.models.profile import Profile
 from app.routers.auth import get_current_user
@@ -19,7 +20,7 @@ from app.store import (
     append_event_wall_post,
     delete_event_wall_post,
     get_event_wall,
-    save_store,
+    save_records,
 )
 
 router = APIRouter(tags=["Event Wall"])
@@ -330,10 +331,18 @@ def _find_wall_post(event_id: int, post_id: str) -> Dict[str, Any]:
 
 
 @router.get("/events/{event_id}/wall")
-def read_event_wall(event_id: int, limit: int = Query(50, ge=1, le=100)):
+def read_event_wall(request: Request, event_id: int, limit: int = Query(50, ge=1, le=100)):
     if not _event_exists(event_id):
         raise HTTPException(status_code=404, detail="Event not found")
 
+    return response_cache.cached_json(
+        request,
+        lambda: _event_wall_payload(event_id, limit),
+        tags=(f"wall:{int(event_id)}",),
+    )
+
+
+def _event_wall_payload(event_id: int, limit: int) -> Dict[str, Any]:
     wall = get_event_wall(event_id)
     posts = wall.get("posts") if isinstance(wall.get("posts"), list) else []
     return {
@@ -382,6 +391,7 @@ def create_event_wall_post(
         "created_at": _now_iso(),
     }
     saved = append_event_wall_post(event_id, post)
+    response_cache.invalidate(f"wall:{int(event_id)}")
     return {"ok": True, "post": _public_post(saved)}
 
 
@@ -415,7 +425,8 @@ def pin_event_wall_post(
         target.pop("pinned_at", None)
         target.pop("pinned_by", None)
 
-    save_store()
+    save_records("event_walls", event_id)
+    response_cache.invalidate(f"wall:{int(event_id)}")
     return {"ok": True, "post": _public_post(target)}
 
 
@@ -464,7 +475,8 @@ def toggle_event_wall_reaction(
     }
     target["updated_at"] = _now_iso()
 
-    save_store()
+    save_records("event_walls", event_id)
+    response_cache.invalidate(f"wall:{int(event_id)}")
 
     return {
         "ok": True,
@@ -505,4 +517,5 @@ def remove_event_wall_post(
         raise HTTPException(status_code=403, detail="Not allowed to delete this wall post")
 
     ok = delete_event_wall_post(event_id, post_id)
+    response_cache.invalidate(f"wall:{int(event_id)}")
     return {"ok": ok}
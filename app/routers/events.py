@@ -6,25 +6,43 @@ import hashlib
 import logging
 import os
 import re
-from datetime import datetime, timezone
+import shutil
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any, Dict, Optional
 from uuid import uuid4
 from urllib.parse import parse_qs, urlparse
 
-from fastapi import APIRouter, Body, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi import APIRouter, BackgroundTasks, Body, Depends, File, HTTPException, Query, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, ConfigDict, Field
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, or_
 
+from app import response_cache
 from app.core.permissions import require_event_limit
 from app.db import get_db
 from app.models.event import Event
 from app.models.diagram import Diagram
 from app.models.profile import Profile, EventAlert
-from app.routers.applications import _APPLICATIONS, expire_reservations_if_needed
+from app.payment_ledger import as_totals as as_ledger_totals
+from app.routers.applications import _APPLICATIONS, expire_reservations_if_needed, invalidate_event_resolution
 from app.routers.auth import get_current_user
-from app.store import _EVENTS, _PAYMENTS, _REQUIREMENTS, get_store_snapshot, save_store
+from app.routers.vendor_notifications import invalidate_event_matches
+from app.store import (
+    _EVENTS,
+    _PAYMENTS,
+    _REQUIREMENTS,
+    application_generation,
+    applications_for_event,
+    collection_generation,
+    flush,
+    get_store_snapshot,
+    payment_ledger,
+    save_records,
+)
 
 logger = logging.getLogger(__name__)
 logger.warning("🔥 app.routers.events loaded (postgres)")
@@ -235,6 +253,65 @@ def _event_is_active_marketplace_event(event_data: Dict[str, Any]) -> bool:
     )
 
 
+_CANCELLATION_FIELDS = ("status", "canceled", "cancelled", "canceled_at", "cancelled_at")
+
+# Cancellation still lives in the runtime store, so it is the one lifecycle
+# check that cannot be a column predicate yet. The ids are kept here and
+# rescanned only when the events collection changes (a save, reload or sync
+# from another worker, which covers the cancel and restore routes).
+_CANCELED_EVENT_IDS: tuple[int, ...] = ()
+_CANCELED_EVENT_IDS_GENERATION: Optional[int] = None
+_CANCELED_EVENT_IDS_LOCK = threading.Lock()
+
+
+def _canceled_store_event_ids() -> tuple[int, ...]:
+    """Canceled events the listing filters would otherwise still show."""
+    global _CANCELED_EVENT_IDS, _CANCELED_EVENT_IDS_GENERATION
+
+    generation = collection_generation("events")
+    with _CANCELED_EVENT_IDS_LOCK:
+        if generation == _CANCELED_EVENT_IDS_GENERATION:
+            return _CANCELED_EVENT_IDS
+    ids = []
+    for key, record in list(_EVENTS.items()):
+        # Canceling archives the Postgres row too, so the archived filter
+        # already drops it; only events published again after a cancel
+        # need excluding by id.
+        if not isinstance(record, dict) or record.get("archived"):
+            continue
+        flags = {field: record.get(field) for field in _CANCELLATION_FIELDS}
+        if not _event_is_canceled(flags):
+            continue
+        try:
+            ids.append(int(key))
+        except Exception:
+            continue
+    with _CANCELED_EVENT_IDS_LOCK:
+        _CANCELED_EVENT_IDS = tuple(sorted(ids))
+        _CANCELED_EVENT_IDS_GENERATION = generation
+        return _CANCELED_EVENT_IDS
+
+
+def _active_marketplace_events_query(db: Session):
+    """Published, non-archived, non-canceled events that have not ended.
+
+    SQL version of _event_is_active_marketplace_event: an event is past once
+    its end date (start date for one-day events) is before today in UTC.
+    """
+    today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    lifecycle_date = func.coalesce(Event.end_date, Event.start_date)
+    query = (
+        db.query(Event)
+        .filter(Event.published == True)  # noqa: E712
+        .filter(Event.archived == False)  # noqa: E712
+        .filter(or_(lifecycle_date.is_(None), lifecycle_date >= today_start))
+    )
+    canceled_ids = _canceled_store_event_ids()
+    if canceled_ids:
+        query = query.filter(~Event.id.in_(canceled_ids))
+    return query
+
+
 def _norm_email(value: Any) -> str:
     return str(value or "").strip().lower()
 
@@ -424,7 +501,8 @@ def _persist_event_mode(event_id: int, mode: Any = None, listing_only: Any = Non
 
     _EVENTS[eid] = dict(event_store)
     _EVENTS[str(eid)] = dict(event_store)
-    save_store()
+    save_records("events", eid)
+    invalidate_event_matches(eid)
     return normalized
 
 
@@ -483,7 +561,8 @@ def _persist_public_listing_fields(event_id: int, payload: Dict[str, Any]) -> Di
 
     _EVENTS[eid] = dict(event_store)
     _EVENTS[str(eid)] = dict(event_store)
-    save_store()
+    save_records("events", eid)
+    invalidate_event_matches(eid)
     return event_store
 
 
@@ -808,13 +887,16 @@ def _sync_event_to_store(event_data: Dict[str, Any], user: Optional[Dict[str, An
 
     _EVENTS[event_id] = merged
     _EVENTS[str(event_id)] = merged
-    save_store()
+    save_records("events", event_id)
+    invalidate_event_matches(event_id)
     return merged
 
 
 def _remove_event_from_store(event_id: int) -> None:
     _EVENTS.pop(int(event_id), None)
-    save_store()
+    _EVENTS.pop(str(int(event_id)), None)
+    save_records("events", int(event_id))
+    invalidate_event_matches(int(event_id))
 
 
 def _owned_events_for_user(db: Session, user: Dict[str, Any]) -> list[Event]:
@@ -1389,7 +1471,81 @@ def _category_availability_for_event(event_data: Dict[str, Any], applications: d
         "by_slug": {str(item.get("slug")): item for item in rows},
     }
 
+# Materialized availability per event. An entry is reused while the event's
+# application change counter, its updated_at and its needs are unchanged; it
+# expires when the earliest booth hold lapses or after MARKETPLACE_STATS_TTL
+# seconds, which also bounds staleness from diagram saves in other workers.
+MARKETPLACE_STATS_TTL = float(os.getenv("MARKETPLACE_STATS_TTL", "60") or 0)
+_MARKETPLACE_STATS: Dict[int, Dict[str, Any]] = {}
+_MARKETPLACE_STATS_LOCK = threading.Lock()
+
+
+def invalidate_marketplace_stats(event_id: Any = None) -> None:
+    with _MARKETPLACE_STATS_LOCK:
+        if event_id is None:
+            _MARKETPLACE_STATS.clear()
+            return
+        try:
+            _MARKETPLACE_STATS.pop(int(event_id), None)
+        except Exception:
+            pass
+
+
+def _seconds_until_next_hold_expiry(applications: dict) -> Optional[float]:
+    now = datetime.now(timezone.utc)
+    soonest: Optional[float] = None
+    for app in applications.values():
+        if not isinstance(app, dict):
+            continue
+        for key in ("booth_reserved_until", "reserved_until", "reservedUntil"):
+            raw = app.get(key)
+            if not raw:
+                continue
+            try:
+                until = datetime.fromisoformat(str(raw).replace("Z", "+00:00"))
+                remaining = (until - now).total_seconds()
+            except Exception:
+                continue
+            if remaining > 0 and (soonest is None or remaining < soonest):
+                soonest = remaining
+    return soonest
+
+
 def _event_marketplace_stats(event: dict, applications: dict, db: Optional[Session] = None) -> dict:
+    event_id = int(event.get("id") or 0)
+    if applications is not _APPLICATIONS or not event_id or MARKETPLACE_STATS_TTL <= 0:
+        return _compute_event_marketplace_stats(event, applications, db)
+
+    key = (
+        application_generation(event_id),
+        db is not None,
+        str(event.get("updated_at") or ""),
+        repr((
+            event.get("event_mode"),
+            event.get("eventMode"),
+            event.get("listing_only"),
+            event.get("listingOnly"),
+            _extract_event_needs(event),
+        )),
+    )
+    now = time.monotonic()
+    with _MARKETPLACE_STATS_LOCK:
+        cached = _MARKETPLACE_STATS.get(event_id)
+        if cached is not None and cached["key"] == key and cached["expires"] > now:
+            return dict(cached["stats"])
+
+    event_applications = applications_for_event(event_id)
+    stats = _compute_event_marketplace_stats(event, event_applications, db)
+    expires = now + MARKETPLACE_STATS_TTL
+    next_hold_expiry = _seconds_until_next_hold_expiry(event_applications)
+    if next_hold_expiry is not None:
+        expires = min(expires, now + next_hold_expiry)
+    with _MARKETPLACE_STATS_LOCK:
+        _MARKETPLACE_STATS[event_id] = {"key": key, "expires": expires, "stats": stats}
+    return dict(stats)
+
+
+def _compute_event_marketplace_stats(event: dict, applications: dict, db: Optional[Session] = None) -> dict:
     event_id = int(event.get("id") or 0)
     if _normalize_event_mode(event.get("event_mode") or event.get("eventMode"), event.get("listing_only") or event.get("listingOnly")) == LISTING_ONLY_MODE:
         empty_availability = {"items": [], "by_category": {}, "by_slug": {}}
@@ -1642,7 +1798,8 @@ def _persist_event_needs(event_id: int, needs: list[str]) -> list[str]:
     _REQUIREMENTS[eid] = req_store
     _REQUIREMENTS[str(eid)] = dict(req_store)
 
-    save_store()
+    save_records("requirements", eid)
+    invalidate_event_matches(eid)
     return clean
 
 
@@ -1712,61 +1869,201 @@ def _profile_categories(profile: Profile) -> list[str]:
     ])
 
 
-def _create_vendor_event_alerts(db: Session, event_data: Dict[str, Any]) -> int:
-    """Create in-app alerts for Premium vendors whose categories match a newly published event."""
+# Category -> vendor index for alert fan-out. Built from alert-eligible vendor
+# profiles and refreshed incrementally from Profile.updated_at, with a full
+# rebuild every VENDOR_CATEGORY_INDEX_REBUILD_SECONDS to drop deleted rows.
+# updated_at is the writer's transaction start, so each refresh re-reads
+# VENDOR_CATEGORY_CURSOR_LAG_SECONDS behind the watermark. Refreshes run at
+# startup and in the fan-out job, never in the publish request.
+VENDOR_CATEGORY_INDEX_REBUILD_SECONDS = float(os.getenv("VENDOR_CATEGORY_INDEX_REBUILD_SECONDS", "3600") or 3600)
+VENDOR_CATEGORY_CURSOR_LAG_SECONDS = float(os.getenv("VENDOR_CATEGORY_CURSOR_LAG_SECONDS", "300") or 0)
+_EVENT_ALERT_INSERT_CHUNK = 1000
+
+_VENDOR_CATEGORY_INDEX: Dict[str, set[int]] = {}
+_VENDOR_CATEGORY_PROFILES: Dict[int, list[str]] = {}
+_VENDOR_CATEGORY_WATERMARK: Optional[datetime] = None
+_VENDOR_CATEGORY_BUILT_AT = 0.0
+# _VENDOR_CATEGORY_LOCK guards the index; the refresh lock keeps the profile
+# scan outside it so readers do not wait on the database.
+_VENDOR_CATEGORY_LOCK = threading.Lock()
+_VENDOR_CATEGORY_REFRESH_LOCK = threading.Lock()
+
+
+def _unindex_vendor_categories(profile_id: int) -> None:
+    for category in _VENDOR_CATEGORY_PROFILES.pop(profile_id, []):
+        slug = _category_slug(category)
+        ids = _VENDOR_CATEGORY_INDEX.get(slug)
+        if ids is not None:
+            ids.discard(profile_id)
+            if not ids:
+                _VENDOR_CATEGORY_INDEX.pop(slug, None)
+
+
+def _index_vendor_categories(profile: Profile) -> None:
+    profile_id = int(profile.id)
+    _unindex_vendor_categories(profile_id)
+    if not _norm_email(profile.email) or not _profile_is_alert_eligible_vendor(profile):
+        return
+    categories = [category for category in _profile_categories(profile) if _category_slug(category)]
+    if not categories:
+        return
+    _VENDOR_CATEGORY_PROFILES[profile_id] = categories
+    for category in categories:
+        _VENDOR_CATEGORY_INDEX.setdefault(_category_slug(category), set()).add(profile_id)
+
+
+def _refresh_vendor_category_index(db: Session) -> None:
+    global _VENDOR_CATEGORY_WATERMARK, _VENDOR_CATEGORY_BUILT_AT
+
+    with _VENDOR_CATEGORY_REFRESH_LOCK:
+        full = (
+            _VENDOR_CATEGORY_WATERMARK is None
+            or time.monotonic() - _VENDOR_CATEGORY_BUILT_AT > VENDOR_CATEGORY_INDEX_REBUILD_SECONDS
+        )
+        query = db.query(Profile).filter(Profile.role == "vendor")
+        if full:
+            # DB clock, not ours; stays None (full rebuilds) while there are no vendors.
+            watermark = query.with_entities(func.max(Profile.updated_at)).scalar()
+        else:
+            watermark = _VENDOR_CATEGORY_WATERMARK
+            since = watermark - timedelta(seconds=VENDOR_CATEGORY_CURSOR_LAG_SECONDS)
+            query = query.filter(Profile.updated_at >= since)
+        rows = query.all()
+
+        with _VENDOR_CATEGORY_LOCK:
+            if full:
+                _VENDOR_CATEGORY_INDEX.clear()
+                _VENDOR_CATEGORY_PROFILES.clear()
+                _VENDOR_CATEGORY_BUILT_AT = time.monotonic()
+            for row in rows:
+                _index_vendor_categories(row)
+                if not full and row.updated_at is not None and row.updated_at > watermark:
+                    watermark = row.updated_at
+            _VENDOR_CATEGORY_WATERMARK = watermark
+
+
+def _warm_vendor_category_index() -> None:
+    try:
+        from app.db import SessionLocal
+    except Exception:
+        return
+    if SessionLocal is None:
+        return
+    db = SessionLocal()
+    try:
+        _refresh_vendor_category_index(db)
+    except Exception:
+        logger.exception("Vendor category index warm-up failed")
+    finally:
+        db.close()
+
+
+def warm_vendor_category_index() -> threading.Thread:
+    """Build the vendor category index in the background so the first publish finds it warm."""
+    thread = threading.Thread(target=_warm_vendor_category_index, name="vendor-category-index", daemon=True)
+    thread.start()
+    return thread
+
+
+def _vendor_alert_candidates(
+    db: Session,
+    event_data: Dict[str, Any],
+    *,
+    refresh: bool = True,
+) -> tuple[set[str], Dict[int, list[str]]]:
+    """Return the event's category slugs and matching categories per vendor profile id.
+
+    With ``refresh=False`` the index is read as it stands.
+    """
     event_id = int(event_data.get("id") or 0)
     if not event_id:
-        return 0
+        return set(), {}
 
     event_categories = _event_alert_categories(event_data)
     event_slugs = {_category_slug(category) for category in event_categories if _category_slug(category)}
     if not event_slugs:
+        return set(), {}
+
+    if refresh:
+        _refresh_vendor_category_index(db)
+    candidates: Dict[int, list[str]] = {}
+    with _VENDOR_CATEGORY_LOCK:
+        profile_ids: set[int] = set()
+        for slug in event_slugs:
+            profile_ids |= _VENDOR_CATEGORY_INDEX.get(slug, set())
+        for profile_id in profile_ids:
+            matching = [
+                category
+                for category in _VENDOR_CATEGORY_PROFILES.get(profile_id, [])
+                if _category_slug(category) in event_slugs
+            ]
+            if matching:
+                candidates[profile_id] = matching
+    return event_slugs, candidates
+
+
+def _insert_event_alert_rows(db: Session, rows: list[Dict[str, Any]]) -> None:
+    dialect = db.get_bind().dialect.name
+    for start in range(0, len(rows), _EVENT_ALERT_INSERT_CHUNK):
+        chunk = rows[start:start + _EVENT_ALERT_INSERT_CHUNK]
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            db.bulk_insert_mappings(EventAlert, chunk)
+            continue
+        db.execute(dialect_insert(EventAlert).values(chunk).on_conflict_do_nothing())
+
+
+def _deliver_vendor_event_alerts(
+    db: Session,
+    event_data: Dict[str, Any],
+    event_slugs: set[str],
+    candidates: Dict[int, list[str]],
+) -> int:
+    """Create alerts for candidate vendors with one existence check and bulk inserts."""
+    event_id = int(event_data.get("id") or 0)
+    if not event_id or not candidates:
         return 0
 
-    rows = db.query(Profile).filter(Profile.role == "vendor").all()
-    created = 0
     title = _clean_event_title(event_data.get("title"), event_data.get("name"), event_id=event_id)
     city = _safe_text(event_data.get("city"))
     state = _safe_text(event_data.get("state"))
     location = ", ".join([part for part in [city, state] if part])
+    where = f" in {location}" if location else ""
 
-    for vendor in rows:
-        email = _norm_email(vendor.email)
-        if not email or not _profile_is_alert_eligible_vendor(vendor):
-            continue
+    existing = {
+        (_norm_email(email), _safe_text(category).lower())
+        for email, category in db.query(EventAlert.vendor_email, EventAlert.category).filter(EventAlert.event_id == event_id)
+    }
 
-        vendor_categories = _profile_categories(vendor)
-        matching = [category for category in vendor_categories if _category_slug(category) in event_slugs]
-        if not matching:
+    rows: list[Dict[str, Any]] = []
+    profiles = db.query(Profile).filter(Profile.id.in_(sorted(candidates))).all()
+    for vendor in profiles:
+        # Re-check against the current row; the index may trail profile edits.
+        email = _norm_email(vendor.email)
+        if vendor.role != "vendor" or not email or not _profile_is_alert_eligible_vendor(vendor):
             continue
-
+        matching = [category for category in _profile_categories(vendor) if _category_slug(category) in event_slugs]
         for category in matching:
             category_label = _safe_text(category) or "your category"
-            existing = (
-                db.query(EventAlert)
-                .filter(
-                    func.lower(EventAlert.vendor_email) == email,
-                    EventAlert.event_id == event_id,
-                    func.lower(EventAlert.category) == category_label.lower(),
-                )
-                .one_or_none()
-            )
-            if existing:
+            key = (email, category_label.lower())
+            if key in existing:
                 continue
-
-            where = f" in {location}" if location else ""
-            alert = EventAlert(
-                vendor_email=email,
-                vendor_profile_id=vendor.id,
-                event_id=event_id,
-                event_title=title,
-                event_city=city or None,
-                event_state=state or None,
-                category=category_label,
-                alert_type="new_matching_event",
-                message=f"New {category_label} opportunity: {title}{where}.",
-                read=False,
-                data={
+            existing.add(key)
+            rows.append({
+                "vendor_email": email,
+                "vendor_profile_id": vendor.id,
+                "event_id": event_id,
+                "event_title": title,
+                "event_city": city or None,
+                "event_state": state or None,
+                "category": category_label,
+                "alert_type": "new_matching_event",
+                "message": f"New {category_label} opportunity: {title}{where}.",
+                "read": False,
+                "data": {
                     "event_id": event_id,
                     "event_title": title,
                     "category": category_label,
@@ -1774,13 +2071,56 @@ def _create_vendor_event_alerts(db: Session, event_data: Dict[str, Any]) -> int:
                     "state": state,
                     "source": "event_publish",
                 },
-            )
-            db.add(alert)
-            created += 1
+            })
 
-    if created:
+    if rows:
+        _insert_event_alert_rows(db, rows)
         db.commit()
-    return created
+    return len(rows)
+
+
+def _run_vendor_event_alert_job(event_data: Dict[str, Any]) -> None:
+    try:
+        from app.db import SessionLocal
+    except Exception:
+        return
+    if SessionLocal is None:
+        return
+    db = SessionLocal()
+    try:
+        created = _create_vendor_event_alerts(db, event_data)
+        logger.info("Created %s vendor alerts for event %s", created, event_data.get("id"))
+    except Exception:
+        db.rollback()
+        logger.exception("Vendor alert fan-out failed for event %s", event_data.get("id"))
+    finally:
+        db.close()
+
+
+def _create_vendor_event_alerts(db: Session, event_data: Dict[str, Any]) -> int:
+    """Create in-app alerts for Premium vendors whose categories match a newly published event."""
+    event_slugs, candidates = _vendor_alert_candidates(db, event_data)
+    return _deliver_vendor_event_alerts(db, event_data, event_slugs, candidates)
+
+
+def _queue_vendor_event_alerts(
+    db: Session,
+    event_data: Dict[str, Any],
+    background_tasks: Optional[BackgroundTasks],
+) -> int:
+    """Schedule the alert fan-out after the response; returns alerts queued.
+
+    The count is read from the category index as it stands, before the job
+    refreshes it and checks existing alerts, so vendors already alerted for
+    this event are included in it.
+    """
+    if background_tasks is None:
+        return _create_vendor_event_alerts(db, event_data)
+    event_slugs, candidates = _vendor_alert_candidates(db, event_data, refresh=False)
+    if not event_slugs:
+        return 0
+    background_tasks.add_task(_run_vendor_event_alert_job, dict(event_data))
+    return sum(len(categories) for categories in candidates.values())
 
 
 @router.get("/invites/{invite_id}")
@@ -1821,24 +2161,25 @@ def get_invite(invite_id: str, db: Session = Depends(get_db)):
 
 
 @router.get("/events")
-async def get_events(
+def get_events(
+    request: Request,
     limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
     offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
 ):
-    all_rows = (
-        db.query(Event)
-        .filter(Event.published == True)  # noqa: E712
-        .filter(Event.archived == False)  # noqa: E712
-        .order_by(Event.id.desc())
-        .all()
+    return response_cache.cached_json(
+        request,
+        lambda: _events_page(db, limit, offset),
+        tags=("events",),
     )
 
-    active_rows = [row for row in all_rows if _event_is_active_marketplace_event(_serialize_event_model(row))]
-    total = len(active_rows)
+
+def _events_page(db: Session, limit: int, offset: int) -> Dict[str, Any]:
+    query = _active_marketplace_events_query(db)
+    total = query.count()
     safe_limit = _page_limit(limit)
     safe_offset = _page_offset(offset)
-    rows = active_rows[safe_offset:safe_offset + safe_limit]
+    rows = query.order_by(Event.id.desc()).offset(safe_offset).limit(safe_limit).all()
 
     result = []
     for row in rows:
@@ -1917,6 +2258,7 @@ def organizer_create_event(
     db.add(event)
     db.commit()
     db.refresh(event)
+    response_cache.invalidate_event(event.id)
 
     serialized = _serialize_event_model(event)
     mode = create_mode
@@ -1968,6 +2310,7 @@ def organizer_get_event(
 @router.patch("/organizer/events/{event_id}")
 def organizer_patch_event(
     event_id: int,
+    background_tasks: BackgroundTasks,
     payload: Dict[str, Any] = Body(default={}),
     user: dict = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -1983,6 +2326,8 @@ def organizer_patch_event(
     _apply_event_patch_model(ev, incoming)
     db.add(ev)
     db.commit()
+    invalidate_event_resolution(event_id)
+    response_cache.invalidate_event(event_id)
     db.refresh(ev)
 
     serialized = _serialize_event_model(ev)
@@ -2035,6 +2380,7 @@ def organizer_patch_event(
             ev.published = True
             db.add(ev)
             db.commit()
+            response_cache.invalidate_event(event_id)
             db.refresh(ev)
             serialized = _serialize_event_model(ev)
         _apply_event_mode_aliases(serialized, mode)
@@ -2050,10 +2396,10 @@ def organizer_patch_event(
     synced = _sync_event_to_store(serialized, user)
     _EVENTS[int(event_id)] = dict(synced)
     _EVENTS[str(int(event_id))] = dict(synced)
-    save_store()
+    save_records("events", int(event_id))
 
     if bool(ev.published) and not was_published:
-        _create_vendor_event_alerts(db, synced)
+        synced = {**synced, "alerts_queued": _queue_vendor_event_alerts(db, synced, background_tasks)}
     return synced
 
 @router.delete("/organizer/events/{event_id}")
@@ -2066,16 +2412,19 @@ def organizer_delete_event(
     eid = int(event_id)
     db.delete(ev)
     db.commit()
+    invalidate_event_resolution(event_id)
+    response_cache.invalidate_event(event_id)
 
     _REQUIREMENTS.pop(eid, None)
     _remove_event_from_store(eid)
-    save_store()
+    save_records("requirements", eid)
     return {"ok": True}
 
 
 @router.post("/organizer/events/{event_id}/publish")
 def organizer_publish_event(
     event_id: int,
+    background_tasks: BackgroundTasks,
     user: dict = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
@@ -2085,6 +2434,8 @@ def organizer_publish_event(
     ev.archived = False
     db.add(ev)
     db.commit()
+    invalidate_event_resolution(event_id)
+    response_cache.invalidate_event(event_id)
     db.refresh(ev)
     serialized = _serialize_event_model(ev)
     store_mode_payload = _event_mode_store_payload(int(event_id))
@@ -2095,7 +2446,7 @@ def organizer_publish_event(
     )
     serialized = _sync_event_to_store(serialized, user)
     if not was_published and serialized.get("event_mode") != LISTING_ONLY_MODE:
-        _create_vendor_event_alerts(db, serialized)
+        serialized = {**serialized, "alerts_queued": _queue_vendor_event_alerts(db, serialized, background_tasks)}
     return serialized
 
 
@@ -2117,6 +2468,8 @@ def organizer_cancel_event(
     ev.archived = True
     db.add(ev)
     db.commit()
+    invalidate_event_resolution(event_id)
+    response_cache.invalidate_event(event_id)
     db.refresh(ev)
 
     serialized = _serialize_event_model(ev)
@@ -2134,7 +2487,8 @@ def organizer_cancel_event(
     _sync_event_to_store(serialized, user)
 
     # Mark existing application records without destroying payment/history data.
-    for app in _APPLICATIONS.values():
+    canceled_app_keys = []
+    for app_key, app in _APPLICATIONS.items():
         if not isinstance(app, dict):
             continue
         try:
@@ -2148,8 +2502,9 @@ def organizer_cancel_event(
         app["event_cancellation_reason"] = reason
         if str(app.get("status") or "").strip().lower() not in {"paid", "confirmed"}:
             app["status"] = "event_canceled"
+        canceled_app_keys.append(app_key)
 
-    save_store()
+    save_records("applications", *canceled_app_keys)
     return serialized
 
 
@@ -2163,6 +2518,8 @@ def organizer_archive_event(
     ev.archived = True
     db.add(ev)
     db.commit()
+    invalidate_event_resolution(event_id)
+    response_cache.invalidate_event(event_id)
     db.refresh(ev)
     serialized = _serialize_event_model(ev)
     _sync_event_to_store(serialized, user)
@@ -2179,6 +2536,8 @@ def organizer_restore_event(
     ev.archived = False
     db.add(ev)
     db.commit()
+    invalidate_event_resolution(event_id)
+    response_cache.invalidate_event(event_id)
     db.refresh(ev)
     serialized = _serialize_event_model(ev)
     serialized.update({
@@ -2195,11 +2554,42 @@ def organizer_restore_event(
     return serialized
 
 
+def _ledger_date_range(start: Optional[str], end: Optional[str]) -> tuple[Optional[str], Optional[str]]:
+    """Validate optional YYYY-MM-DD bounds for the earnings and payout reports."""
+    bounds = []
+    for label, value in (("start", start), ("end", end)):
+        text = str(value or "").strip()
+        if not text:
+            bounds.append(None)
+            continue
+        try:
+            bounds.append(date.fromisoformat(text[:10]).isoformat())
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=f"Invalid {label} date; use YYYY-MM-DD.") from exc
+    if bounds[0] and bounds[1] and bounds[0] > bounds[1]:
+        raise HTTPException(status_code=400, detail="start must be on or before end.")
+    return bounds[0], bounds[1]
+
+
+def _organizer_ledger_scope(db: Session, user: Dict[str, Any]) -> Dict[str, Any]:
+    """Ledger query arguments selecting the user's payments; empty for admins (every payment)."""
+    if _is_admin_user(user):
+        return {}
+    return {
+        "email": _norm_email(user.get("email")),
+        "organizer_id": user.get("organizer_id") or user.get("id") or user.get("sub"),
+        "event_ids": {int(ev.id or 0) for ev in _owned_events_for_user(db, user)},
+    }
+
+
 @router.get("/organizer/earnings")
 def organizer_earnings(
+    start: Optional[str] = Query(None),
+    end: Optional[str] = Query(None),
     user: dict = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
+    start, end = _ledger_date_range(start, end)
     store = get_store_snapshot()
     events = store.get("events", {}) or {}
     payments = store.get("payments", {}) or {}
@@ -2209,69 +2599,46 @@ def organizer_earnings(
     if not isinstance(payments, dict):
         payments = {}
 
-    owned_event_ids = {int(ev.id or 0) for ev in _owned_events_for_user(db, user)}
-
-    gross_sales = 0.0
-    platform_fees = 0.0
-    net_earnings = 0.0
-    payouts_paid = 0.0
-    payouts_owed = 0.0
-
-    event_totals: Dict[int, Dict[str, Any]] = {}
+    # Totals come from the payment ledger, per event; only the organizer's own
+    # payments are read, for the payout rows.
+    ledger = payment_ledger()
+    scope = _organizer_ledger_scope(db, user)
+    if scope:
+        per_event = ledger.organizer_totals(**scope, start=start, end=end)
+        payment_keys = ledger.organizer_payment_keys(**scope, start=start, end=end)
+    else:
+        per_event = ledger.event_totals(start=start, end=end)
+        payment_keys = ledger.payment_keys(start=start, end=end)
+
+    db_titles: Dict[int, str] = {}
+
+    def event_title(event_id: int, payment: Dict[str, Any]) -> str:
+        if event_id not in db_titles:
+            db_titles[event_id] = _lookup_event_title_from_db(db, event_id)
+        event_row = events.get(str(event_id)) or {}
+        return _clean_event_title(
+            db_titles[event_id],
+            event_row.get("title"),
+            event_row.get("event_title"),
+            event_row.get("name"),
+            payment.get("event_title"),
+            event_id=event_id,
+        )
 
     payout_rows: list[Dict[str, Any]] = []
+    event_titles: Dict[int, str] = {}
 
-    for payment_key, payment in payments.items():
+    for payment_key in payment_keys:
+        payment = payments.get(payment_key)
         if not isinstance(payment, dict):
             continue
-        if str(payment.get("status", "")).lower() != "paid":
-            continue
 
         event_id = int(payment.get("event_id") or 0)
-        event_row = events.get(str(event_id)) or events.get(event_id) or {}
-
-        payment_email = _norm_email(
-            payment.get("organizer_email")
-            or (event_row or {}).get("organizer_email")
-            or (event_row or {}).get("owner_email")
-        )
-        payment_owner_id = (
-            payment.get("organizer_id")
-            or (event_row or {}).get("organizer_id")
-            or (event_row or {}).get("owner_id")
-            or (event_row or {}).get("created_by")
-        )
-
-        payment_belongs = event_id in owned_event_ids or _event_belongs_to_user(
-            {"organizer_email": payment_email, "organizer_id": payment_owner_id},
-            user,
-        )
-        if not payment_belongs:
-            continue
-
         amount = float(payment.get("amount") or 0)
         fee = float(payment.get("platform_fee") or 0)
         payout = float(payment.get("organizer_payout") or 0)
         payout_status = str(payment.get("payout_status") or "unpaid").strip().lower()
-
-        gross_sales += amount
-        platform_fees += fee
-        net_earnings += payout
-
-        if payout_status == "paid":
-            payouts_paid += payout
-        else:
-            payouts_owed += payout
-
-        db_event_title = _lookup_event_title_from_db(db, event_id)
-        title = _clean_event_title(
-            db_event_title,
-            (event_row or {}).get("title"),
-            (event_row or {}).get("event_title"),
-            (event_row or {}).get("name"),
-            payment.get("event_title"),
-            event_id=event_id,
-        )
+        title = event_titles.setdefault(event_id, event_title(event_id, payment))
 
         try:
             payment_id = int(payment_key)
@@ -2296,37 +2663,21 @@ def organizer_earnings(
             "paid_at": payment.get("paid_at") or payment.get("updated_at") or payment.get("created_at"),
         })
 
-        if event_id not in event_totals:
-            event_totals[event_id] = {
-                "event_id": event_id,
-                "event_title": title,
-                "gross_sales": 0.0,
-                "platform_fees": 0.0,
-                "net_earnings": 0.0,
-                "payouts_paid": 0.0,
-                "payouts_owed": 0.0,
-                "payout_status_counts": {"paid": 0, "unpaid": 0},
-            }
-
-        event_totals[event_id]["gross_sales"] += amount
-        event_totals[event_id]["platform_fees"] += fee
-        event_totals[event_id]["net_earnings"] += payout
-
-        if payout_status == "paid":
-            event_totals[event_id]["payouts_paid"] += payout
-            event_totals[event_id]["payout_status_counts"]["paid"] += 1
-        else:
-            event_totals[event_id]["payouts_owed"] += payout
-            event_totals[event_id]["payout_status_counts"]["unpaid"] += 1
-
+    summary = [0] * 8
     event_rows = []
-    for row in event_totals.values():
-        row["gross_sales"] = round(float(row["gross_sales"]), 2)
-        row["platform_fees"] = round(float(row["platform_fees"]), 2)
-        row["net_earnings"] = round(float(row["net_earnings"]), 2)
-        row["payouts_paid"] = round(float(row["payouts_paid"]), 2)
-        row["payouts_owed"] = round(float(row["payouts_owed"]), 2)
-        event_rows.append(row)
+    for event_id, vector in per_event.items():
+        totals = as_ledger_totals(vector)
+        summary = [a + b for a, b in zip(summary, vector, strict=True)]
+        event_rows.append({
+            "event_id": event_id,
+            "event_title": event_titles.get(event_id) or event_title(event_id, {}),
+            "gross_sales": totals["gross_sales"],
+            "platform_fees": totals["platform_fees"],
+            "net_earnings": totals["net_earnings"],
+            "payouts_paid": totals["payouts_paid"],
+            "payouts_owed": totals["payouts_owed"],
+            "payout_status_counts": {"paid": totals["paid_count"], "unpaid": totals["unpaid_count"]},
+        })
 
     event_rows.sort(
         key=lambda row: (
@@ -2345,21 +2696,47 @@ def organizer_earnings(
         reverse=True,
     )
 
+    totals = as_ledger_totals(summary)
     return {
         "summary": {
-            "gross_sales": round(gross_sales, 2),
-            "platform_fees": round(platform_fees, 2),
-            "net_earnings": round(net_earnings, 2),
-            "payouts_paid": round(payouts_paid, 2),
-            "payouts_owed": round(payouts_owed, 2),
+            "gross_sales": totals["gross_sales"],
+            "platform_fees": totals["platform_fees"],
+            "net_earnings": totals["net_earnings"],
+            "payouts_paid": totals["payouts_paid"],
+            "payouts_owed": totals["payouts_owed"],
         },
+        "range": {"start": start, "end": end},
         "events": event_rows,
         "payouts": payout_rows,
     }
 
 
+@router.get("/organizer/earnings/rollup")
+def organizer_earnings_rollup(
+    start: Optional[str] = Query(None),
+    end: Optional[str] = Query(None),
+    period: str = Query("day"),
+    user: dict = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Earnings per day or month between start and end (inclusive)."""
+    start, end = _ledger_date_range(start, end)
+    period = str(period or "day").strip().lower()
+    if period not in {"day", "month"}:
+        raise HTTPException(status_code=400, detail="period must be day or month.")
+
+    rows = payment_ledger().rollup(**_organizer_ledger_scope(db, user), start=start, end=end, period=period)
+
+    return {
+        "period": period,
+        "range": {"start": start, "end": end},
+        "rows": [{"period": key, **as_ledger_totals(vector)} for key, vector in rows],
+    }
+
+
 @router.get("/admin/payouts")
-def admin_list_payouts():
+def admin_list_payouts(start: Optional[str] = Query(None), end: Optional[str] = Query(None)):
+    start, end = _ledger_date_range(start, end)
     store = get_store_snapshot()
     events = store.get("events", {}) or {}
     payments = store.get("payments", {}) or {}
@@ -2369,18 +2746,13 @@ def admin_list_payouts():
     if not isinstance(payments, dict):
         payments = {}
 
+    ledger = payment_ledger()
     rows = []
-    total_gross = 0.0
-    total_platform_fees = 0.0
-    total_organizer_payouts = 0.0
-    total_paid_out = 0.0
-    total_owed = 0.0
 
-    for payment_id_raw, payment in payments.items():
+    for payment_id_raw in ledger.payment_keys(start=start, end=end):
+        payment = payments.get(payment_id_raw)
         if not isinstance(payment, dict):
             continue
-        if str(payment.get("status") or "").strip().lower() != "paid":
-            continue
 
         try:
             payment_id = int(payment_id_raw)
@@ -2394,16 +2766,16 @@ def admin_list_payouts():
         payout_sent_at = payment.get("payout_sent_at")
 
         event_id = int(payment.get("event_id") or 0)
-        event_row = events.get(str(event_id)) or events.get(event_id) or {}
+        event_row = events.get(str(event_id)) or {}
         event_title = _clean_event_title(
-            (event_row or {}).get("title"),
-            (event_row or {}).get("event_title"),
-            (event_row or {}).get("name"),
+            event_row.get("title"),
+            event_row.get("event_title"),
+            event_row.get("name"),
             payment.get("event_title"),
             event_id=event_id,
         )
 
-        row = {
+        rows.append({
             "payment_id": payment_id,
             "event_id": event_id,
             "event_title": event_title,
@@ -2420,17 +2792,7 @@ def admin_list_payouts():
             "payout_sent_at": payout_sent_at,
             "created_at": payment.get("created_at"),
             "paid_at": payment.get("paid_at") or payment.get("updated_at") or payment.get("created_at"),
-        }
-        rows.append(row)
-
-        total_gross += amount
-        total_platform_fees += platform_fee
-        total_organizer_payouts += organizer_payout
-
-        if payout_status == "paid":
-            total_paid_out += organizer_payout
-        else:
-            total_owed += organizer_payout
+        })
 
     rows.sort(
         key=lambda row: (
@@ -2441,16 +2803,18 @@ def admin_list_payouts():
         reverse=True,
     )
 
+    totals = as_ledger_totals(ledger.totals(start, end))
     return {
         "summary": {
-            "gross_sales": round(total_gross, 2),
-            "platform_fees": round(total_platform_fees, 2),
-            "organizer_payouts": round(total_organizer_payouts, 2),
-            "payouts_paid": round(total_paid_out, 2),
-            "payouts_owed": round(total_owed, 2),
-            "paid_count": sum(1 for row in rows if str(row.get("payout_status") or "") == "paid"),
-            "unpaid_count": sum(1 for row in rows if str(row.get("payout_status") or "") != "paid"),
+            "gross_sales": totals["gross_sales"],
+            "platform_fees": totals["platform_fees"],
+            "organizer_payouts": totals["net_earnings"],
+            "payouts_paid": totals["payouts_paid"],
+            "payouts_owed": totals["payouts_owed"],
+            "paid_count": totals["paid_count"],
+            "unpaid_count": totals["unpaid_count"],
         },
+        "range": {"start": start, "end": end},
         "payouts": rows,
     }
 
@@ -2482,7 +2846,9 @@ def admin_mark_payout_paid(payment_id: int):
 
     payment["payout_status"] = "paid"
     payment["payout_sent_at"] = utc_now_iso()
-    save_store()
+    save_records("payments", payment.get("id") or payment_id)
+    # Payout state is money state: durable before we answer.
+    flush(sync=True)
 
     return {
         "ok": True,
@@ -2580,7 +2946,10 @@ def _save_requirements_for_event(event_id: int, payload: Dict[str, Any], db: Ses
     ev.requirements_published = True
     db.add(ev)
     db.commit()
-    save_store()
+    invalidate_event_resolution(event_id)
+    response_cache.invalidate_event(event_id)
+    invalidate_event_matches(event_id)
+    save_records("events", int(event_id))
 
     return _requirements_payload_for_event(int(event_id), db=db)
 
@@ -2624,22 +2993,24 @@ def get_organizer_event_requirements(event_id: int, db: Session = Depends(get_db
 
 @router.get("/public/events")
 def public_list_events(
+    request: Request,
     limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
     offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
 ):
-    rows_all = (
-        db.query(Event)
-        .filter(Event.published == True)  # noqa: E712
-        .filter(Event.archived == False)  # noqa: E712
-        .order_by(Event.id.desc())
-        .all()
+    return response_cache.cached_json(
+        request,
+        lambda: _public_events_page(db, limit, offset),
+        tags=("events",),
     )
-    active_rows = [row for row in rows_all if _event_is_active_marketplace_event(_serialize_event_model(row))]
-    total = len(active_rows)
+
+
+def _public_events_page(db: Session, limit: int, offset: int) -> Dict[str, Any]:
+    query = _active_marketplace_events_query(db)
+    total = query.count()
     safe_limit = _page_limit(limit)
     safe_offset = _page_offset(offset)
-    rows = active_rows[safe_offset:safe_offset + safe_limit]
+    rows = query.order_by(Event.id.desc()).offset(safe_offset).limit(safe_limit).all()
 
     out = []
     for event in rows:
@@ -2807,9 +3178,37 @@ def _public_profile_for_vendor(db: Session, email: str) -> Optional[Profile]:
         return None
 
 
-def _public_vendor_payload_from_app(db: Session, app: Dict[str, Any]) -> Dict[str, Any]:
-    email = _norm_email(app.get("vendor_email") or app.get("email") or app.get("user_email"))
-    profile = _public_profile_for_vendor(db, email)
+def _public_app_vendor_email(app: Dict[str, Any]) -> str:
+    return _norm_email(app.get("vendor_email") or app.get("email") or app.get("user_email"))
+
+
+def _public_profiles_for_vendors(db: Session, emails: set[str]) -> Dict[str, Profile]:
+    """Load vendor profiles for all ``emails`` with one query."""
+    emails = {email for email in emails if email}
+    if not emails:
+        return {}
+    profiles: Dict[str, Profile] = {}
+    try:
+        rows = (
+            db.query(Profile)
+            .filter(Profile.role == "vendor")
+            .filter(func.lower(Profile.email).in_(sorted(emails)))
+            .all()
+        )
+    except Exception:
+        return {}
+    for row in rows:
+        profiles.setdefault(_norm_email(row.email), row)
+    return profiles
+
+
+def _public_vendor_payload_from_app(
+    db: Session,
+    app: Dict[str, Any],
+    profiles: Optional[Dict[str, Profile]] = None,
+) -> Dict[str, Any]:
+    email = _public_app_vendor_email(app)
+    profile = profiles.get(email) if profiles is not None else _public_profile_for_vendor(db, email)
     profile_data = dict(profile.data or {}) if profile and isinstance(profile.data, dict) else {}
     business_name = str(
         app.get("business_name")
@@ -2856,7 +3255,7 @@ def _public_vendor_payload_from_app(db: Session, app: Dict[str, Any]) -> Dict[st
 
 def _public_applications_for_event(event_id: int) -> list[Dict[str, Any]]:
     out: list[Dict[str, Any]] = []
-    for app in _APPLICATIONS.values():
+    for app in applications_for_event(event_id).values():
         if not isinstance(app, dict):
             continue
         try:
@@ -2868,62 +3267,58 @@ def _public_applications_for_event(event_id: int) -> list[Dict[str, Any]]:
     return out
 
 
-@router.get("/public/events/{event_id}/diagram")
-def public_event_diagram(event_id: int, db: Session = Depends(get_db)):
-    """Return a no-login, read-only floorplan payload for public visitors.
+_PUBLIC_BOOTH_HOLD_STATUSES = {"approved", "accepted", "confirmed", "submitted", "under_review", "pending"}
 
-    This intentionally exposes only map geometry and assigned/reserved vendor
-    display data. It does not expose vendor application controls or private
-    application documents.
-    """
-    event = (
-        db.query(Event)
-        .filter(Event.id == int(event_id))
-        .filter(Event.published == True)  # noqa: E712
-        .filter(Event.archived == False)  # noqa: E712
-        .first()
-    )
 
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
+def _public_booth_assignments(event_apps: list[Dict[str, Any]]) -> Dict[str, tuple[int, Dict[str, Any]]]:
+    """Map each booth token to the first application (in store order) holding it."""
+    assignments: Dict[str, tuple[int, Dict[str, Any]]] = {}
+    for position, app in enumerate(event_apps):
+        status = str(app.get("status") or "").strip().lower()
+        payment_status = _coerce_payment_status(app.get("payment_status") or app.get("paymentStatus"))
+        if status not in _PUBLIC_BOOTH_HOLD_STATUSES and payment_status not in {"paid", "pending"}:
+            continue
+        for token in _public_application_booth_tokens(app):
+            assignments.setdefault(token, (position, app))
+    return assignments
 
-    event_dict = _serialize_event_model(event)
-    if not _event_is_active_marketplace_event(event_dict):
-        raise HTTPException(status_code=404, detail="Event not found")
 
-    diagram_row = (
-        db.query(Diagram)
-        .filter(Diagram.event_id == int(event_id))
-        .order_by(Diagram.id.desc())
-        .first()
-    )
+def _public_assigned_app(
+    assignments: Dict[str, tuple[int, Dict[str, Any]]],
+    booth_tokens: set[str],
+) -> Optional[Dict[str, Any]]:
+    matches = [assignments[token] for token in booth_tokens if token in assignments]
+    if not matches:
+        return None
+    return min(matches, key=lambda item: item[0])[1]
 
-    diagram_payload = diagram_row.diagram if diagram_row and isinstance(diagram_row.diagram, dict) else {}
+
+def _build_public_event_diagram(
+    db: Session,
+    event_id: int,
+    diagram_payload: Dict[str, Any],
+) -> Dict[str, Any]:
     raw_booths = _iter_diagram_booths(diagram_payload)
-    event_apps = _public_applications_for_event(int(event_id))
+    assignments = _public_booth_assignments(_public_applications_for_event(int(event_id)))
 
-    public_booths: list[Dict[str, Any]] = []
+    placed: list[tuple[int, Dict[str, Any], str, str, Optional[Dict[str, Any]]]] = []
     for index, booth in enumerate(raw_booths, start=1):
         if not isinstance(booth, dict) or not _booth_is_sellable(booth):
             continue
-
         booth_id = _public_booth_id(booth, f"booth-{index}")
         label = _public_booth_label(booth, f"B{index}")
-        booth_tokens = _public_booth_match_tokens(booth, booth_id, label)
-
-        matched_app: Optional[Dict[str, Any]] = None
-        for app in event_apps:
-            app_tokens = _public_application_booth_tokens(app)
-            if booth_tokens.intersection(app_tokens):
-                status = str(app.get("status") or "").strip().lower()
-                payment_status = _coerce_payment_status(app.get("payment_status") or app.get("paymentStatus"))
-                if status in {"approved", "accepted", "confirmed", "submitted", "under_review", "pending"} or payment_status in {"paid", "pending"}:
-                    matched_app = app
-                    break
+        matched_app = _public_assigned_app(assignments, _public_booth_match_tokens(booth, booth_id, label))
+        placed.append((index, booth, booth_id, label, matched_app))
 
+    profiles = _public_profiles_for_vendors(
+        db, {_public_app_vendor_email(app) for *_, app in placed if app}
+    )
+
+    public_booths: list[Dict[str, Any]] = []
+    for index, booth, booth_id, label, matched_app in placed:
         vendor_payload: Dict[str, Any] = {}
         if matched_app:
-            vendor_payload = _public_vendor_payload_from_app(db, matched_app)
+            vendor_payload = _public_vendor_payload_from_app(db, matched_app, profiles)
 
         meta = booth.get("meta") if isinstance(booth.get("meta"), dict) else {}
         base_status = str(booth.get("status") or meta.get("status") or "available").strip().lower()
@@ -2966,8 +3361,66 @@ def public_event_diagram(event_id: int, db: Session = Depends(get_db)):
     }
 
 
+@router.get("/public/events/{event_id}/diagram")
+def public_event_diagram(
+    event_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+):
+    """Return a no-login, read-only floorplan payload for public visitors.
+
+    This intentionally exposes only map geometry and assigned/reserved vendor
+    display data. It does not expose vendor application controls or private
+    application documents.
+    """
+    event = (
+        db.query(Event)
+        .filter(Event.id == int(event_id))
+        .filter(Event.published == True)  # noqa: E712
+        .filter(Event.archived == False)  # noqa: E712
+        .first()
+    )
+
+    if not event:
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    event_dict = _serialize_event_model(event)
+    if not _event_is_active_marketplace_event(event_dict):
+        raise HTTPException(status_code=404, detail="Event not found")
+
+    latest = (
+        db.query(Diagram.id, Diagram.version, Diagram.updated_at)
+        .filter(Diagram.event_id == int(event_id))
+        .order_by(Diagram.id.desc())
+        .first()
+    )
+    # Diagrams are also saved outside this router, so the entry is tied to
+    # the latest diagram row and the event's application counter as well.
+    version = (
+        str(event.updated_at or ""),
+        tuple(str(value) for value in latest) if latest else None,
+        application_generation(event_id),
+    )
+
+    def build() -> Dict[str, Any]:
+        diagram_row = db.query(Diagram).filter(Diagram.id == latest[0]).first() if latest else None
+        diagram_payload = diagram_row.diagram if diagram_row and isinstance(diagram_row.diagram, dict) else {}
+        return _build_public_event_diagram(db, int(event_id), diagram_payload)
+
+    return response_cache.cached_json(request, build, tags=(f"event:{int(event_id)}",), version=version)
+
+
 @router.get("/public/events/{event_id}")
-def public_get_event(event_id: int, db: Session = Depends(get_db)):
+def public_get_event(event_id: int, request: Request, db: Session = Depends(get_db)):
+    return response_cache.cached_json(
+        request,
+        lambda: _public_event_payload(db, int(event_id)),
+        tags=(f"event:{int(event_id)}",),
+        version=application_generation(event_id),
+    )
+
+
+def _public_event_payload(db: Session, event_id: int) -> Dict[str, Any]:
     ev = _get_event_row_or_404(db, event_id)
     event_dict = _serialize_event_model(ev)
     if not _event_is_active_marketplace_event(event_dict):
@@ -3221,6 +3674,12 @@ async def check_in_vendor(
     for key, value in request.query_params.items():
         data.setdefault(key, value)
 
+    # Only reading the body needs the loop; the lookups and store writes below
+    # block, so they run in the threadpool.
+    return await run_in_threadpool(_check_in_vendor, data, db)
+
+
+def _check_in_vendor(data: Dict[str, Any], db: Session) -> Dict[str, Any]:
     normalized = _extract_checkin_payload(data)
     event_id = _safe_int(normalized.get("event_id"), 0)
     if not event_id:
@@ -3248,7 +3707,7 @@ async def check_in_vendor(
         # overwrite the original check-in timestamp.
         checked_in_at = app.get("checked_in_at") or now
         app["check_in_status"] = "checked_in"
-        save_store()
+        save_records("applications", stored_key)
         return {
             "ok": True,
             "message": "Vendor already checked in",
@@ -3275,7 +3734,7 @@ async def check_in_vendor(
     if checked_in_by:
         app["checked_in_by"] = checked_in_by
 
-    save_store()
+    save_records("applications", stored_key)
 
     return {
         "ok": True,
@@ -3365,9 +3824,16 @@ def get_event_stats(event_id: int, db: Session = Depends(get_db)):
 
 @router.post("/dev/reset")
 def dev_reset():
-    _REQUIREMENTS.clear()
-    _APPLICATIONS.clear()
-    _PAYMENTS.clear()
+    cleared = {
+        "requirements": _REQUIREMENTS,
+        "applications": _APPLICATIONS,
+        "payments": _PAYMENTS,
+    }
+    for name, table in cleared.items():
+        keys = list(table)
+        table.clear()
+        if keys:
+            save_records(name, *keys)
 
     try:
         from app.routers.users import _USERS
@@ -3375,8 +3841,6 @@ def dev_reset():
     except Exception:
         pass
 
-    save_store()
-
     return {
         "ok": True,
         "message": "Reset remaining JSON-backed stores complete",
@@ -3384,7 +3848,7 @@ def dev_reset():
 
 
 @router.post("/events/{event_id}/images")
-async def upload_event_image(
+def upload_event_image(
     event_id: int,
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
@@ -3393,7 +3857,7 @@ async def upload_event_image(
 
     safe_name = _sanitize_upload_filename(file.filename or "image")
     target = UPLOAD_DIR / safe_name
-    data = await file.read()
-    target.write_bytes(data)
+    with target.open("wb") as out:
+        shutil.copyfileobj(file.file, out)
 
     return {"url": f"/uploads/{safe_name}", "filename": safe_name}
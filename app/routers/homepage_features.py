@@ -2,12 +2,14 @@ import logging
 import os
 from typing import Any, Generator
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel, Field
 from sqlalchemy import create_engine, text
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session, sessionmaker
 
+from app import response_cache
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["homepage-features"])
@@ -176,8 +178,12 @@ def get_featured_homepage(db: Session = Depends(get_db)):
 
 
 @router.get("/public/homepage-features", response_model=list[HomepageFeatureOut])
-def get_homepage_features(db: Session = Depends(get_db)):
-    return _public_features(db)
+def get_homepage_features(request: Request, db: Session = Depends(get_db)):
+    return response_cache.cached_json(
+        request,
+        lambda: [feature.model_dump() for feature in _public_features(db)],
+        tags=("homepage",),
+    )
 
 
 @router.get("/api/admin/homepage-features", response_model=list[HomepageFeatureOut])
@@ -255,6 +261,7 @@ def admin_create_homepage_feature(payload: HomepageFeatureCreate, db: Session =
         payload.model_dump(),
     ).fetchone()
     db.commit()
+    response_cache.invalidate("homepage")
 
     if row is None:
         raise HTTPException(status_code=500, detail="Could not create homepage feature")
@@ -323,6 +330,7 @@ def admin_update_homepage_feature(
         updates,
     ).fetchone()
     db.commit()
+    response_cache.invalidate("homepage")
 
     if row is None:
         raise HTTPException(status_code=404, detail="Homepage feature not found")
@@ -338,6 +346,7 @@ def admin_delete_homepage_feature(feature_id: int, db: Session = Depends(get_db)
         {"feature_id": feature_id},
     )
     db.commit()
+    response_cache.invalidate("homepage")
 
     if result.rowcount == 0:
         raise HTTPException(status_code=404, detail="Homepage feature not found")
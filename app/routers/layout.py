@@ -6,7 +6,7 @@ from typing import Any, Dict
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, ConfigDict
 
-from app.store import _EVENTS, _LAYOUT_META, save_store
+from app.store import _EVENTS, _LAYOUT_META, save_records
 
 # ✅ Minimal, safest fix:
 # Define the router without a prefix here so we don't accidentally double-prefix
@@ -35,5 +35,5 @@ def get_layout(event_id: int):
 def save_layout(event_id: int, body: LayoutPayload):
     _ensure_event(event_id)
     _LAYOUT_META[event_id] = {"data": body.data or {}}
-    save_store()  # ✅ persist layout meta
+    save_records("layout_meta", event_id)  # ✅ persist layout meta
     return {"ok": True, "event_id": event_id}
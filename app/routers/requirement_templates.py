@@ -6,7 +6,7 @@ from typing import Any, Dict
 from fastapi import APIRouter, Body, HTTPException
 from pydantic import BaseModel, Field
 
-from app.store import _REQUIREMENT_TEMPLATES, save_store
+from app.store import _REQUIREMENT_TEMPLATES, save_records
 
 router = APIRouter(tags=["Requirement Templates"])
 
@@ -69,7 +69,7 @@ def create_template(payload: RequirementTemplateCreate):
     }
 
     _REQUIREMENT_TEMPLATES[tid] = t
-    save_store()
+    save_records("requirement_templates", tid)
 
     return t
 
@@ -90,7 +90,7 @@ def update_template(template_id: str, payload: RequirementTemplateUpdate):
 
     t["updated_at"] = utc_now_iso()
 
-    save_store()
+    save_records("requirement_templates", template_id)
 
     return t
 
@@ -103,6 +103,6 @@ def delete_template(template_id: str):
 
     del _REQUIREMENT_TEMPLATES[template_id]
 
-    save_store()
+    save_records("requirement_templates", template_id)
 
     return {"ok": True}
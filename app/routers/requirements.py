@@ -9,7 +9,7 @@ from sqlalchemy.orm import Session
 
 from app.db import get_db
 from app.models.event import Event
-from app.store import _REQUIREMENTS, save_store
+from app.store import _REQUIREMENTS, save_records
 
 router = APIRouter(tags=["Requirements"])
 
@@ -199,7 +199,7 @@ def organizer_put_event_requirements(
 
     _REQUIREMENTS[int(event_id)] = {"requirements": requirements, "version": version}
     _mark_event_requirements_saved(db, event_id, version)
-    save_store()
+    save_records("requirements", int(event_id))
 
     return {"ok": True, "version": version, "requirements": requirements}
 
@@ -3,7 +3,7 @@ from __future__ import annotations
 
 from fastapi import APIRouter
 
-from app.store import _EVENTS, save_store
+from app.store import _EVENTS, save_records
 
 router = APIRouter(prefix="/requirements", tags=["Requirements Alias"])
 
@@ -38,5 +38,5 @@ def put_requirements_alias(event_id: int, body: dict):
         int(incoming) if incoming is not None else int(e["requirements_version"]) + 1
     )
     _EVENTS[event_id] = e
-    save_store()
+    save_records("events", event_id)
     return {"requirements": e["requirements"], "version": e["requirements_version"]}
@@ -33,7 +33,7 @@ def _save_upload(file: UploadFile) -> dict:
 @router.post("")
 @router.post("/")
 @router.post("/image")
-async def upload_file(file: UploadFile = File(...)):
+def upload_file(file: UploadFile = File(...)):
     try:
         return _save_upload(file)
     except Exception as e:
@@ -558,7 +558,7 @@ def _event_payload(db: Session, event_id: int) -> Dict[str, Any]:
         raise HTTPException(status_code=404, detail="Event not found.")
 
     try:
-        store_module.load_store()
+        store_module.reload_store_if_changed()
     except Exception:
         pass
 
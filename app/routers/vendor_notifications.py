@@ -1,12 +1,16 @@
 from __future__ import annotations
 
+import os
 import re
-from datetime import datetime, timezone
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import func
+from sqlalchemy import func, or_
 from sqlalchemy.orm import Session
 
 from app.db import get_db
@@ -409,6 +413,150 @@ def _alert_to_dict(alert: EventAlert) -> Dict[str, Any]:
     }
 
 
+# Category slug -> event id index over active published events. Refreshed
+# incrementally from Event.updated_at plus ids passed to
+# invalidate_event_matches() (every events.py store write calls it, since
+# store-only edits do not touch the row), with a full rebuild every
+# EVENT_MATCH_INDEX_REBUILD_SECONDS. updated_at is the writer's transaction
+# start, so a slow transaction can commit behind the watermark: each refresh
+# re-reads EVENT_MATCH_CURSOR_LAG_SECONDS before it and re-read rows that did
+# not change keep their generation. Every changed entry gets a new generation;
+# a vendor's watermark is the generation last matched against their category
+# slugs.
+EVENT_MATCH_INDEX_REBUILD_SECONDS = float(os.getenv("EVENT_MATCH_INDEX_REBUILD_SECONDS", "3600") or 3600)
+EVENT_MATCH_CURSOR_LAG_SECONDS = float(os.getenv("EVENT_MATCH_CURSOR_LAG_SECONDS", "300") or 0)
+
+_EVENT_MATCH_INDEX: Dict[str, set[int]] = {}
+_EVENT_MATCH_ENTRIES: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+_EVENT_MATCH_DIRTY: set[int] = set()
+_EVENT_MATCH_GENERATION = 0
+_EVENT_MATCH_WATERMARK: Optional[datetime] = None
+_EVENT_MATCH_BUILT_AT = 0.0
+_VENDOR_MATCH_STATE: Dict[str, tuple[frozenset, int]] = {}
+_EVENT_MATCH_LOCK = threading.Lock()
+
+_EVENT_DATE_FIELDS = ("end_date", "endDate", "start_date", "startDate", "event_date", "date")
+
+
+def invalidate_event_matches(event_id: Any = None) -> None:
+    """Re-read one event (or rebuild the whole index) on the next match."""
+    global _EVENT_MATCH_WATERMARK
+    with _EVENT_MATCH_LOCK:
+        if event_id is None:
+            _EVENT_MATCH_WATERMARK = None
+            return
+        try:
+            _EVENT_MATCH_DIRTY.add(int(event_id))
+        except Exception:
+            pass
+
+
+def _event_match_entry(ev: Event) -> Optional[Dict[str, Any]]:
+    event_data = _serialize_event(ev)
+    if not bool(getattr(ev, "published", False)) or bool(getattr(ev, "archived", False)):
+        return None
+    if not _event_is_active_marketplace_event(event_data):
+        return None
+    categories = [category for category in _event_categories(event_data) if _category_slug(category)]
+    if not categories:
+        return None
+    return {
+        "slugs": frozenset(_category_slug(category) for category in categories),
+        "categories": categories,
+        "title": _safe_str(event_data.get("title") or event_data.get("name") or f"Event #{event_data.get('id')}"),
+        "city": _safe_str(event_data.get("city")),
+        "state": _safe_str(event_data.get("state")),
+        "dates": {field: event_data.get(field) for field in _EVENT_DATE_FIELDS},
+    }
+
+
+def _unindex_event_match(event_id: int) -> None:
+    entry = _EVENT_MATCH_ENTRIES.pop(event_id, None)
+    if entry is None:
+        return
+    for slug in entry["slugs"]:
+        ids = _EVENT_MATCH_INDEX.get(slug)
+        if ids is not None:
+            ids.discard(event_id)
+            if not ids:
+                _EVENT_MATCH_INDEX.pop(slug, None)
+
+
+def _index_event_match(event_id: int, entry: Optional[Dict[str, Any]]) -> None:
+    global _EVENT_MATCH_GENERATION
+
+    current = _EVENT_MATCH_ENTRIES.get(event_id)
+    if entry is not None and current is not None and {**current, "generation": 0} == {**entry, "generation": 0}:
+        # Unchanged events keep their generation so vendors are not re-matched.
+        return
+    _unindex_event_match(event_id)
+    if entry is None:
+        return
+    _EVENT_MATCH_GENERATION += 1
+    _EVENT_MATCH_ENTRIES[event_id] = {**entry, "generation": _EVENT_MATCH_GENERATION}
+    for slug in entry["slugs"]:
+        _EVENT_MATCH_INDEX.setdefault(slug, set()).add(event_id)
+
+
+def _refresh_event_match_index(db: Session) -> None:
+    global _EVENT_MATCH_WATERMARK, _EVENT_MATCH_BUILT_AT
+
+    with _EVENT_MATCH_LOCK:
+        full = (
+            _EVENT_MATCH_WATERMARK is None
+            or time.monotonic() - _EVENT_MATCH_BUILT_AT > EVENT_MATCH_INDEX_REBUILD_SECONDS
+        )
+        if full:
+            rows = db.query(Event).filter(Event.published == True).filter(Event.archived == False).all()  # noqa: E712
+            seen = {int(row.id) for row in rows}
+            for event_id in [event_id for event_id in _EVENT_MATCH_ENTRIES if event_id not in seen]:
+                _unindex_event_match(event_id)
+            _EVENT_MATCH_BUILT_AT = time.monotonic()
+        else:
+            changed = Event.updated_at >= _EVENT_MATCH_WATERMARK - timedelta(seconds=EVENT_MATCH_CURSOR_LAG_SECONDS)
+            if _EVENT_MATCH_DIRTY:
+                changed = or_(changed, Event.id.in_(sorted(_EVENT_MATCH_DIRTY)))
+            rows = db.query(Event).filter(changed).all()
+            seen = {int(row.id) for row in rows}
+            for event_id in _EVENT_MATCH_DIRTY - seen:
+                _unindex_event_match(event_id)
+        _EVENT_MATCH_DIRTY.clear()
+
+        for row in rows:
+            _index_event_match(int(row.id), _event_match_entry(row))
+            if not full and row.updated_at is not None and row.updated_at > _EVENT_MATCH_WATERMARK:
+                _EVENT_MATCH_WATERMARK = row.updated_at
+        if full:
+            # DB clock, not ours; stays None (full rebuilds) while there are no events.
+            _EVENT_MATCH_WATERMARK = db.query(func.max(Event.updated_at)).scalar()
+
+
+def _event_match_candidates(
+    vendor_slugs: frozenset,
+    since_generation: Optional[int],
+) -> tuple[int, List[tuple[int, Dict[str, Any]]]]:
+    """Return the current generation and indexed events matching ``vendor_slugs``.
+
+    With ``since_generation`` only events (re)indexed after it are returned.
+    """
+    with _EVENT_MATCH_LOCK:
+        if since_generation is None:
+            event_ids: set[int] = set()
+            for slug in vendor_slugs:
+                event_ids |= _EVENT_MATCH_INDEX.get(slug, set())
+            matches = [(event_id, _EVENT_MATCH_ENTRIES[event_id]) for event_id in event_ids]
+        else:
+            matches = []
+            for event_id in reversed(_EVENT_MATCH_ENTRIES):
+                entry = _EVENT_MATCH_ENTRIES[event_id]
+                if entry["generation"] <= since_generation:
+                    break
+                if entry["slugs"] & vendor_slugs:
+                    matches.append((event_id, entry))
+        matches.sort(key=lambda item: item[0], reverse=True)
+        return _EVENT_MATCH_GENERATION, matches
+
+
 def _create_missing_alerts_for_vendor(db: Session, profile: Profile, user: Dict[str, Any]) -> int:
     email = _safe_lower(profile.email)
     if not email:
@@ -422,75 +570,76 @@ def _create_missing_alerts_for_vendor(db: Session, profile: Profile, user: Dict[
         return 0
 
     vendor_categories = _profile_categories(profile)
-    vendor_slugs = {_category_slug(category) for category in vendor_categories if _category_slug(category)}
+    vendor_slugs = frozenset(_category_slug(category) for category in vendor_categories if _category_slug(category))
     if not vendor_slugs:
         return 0
 
-    rows = db.query(Event).filter(Event.published == True).filter(Event.archived == False).order_by(Event.id.desc()).all()  # noqa: E712
-    created = 0
-
-    for ev in rows:
-        event_data = _serialize_event(ev)
-        if not _event_is_active_marketplace_event(event_data):
-            continue
-
-        event_categories = _event_categories(event_data)
-        event_slugs = {_category_slug(category) for category in event_categories if _category_slug(category)}
-        matching_slugs = vendor_slugs.intersection(event_slugs)
-        if not matching_slugs:
-            continue
+    _refresh_event_match_index(db)
+    match_state = _VENDOR_MATCH_STATE.get(email)
+    since = match_state[1] if match_state is not None and match_state[0] == vendor_slugs else None
+    generation, matches = _event_match_candidates(vendor_slugs, since)
+    matches = [(event_id, entry) for event_id, entry in matches if not _event_is_past(entry["dates"])]
+
+    existing: set[tuple[int, str]] = set()
+    if matches:
+        existing = {
+            (int(event_id), _safe_lower(category))
+            for event_id, category in db.query(EventAlert.event_id, EventAlert.category).filter(
+                func.lower(EventAlert.vendor_email) == email,
+                EventAlert.event_id.in_([event_id for event_id, _ in matches]),
+            )
+        }
 
-        matching_labels = [category for category in event_categories if _category_slug(category) in matching_slugs] or [
+    matched_at = _now_iso()
+    rows: List[Dict[str, Any]] = []
+    for event_id, entry in matches:
+        matching_slugs = vendor_slugs.intersection(entry["slugs"])
+        matching_labels = [category for category in entry["categories"] if _category_slug(category) in matching_slugs] or [
             category for category in vendor_categories if _category_slug(category) in matching_slugs
         ]
 
-        title = _safe_str(event_data.get("title") or event_data.get("name") or f"Event #{event_data.get('id')}")
-        city = _safe_str(event_data.get("city"))
-        state = _safe_str(event_data.get("state"))
+        title = entry["title"]
+        city = entry["city"]
+        state = entry["state"]
         where = ", ".join([part for part in [city, state] if part])
+        suffix = f" in {where}" if where else ""
 
         for category in matching_labels:
             category_label = _safe_str(category) or "your category"
-            existing = (
-                db.query(EventAlert)
-                .filter(
-                    func.lower(EventAlert.vendor_email) == email,
-                    EventAlert.event_id == int(event_data["id"]),
-                    func.lower(EventAlert.category) == category_label.lower(),
-                )
-                .one_or_none()
-            )
-            if existing:
+            key = (event_id, category_label.lower())
+            if key in existing:
                 continue
-
-            suffix = f" in {where}" if where else ""
-            alert = EventAlert(
-                vendor_email=email,
-                vendor_profile_id=profile.id,
-                event_id=int(event_data["id"]),
-                event_title=title,
-                event_city=city or None,
-                event_state=state or None,
-                category=category_label,
-                alert_type="new_matching_event",
-                message=f"New {category_label} opportunity: {title}{suffix}.",
-                read=False,
-                data={
-                    "event_id": int(event_data["id"]),
+            existing.add(key)
+            rows.append({
+                "vendor_email": email,
+                "vendor_profile_id": profile.id,
+                "event_id": event_id,
+                "event_title": title,
+                "event_city": city or None,
+                "event_state": state or None,
+                "category": category_label,
+                "alert_type": "new_matching_event",
+                "message": f"New {category_label} opportunity: {title}{suffix}.",
+                "read": False,
+                "data": {
+                    "event_id": event_id,
                     "event_title": title,
                     "category": category_label,
                     "city": city,
                     "state": state,
                     "source": "event_match_backfill",
-                    "matched_at": _now_iso(),
+                    "matched_at": matched_at,
                 },
-            )
-            db.add(alert)
-            created += 1
+            })
+
+    if rows:
+        from app.routers.events import _insert_event_alert_rows
 
-    if created:
+        _insert_event_alert_rows(db, rows)
         db.commit()
-    return created
+    with _EVENT_MATCH_LOCK:
+        _VENDOR_MATCH_STATE[email] = (vendor_slugs, generation)
+    return len(rows)
 
 
 def _list_alerts(db: Session, email: str, limit: int = 25) -> List[Dict[str, Any]]:
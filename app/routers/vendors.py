@@ -3,18 +3,19 @@ from __future__ import annotations
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from pydantic import BaseModel, ConfigDict, Field
-from app.store import _VENDORS, save_store
 
-from app.routers.auth import get_current_user
+from app import response_cache
+from app.routers.auth import get_current_user, invalidate_principal_cache
 from app.store import (
     _APPLICATIONS,
     _EVENTS,
     _REVIEWS,
     _VENDORS,
+    applications_for_vendor,
     next_review_id,
-    save_store,
+    save_records,
     upsert_vendor,
 )
 from app.routers.verifications import _find_latest_record
@@ -120,6 +121,7 @@ def set_vendor_premium(
         role="vendor",
         data=vendor,
     )
+    invalidate_principal_cache(email)
 
     return {
         "ok": True,
@@ -175,6 +177,7 @@ def unverify_vendor(
         role="vendor",
         data=vendor,
     )
+    invalidate_principal_cache(email)
     updated = _load_vendor_from_db(db, email) or vendor
 
     return {
@@ -210,6 +213,7 @@ def force_verify_vendor(payload: dict, user: Dict[str, Any] = Depends(get_curren
     }
 
     _upsert_profile_row(db, email=email, role="vendor", data=updated)
+    invalidate_principal_cache(email)
     updated = _load_vendor_from_db(db, email) or updated
 
     return {
@@ -576,6 +580,7 @@ def _upsert_profile_row(db: Session, *, email: str, role: str, data: Dict[str, A
         row.promoted = bool(data.get("promoted"))
 
     db.commit()
+    response_cache.invalidate("vendors")
     db.refresh(row)
     return row
 
@@ -769,10 +774,7 @@ def _vendor_vendcore_events(vendor_key: str) -> List[Dict[str, Any]]:
     rows: List[Dict[str, Any]] = []
     seen: set[str] = set()
 
-    for app in _APPLICATIONS.values():
-        if not isinstance(app, dict):
-            continue
-
+    for app in applications_for_vendor(vendor_key, vendor_key).values():
         app_vendor_email = _safe_str(app.get("vendor_email") or app.get("email")).lower()
         app_vendor_id = _safe_str(app.get("vendor_id") or app.get("vendorId")).lower()
         if vendor_key not in {app_vendor_email, app_vendor_id}:
@@ -1094,13 +1096,15 @@ def _sync_vendor_category_to_applications(vendor_key: str, vendor: Dict[str, Any
     if not primary_category and not categories:
         return
 
-    changed = False
+    changed_keys = []
     vendor_email = _safe_str(vendor.get("email") or vendor_key).lower()
     vendor_id = _safe_str(vendor.get("vendor_id") or vendor_key).lower()
 
-    for app in _APPLICATIONS.values():
-        if not isinstance(app, dict):
-            continue
+    candidates = applications_for_vendor(vendor_key, vendor_key)
+    candidates.update(applications_for_vendor(vendor_email, vendor_id))
+
+    for app_key, app in candidates.items():
+        changed = False
 
         app_vendor_email = _safe_str(app.get("vendor_email")).lower()
         app_vendor_id = _safe_str(app.get("vendor_id")).lower()
@@ -1121,9 +1125,11 @@ def _sync_vendor_category_to_applications(vendor_key: str, vendor: Dict[str, Any
             changed = True
 
         app["updated_at"] = app.get("updated_at") or _now_iso()
+        if changed:
+            changed_keys.append(app_key)
 
-    if changed:
-        save_store()
+    if changed_keys:
+        save_records("applications", *changed_keys)
 
 
 def _reviews_for_vendor(vendor_id: Any) -> List[Dict[str, Any]]:
@@ -1441,7 +1447,7 @@ def create_vendor_review(
     }
 
     vendor_reviews[review_id] = review
-    save_store()
+    save_records("reviews", vendor_key)
 
     return {
         "ok": True,
@@ -1452,8 +1458,10 @@ def create_vendor_review(
 @router.post("/admin/backfill-categories")
 def backfill_categories():
     updated = 0
+    touched = []
 
-    for app in _APPLICATIONS.values():
+    for key, app in _APPLICATIONS.items():
+        before = (app.get("vendor_category"), app.get("vendor_categories"), app.get("category"))
         vendor_email = (app.get("vendor_email") or "").lower()
         vendor = _VENDORS.get(vendor_email)
 
@@ -1474,7 +1482,11 @@ def backfill_categories():
             if not app.get("category"):
                 app["category"] = primary
 
-    save_store()
+        if (app.get("vendor_category"), app.get("vendor_categories"), app.get("category")) != before:
+            touched.append(key)
+
+    if touched:
+        save_records("applications", *touched)
 
     return {"updated": updated}
 
@@ -1499,9 +1511,13 @@ def wipe_public_vendors(user: Dict[str, Any] = Depends(get_current_user)):
     removed_count = len(_VENDORS)
     removed_keys = sorted([str(key) for key in _VENDORS.keys()])
 
+    review_keys = list(_REVIEWS)
     _VENDORS.clear()
     _REVIEWS.clear()
-    save_store()
+    if removed_keys:
+        save_records("vendors", *removed_keys)
+    if review_keys:
+        save_records("reviews", *review_keys)
 
     return {
         "ok": True,
@@ -1518,6 +1534,8 @@ def dedupe_public_vendors(user: Dict[str, Any] = Depends(get_current_user)):
 
     seen: Dict[str, str] = {}
     removed_keys: List[str] = []
+    vendors_before = dict(_VENDORS)
+    reviews_before = dict(_REVIEWS)
 
     for vendor_key, vendor in list(_VENDORS.items()):
         key = str(vendor_key or "").strip().lower()
@@ -1571,7 +1589,10 @@ def dedupe_public_vendors(user: Dict[str, Any] = Depends(get_current_user)):
             else:
                 seen[identity] = key
 
-    save_store()
+    for name, table, before in (("vendors", _VENDORS, vendors_before), ("reviews", _REVIEWS, reviews_before)):
+        changed = [key for key in set(before) | set(table) if before.get(key) is not table.get(key)]
+        if changed:
+            save_records(name, *changed)
 
     return {
         "ok": True,
@@ -1582,10 +1603,19 @@ def dedupe_public_vendors(user: Dict[str, Any] = Depends(get_current_user)):
 
 @router.get("/public")
 def get_public_vendors(
+    request: Request,
     limit: int = Query(DEFAULT_PAGE_LIMIT, ge=1, le=MAX_PAGE_LIMIT),
     offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
 ):
+    return response_cache.cached_json(
+        request,
+        lambda: _public_vendors_page(db, limit, offset),
+        tags=("vendors",),
+    )
+
+
+def _public_vendors_page(db: Session, limit: int, offset: int) -> Dict[str, Any]:
     results = []
     vendors = _load_all_vendors_from_db(db)
 
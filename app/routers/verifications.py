@@ -9,7 +9,7 @@ from typing import Any, Dict, List, Optional
 from fastapi import APIRouter, Depends, HTTPException
 
 from app import store as store_module
-from app.routers.auth import get_current_user
+from app.routers.auth import get_current_user, invalidate_principal_cache
 from sqlalchemy import func, or_, text
 from app.db import SessionLocal
 from app.models.profile import Profile
@@ -29,10 +29,20 @@ def _verification_store() -> Dict[int, Dict[str, Any]]:
     that dictionary, so a direct import can point at a stale object and cause
     submit/payment/admin reads to drift.
     """
-    store_module.load_store()
+    store_module.reload_store_if_changed()
     return store_module._VERIFICATIONS
 
 
+def _save_verification(record: Dict[str, Any]) -> None:
+    """Persist one verification record with a record-level save."""
+    records = store_module._VERIFICATIONS
+    key = record.get("id")
+    if records.get(key) is not record:
+        # Legacy records may be keyed differently from their "id".
+        key = next((k for k, v in records.items() if v is record), key)
+    store_module.save_records("verifications", key)
+
+
 def _now() -> datetime:
     return datetime.now(timezone.utc)
 
@@ -538,7 +548,8 @@ def mark_verification_paid(
     if stripe_payment_intent_id:
         record["stripe_payment_intent_id"] = stripe_payment_intent_id
 
-    store_module.save_store()
+    _save_verification(record)
+    store_module.flush(sync=True)
     _sync_verification_record_to_profile(record)
     return record
 
@@ -846,7 +857,7 @@ def create_verification_checkout(payload: Dict[str, Any], current_user: dict = D
             "updated_at": _now_iso(),
         },
     )
-    store_module.save_store()
+    _save_verification(record)
 
     success_url = _safe_str(payload.get("success_url"))
     cancel_url = _safe_str(payload.get("cancel_url"))
@@ -891,7 +902,7 @@ def create_verification_checkout(payload: Dict[str, Any], current_user: dict = D
             },
         )
         record["checkout_session_id"] = str(session.get("id") if isinstance(session, dict) else session.id)
-        store_module.save_store()
+        _save_verification(record)
         return {"ok": True, "url": session.get("url") if isinstance(session, dict) else session.url, "verification": _private_record(record, email, role)}
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc) or "Unable to start payment.")
@@ -938,7 +949,8 @@ def confirm_verification_payment(payload: Dict[str, Any], current_user: dict = D
             "updated_at": _now_iso(),
         },
     )
-    store_module.save_store()
+    _save_verification(record)
+    store_module.flush(sync=True)
     _sync_verification_record_to_profile(record)
 
     return {
@@ -1003,7 +1015,7 @@ def submit_verification(payload: Dict[str, Any]):
         }
         _verification_store()[verification_id] = saved
 
-    store_module.save_store()
+    _save_verification(saved)
     _sync_verification_record_to_profile(saved)
 
     return {
@@ -1042,7 +1054,7 @@ def cancel_my_verification(payload: Optional[Dict[str, Any]] = None, current_use
             "updated_at": now,
         }
     )
-    store_module.save_store()
+    _save_verification(record)
     _sync_verification_record_to_profile(record)
 
     return {
@@ -1076,7 +1088,7 @@ def reactivate_my_verification(payload: Optional[Dict[str, Any]] = None, current
             "updated_at": now,
         }
     )
-    store_module.save_store()
+    _save_verification(record)
     _sync_verification_record_to_profile(record)
 
     return {
@@ -1384,7 +1396,7 @@ def ai_review_verification(verification_id: int, user: Dict[str, Any] = Depends(
     record["ai_review"] = result
     record["ai_reviewed_at"] = result.get("reviewed_at") or _now_iso()
     record["ai_review_status"] = result.get("overall_status")
-    store_module.save_store()
+    _save_verification(record)
 
     return {
         "ok": result.get("overall_status") != "unavailable",
@@ -1450,8 +1462,9 @@ def review_verification(verification_id: int, payload: Dict[str, Any]):
             _now() + timedelta(days=DEFAULT_VERIFICATION_DURATION_DAYS)
         ).isoformat()
 
-    store_module.save_store()
+    _save_verification(record)
     _sync_verification_record_to_profile(record)
+    invalidate_principal_cache(record.get("email"))
 
     return {
         "ok": True,
@@ -1465,7 +1478,7 @@ def delete_verification(verification_id: int):
         raise HTTPException(status_code=404, detail="Verification not found")
 
     removed = _verification_store().pop(verification_id)
-    store_module.save_store()
+    store_module.save_records("verifications", verification_id)
 
     return {
         "ok": True,
@@ -31,6 +31,12 @@ def _coerce_json_list(value: Any) -> list:
 
 
 def _read_store() -> Dict[str, Any]:
+    # Data directories written by the sharded store no longer keep an
+    # up-to-date _data_store.json; read them through app.store instead.
+    if (DATA_PATH.parent / "_data_store" / "meta.json").exists():
+        from app.store import get_store_snapshot
+
+        return get_store_snapshot()
     if not DATA_PATH.exists():
         raise FileNotFoundError(f"Store file not found: {DATA_PATH}")
     raw = DATA_PATH.read_text(encoding="utf-8")
@@ -103,7 +109,7 @@ def migrate() -> None:
     print("EVENT COUNT:", len(events) if isinstance(events, dict) else "not-   dict")
     print("DIAGRAM COUNT:", len(diagrams) if isinstance(diagrams, dict) else "not-dict")
     if isinstance(events, dict):
-    print("EVENT SAMPLE KEYS:", list(events.keys())[:10])
+        print("EVENT SAMPLE KEYS:", list(events.keys())[:10])
 
     print("EVENTS TYPE:", type(events).__name__)
     print("DIAGRAMS TYPE:", type(diagrams).__name__)
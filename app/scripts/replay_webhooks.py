@@ -0,0 +1,76 @@
+"""Inspect and replay Stripe webhook events held in the webhook inbox.
+
+    python -m app.scripts.replay_webhooks --list [--status dead] [--source billing]
+    python -m app.scripts.replay_webhooks --status dead [--source billing]
+    python -m app.scripts.replay_webhooks --event-id evt_123 --event-id evt_456
+    python -m app.scripts.replay_webhooks --id 42 --process
+
+Replayed events go back to pending with their attempts reset; the running
+API's inbox workers pick them up. --process applies them in this process
+instead, which loads the app's webhook handlers; each event is applied to the
+store as it is on disk at that moment, and the changes are flushed before the
+script exits.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from datetime import datetime, timezone
+
+from app import store, webhook_inbox
+
+
+def _when(ts) -> str:
+    if ts is None:
+        return "-"
+    return datetime.fromtimestamp(float(ts), tz=timezone.utc).isoformat(timespec="seconds")
+
+
+def _print_events(rows) -> None:
+    for row in rows:
+        print(
+            f"{row['id']:>6}  {row['source']:<12} {row['event_id']:<32} {row['event_type']:<36} "
+            f"{row['status']:<10} attempts={row['attempts']} received={_when(row['received_at'])} "
+            f"processed={_when(row['processed_at'])}"
+        )
+        if row["last_error"]:
+            print(f"        last error: {row['last_error']}")
+
+
+def _load_handlers() -> None:
+    # The routers register their handlers on import.
+    import app.routers.applications  # noqa: F401
+    import app.routers.billing  # noqa: F401
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--list", action="store_true", help="list events instead of replaying them")
+    parser.add_argument("--id", dest="ids", type=int, action="append", default=[], help="inbox row id")
+    parser.add_argument("--event-id", dest="event_ids", action="append", default=[], help="Stripe event id")
+    parser.add_argument("--status", choices=["pending", "dead", "done"], help="only events in this state")
+    parser.add_argument("--source", choices=["applications", "billing"], help="only events from this endpoint")
+    parser.add_argument("--limit", type=int, default=50, help="rows to list")
+    parser.add_argument("--process", action="store_true", help="apply replayed events here and wait for them")
+    args = parser.parse_args()
+
+    if args.list:
+        _print_events(webhook_inbox.list_events(status=args.status, source=args.source, limit=args.limit))
+        return
+
+    if not (args.ids or args.event_ids or args.status):
+        parser.error("choose events with --id, --event-id or --status")
+
+    count = webhook_inbox.replay(ids=args.ids, event_ids=args.event_ids, status=args.status, source=args.source)
+    print(f"Requeued {count} event(s).")
+
+    if args.process and count:
+        _load_handlers()
+        processed = webhook_inbox.drain_inbox()
+        store.flush(sync=True)
+        print(f"Processed {processed} event(s).")
+        print(json.dumps(webhook_inbox.webhook_inbox_stats()["queue_depth"], indent=2))
+
+
+if __name__ == "__main__":
+    main()
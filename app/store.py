@@ -1,19 +1,67 @@
 ﻿from __future__ import annotations
 
+import atexit
+import copy
 import json
 import os
 import sys
 import tempfile
 import threading
+import time
+import zlib
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.payment_ledger import PaymentLedger
 
 DATA_DIR = Path(os.getenv("DATA_DIR", "/data/vendorconnect"))
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+# Legacy single-file snapshot. Still read when the sharded layout below does
+# not exist yet, so existing data directories migrate on first compaction.
 _DATA_PATH = DATA_DIR / "_data_store.json"
+_SNAPSHOT_DIR = DATA_DIR / "_data_store"
+_SNAPSHOT_META_PATH = _SNAPSHOT_DIR / "meta.json"
 _LOCK = threading.RLock()
 
+# Append-only journal. Record-level writes (save_records) append one compact
+# line and fsync only that line; the compactor folds the journal back into
+# the snapshot shards once it grows past STORE_JOURNAL_COMPACT_BYTES.
+_JOURNAL_PATH = DATA_DIR / "_data_store.journal"
+_JOURNAL_ROTATED_PATH = DATA_DIR / "_data_store.journal.old"
+STORE_JOURNAL_ENABLED = os.getenv("STORE_JOURNAL", "1").strip().lower() not in {
+    "0",
+    "false",
+    "no",
+    "off",
+}
+STORE_JOURNAL_COMPACT_BYTES = int(os.getenv("STORE_JOURNAL_COMPACT_BYTES", str(8 * 1024 * 1024)))
+STORE_JOURNAL_COMPACT_INTERVAL = float(os.getenv("STORE_JOURNAL_COMPACT_INTERVAL", "30"))
+
+# Write-behind. save_store()/save_records() only queue their changes; a
+# flusher thread turns everything queued within STORE_FLUSH_MAX_DELAY_MS (or
+# STORE_FLUSH_MAX_PENDING saves, whichever comes first) into one physical
+# write. Paths that must be durable before responding call flush(sync=True).
+STORE_WRITE_BEHIND = os.getenv("STORE_WRITE_BEHIND", "1").strip().lower() not in {
+    "0",
+    "false",
+    "no",
+    "off",
+}
+STORE_FLUSH_MAX_DELAY_MS = float(os.getenv("STORE_FLUSH_MAX_DELAY_MS", "100"))
+STORE_FLUSH_MAX_PENDING = max(1, int(os.getenv("STORE_FLUSH_MAX_PENDING", "500")))
+
+# Storage backend. "file" is the journal + snapshot shards above, which only
+# one process may own. "sqlite" (DATA_DIR/_data_store.sqlite3) or
+# "sqlite:///path" keeps records in a SQLite WAL database shared by every
+# worker on the host: saves are row-level writes committed immediately, and
+# sync() pulls what other workers wrote (app/store_sqlite.py). On first use
+# the database is seeded from the file layout.
+STORE_BACKEND = os.getenv("STORE_BACKEND", "file").strip() or "file"
+# How often sync() drops the backend's delete markers that every worker has
+# read past (0 disables); workers report their read position half as often.
+STORE_SQLITE_COMPACT_INTERVAL = float(os.getenv("STORE_SQLITE_COMPACT_INTERVAL", "600"))
+
 
 def _int_keyed(d: dict) -> Dict[int, Any]:
     out: Dict[int, Any] = {}
@@ -84,121 +132,523 @@ _NEXT_BOOTH_ID = 1
 _NEXT_TEMPLATE_ID = 1
 _NEXT_APPLICATION_ID = 1
 
+# Collection name -> live dict. load_store() refills these dicts in place so
+# routers that imported them directly (from app.store import _EVENTS) keep
+# seeing current data after a reload.
+_COLLECTIONS: Dict[str, Dict[Any, Any]] = {
+    "events": _EVENTS,
+    "requirements": _REQUIREMENTS,
+    "requirement_templates": _REQUIREMENT_TEMPLATES,
+    "diagrams": _DIAGRAMS,
+    "applications": _APPLICATIONS,
+    "payments": _PAYMENTS,
+    "payouts": _PAYOUTS,
+    "audit_logs": _AUDIT_LOGS,
+    "verifications": _VERIFICATIONS,
+    "layout_meta": _LAYOUT_META,
+    "booths": _BOOTHS,
+    "templates": _TEMPLATES,
+    "vendors": _VENDORS,
+    "reviews": _REVIEWS,
+    "event_walls": _EVENT_WALLS,
+}
+
+_STR_KEYED_COLLECTIONS = {"requirement_templates"}
+_LOWER_STR_KEYED_COLLECTIONS = {"vendors", "reviews"}
+_LIST_OR_DICT_COLLECTIONS = {"payments", "payouts", "audit_logs", "verifications"}
+
+# Large, append-heavy collections are split into STORE_SHARD_COUNT files by
+# record id so touching one record rewrites 1/N of the collection. The count
+# is fixed per data directory once written (see meta.json).
+_SHARDED_COLLECTIONS = {"applications", "audit_logs"}
+_SHARD_COUNTS: Dict[str, int] = {
+    name: max(1, int(os.getenv("STORE_SHARD_COUNT", "16")))
+    for name in _SHARDED_COLLECTIONS
+}
+_SHARD_SEQ: Dict[Tuple[str, int], int] = {}
+_DIRTY_SHARDS: Set[Tuple[str, int]] = set()
+
+_JOURNAL_SEQ = 0
+_JOURNAL_FILE = None
+_COMPACT_LOCK = threading.Lock()
+_COMPACTOR_START_LOCK = threading.Lock()
+_COMPACTOR: Optional[threading.Thread] = None
+_COMPACTOR_WAKE = threading.Event()
+
+_PENDING_RECORDS: Dict[str, Set[Any]] = {}
+_PENDING_SAVES = 0
+_PENDING_CHECKPOINT = False
+_FLUSHER: Optional[threading.Thread] = None
+_FLUSHER_START_LOCK = threading.Lock()
+_FLUSH_WAKE = threading.Event()
+_FLUSH_URGENT = threading.Event()
+# Secondary indexes over _APPLICATIONS. Buckets hold store keys; _APP_INDEX
+# remembers what each key was indexed under so updates and deletes can
+# unlink it, and _APP_ORDER keeps lookups in collection order. The indexes
+# describe applications as of their last save: save_records() reindexes just
+# the saved keys, while a whole-collection save_store() only marks them stale
+# (_APP_INDEXES_STALE) and the next lookup rebuilds them once.
+_APPS_BY_VENDOR_EMAIL: Dict[str, Set[Any]] = {}
+_APPS_BY_VENDOR_ID: Dict[str, Set[Any]] = {}
+_APPS_BY_EVENT: Dict[str, Set[Any]] = {}
+_APPS_BY_VENDOR_EVENT: Dict[Tuple[str, str], Set[Any]] = {}
+_APPS_BY_RECORD_ID: Dict[str, Set[Any]] = {}
+_APP_INDEX: Dict[Any, Tuple[Tuple[str, ...], Tuple[str, ...], str, str]] = {}
+_APP_ORDER: Dict[Any, int] = {}
+_APP_ORDER_SEQ = 0
+_APP_INDEXES_STALE = False
+# Change counters for derived per-event data (availability stats): bumped
+# for an event whenever one of its applications is saved, and globally when
+# the indexes are rebuilt.
+_APP_EVENT_GENERATIONS: Dict[str, int] = {}
+_APP_GENERATION = 0
+
+# Store generation: bumped by every save, reload and sync. get_store_snapshot()
+# keeps one read-only view per collection, tagged with the generation it was
+# built at, and only rebuilds the collections (and, when known, the records)
+# that changed since. _SNAPSHOT_CHANGED holds the keys saved since a view was
+# built; None means rebuild the whole collection.
+_STORE_GENERATION = 0
+_COLLECTION_GENERATIONS: Dict[str, int] = {}
+_SNAPSHOT_CHANGED: Dict[str, Optional[Set[Any]]] = {}
+_SNAPSHOT_VIEWS: Dict[str, Tuple[int, "_FrozenDict"]] = {}
+_SNAPSHOT: Optional["StoreSnapshot"] = None
+_SNAPSHOT_MAX_TRACKED_KEYS = 1024
+# (inode, mtime_ns, size) of the store files as this process last left them;
+# reload_store_if_changed() reloads only when they differ.
+_DISK_STATE: Tuple[Any, ...] = ()
+
+# Payment totals per event and organizer (app/payment_ledger.py), updated as
+# payments and events are saved and rebuilt lazily after a full save or
+# reload. The reconciler recomputes it from _PAYMENTS every
+# PAYMENT_LEDGER_RECONCILE_INTERVAL seconds (0 disables) and repairs drift.
+PAYMENT_LEDGER_RECONCILE_INTERVAL = float(os.getenv("PAYMENT_LEDGER_RECONCILE_INTERVAL", "3600"))
+_PAYMENT_LEDGER = PaymentLedger()
+_PAYMENT_LEDGER_READY = False
+_LEDGER_RECONCILER: Optional[threading.Thread] = None
+_LEDGER_RECONCILER_START_LOCK = threading.Lock()
+_LEDGER_RECONCILE_REPORT: Dict[str, Any] = {}
+
+_WRITE_STATS: Dict[str, int] = {
+    "logical_saves": 0,
+    "physical_writes": 0,
+    "coalesced_saves": 0,
+    "sync_flushes": 0,
+    "compactions": 0,
+    "synced_records": 0,
+    "pruned_tombstones": 0,
+}
+
+
+def _open_backend(spec: str):
+    if spec == "sqlite":
+        path: Any = DATA_DIR / "_data_store.sqlite3"
+    elif spec.startswith("sqlite:///"):
+        path = spec[len("sqlite:///"):]
+    else:
+        return None
+    from app.store_sqlite import SQLiteStore
 
-def load_store() -> None:
-    global _EVENTS, _REQUIREMENTS, _REQUIREMENT_TEMPLATES, _DIAGRAMS, _APPLICATIONS
-    global _PAYMENTS, _PAYOUTS, _AUDIT_LOGS, _VERIFICATIONS
-    global _LAYOUT_META, _BOOTHS, _TEMPLATES
-    global _VENDORS, _REVIEWS, _EVENT_WALLS
+    return SQLiteStore(path, _COLLECTIONS)
+
+
+_BACKEND = _open_backend(STORE_BACKEND)
+# Per collection: the backend change counter this process is current to, and
+# a hash of each record's JSON as last written or read, so save_store() only
+# writes records that changed and sync() skips this process's own writes.
+_BACKEND_SEEN: Dict[str, int] = {}
+_BACKEND_HASHES: Dict[str, Dict[str, int]] = {name: {} for name in _COLLECTIONS}
+# The read position last reported to the backend, and when. A changed
+# position is reported at most every _BACKEND_MARK_MIN_INTERVAL seconds.
+_BACKEND_MARKED: Dict[str, int] = {}
+_BACKEND_MARKED_AT = 0.0
+_BACKEND_MARK_MIN_INTERVAL = 1.0
+_BACKEND_COMPACTED_AT = time.monotonic()
+
+
+def _records_from_list_or_dict(raw: Any) -> Dict[int, Any]:
+    if not isinstance(raw, list):
+        return _int_keyed(raw)
+    out: Dict[int, Any] = {}
+    for i, item in enumerate(raw, start=1):
+        if not isinstance(item, dict):
+            continue
+        rid = item.get("id", i)
+        try:
+            rid = int(rid)
+        except Exception:
+            rid = i
+        out[rid] = item
+    return out
+
+
+def _decode_reviews(raw: Any) -> Dict[str, Dict[int, Any]]:
+    out: Dict[str, Dict[int, Any]] = {}
+    if isinstance(raw, dict):
+        for vendor_key, vendor_reviews in raw.items():
+            normalized_vendor_key = str(vendor_key or "").strip().lower()
+            if not normalized_vendor_key or not isinstance(vendor_reviews, dict):
+                continue
+            out[normalized_vendor_key] = _int_keyed(vendor_reviews)
+    return out
+
+
+def _decode_collection(name: str, raw: Any) -> Dict[Any, Any]:
+    if name in _STR_KEYED_COLLECTIONS:
+        return dict(raw or {}) if isinstance(raw, dict) else {}
+    if name == "reviews":
+        return _decode_reviews(raw or {})
+    if name in _LOWER_STR_KEYED_COLLECTIONS:
+        return _lower_str_keyed(raw if isinstance(raw, dict) else {})
+    if name in _LIST_OR_DICT_COLLECTIONS:
+        return _records_from_list_or_dict(raw)
+    return _int_keyed(raw if isinstance(raw, dict) else {})
+
+
+def _encode_record(name: str, value: Any) -> Any:
+    if name == "reviews" and isinstance(value, dict):
+        return _str_keyed(value)
+    return value
+
+
+def _decode_record(name: str, value: Any) -> Any:
+    if name == "reviews" and isinstance(value, dict):
+        return _int_keyed(value)
+    return value
+
+
+def _replace_contents(target: Dict[Any, Any], source: Dict[Any, Any]) -> None:
+    target.clear()
+    target.update(source)
+
+
+def _set_next_counters(nxt: Dict[str, Any]) -> None:
     global _NEXT_EVENT_ID, _NEXT_BOOTH_ID, _NEXT_TEMPLATE_ID, _NEXT_APPLICATION_ID
 
+    _NEXT_EVENT_ID = int(nxt.get("event_id", 1) or 1)
+    _NEXT_BOOTH_ID = int(nxt.get("booth_id", 1) or 1)
+    _NEXT_TEMPLATE_ID = int(nxt.get("template_id", 1) or 1)
+    _NEXT_APPLICATION_ID = int(nxt.get("application_id", 1) or 1)
+
+
+def _next_counters() -> Dict[str, int]:
+    return {
+        "event_id": _NEXT_EVENT_ID,
+        "booth_id": _NEXT_BOOTH_ID,
+        "template_id": _NEXT_TEMPLATE_ID,
+        "application_id": _NEXT_APPLICATION_ID,
+    }
+
+
+def _journal_key(name: str, key: Any) -> Any:
+    if name in _STR_KEYED_COLLECTIONS:
+        return str(key)
+    if name in _LOWER_STR_KEYED_COLLECTIONS:
+        return str(key or "").strip().lower()
+    try:
+        return int(key)
+    except Exception:
+        return None
+
+
+def _shard_of(name: str, key: Any) -> int:
+    count = _SHARD_COUNTS.get(name)
+    if not count:
+        return 0
+    try:
+        return int(key) % count
+    except Exception:
+        return zlib.crc32(str(key).encode("utf-8")) % count
+
+
+def _all_shards(name: str) -> List[Tuple[str, int]]:
+    return [(name, shard) for shard in range(_SHARD_COUNTS.get(name, 1))]
+
+
+def _shard_path(name: str, shard: int) -> Path:
+    if name in _SHARD_COUNTS:
+        return _SNAPSHOT_DIR / f"{name}.{shard:03d}.json"
+    return _SNAPSHOT_DIR / f"{name}.json"
+
+
+def _mark_dirty(*names: str) -> None:
+    for name in names or tuple(_COLLECTIONS):
+        if name not in _COLLECTIONS:
+            raise ValueError(f"Unknown store collection: {name}")
+        _DIRTY_SHARDS.update(_all_shards(name))
+
+
+def _read_json(path: Path) -> Any:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _load_sharded_snapshot() -> None:
+    meta = _read_json(_SNAPSHOT_META_PATH)
+    for name, count in (meta.get("shard_counts") or {}).items():
+        if name in _SHARD_COUNTS:
+            _SHARD_COUNTS[name] = max(1, int(count))
+
+    for name, table in _COLLECTIONS.items():
+        merged: Dict[Any, Any] = {}
+        for _, shard in _all_shards(name):
+            path = _shard_path(name, shard)
+            if not path.exists():
+                continue
+            doc = _read_json(path)
+            _SHARD_SEQ[(name, shard)] = int(doc.get("seq", 0) or 0)
+            merged.update(_decode_collection(name, doc.get("records")))
+        _replace_contents(table, merged)
+
+    _set_next_counters(meta.get("next", {}) or {})
+
+
+def _load_legacy_snapshot() -> int:
+    """Import the single-file _data_store.json layout; returns its journal seq."""
+    raw = _read_json(_DATA_PATH)
+    for name, table in _COLLECTIONS.items():
+        _replace_contents(table, _decode_collection(name, raw.get(name, {})))
+    _set_next_counters(raw.get("next", {}) or {})
+    # Everything still lives in the legacy file; the next compaction writes
+    # the sharded layout.
+    _mark_dirty()
+    try:
+        return int(raw.get("journal_seq", 0) or 0)
+    except Exception:
+        return 0
+
+
+def load_store() -> None:
     with _LOCK:
-        if not _DATA_PATH.exists():
-            _recompute_next_counters()
-            return
+        # Reloading replaces in-memory state, so queued writes land first.
+        _flush_now()
+        if _BACKEND is not None:
+            _load_backend()
+        else:
+            _load_files()
+        _touch_collections(*_COLLECTIONS)
+
+
+def _file_state(path: Path) -> Any:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+def _disk_state() -> Tuple[Any, ...]:
+    return tuple(
+        _file_state(path)
+        for path in (_SNAPSHOT_META_PATH, _DATA_PATH, _JOURNAL_PATH, _JOURNAL_ROTATED_PATH)
+    )
+
+
+def _remember_disk_state() -> None:
+    global _DISK_STATE
+    _DISK_STATE = _disk_state()
+
 
+def reload_store_if_changed() -> bool:
+    """Reload only if the store changed underneath this process; True if it did.
+
+    For the file backend that means the snapshot or journal files differ
+    (inode, mtime or size) from how this process last wrote or read them, so
+    an idle check is a few stat() calls. For the SQLite backend it is sync().
+    """
+    if _BACKEND is not None:
+        return sync() > 0
+    with _LOCK:
+        # A compaction in progress is this process rewriting the files.
+        if not _COMPACT_LOCK.acquire(blocking=False):
+            return False
+        try:
+            if _disk_state() == _DISK_STATE:
+                return False
+        finally:
+            _COMPACT_LOCK.release()
+        load_store()
+        return True
+
+
+def _load_files() -> bool:
+    """Load the snapshot shards and replay the journal; False if unreadable."""
+    global _JOURNAL_SEQ
+
+    with _LOCK:
+        _SHARD_SEQ.clear()
+        _DIRTY_SHARDS.clear()
+        legacy_seq = 0
         try:
-            raw = json.loads(_DATA_PATH.read_text(encoding="utf-8"))
+            if _SNAPSHOT_META_PATH.exists():
+                _load_sharded_snapshot()
+            elif _DATA_PATH.exists():
+                legacy_seq = _load_legacy_snapshot()
         except Exception as e:
             print(
-                "ERROR: _data_store.json is corrupted. Refusing to overwrite.",
+                "ERROR: store snapshot is corrupted. Refusing to overwrite.",
                 file=sys.stderr,
             )
             print(f"Details: {e}", file=sys.stderr)
             _recompute_next_counters()
-            return
+            return False
 
-        _EVENTS = _int_keyed(raw.get("events", {}))
-        _REQUIREMENTS = _int_keyed(raw.get("requirements", {}))
-        _REQUIREMENT_TEMPLATES = raw.get("requirement_templates", {}) or {}
-        _DIAGRAMS = _int_keyed(raw.get("diagrams", {}))
-        _APPLICATIONS = _int_keyed(raw.get("applications", {}))
-
-        raw_payments = raw.get("payments", {})
-        if isinstance(raw_payments, list):
-            _PAYMENTS = {}
-            for i, p in enumerate(raw_payments, start=1):
-                if not isinstance(p, dict):
-                    continue
-                pid = p.get("id", i)
-                try:
-                    pid = int(pid)
-                except Exception:
-                    pid = i
-                _PAYMENTS[pid] = p
-        else:
-            _PAYMENTS = _int_keyed(raw_payments)
+        _JOURNAL_SEQ = max([_JOURNAL_SEQ, legacy_seq, *_SHARD_SEQ.values()])
+        for path in (_JOURNAL_ROTATED_PATH, _JOURNAL_PATH):
+            _JOURNAL_SEQ = max(_JOURNAL_SEQ, _replay_journal(path, legacy_seq))
 
-        raw_payouts = raw.get("payouts", {})
-        if isinstance(raw_payouts, list):
-            _PAYOUTS = {}
-            for i, p in enumerate(raw_payouts, start=1):
-                if not isinstance(p, dict):
-                    continue
-                pid = p.get("id", i)
-                try:
-                    pid = int(pid)
-                except Exception:
-                    pid = i
-                _PAYOUTS[pid] = p
-        else:
-            _PAYOUTS = _int_keyed(raw_payouts)
+        _recompute_next_counters()
+        _rebuild_application_indexes()
+        _remember_disk_state()
+        return True
 
-        raw_audit_logs = raw.get("audit_logs", {})
-        if isinstance(raw_audit_logs, list):
-            _AUDIT_LOGS = {}
-            for i, item in enumerate(raw_audit_logs, start=1):
-                if not isinstance(item, dict):
-                    continue
-                aid = item.get("id", i)
-                try:
-                    aid = int(aid)
-                except Exception:
-                    aid = i
-                _AUDIT_LOGS[aid] = item
-        else:
-            _AUDIT_LOGS = _int_keyed(raw_audit_logs)
 
-        raw_verifications = raw.get("verifications", {})
-        if isinstance(raw_verifications, list):
-            _VERIFICATIONS = {}
-            for i, item in enumerate(raw_verifications, start=1):
-                if not isinstance(item, dict):
-                    continue
-                vid = item.get("id", i)
-                try:
-                    vid = int(vid)
-                except Exception:
-                    vid = i
-                _VERIFICATIONS[vid] = item
-        else:
-            _VERIFICATIONS = _int_keyed(raw_verifications)
-
-        _LAYOUT_META = _int_keyed(raw.get("layout_meta", {}))
-        _BOOTHS = _int_keyed(raw.get("booths", {}))
-        _TEMPLATES = _int_keyed(raw.get("templates", {}))
-        _VENDORS = _lower_str_keyed(raw.get("vendors", {}))
-        _EVENT_WALLS = _int_keyed(raw.get("event_walls", {}))
-
-        raw_reviews = raw.get("reviews", {}) or {}
-        _REVIEWS = {}
-        if isinstance(raw_reviews, dict):
-            for vendor_key, vendor_reviews in raw_reviews.items():
-                normalized_vendor_key = str(vendor_key or "").strip().lower()
-                if not normalized_vendor_key or not isinstance(vendor_reviews, dict):
-                    continue
-                _REVIEWS[normalized_vendor_key] = _int_keyed(vendor_reviews)
+# ---------------------------------------------------------------------------
+# Shared SQLite backend
+# ---------------------------------------------------------------------------
 
-        nxt = raw.get("next", {}) or {}
-        _NEXT_EVENT_ID = int(nxt.get("event_id", 1) or 1)
-        _NEXT_BOOTH_ID = int(nxt.get("booth_id", 1) or 1)
-        _NEXT_TEMPLATE_ID = int(nxt.get("template_id", 1) or 1)
-        _NEXT_APPLICATION_ID = int(nxt.get("application_id", 1) or 1)
 
-        _recompute_next_counters()
+def _record_json(name: str, value: Any) -> str:
+    return json.dumps(_encode_record(name, value), ensure_ascii=False, default=str, separators=(",", ":"))
 
 
-def _atomic_write_json(path: Path, payload: dict) -> None:
+def _backend_rows(name: str, keys: Any) -> List[Tuple[str, Optional[str]]]:
+    """(key, JSON or None for a delete) for the given keys of one collection."""
+    table = _COLLECTIONS[name]
+    rows: List[Tuple[str, Optional[str]]] = []
+    for key in keys:
+        stored = _resolve_record_key(table, name, key)
+        normalized = stored if stored is not None else _journal_key(name, key)
+        if normalized is None or normalized == "":
+            continue
+        rows.append((str(normalized), _record_json(name, table[stored]) if stored is not None else None))
+    return rows
+
+
+def _backend_write(name: str, rows: List[Tuple[str, Optional[str]]]) -> None:
+    """Write rows through to the backend. Must be called with _LOCK held."""
+    if not rows:
+        return
+    before, after = _BACKEND.write(name, rows)
+    if _BACKEND_SEEN.get(name, 0) == before:
+        # No other worker wrote this collection since our last sync, so this
+        # worker is current up to its own write.
+        _BACKEND_SEEN[name] = after
+    hashes = _BACKEND_HASHES[name]
+    for key, value in rows:
+        if value is None:
+            hashes.pop(key, None)
+        else:
+            hashes[key] = hash(value)
+    _WRITE_STATS["physical_writes"] += 1
+
+
+def _load_backend() -> None:
+    if _BACKEND.is_empty() and _load_files():
+        records = {name: _backend_rows(name, list(table)) for name, table in _COLLECTIONS.items()}
+        if _BACKEND.import_records(records, _next_counters()):
+            print(f"[store] seeded {_BACKEND.path} from the file store", file=sys.stderr)
+
+    records, counters = _BACKEND.load()
+    for name in _COLLECTIONS:
+        _replace_backend_collection(name, records.get(name, ()))
+    _BACKEND_SEEN.clear()
+    _BACKEND_SEEN.update(counters)
+    _set_next_counters(_BACKEND.id_counters())
+    _recompute_next_counters()
+    _rebuild_application_indexes()
+    _backend_housekeeping(force=True)
+
+
+def _replace_backend_collection(name: str, rows: Iterable[Tuple[str, Optional[str]]]) -> int:
+    """Replace one collection with the backend's live rows; returns how many records differed."""
+    hashes = _BACKEND_HASHES[name]
+    previous = dict(hashes)
+    hashes.clear()
+    loaded: Dict[Any, Any] = {}
+    for key, value in rows:
+        normalized = _journal_key(name, key)
+        if normalized is None or normalized == "" or value is None:
+            continue
+        loaded[normalized] = _decode_record(name, json.loads(value))
+        hashes[key] = hash(value)
+    _replace_contents(_COLLECTIONS[name], loaded)
+    return sum(1 for key in set(previous) | set(hashes) if previous.get(key) != hashes.get(key))
+
+
+def _backend_housekeeping(force: bool = False) -> None:
+    """Report this worker's read position and now and then compact the backend.
+
+    Must be called with _LOCK held.
+    """
+    global _BACKEND_MARKED_AT, _BACKEND_COMPACTED_AT
+
+    now = time.monotonic()
+    since = now - _BACKEND_MARKED_AT
+    if (
+        force
+        or (_BACKEND_SEEN != _BACKEND_MARKED and since >= _BACKEND_MARK_MIN_INTERVAL)
+        or since >= STORE_SQLITE_COMPACT_INTERVAL / 2
+    ):
+        _BACKEND.mark_seen(_BACKEND_SEEN)
+        _BACKEND_MARKED.clear()
+        _BACKEND_MARKED.update(_BACKEND_SEEN)
+        _BACKEND_MARKED_AT = now
+    if STORE_SQLITE_COMPACT_INTERVAL > 0 and now - _BACKEND_COMPACTED_AT >= STORE_SQLITE_COMPACT_INTERVAL:
+        _BACKEND_COMPACTED_AT = now
+        _WRITE_STATS["pruned_tombstones"] += _BACKEND.compact()
+
+
+def sync() -> int:
+    """Apply records other workers wrote since the last sync; returns how many.
+
+    A no-op for the file backend. With the SQLite backend an idle check is
+    one PRAGMA, so this is cheap enough to run before every request.
+    """
+    global _APP_INDEXES_STALE
+
+    if _BACKEND is None:
+        return 0
+    with _LOCK:
+        if not _BACKEND.changed():
+            _backend_housekeeping()
+            return 0
+        changes, counters, reloaded = _BACKEND.changes_since(_BACKEND_SEEN)
+        applied = 0
+        for name, rows in changes.items():
+            if name in reloaded:
+                # Delete markers this worker had not read yet were compacted
+                # away, so merging could miss deletes; take the whole table.
+                applied += _replace_backend_collection(name, rows)
+                if name == "applications":
+                    _APP_INDEXES_STALE = True
+                _touch_collections(name)
+                continue
+            table = _COLLECTIONS[name]
+            hashes = _BACKEND_HASHES[name]
+            for key, value in rows:
+                if hashes.get(key) == (hash(value) if value is not None else None):
+                    continue
+                normalized = _journal_key(name, key)
+                if normalized is None or normalized == "":
+                    continue
+                existing = _resolve_record_key(table, name, key)
+                if value is None:
+                    table.pop(existing, None)
+                    hashes.pop(key, None)
+                else:
+                    table[existing if existing is not None else normalized] = _decode_record(name, json.loads(value))
+                    hashes[key] = hash(value)
+                if name == "applications":
+                    _reindex_application(normalized)
+                _touch_collections(name, keys=(normalized,))
+                applied += 1
+        _BACKEND_SEEN.update(counters)
+        _WRITE_STATS["synced_records"] += applied
+        _backend_housekeeping()
+        return applied
+
+
+def _atomic_write_text(path: Path, text: str) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
 
     tmp_fd = None
@@ -211,7 +661,7 @@ def _atomic_write_json(path: Path, payload: dict) -> None:
         )
 
         with os.fdopen(tmp_fd, "w", encoding="utf-8") as f:
-            json.dump(payload, f, indent=2, ensure_ascii=False, default=str)
+            f.write(text)
             f.flush()
             os.fsync(f.fileno())
 
@@ -225,38 +675,947 @@ def _atomic_write_json(path: Path, payload: dict) -> None:
                 pass
 
 
-def save_store() -> None:
+def _atomic_write_json(path: Path, payload: dict) -> None:
+    _atomic_write_text(
+        path,
+        json.dumps(payload, ensure_ascii=False, default=str, separators=(",", ":")),
+    )
+
+
+def _dirty_shard_files() -> List[Tuple[Path, str]]:
+    """Serialize every dirty shard; one pass over each dirty collection."""
+    files: List[Tuple[Path, str]] = []
+    dirty_names = sorted({name for name, _ in _DIRTY_SHARDS})
+    for name in dirty_names:
+        table = _COLLECTIONS[name]
+        shards = sorted(shard for dirty_name, shard in _DIRTY_SHARDS if dirty_name == name)
+        buckets: Dict[int, Dict[str, Any]] = {shard: {} for shard in shards}
+        for k, v in table.items():
+            bucket = buckets.get(_shard_of(name, k))
+            if bucket is not None:
+                bucket[str(k)] = _encode_record(name, v)
+        for shard in shards:
+            payload = {
+                "collection": name,
+                "shard": shard,
+                "seq": _JOURNAL_SEQ,
+                "records": buckets[shard],
+            }
+            files.append(
+                (
+                    _shard_path(name, shard),
+                    json.dumps(payload, ensure_ascii=False, default=str, separators=(",", ":")),
+                )
+            )
+    return files
+
+
+def save_store(*names: str) -> None:
+    """Write snapshot files for the named collections (all when omitted).
+
+    Only the shards of those collections are rewritten. With the SQLite
+    backend there are no shards, so finding the changed rows means encoding
+    every record of those collections. Callers that know which records they
+    changed should use save_records(), which writes just those.
+    """
+    global _PENDING_SAVES, _PENDING_CHECKPOINT, _APP_INDEXES_STALE
+
     with _LOCK:
-        _recompute_next_counters()
+        if not names or "applications" in names:
+            # Which records changed is unknown here; rebuild on next lookup
+            # rather than on every save.
+            _APP_INDEXES_STALE = True
+        _touch_collections(*(names or _COLLECTIONS))
+        if _BACKEND is not None:
+            _WRITE_STATS["logical_saves"] += 1
+            for name in names or tuple(_COLLECTIONS):
+                if name not in _COLLECTIONS:
+                    raise ValueError(f"Unknown store collection: {name}")
+                _backend_write(name, _changed_backend_rows(name))
+            return
+        _mark_dirty(*names)
+        _PENDING_CHECKPOINT = True
+        _PENDING_SAVES += 1
+        _WRITE_STATS["logical_saves"] += 1
+        pending = _PENDING_SAVES
+    _schedule_flush(pending)
+
+
+def _changed_backend_rows(name: str) -> List[Tuple[str, Optional[str]]]:
+    # Records this process never saw (another worker's inserts not yet
+    # synced) are left alone rather than deleted.
+    hashes = _BACKEND_HASHES[name]
+    rows: List[Tuple[str, Optional[str]]] = []
+    present: Set[str] = set()
+    for key, value in _COLLECTIONS[name].items():
+        normalized = _journal_key(name, key)
+        if normalized is None or normalized == "":
+            continue
+        text = _record_json(name, value)
+        present.add(str(normalized))
+        if hashes.get(str(normalized)) != hash(text):
+            rows.append((str(normalized), text))
+    rows.extend((key, None) for key in hashes if key not in present)
+    return rows
+
+
+# ---------------------------------------------------------------------------
+# Journal
+# ---------------------------------------------------------------------------
+
+
+def _resolve_record_key(table: Dict[Any, Any], name: str, key: Any) -> Any:
+    if key in table:
+        return key
+    normalized = _journal_key(name, key)
+    if normalized is not None and normalized in table:
+        return normalized
+    text = str(key)
+    if text in table:
+        return text
+    return None
+
+
+def _apply_journal_entry(entry: Dict[str, Any]) -> None:
+    name = str(entry.get("c") or "")
+    table = _COLLECTIONS.get(name)
+    if table is None:
+        return
+    key = _journal_key(name, entry.get("k"))
+    if key is None or key == "":
+        return
+    if entry.get("op") == "del":
+        existing = _resolve_record_key(table, name, entry.get("k"))
+        if existing is not None:
+            table.pop(existing, None)
+        table.pop(key, None)
+        return
+    table[key] = _decode_record(name, entry.get("v"))
+
+
+def _replay_journal(path: Path, legacy_seq: int) -> int:
+    """Apply journal entries newer than their shard file; return the last seq seen."""
+    last_seq = 0
+    if not path.exists():
+        return last_seq
+    with open(path, "rb") as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+            except Exception:
+                # A torn final write from a crash; everything before it is intact.
+                print(
+                    f"WARNING: ignoring unreadable journal entry {path.name}:{line_no}",
+                    file=sys.stderr,
+                )
+                break
+            if not isinstance(entry, dict):
+                continue
+            try:
+                seq = int(entry.get("s") or 0)
+            except Exception:
+                seq = 0
+            last_seq = max(last_seq, seq)
+            name = str(entry.get("c") or "")
+            if name not in _COLLECTIONS:
+                continue
+            shard = (name, _shard_of(name, _journal_key(name, entry.get("k"))))
+            if seq and seq <= _SHARD_SEQ.get(shard, legacy_seq):
+                continue
+            _apply_journal_entry(entry)
+            _DIRTY_SHARDS.add(shard)
+    return last_seq
+
+
+def _open_journal():
+    global _JOURNAL_FILE
+    if _JOURNAL_FILE is None or _JOURNAL_FILE.closed:
+        _JOURNAL_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _JOURNAL_FILE = open(_JOURNAL_PATH, "ab")
+    return _JOURNAL_FILE
+
+
+def _close_journal() -> None:
+    global _JOURNAL_FILE
+    if _JOURNAL_FILE is not None:
+        try:
+            _JOURNAL_FILE.close()
+        except Exception:
+            pass
+    _JOURNAL_FILE = None
+
+
+def _journal_entry(name: str, key: Any) -> Dict[str, Any] | None:
+    global _JOURNAL_SEQ
+
+    table = _COLLECTIONS.get(name)
+    if table is None:
+        raise ValueError(f"Unknown store collection: {name}")
+    stored_key = _resolve_record_key(table, name, key)
+    journal_key = stored_key if stored_key is not None else _journal_key(name, key)
+    if journal_key is None or journal_key == "":
+        return None
+
+    _DIRTY_SHARDS.add((name, _shard_of(name, journal_key)))
+    _JOURNAL_SEQ += 1
+    entry: Dict[str, Any] = {"s": _JOURNAL_SEQ, "c": name, "k": str(journal_key)}
+    if stored_key is None:
+        entry["op"] = "del"
+    else:
+        entry["op"] = "put"
+        entry["v"] = _encode_record(name, table[stored_key])
+    return entry
+
+
+def _append_journal(entries: List[Dict[str, Any]]) -> None:
+    if not entries:
+        return
+    data = b"".join(
+        json.dumps(entry, ensure_ascii=False, default=str, separators=(",", ":")).encode("utf-8")
+        + b"\n"
+        for entry in entries
+    )
+    f = _open_journal()
+    start = f.tell()
+    try:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    except Exception:
+        # Cut a partial write off; replay stops at the first torn line.
+        _close_journal()
+        try:
+            os.truncate(_JOURNAL_PATH, start)
+        except OSError:
+            pass
+        raise
+    _remember_disk_state()
 
-        payload = {
-            "events": _str_keyed(_EVENTS),
-            "requirements": _str_keyed(_REQUIREMENTS),
-            "requirement_templates": _REQUIREMENT_TEMPLATES,
-            "diagrams": _str_keyed(_DIAGRAMS),
-            "applications": _str_keyed(_APPLICATIONS),
-            "payments": _str_keyed(_PAYMENTS),
-            "payouts": _str_keyed(_PAYOUTS),
-            "audit_logs": _str_keyed(_AUDIT_LOGS),
-            "verifications": _str_keyed(_VERIFICATIONS),
-            "layout_meta": _str_keyed(_LAYOUT_META),
-            "booths": _str_keyed(_BOOTHS),
-            "templates": _str_keyed(_TEMPLATES),
-            "vendors": _VENDORS,
-            "reviews": {
-                vendor_key: _str_keyed(vendor_reviews)
-                for vendor_key, vendor_reviews in _REVIEWS.items()
-            },
-            "event_walls": _str_keyed(_EVENT_WALLS),
-            "next": {
-                "event_id": _NEXT_EVENT_ID,
-                "booth_id": _NEXT_BOOTH_ID,
-                "template_id": _NEXT_TEMPLATE_ID,
-                "application_id": _NEXT_APPLICATION_ID,
-            },
+
+def save_records(name: str, *keys: Any) -> None:
+    """Persist only the given records of one collection.
+
+    A key that is no longer present in the collection is written as a
+    delete. With the journal each record becomes one journal entry; without
+    it only the shards holding those records are rewritten.
+    """
+    global _PENDING_SAVES
+
+    if name not in _COLLECTIONS:
+        raise ValueError(f"Unknown store collection: {name}")
+    with _LOCK:
+        if name == "applications":
+            for key in keys:
+                _reindex_application(key)
+        _touch_collections(name, keys=keys)
+        if _BACKEND is not None:
+            _WRITE_STATS["logical_saves"] += 1
+            _backend_write(name, _backend_rows(name, keys))
+            return
+        _PENDING_RECORDS.setdefault(name, set()).update(keys)
+        _PENDING_SAVES += 1
+        _WRITE_STATS["logical_saves"] += 1
+        pending = _PENDING_SAVES
+    _schedule_flush(pending)
+
+
+def _flush_locked() -> bool:
+    """Write queued record changes; returns True when a checkpoint is due.
+
+    Must be called with _LOCK held. If the journal write fails the queue is
+    left as it was and the error propagates; the next flush retries it.
+    """
+    global _PENDING_SAVES, _PENDING_CHECKPOINT
+
+    if not _PENDING_SAVES:
+        return False
+
+    records = _PENDING_RECORDS
+    saves = _PENDING_SAVES
+    checkpoint = _PENDING_CHECKPOINT
+
+    if STORE_JOURNAL_ENABLED:
+        entries: List[Dict[str, Any]] = []
+        seen: Set[Tuple[str, str]] = set()
+        for name, keys in records.items():
+            for key in keys:
+                entry = _journal_entry(name, key)
+                if entry and (name, entry["k"]) not in seen:
+                    seen.add((name, entry["k"]))
+                    entries.append(entry)
+        _append_journal(entries)
+    else:
+        for name, keys in records.items():
+            table = _COLLECTIONS[name]
+            for key in keys:
+                stored_key = _resolve_record_key(table, name, key)
+                _DIRTY_SHARDS.add((name, _shard_of(name, stored_key if stored_key is not None else key)))
+        checkpoint = checkpoint or bool(records)
+
+    _PENDING_RECORDS.clear()
+    _PENDING_SAVES = 0
+    _PENDING_CHECKPOINT = False
+    _WRITE_STATS["physical_writes"] += 1
+    _WRITE_STATS["coalesced_saves"] += saves - 1
+    return checkpoint
+
+
+def flush(sync: bool = True) -> None:
+    """Write everything queued by save_store()/save_records().
+
+    With sync=True the data is on disk when this returns; use it on payment
+    and webhook paths that must be durable before responding. sync=False only
+    asks the flusher thread to write now instead of at its next deadline.
+    """
+    if not sync:
+        _FLUSH_WAKE.set()
+        _FLUSH_URGENT.set()
+        return
+    with _LOCK:
+        _WRITE_STATS["sync_flushes"] += 1
+    _flush_now()
+
+
+def _flush_now() -> None:
+    if _BACKEND is not None:
+        # Backend writes are committed when they are made.
+        return
+    with _LOCK:
+        checkpoint = _flush_locked()
+        journal_size = _JOURNAL_FILE.tell() if _JOURNAL_FILE is not None else 0
+    if checkpoint:
+        compact_store(force=True)
+        return
+    if journal_size >= STORE_JOURNAL_COMPACT_BYTES:
+        _ensure_compactor()
+        _COMPACTOR_WAKE.set()
+
+
+def _schedule_flush(pending: int) -> None:
+    if not STORE_WRITE_BEHIND:
+        _flush_now()
+        return
+    _ensure_flusher()
+    _FLUSH_WAKE.set()
+    if pending >= STORE_FLUSH_MAX_PENDING:
+        _FLUSH_URGENT.set()
+
+
+def _flusher_loop() -> None:
+    while True:
+        _FLUSH_WAKE.wait()
+        _FLUSH_URGENT.wait(STORE_FLUSH_MAX_DELAY_MS / 1000.0)
+        _FLUSH_WAKE.clear()
+        _FLUSH_URGENT.clear()
+        try:
+            _flush_now()
+        except Exception as e:
+            print(f"WARNING: store flush failed: {e}", file=sys.stderr)
+
+
+def _ensure_flusher() -> None:
+    global _FLUSHER
+    if _FLUSHER is not None and _FLUSHER.is_alive():
+        return
+    with _FLUSHER_START_LOCK:
+        if _FLUSHER is not None and _FLUSHER.is_alive():
+            return
+        _FLUSHER = threading.Thread(
+            target=_flusher_loop,
+            name="store-write-behind",
+            daemon=True,
+        )
+        _FLUSHER.start()
+
+
+def store_write_stats() -> Dict[str, Any]:
+    """Counters for logical saves vs. physical writes since process start."""
+    with _LOCK:
+        stats: Dict[str, Any] = {
+            **_WRITE_STATS,
+            "pending_saves": _PENDING_SAVES,
+            "journal_seq": _JOURNAL_SEQ,
+            "dirty_shards": len(_DIRTY_SHARDS),
+            "backend": "file",
+        }
+        if _BACKEND is not None:
+            stats.update(_BACKEND.stats())
+            stats["change_counters"] = dict(_BACKEND_SEEN)
+        return stats
+
+
+def _flush_at_exit() -> None:
+    try:
+        _flush_now()
+    except Exception as e:
+        print(f"WARNING: store flush at exit failed: {e}", file=sys.stderr)
+
+
+atexit.register(_flush_at_exit)
+
+
+def compact_store(force: bool = False) -> bool:
+    """Rewrite dirty snapshot shards and start a fresh journal.
+
+    Every shard touched by a journal entry is dirty, so once the dirty shards
+    are written the journal is redundant. Shards are serialized under _LOCK
+    but written after it is released; the rotated journal is kept until all
+    shards are durable, and replay skips entries a shard already contains, so
+    a crash at any point still replays to the same state.
+    """
+    if _BACKEND is not None:
+        return False
+    with _LOCK:
+        # Queued records go to the journal first so they survive a crash
+        # while the shards are being written.
+        if _flush_locked():
+            force = True
+        journal_size = _JOURNAL_PATH.stat().st_size if _JOURNAL_PATH.exists() else 0
+        if not force and journal_size < STORE_JOURNAL_COMPACT_BYTES:
+            return False
+
+        # Lock order is always _LOCK -> _COMPACT_LOCK; the writer below only
+        # holds _COMPACT_LOCK, so writers queue behind it instead of racing.
+        _COMPACT_LOCK.acquire()
+        try:
+            _recompute_next_counters()
+            files = _dirty_shard_files()
+            for name, shard in _DIRTY_SHARDS:
+                _SHARD_SEQ[(name, shard)] = _JOURNAL_SEQ
+            _DIRTY_SHARDS.clear()
+            _WRITE_STATS["compactions"] += 1
+            meta = {
+                "format": 1,
+                "journal_seq": _JOURNAL_SEQ,
+                "shard_counts": dict(_SHARD_COUNTS),
+                "next": _next_counters(),
+            }
+
+            _close_journal()
+            if _JOURNAL_PATH.exists():
+                if _JOURNAL_ROTATED_PATH.exists():
+                    # A previous compaction died before its shards landed.
+                    with open(_JOURNAL_ROTATED_PATH, "ab") as rotated:
+                        rotated.write(_JOURNAL_PATH.read_bytes())
+                        rotated.flush()
+                        os.fsync(rotated.fileno())
+                    _JOURNAL_PATH.unlink()
+                else:
+                    os.replace(_JOURNAL_PATH, _JOURNAL_ROTATED_PATH)
+        except Exception:
+            _COMPACT_LOCK.release()
+            raise
+
+    try:
+        for path, text in files:
+            _atomic_write_text(path, text)
+        # meta.json goes last: it is what marks the sharded layout as present.
+        _atomic_write_json(_SNAPSHOT_META_PATH, meta)
+        try:
+            _JOURNAL_ROTATED_PATH.unlink()
+        except FileNotFoundError:
+            pass
+        _remember_disk_state()
+    finally:
+        _COMPACT_LOCK.release()
+    return True
+
+
+def _compactor_loop() -> None:
+    while True:
+        _COMPACTOR_WAKE.wait(STORE_JOURNAL_COMPACT_INTERVAL)
+        _COMPACTOR_WAKE.clear()
+        try:
+            compact_store()
+        except Exception as e:
+            print(f"WARNING: store journal compaction failed: {e}", file=sys.stderr)
+
+
+def _ensure_compactor() -> None:
+    global _COMPACTOR
+    if _COMPACTOR is not None and _COMPACTOR.is_alive():
+        return
+    with _COMPACTOR_START_LOCK:
+        if _COMPACTOR is not None and _COMPACTOR.is_alive():
+            return
+        _COMPACTOR = threading.Thread(
+            target=_compactor_loop,
+            name="store-journal-compactor",
+            daemon=True,
+        )
+        _COMPACTOR.start()
+
+
+# ---------------------------------------------------------------------------
+# Application indexes
+# ---------------------------------------------------------------------------
+
+
+def _event_index_key(value: Any) -> str:
+    text = str(value if value is not None else "").strip()
+    if text.lstrip("-").isdigit():
+        return str(int(text))
+    return text
+
+
+def _application_index_entry(app: Any) -> Tuple[Tuple[str, ...], Tuple[str, ...], str, str]:
+    if not isinstance(app, dict):
+        return (), (), "", ""
+    emails = {
+        str(app.get(field) or "").strip().lower()
+        for field in ("vendor_email", "email")
+    }
+    vendor_ids = {
+        str(app.get(field) or "").strip().lower()
+        for field in ("vendor_id", "vendorId", "user_id", "userId")
+    }
+    emails.discard("")
+    vendor_ids.discard("")
+    event_key = _event_index_key(app.get("event_id") or app.get("eventId"))
+    record_id = str(app.get("id") if app.get("id") is not None else "").strip()
+    return tuple(sorted(emails)), tuple(sorted(vendor_ids)), event_key, record_id
+
+
+def _index_add(bucket: Dict[Any, Set[Any]], index_key: Any, key: Any) -> None:
+    bucket.setdefault(index_key, set()).add(key)
+
+
+def _index_discard(bucket: Dict[Any, Set[Any]], index_key: Any, key: Any) -> None:
+    keys = bucket.get(index_key)
+    if keys is None:
+        return
+    keys.discard(key)
+    if not keys:
+        bucket.pop(index_key, None)
+
+
+def _unindex_application_key(key: Any) -> None:
+    entry = _APP_INDEX.pop(key, None)
+    _APP_ORDER.pop(key, None)
+    if entry is None:
+        return
+    emails, vendor_ids, event_key, record_id = entry
+    if record_id:
+        _index_discard(_APPS_BY_RECORD_ID, record_id, key)
+    for email in emails:
+        _index_discard(_APPS_BY_VENDOR_EMAIL, email, key)
+        if event_key:
+            _index_discard(_APPS_BY_VENDOR_EVENT, (email, event_key), key)
+    for vendor_id in vendor_ids:
+        _index_discard(_APPS_BY_VENDOR_ID, vendor_id, key)
+    if event_key:
+        _index_discard(_APPS_BY_EVENT, event_key, key)
+
+
+def _index_application_key(key: Any) -> None:
+    global _APP_ORDER_SEQ
+
+    entry = _application_index_entry(_APPLICATIONS.get(key))
+    if _APP_INDEX.get(key) == entry:
+        return
+    order = _APP_ORDER.get(key)
+    _unindex_application_key(key)
+    if order is None:
+        _APP_ORDER_SEQ += 1
+        order = _APP_ORDER_SEQ
+    _APP_INDEX[key] = entry
+    _APP_ORDER[key] = order
+    emails, vendor_ids, event_key, record_id = entry
+    if record_id:
+        _index_add(_APPS_BY_RECORD_ID, record_id, key)
+    for email in emails:
+        _index_add(_APPS_BY_VENDOR_EMAIL, email, key)
+        if event_key:
+            _index_add(_APPS_BY_VENDOR_EVENT, (email, event_key), key)
+    for vendor_id in vendor_ids:
+        _index_add(_APPS_BY_VENDOR_ID, vendor_id, key)
+    if event_key:
+        _index_add(_APPS_BY_EVENT, event_key, key)
+
+
+def _bump_application_event(entry: Any) -> None:
+    if entry and entry[2]:
+        _APP_EVENT_GENERATIONS[entry[2]] = _APP_EVENT_GENERATIONS.get(entry[2], 0) + 1
+
+
+def _reindex_application(key: Any) -> None:
+    """Bring the indexes in line with one application record after a save."""
+    stored = _resolve_record_key(_APPLICATIONS, "applications", key)
+    if stored is not None:
+        before = _APP_INDEX.get(stored)
+        _index_application_key(stored)
+        _bump_application_event(before)
+        if _APP_INDEX.get(stored) != before:
+            _bump_application_event(_APP_INDEX.get(stored))
+        return
+    for candidate in (key, _journal_key("applications", key), str(key)):
+        if candidate in _APP_INDEX:
+            _bump_application_event(_APP_INDEX.get(candidate))
+            _unindex_application_key(candidate)
+
+
+def _rebuild_application_indexes() -> None:
+    global _APP_ORDER_SEQ, _APP_GENERATION, _APP_INDEXES_STALE
+
+    for bucket in (
+        _APPS_BY_VENDOR_EMAIL,
+        _APPS_BY_VENDOR_ID,
+        _APPS_BY_EVENT,
+        _APPS_BY_VENDOR_EVENT,
+        _APPS_BY_RECORD_ID,
+    ):
+        bucket.clear()
+    _APP_INDEX.clear()
+    _APP_ORDER.clear()
+    _APP_ORDER_SEQ = 0
+    _APP_GENERATION += 1
+    _APP_INDEXES_STALE = False
+    for key in list(_APPLICATIONS):
+        _index_application_key(key)
+
+
+def _ensure_application_indexes() -> None:
+    # Rebuild after a whole-collection save_store(). The size comparison is
+    # only a cheap net for a record inserted or removed before it was saved
+    # (routers insert first, then save); it cannot notice a record edited in
+    # place, whose vendor or event fields are reindexed by save_records().
+    if _APP_INDEXES_STALE or len(_APP_INDEX) != len(_APPLICATIONS):
+        _rebuild_application_indexes()
+
+
+def _indexed_applications(*buckets: Optional[Set[Any]]) -> Dict[Any, Dict[str, Any]]:
+    keys: Set[Any] = set()
+    for bucket in buckets:
+        if bucket:
+            keys.update(bucket)
+    found: Dict[Any, Dict[str, Any]] = {}
+    for key in sorted(keys, key=lambda k: _APP_ORDER.get(k, 0)):
+        app = _APPLICATIONS.get(key)
+        if isinstance(app, dict):
+            found[key] = app
+    return found
+
+
+def get_application(app_id: Any) -> Dict[str, Any] | None:
+    """Look up one application by store key or by its "id" field.
+
+    String and int forms of the same id resolve to the same record.
+    """
+    text = str(app_id if app_id is not None else "").strip()
+    if not text:
+        return None
+    with _LOCK:
+        candidates: List[Any] = [text]
+        try:
+            candidates.insert(0, int(text))
+        except ValueError:
+            pass
+        for candidate in candidates:
+            app = _APPLICATIONS.get(candidate)
+            if isinstance(app, dict) and str(candidate) == text:
+                return app
+        _ensure_application_indexes()
+        for app in _indexed_applications(_APPS_BY_RECORD_ID.get(text)).values():
+            if str(app.get("id") if app.get("id") is not None else "").strip() == text:
+                return app
+    return None
+
+
+def application_generation(event_id: Any) -> Tuple[int, int]:
+    """Change counter for one event's applications.
+
+    The value differs whenever an application of that event has been saved
+    since it was last read, so callers can key derived data on it.
+    """
+    event_key = _event_index_key(event_id)
+    with _LOCK:
+        _ensure_application_indexes()
+        return _APP_GENERATION, _APP_EVENT_GENERATIONS.get(event_key, 0)
+
+
+def applications_for_vendor(
+    vendor_email: Any = None, vendor_id: Any = None
+) -> Dict[Any, Dict[str, Any]]:
+    """Applications whose email or vendor id fields match, keyed by store key.
+
+    Matching is case-insensitive on any of the vendor email/id aliases, so
+    the result is a superset that callers may narrow with their own rules.
+    """
+    email = str(vendor_email or "").strip().lower()
+    vid = str(vendor_id or "").strip().lower()
+    with _LOCK:
+        _ensure_application_indexes()
+        return _indexed_applications(
+            _APPS_BY_VENDOR_EMAIL.get(email) if email else None,
+            _APPS_BY_VENDOR_ID.get(vid) if vid else None,
+            _APPS_BY_VENDOR_EMAIL.get(vid) if vid else None,
+            _APPS_BY_VENDOR_ID.get(email) if email else None,
+        )
+
+
+def applications_for_event(event_id: Any) -> Dict[Any, Dict[str, Any]]:
+    """Applications whose event_id (or eventId) matches, keyed by store key."""
+    event_key = _event_index_key(event_id)
+    if not event_key:
+        return {}
+    with _LOCK:
+        _ensure_application_indexes()
+        return _indexed_applications(_APPS_BY_EVENT.get(event_key))
+
+
+def applications_for_vendor_event(vendor_email: Any, event_id: Any) -> Dict[Any, Dict[str, Any]]:
+    """Applications for one vendor email at one event, keyed by store key."""
+    email = str(vendor_email or "").strip().lower()
+    event_key = _event_index_key(event_id)
+    if not email or not event_key:
+        return {}
+    with _LOCK:
+        _ensure_application_indexes()
+        return _indexed_applications(_APPS_BY_VENDOR_EVENT.get((email, event_key)))
+
+
+# ---------------------------------------------------------------------------
+# Read-only snapshots
+# ---------------------------------------------------------------------------
+
+
+def _read_only(self, *args: Any, **kwargs: Any) -> None:
+    raise TypeError("store snapshots are read-only; change the store and save it instead")
+
+
+class _FrozenDict(dict):
+    """A dict that refuses in-place changes, so snapshot views can be shared."""
+
+    __slots__ = ()
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def copy(self) -> Dict[Any, Any]:
+        return dict(self)
+
+    def __copy__(self) -> Dict[Any, Any]:
+        return dict(self)
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> Dict[Any, Any]:
+        return copy.deepcopy(dict(self), memo)
+
+    def __reduce__(self) -> Any:
+        return (dict, (dict(self),))
+
+
+class StoreSnapshot(_FrozenDict):
+    """Every collection as of one store generation."""
+
+    __slots__ = ("generation",)
+
+
+def _touch_collections(*names: str, keys: Optional[Iterable[Any]] = None) -> None:
+    """Bump the store generation for changed collections. Call with _LOCK held.
+
+    ``keys`` narrows the change to those records, so the next snapshot copies
+    only them and the payment ledger updates only them; without it the
+    collection's view (and the ledger) is rebuilt in full.
+    """
+    global _STORE_GENERATION
+
+    _STORE_GENERATION += 1
+    for name in names:
+        _COLLECTION_GENERATIONS[name] = _STORE_GENERATION
+        if name in ("payments", "events"):
+            _ledger_touch(name, keys)
+        if name not in _SNAPSHOT_VIEWS:
+            continue
+        if keys is None:
+            _SNAPSHOT_CHANGED[name] = None
+            continue
+        changed = _SNAPSHOT_CHANGED.setdefault(name, set())
+        if changed is None:
+            continue
+        changed.update(keys)
+        if len(changed) > _SNAPSHOT_MAX_TRACKED_KEYS:
+            _SNAPSHOT_CHANGED[name] = None
+
+
+def store_generation() -> int:
+    """Counter bumped by every save, reload and sync of the store."""
+    return _STORE_GENERATION
+
+
+def collection_generation(name: str) -> int:
+    """Store generation at which ``name`` last changed (0 if it never has)."""
+    return _COLLECTION_GENERATIONS.get(name, 0)
+
+
+def _frozen_record(name: str, value: Any) -> Any:
+    if not isinstance(value, dict):
+        return value
+    if name == "reviews":
+        return _FrozenDict({str(k): _frozen_record("", v) for k, v in value.items()})
+    return _FrozenDict(value)
+
+
+def _collection_view(name: str) -> _FrozenDict:
+    generation = _COLLECTION_GENERATIONS.get(name, 0)
+    cached = _SNAPSHOT_VIEWS.get(name)
+    if cached is not None and cached[0] == generation:
+        return cached[1]
+
+    table = _COLLECTIONS[name]
+    changed = _SNAPSHOT_CHANGED.pop(name, None)
+    if cached is None or changed is None:
+        view = {str(k): _frozen_record(name, v) for k, v in table.items()}
+    else:
+        # Copy-on-write: unchanged records are shared with the previous view.
+        view = dict(cached[1])
+        for key in changed:
+            stored = _resolve_record_key(table, name, key)
+            if stored is None:
+                view.pop(str(key), None)
+                view.pop(str(_journal_key(name, key)), None)
+            else:
+                view[str(stored)] = _frozen_record(name, table[stored])
+    frozen = _FrozenDict(view)
+    _SNAPSHOT_VIEWS[name] = (generation, frozen)
+    return frozen
+
+
+def get_store_snapshot() -> Dict[str, Any]:
+    """Read-only view of every collection, keyed by string id.
+
+    The view reflects the store as of its last save or reload and never
+    changes afterwards; repeated calls at the same generation return the same
+    object. Collections and records are read-only dicts; to change a record,
+    edit the live collection (e.g. _PAYMENTS) and save it.
+    """
+    global _SNAPSHOT
+
+    reload_store_if_changed()
+    with _LOCK:
+        nxt = {
+            "event_id": _NEXT_EVENT_ID,
+            "booth_id": _NEXT_BOOTH_ID,
+            "template_id": _NEXT_TEMPLATE_ID,
+            "application_id": _NEXT_APPLICATION_ID,
+        }
+        snapshot = _SNAPSHOT
+        if snapshot is not None and snapshot.generation == _STORE_GENERATION and snapshot["next"] == nxt:
+            return snapshot
+        snapshot = StoreSnapshot({name: _collection_view(name) for name in _COLLECTIONS}, next=_FrozenDict(nxt))
+        snapshot.generation = _STORE_GENERATION
+        _SNAPSHOT = snapshot
+        return snapshot
+
+
+# ---------------------------------------------------------------------------
+# Payment ledger
+# ---------------------------------------------------------------------------
+
+
+def _ledger_touch(name: str, keys: Optional[Iterable[Any]]) -> None:
+    global _PAYMENT_LEDGER_READY
+
+    if not _PAYMENT_LEDGER_READY:
+        return
+    if keys is None:
+        _PAYMENT_LEDGER_READY = False
+        return
+    if name == "events":
+        # An event's owner fields decide who its payments are attributed to.
+        keys = [key for event_key in keys for key in _PAYMENT_LEDGER.event_payment_keys(event_key)]
+    for key in keys:
+        stored = _resolve_record_key(_PAYMENTS, "payments", key)
+        if stored is None:
+            _PAYMENT_LEDGER.apply(_journal_key("payments", key), None, _EVENTS)
+        else:
+            _PAYMENT_LEDGER.apply(stored, _PAYMENTS[stored], _EVENTS)
+
+
+def _build_payment_ledger() -> PaymentLedger:
+    ledger = PaymentLedger()
+    for key, payment in _PAYMENTS.items():
+        ledger.apply(key, payment, _EVENTS)
+    return ledger
+
+
+def payment_ledger() -> PaymentLedger:
+    """Payment totals per event and organizer, as of the last save."""
+    global _PAYMENT_LEDGER, _PAYMENT_LEDGER_READY
+
+    with _LOCK:
+        if not _PAYMENT_LEDGER_READY:
+            _PAYMENT_LEDGER = _build_payment_ledger()
+            _PAYMENT_LEDGER_READY = True
+        ledger = _PAYMENT_LEDGER
+    _ensure_ledger_reconciler()
+    return ledger
+
+
+def reconcile_payment_ledger(repair: bool = True) -> Dict[str, Any]:
+    """Recompute the ledger from _PAYMENTS and report buckets that drifted.
+
+    With repair=True a drifted ledger is replaced by the recomputed one.
+    """
+    global _PAYMENT_LEDGER
+
+    started = time.monotonic()
+    with _LOCK:
+        live = payment_ledger()
+        expected = _build_payment_ledger()
+        mismatches, sample = live.diff(expected)
+        if mismatches and repair:
+            _PAYMENT_LEDGER = expected
+        report = {
+            "at": time.time(),
+            "payments": len(expected),
+            "mismatches": mismatches,
+            "repaired": bool(mismatches and repair),
+            "duration_ms": round((time.monotonic() - started) * 1000, 3),
+            "sample": sample,
+        }
+        _LEDGER_RECONCILE_REPORT.clear()
+        _LEDGER_RECONCILE_REPORT.update(report)
+    if mismatches:
+        print(f"WARNING: payment ledger drifted in {mismatches} buckets", file=sys.stderr)
+    return report
+
+
+def payment_ledger_stats() -> Dict[str, Any]:
+    with _LOCK:
+        return {
+            "ready": _PAYMENT_LEDGER_READY,
+            "payments": len(_PAYMENT_LEDGER),
+            "reconcile_interval_seconds": PAYMENT_LEDGER_RECONCILE_INTERVAL,
+            "last_reconcile": dict(_LEDGER_RECONCILE_REPORT) or None,
         }
 
-        _atomic_write_json(_DATA_PATH, payload)
+
+def _ledger_reconciler_loop() -> None:
+    while True:
+        time.sleep(PAYMENT_LEDGER_RECONCILE_INTERVAL)
+        try:
+            reconcile_payment_ledger()
+        except Exception as e:
+            print(f"WARNING: payment ledger reconciliation failed: {e}", file=sys.stderr)
+
+
+def _ensure_ledger_reconciler() -> None:
+    global _LEDGER_RECONCILER
+    if PAYMENT_LEDGER_RECONCILE_INTERVAL <= 0:
+        return
+    if _LEDGER_RECONCILER is not None and _LEDGER_RECONCILER.is_alive():
+        return
+    with _LEDGER_RECONCILER_START_LOCK:
+        if _LEDGER_RECONCILER is not None and _LEDGER_RECONCILER.is_alive():
+            return
+        _LEDGER_RECONCILER = threading.Thread(
+            target=_ledger_reconciler_loop,
+            name="payment-ledger-reconciler",
+            daemon=True,
+        )
+        _LEDGER_RECONCILER.start()
 
 
 load_store()
@@ -266,6 +1625,8 @@ def next_event_id() -> int:
     global _NEXT_EVENT_ID
     with _LOCK:
         _NEXT_EVENT_ID = max(int(_NEXT_EVENT_ID or 1), _next_id_from_keys(_EVENTS, 1))
+        if _BACKEND is not None:
+            _NEXT_EVENT_ID = _BACKEND.next_id("event_id", _NEXT_EVENT_ID)
         val = _NEXT_EVENT_ID
         _NEXT_EVENT_ID += 1
         return val
@@ -275,6 +1636,8 @@ def next_booth_id() -> int:
     global _NEXT_BOOTH_ID
     with _LOCK:
         _NEXT_BOOTH_ID = max(int(_NEXT_BOOTH_ID or 1), _next_id_from_keys(_BOOTHS, 1))
+        if _BACKEND is not None:
+            _NEXT_BOOTH_ID = _BACKEND.next_id("booth_id", _NEXT_BOOTH_ID)
         val = _NEXT_BOOTH_ID
         _NEXT_BOOTH_ID += 1
         return val
@@ -287,6 +1650,8 @@ def next_template_id() -> int:
             int(_NEXT_TEMPLATE_ID or 1),
             _next_id_from_keys(_TEMPLATES, 1),
         )
+        if _BACKEND is not None:
+            _NEXT_TEMPLATE_ID = _BACKEND.next_id("template_id", _NEXT_TEMPLATE_ID)
         val = _NEXT_TEMPLATE_ID
         _NEXT_TEMPLATE_ID += 1
         return val
@@ -299,6 +1664,8 @@ def next_application_id() -> int:
             int(_NEXT_APPLICATION_ID or 1),
             _next_id_from_keys(_APPLICATIONS, 1),
         )
+        if _BACKEND is not None:
+            _NEXT_APPLICATION_ID = _BACKEND.next_id("application_id", _NEXT_APPLICATION_ID)
         val = _NEXT_APPLICATION_ID
         _NEXT_APPLICATION_ID += 1
         return val
@@ -318,9 +1685,7 @@ def find_existing_application(
     event_key = str(event_id)
 
     with _LOCK:
-        for app in (_APPLICATIONS or {}).values():
-            if not isinstance(app, dict):
-                continue
+        for app in applications_for_vendor_event(email, event_id).values():
             if str(app.get("vendor_email") or "").strip().lower() != email:
                 continue
             if str(app.get("event_id")) != event_key:
@@ -335,37 +1700,6 @@ def find_existing_application(
     return None
 
 
-def get_store_snapshot() -> Dict[str, Any]:
-    with _LOCK:
-        load_store()
-        return {
-            "events": _str_keyed(_EVENTS),
-            "requirements": _str_keyed(_REQUIREMENTS),
-            "requirement_templates": dict(_REQUIREMENT_TEMPLATES),
-            "diagrams": _str_keyed(_DIAGRAMS),
-            "applications": _str_keyed(_APPLICATIONS),
-            "payments": _str_keyed(_PAYMENTS),
-            "payouts": _str_keyed(_PAYOUTS),
-            "audit_logs": _str_keyed(_AUDIT_LOGS),
-            "verifications": _str_keyed(_VERIFICATIONS),
-            "layout_meta": _str_keyed(_LAYOUT_META),
-            "booths": _str_keyed(_BOOTHS),
-            "templates": _str_keyed(_TEMPLATES),
-            "vendors": dict(_VENDORS),
-            "reviews": {
-                vendor_key: _str_keyed(vendor_reviews)
-                for vendor_key, vendor_reviews in _REVIEWS.items()
-            },
-            "event_walls": _str_keyed(_EVENT_WALLS),
-            "next": {
-                "event_id": _NEXT_EVENT_ID,
-                "booth_id": _NEXT_BOOTH_ID,
-                "template_id": _NEXT_TEMPLATE_ID,
-                "application_id": _NEXT_APPLICATION_ID,
-            },
-        }
-
-
 def next_verification_id() -> int:
     with _LOCK:
         existing_ids = []
@@ -374,7 +1708,10 @@ def next_verification_id() -> int:
                 existing_ids.append(int(k))
             except Exception:
                 continue
-        return (max(existing_ids) + 1) if existing_ids else 1
+        next_id = (max(existing_ids) + 1) if existing_ids else 1
+        if _BACKEND is not None:
+            next_id = _BACKEND.next_id("verification_id", next_id)
+        return next_id
 
 
 def get_verification_by_user_id(user_id: Any) -> Dict[str, Any] | None:
@@ -401,7 +1738,7 @@ def upsert_verification(user_id: Any, payload: Dict[str, Any]) -> Dict[str, Any]
         }
         record["user_id"] = uid
         _VERIFICATIONS[uid] = record
-        save_store()
+        save_records("verifications", uid)
         return record
 
 
@@ -428,7 +1765,7 @@ def upsert_vendor(email: Any, payload: Dict[str, Any]) -> Dict[str, Any]:
         record["email"] = key
         record["vendor_id"] = record.get("vendor_id") or key
         _VENDORS[key] = record
-        save_store()
+        save_records("vendors", key)
         return dict(record)
 
 
@@ -463,7 +1800,7 @@ def upsert_verification_record(payload: Dict[str, Any]) -> Dict[str, Any]:
         existing = _VERIFICATIONS.get(vid, {}) if isinstance(_VERIFICATIONS.get(vid, {}), dict) else {}
         record = {**existing, **data, "id": vid}
         _VERIFICATIONS[vid] = record
-        save_store()
+        save_records("verifications", vid)
         return dict(record)
 
 def get_or_create_application(
@@ -491,7 +1828,7 @@ def get_or_create_application(
         }
 
         _APPLICATIONS[app_id] = application
-        save_store()
+        save_records("applications", app_id)
         return application
 
 
@@ -530,7 +1867,7 @@ def append_event_wall_post(event_id: Any, post: Dict[str, Any]) -> Dict[str, Any
         posts.append(clean_post)
         existing["posts"] = posts[-250:]
         _EVENT_WALLS[eid] = existing
-        save_store()
+        save_records("event_walls", eid)
         return dict(clean_post)
 
 
@@ -549,5 +1886,5 @@ def delete_event_wall_post(event_id: Any, post_id: Any) -> bool:
         changed = len(existing["posts"]) != before
         if changed:
             _EVENT_WALLS[eid] = existing
-            save_store()
+            save_records("event_walls", eid)
         return changed
@@ -0,0 +1,312 @@
+# app/store_sqlite.py
+#
+# SQLite backend for app/store.py, shared by every worker process on the host.
+# Each collection is a table of JSON records keyed by the store key; the
+# database runs in WAL mode so readers never block the writer.
+#
+# Every write gets the next value of one global sequence, stored on the row
+# and as its collection's change counter. A worker remembers the counters it
+# has seen and pulls only the rows written after them; deletes are kept as
+# rows with a NULL value so other workers see them too. Id counters live here
+# as well, so two workers never hand out the same id.
+#
+# Each worker also records how far it has read (store_readers). compact()
+# drops the NULL delete markers every live worker has read past; a worker that
+# was idle longer than STORE_SQLITE_READER_TTL no longer holds them back, and
+# if it comes back changes_since() has it reload the collections it missed
+# markers for instead.
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+STORE_SQLITE_SYNCHRONOUS = os.getenv("STORE_SQLITE_SYNCHRONOUS", "FULL").strip().upper() or "FULL"
+STORE_SQLITE_BUSY_TIMEOUT = float(os.getenv("STORE_SQLITE_BUSY_TIMEOUT", "10"))
+STORE_SQLITE_READER_TTL = float(os.getenv("STORE_SQLITE_READER_TTL", "3600"))
+
+# (store key, JSON text or None for a delete)
+Row = Tuple[str, Optional[str]]
+
+
+def _table(name: str) -> str:
+    if not name.replace("_", "").isalnum():
+        raise ValueError(f"Invalid store collection name: {name}")
+    return f"store_{name}"
+
+
+class SQLiteStore:
+    """Row-level store tables plus change and id counters in one SQLite file.
+
+    One connection per instance; callers serialize access (app.store holds
+    its _LOCK around every call).
+    """
+
+    def __init__(self, path: str | Path, collections: Iterable[str]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.collections = tuple(collections)
+        self.reader = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(
+            str(self.path),
+            timeout=STORE_SQLITE_BUSY_TIMEOUT,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(f"PRAGMA synchronous={STORE_SQLITE_SYNCHRONOUS}")
+        self._data_version: Optional[int] = None
+        with self._transaction():
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS store_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS store_readers ("
+                "reader TEXT NOT NULL, collection TEXT NOT NULL, seen INTEGER NOT NULL, heartbeat REAL NOT NULL, "
+                "PRIMARY KEY (reader, collection))"
+            )
+            for name in self.collections:
+                table = _table(name)
+                self._conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT, seq INTEGER NOT NULL)"
+                )
+                self._conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_seq ON {table} (seq)")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # IMMEDIATE takes the write lock up front, so concurrent writers wait
+        # on busy_timeout instead of failing to upgrade a read transaction.
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def _meta(self, conn: sqlite3.Connection, name: str) -> int:
+        row = conn.execute("SELECT value FROM store_meta WHERE name = ?", (name,)).fetchone()
+        return int(row[0]) if row else 0
+
+    @staticmethod
+    def _set_meta(conn: sqlite3.Connection, name: str, value: int) -> None:
+        conn.execute(
+            "INSERT INTO store_meta (name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = excluded.value",
+            (name, int(value)),
+        )
+
+    # -- reads --------------------------------------------------------------
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return self._meta(self._conn, "seq") == 0
+
+    def counters(self) -> Dict[str, int]:
+        """Change counter (last sequence written) per collection."""
+        with self._lock:
+            rows = self._conn.execute("SELECT name, value FROM store_meta WHERE name LIKE 'seq:%'").fetchall()
+        return {name[4:]: int(value) for name, value in rows}
+
+    def changed(self) -> bool:
+        """True when another connection committed since the last call.
+
+        PRAGMA data_version reads no table, so an idle check stays cheap.
+        """
+        with self._lock:
+            version = int(self._conn.execute("PRAGMA data_version").fetchone()[0])
+            changed = version != self._data_version
+            self._data_version = version
+        return changed
+
+    def load(self) -> Tuple[Dict[str, List[Row]], Dict[str, int]]:
+        """Every live record per collection, and the counters they are current to."""
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                counters = {
+                    name[4:]: int(value)
+                    for name, value in self._conn.execute(
+                        "SELECT name, value FROM store_meta WHERE name LIKE 'seq:%'"
+                    ).fetchall()
+                }
+                records = {
+                    name: self._conn.execute(
+                        f"SELECT key, value FROM {_table(name)} WHERE value IS NOT NULL ORDER BY seq"
+                    ).fetchall()
+                    for name in self.collections
+                }
+            finally:
+                self._conn.execute("COMMIT")
+        return records, counters
+
+    def changes_since(
+        self, seen: Dict[str, int]
+    ) -> Tuple[Dict[str, List[Row]], Dict[str, int], Set[str]]:
+        """Rows written after ``seen`` (collection -> counter), oldest first.
+
+        The third value names collections whose delete markers past ``seen``
+        were already compacted away; for those every live record is returned
+        and the caller should replace the collection rather than merge.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                meta = self._conn.execute(
+                    "SELECT name, value FROM store_meta WHERE name LIKE 'seq:%' OR name LIKE 'pruned:%'"
+                ).fetchall()
+                counters = {name[4:]: int(value) for name, value in meta if name.startswith("seq:")}
+                pruned = {name[7:]: int(value) for name, value in meta if name.startswith("pruned:")}
+                changes: Dict[str, List[Row]] = {}
+                reload: Set[str] = set()
+                for name, counter in counters.items():
+                    since = seen.get(name, 0)
+                    if name not in self.collections or counter <= since:
+                        continue
+                    if pruned.get(name, 0) > since:
+                        reload.add(name)
+                        changes[name] = self._conn.execute(
+                            f"SELECT key, value FROM {_table(name)} WHERE value IS NOT NULL ORDER BY seq"
+                        ).fetchall()
+                    else:
+                        changes[name] = self._conn.execute(
+                            f"SELECT key, value FROM {_table(name)} WHERE seq > ? ORDER BY seq",
+                            (since,),
+                        ).fetchall()
+            finally:
+                self._conn.execute("COMMIT")
+        return changes, counters, reload
+
+    # -- writes -------------------------------------------------------------
+
+    def write(self, name: str, rows: Iterable[Row]) -> Tuple[int, int]:
+        """Upsert (or tombstone, for a None value) rows of one collection.
+
+        Returns the collection's change counter before and after the write.
+        """
+        table = _table(name)
+        rows = list(rows)
+        with self._transaction() as conn:
+            before = self._meta(conn, f"seq:{name}")
+            seq = self._meta(conn, "seq")
+            for key, value in rows:
+                seq += 1
+                conn.execute(
+                    f"INSERT INTO {table} (key, value, seq) VALUES (?, ?, ?) "
+                    "ON CONFLICT(key) DO UPDATE SET value = excluded.value, seq = excluded.seq",
+                    (str(key), value, seq),
+                )
+            if rows:
+                self._set_meta(conn, "seq", seq)
+                self._set_meta(conn, f"seq:{name}", seq)
+            return before, self._meta(conn, f"seq:{name}")
+
+    def import_records(self, records: Dict[str, List[Row]], id_counters: Dict[str, int]) -> bool:
+        """Seed an empty database; False when another worker already did."""
+        with self._transaction() as conn:
+            if self._meta(conn, "seq"):
+                return False
+            seq = 0
+            for name, rows in records.items():
+                table = _table(name)
+                for key, value in rows:
+                    seq += 1
+                    conn.execute(
+                        f"INSERT OR REPLACE INTO {table} (key, value, seq) VALUES (?, ?, ?)",
+                        (str(key), value, seq),
+                    )
+                self._set_meta(conn, f"seq:{name}", seq)
+            for counter, value in id_counters.items():
+                self._set_meta(conn, f"next:{counter}", int(value or 1))
+            # A non-zero sequence marks the database as seeded, even when the
+            # imported store was empty.
+            self._set_meta(conn, "seq", max(seq, 1))
+        return True
+
+    def next_id(self, counter: str, floor: int = 1) -> int:
+        """Allocate the next value of a named id counter, never below ``floor``."""
+        with self._transaction() as conn:
+            value = max(self._meta(conn, f"next:{counter}"), int(floor or 1))
+            self._set_meta(conn, f"next:{counter}", value + 1)
+            return value
+
+    def id_counters(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute("SELECT name, value FROM store_meta WHERE name LIKE 'next:%'").fetchall()
+        return {name[5:]: int(value) for name, value in rows}
+
+    def mark_seen(self, seen: Dict[str, int]) -> None:
+        """Record how far this worker has read, so compact() keeps what it still needs."""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO store_readers (reader, collection, seen, heartbeat) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(reader, collection) DO UPDATE SET seen = excluded.seen, heartbeat = excluded.heartbeat",
+                [(self.reader, name, int(seen.get(name, 0)), now) for name in self.collections],
+            )
+
+    def compact(self, reader_ttl: float = STORE_SQLITE_READER_TTL) -> int:
+        """Delete markers every live worker has read past; returns how many were dropped."""
+        removed = 0
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM store_readers WHERE heartbeat < ?", (time.time() - reader_ttl,))
+            for name in self.collections:
+                table = _table(name)
+                row = conn.execute("SELECT MIN(seen) FROM store_readers WHERE collection = ?", (name,)).fetchone()
+                horizon = self._meta(conn, f"seq:{name}")
+                if row[0] is not None:
+                    horizon = min(horizon, int(row[0]))
+                last = conn.execute(
+                    f"SELECT MAX(seq) FROM {table} WHERE value IS NULL AND seq <= ?", (horizon,)
+                ).fetchone()[0]
+                if last is None:
+                    continue
+                removed += conn.execute(f"DELETE FROM {table} WHERE value IS NULL AND seq <= ?", (last,)).rowcount
+                self._set_meta(conn, f"pruned:{name}", max(self._meta(conn, f"pruned:{name}"), int(last)))
+        return removed
+
+    def set_id_counters(self, counters: Dict[str, int]) -> None:
+        with self._transaction() as conn:
+            for counter, value in counters.items():
+                current = self._meta(conn, f"next:{counter}")
+                self._set_meta(conn, f"next:{counter}", max(current, int(value or 1)))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            seq = self._meta(self._conn, "seq")
+            tombstones = sum(
+                int(self._conn.execute(f"SELECT COUNT(*) FROM {_table(name)} WHERE value IS NULL").fetchone()[0])
+                for name in self.collections
+            )
+        return {"backend": "sqlite", "path": str(self.path), "seq": seq, "tombstones": tombstones}
+
+
+class StoreSyncMiddleware:
+    """Pull other workers' store writes before each HTTP request."""
+
+    def __init__(self, app, *, sync: Callable[[], Any]):
+        self.app = app
+        self.sync = sync
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http":
+            import anyio.to_thread
+
+            try:
+                # sync() waits on the store lock, which a handler thread may
+                # hold mid-save; never wait for it on the event loop.
+                await anyio.to_thread.run_sync(self.sync)
+            except Exception as exc:
+                print(f"[store] sync failed, serving local state: {exc}")
+        await self.app(scope, receive, send)
@@ -1,6 +1,7 @@
 import os
 import jwt
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 
 SECRET = os.getenv("QR_SECRET", "dev-secret-change-this")
 ALGO = "HS256"
@@ -17,5 +18,16 @@ def generate_qr_token(event_id: int, vendor_id: int, application_id: int):
     return jwt.encode(payload, SECRET, algorithm=ALGO)
 
 
-def verify_qr_token(token: str):
-    return jwt.decode(token, SECRET, algorithms=[ALGO])
\ No newline at end of file
+def verify_qr_token(token: str, *, at: Optional[datetime] = None):
+    """Decode a pass token; with ``at`` (naive UTC) expiry is judged at that time.
+
+    Offline scanners upload scans after the fact, so a pass that was valid
+    when it was scanned is still accepted.
+    """
+    if at is None:
+        return jwt.decode(token, SECRET, algorithms=[ALGO])
+    claims = jwt.decode(token, SECRET, algorithms=[ALGO], options={"verify_exp": False})
+    exp = claims.get("exp")
+    if exp is not None and at.replace(tzinfo=timezone.utc).timestamp() >= float(exp):
+        raise jwt.ExpiredSignatureError("Signature has expired")
+    return claims
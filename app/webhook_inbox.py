@@ -0,0 +1,385 @@
+# app/webhook_inbox.py
+#
+# Durable inbox for Stripe webhooks. The endpoints verify the signature, hand
+# the raw event to ingest() and answer 200 straight away. Each event is stored
+# once per endpoint: (source, Stripe event id) is unique, so Stripe's retries
+# and duplicate deliveries are recorded as duplicates instead of being
+# applied again.
+#
+# Worker threads claim due events and run the handler the endpoint registered
+# with register_handler(). Events for the same Stripe object (the
+# subscription, or else the object itself) run one at a time in arrival
+# order: an event is not claimed while an earlier one for its object is still
+# pending, waiting for a retry or being processed. Failed events are retried
+# with exponential backoff and parked as "dead" after
+# WEBHOOK_INBOX_MAX_ATTEMPTS; python -m app.scripts.replay_webhooks requeues
+# them. The spool is SQLite in DATA_DIR, shared by every worker process, and
+# claims are leased so a crashed worker's events are retried.
+#
+# Handlers run on worker threads, outside StoreSyncMiddleware, so each event
+# first pulls whatever other processes wrote to the store since (a sync for
+# the SQLite backend, a reload when the store files changed otherwise).
+from __future__ import annotations
+
+import collections
+import json
+import os
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from app.store import reload_store_if_changed
+
+DATA_DIR = Path(os.getenv("DATA_DIR", "/data/vendorconnect"))
+_INBOX_PATH = DATA_DIR / "_webhook_inbox.sqlite3"
+
+WEBHOOK_INBOX_ENABLED = os.getenv("WEBHOOK_INBOX", "1").strip().lower() not in {"0", "false", "no", "off"}
+WEBHOOK_INBOX_WORKERS = max(1, int(os.getenv("WEBHOOK_INBOX_WORKERS", "2")))
+WEBHOOK_INBOX_BATCH_SIZE = max(1, int(os.getenv("WEBHOOK_INBOX_BATCH_SIZE", "10")))
+WEBHOOK_INBOX_MAX_ATTEMPTS = max(1, int(os.getenv("WEBHOOK_INBOX_MAX_ATTEMPTS", "8")))
+WEBHOOK_INBOX_BACKOFF_SECONDS = float(os.getenv("WEBHOOK_INBOX_BACKOFF_SECONDS", "5"))
+WEBHOOK_INBOX_MAX_BACKOFF_SECONDS = float(os.getenv("WEBHOOK_INBOX_MAX_BACKOFF_SECONDS", "3600"))
+WEBHOOK_INBOX_LEASE_SECONDS = float(os.getenv("WEBHOOK_INBOX_LEASE_SECONDS", "300"))
+WEBHOOK_INBOX_POLL_SECONDS = float(os.getenv("WEBHOOK_INBOX_POLL_SECONDS", "1"))
+WEBHOOK_INBOX_RETAIN_SECONDS = float(os.getenv("WEBHOOK_INBOX_RETAIN_SECONDS", str(30 * 24 * 3600)))
+
+Handler = Callable[[Dict[str, Any]], Any]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS inbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    source TEXT NOT NULL,
+    event_id TEXT NOT NULL,
+    event_type TEXT NOT NULL,
+    object_key TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    claimed_until REAL,
+    last_error TEXT,
+    result TEXT,
+    received_at REAL NOT NULL,
+    processed_at REAL,
+    UNIQUE (source, event_id)
+);
+CREATE INDEX IF NOT EXISTS ix_inbox_due ON inbox (status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS ix_inbox_object ON inbox (object_key, id);
+"""
+
+_HANDLERS: Dict[str, Handler] = {}
+
+_LOCAL = threading.local()
+_SCHEMA_READY: set[str] = set()
+
+_STATS_LOCK = threading.Lock()
+_STATS: Dict[str, int] = {"received": 0, "duplicates": 0, "processed": 0, "failed_attempts": 0, "dead": 0}
+# Seconds from receipt to successful processing.
+_LAGS: "collections.deque[float]" = collections.deque(maxlen=500)
+
+_WAKE = threading.Event()
+_WORKERS: List[threading.Thread] = []
+_WORKERS_LOCK = threading.Lock()
+
+
+def register_handler(source: str, handler: Handler) -> None:
+    """Route events ingested for ``source`` to ``handler(event_dict)``."""
+    _HANDLERS[source] = handler
+
+
+def _connect() -> sqlite3.Connection:
+    path = str(_INBOX_PATH)
+    conn = getattr(_LOCAL, "conn", None)
+    if conn is not None and getattr(_LOCAL, "path", None) == path:
+        return conn
+    _INBOX_PATH.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    # An acknowledged event must survive a crash; Stripe will not resend it.
+    conn.execute("PRAGMA synchronous=FULL")
+    if path not in _SCHEMA_READY:
+        conn.executescript(_SCHEMA)
+        _SCHEMA_READY.add(path)
+    _LOCAL.conn, _LOCAL.path = conn, path
+    return conn
+
+
+def _bump(key: str, amount: int = 1) -> None:
+    with _STATS_LOCK:
+        _STATS[key] = _STATS.get(key, 0) + amount
+
+
+def _object_key(event: Dict[str, Any]) -> str:
+    obj = (event.get("data") or {}).get("object") or {}
+    subscription = obj.get("subscription")
+    if isinstance(subscription, dict):
+        subscription = subscription.get("id")
+    return str(subscription or obj.get("id") or event.get("id") or "")
+
+
+def ingest(source: str, payload: bytes | str) -> Dict[str, Any]:
+    """Store one verified event and return a receipt for the webhook response.
+
+    ``payload`` is the raw request body, already signature-checked. With
+    WEBHOOK_INBOX=0 the event is processed inline instead. Storage errors
+    propagate, so the endpoint fails and Stripe retries the delivery.
+    """
+    text = payload.decode("utf-8") if isinstance(payload, bytes) else payload
+    event = json.loads(text)
+    event_id = str(event.get("id") or "")
+    event_type = str(event.get("type") or "")
+    if not event_id:
+        raise ValueError("Stripe event has no id")
+
+    if not WEBHOOK_INBOX_ENABLED:
+        return {"event_id": event_id, "queued": False, "result": _HANDLERS[source](event)}
+
+    now = time.time()
+    cursor = _connect().execute(
+        "INSERT OR IGNORE INTO inbox (source, event_id, event_type, object_key, payload, next_attempt_at, received_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (source, event_id, event_type, _object_key(event), text, now, now),
+    )
+    duplicate = cursor.rowcount == 0
+    _bump("duplicates" if duplicate else "received")
+    if not duplicate:
+        start_workers()
+        _WAKE.set()
+    return {"event_id": event_id, "queued": not duplicate, "duplicate": duplicate}
+
+
+def _claim_batch(limit: int) -> List[tuple]:
+    sources = list(_HANDLERS)
+    if not sources:
+        return []
+    now = time.time()
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(
+            "UPDATE inbox SET status = 'pending', claimed_until = NULL "
+            "WHERE status = 'processing' AND claimed_until <= ?",
+            (now,),
+        )
+        rows = conn.execute(
+            f"""
+            SELECT id, source, payload, attempts, received_at FROM inbox AS e
+            WHERE status = 'pending' AND next_attempt_at <= ?
+              AND source IN ({", ".join("?" for _ in sources)})
+              AND NOT EXISTS (
+                  SELECT 1 FROM inbox AS earlier
+                  WHERE earlier.object_key = e.object_key
+                    AND earlier.id < e.id
+                    AND earlier.status IN ('pending', 'processing')
+              )
+            ORDER BY id
+            LIMIT ?
+            """,
+            (now, *sources, limit),
+        ).fetchall()
+        if rows:
+            conn.executemany(
+                "UPDATE inbox SET status = 'processing', claimed_until = ? WHERE id = ?",
+                [(now + WEBHOOK_INBOX_LEASE_SECONDS, row[0]) for row in rows],
+            )
+        conn.execute("COMMIT")
+    except Exception:
+        conn.execute("ROLLBACK")
+        raise
+    return rows
+
+
+def _backoff_seconds(attempts: int) -> float:
+    delay = min(WEBHOOK_INBOX_MAX_BACKOFF_SECONDS, WEBHOOK_INBOX_BACKOFF_SECONDS * (2 ** max(0, attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _mark_done(inbox_id: int, received_at: float, result: Any) -> None:
+    now = time.time()
+    _connect().execute(
+        "UPDATE inbox SET status = 'done', processed_at = ?, claimed_until = NULL, last_error = NULL, result = ? "
+        "WHERE id = ?",
+        (now, json.dumps(result, default=str)[:2000], inbox_id),
+    )
+    with _STATS_LOCK:
+        _STATS["processed"] += 1
+        _LAGS.append(now - received_at)
+
+
+def _mark_failed(inbox_id: int, attempts: int, error: Exception) -> None:
+    attempts += 1
+    dead = attempts >= WEBHOOK_INBOX_MAX_ATTEMPTS
+    _connect().execute(
+        "UPDATE inbox SET status = ?, attempts = ?, next_attempt_at = ?, claimed_until = NULL, last_error = ? "
+        "WHERE id = ?",
+        (
+            "dead" if dead else "pending",
+            attempts,
+            time.time() + (0 if dead else _backoff_seconds(attempts)),
+            f"{type(error).__name__}: {error}"[:2000],
+            inbox_id,
+        ),
+    )
+    _bump("failed_attempts")
+    if dead:
+        _bump("dead")
+        print(f"Webhook inbox event {inbox_id} dead after {attempts} attempts: {error}")
+
+
+def _process(row: tuple) -> None:
+    inbox_id, source, payload, attempts, received_at = row
+    try:
+        reload_store_if_changed()
+        result = _HANDLERS[source](json.loads(payload))
+    except Exception as exc:
+        _mark_failed(inbox_id, attempts, exc)
+        return
+    _mark_done(inbox_id, received_at, result)
+
+
+def drain_inbox(max_batches: Optional[int] = None) -> int:
+    """Process due events on the calling thread; return the number claimed."""
+    claimed = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        rows = _claim_batch(WEBHOOK_INBOX_BATCH_SIZE)
+        if not rows:
+            break
+        for row in rows:
+            _process(row)
+        claimed += len(rows)
+        batches += 1
+    return claimed
+
+
+def replay(
+    *,
+    ids: Iterable[int] = (),
+    event_ids: Iterable[str] = (),
+    status: Optional[str] = None,
+    source: Optional[str] = None,
+) -> int:
+    """Requeue events by inbox id, Stripe event id or status; returns how many.
+
+    Events being processed are left alone. Replayed events start again with
+    no attempts and run in their original per-object order.
+    """
+    clauses = ["status != 'processing'"]
+    params: List[Any] = []
+    selectors = []
+    ids, event_ids = list(ids), list(event_ids)
+    if ids:
+        selectors.append(f"id IN ({', '.join('?' for _ in ids)})")
+        params.extend(int(i) for i in ids)
+    if event_ids:
+        selectors.append(f"event_id IN ({', '.join('?' for _ in event_ids)})")
+        params.extend(str(e) for e in event_ids)
+    if selectors:
+        clauses.append(f"({' OR '.join(selectors)})")
+    if status:
+        clauses.append("status = ?")
+        params.append(status)
+    if source:
+        clauses.append("source = ?")
+        params.append(source)
+    if len(clauses) == 1:
+        raise ValueError("replay() needs ids, event_ids or a status")
+    cursor = _connect().execute(
+        "UPDATE inbox SET status = 'pending', attempts = 0, next_attempt_at = ?, claimed_until = NULL, "
+        f"last_error = NULL WHERE {' AND '.join(clauses)}",
+        (time.time(), *params),
+    )
+    _WAKE.set()
+    return int(cursor.rowcount)
+
+
+def list_events(status: Optional[str] = None, source: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    clauses, params = [], []
+    if status:
+        clauses.append("status = ?")
+        params.append(status)
+    if source:
+        clauses.append("source = ?")
+        params.append(source)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    cursor = _connect().execute(
+        "SELECT id, source, event_id, event_type, object_key, status, attempts, last_error, received_at, processed_at "
+        f"FROM inbox {where} ORDER BY id DESC LIMIT ?",
+        (*params, int(limit)),
+    )
+    columns = [c[0] for c in cursor.description]
+    return [dict(zip(columns, row, strict=True)) for row in cursor.fetchall()]
+
+
+def _prune_done() -> None:
+    # Done rows are kept for a while so late duplicates are still recognised.
+    _connect().execute(
+        "DELETE FROM inbox WHERE status = 'done' AND processed_at < ?",
+        (time.time() - WEBHOOK_INBOX_RETAIN_SECONDS,),
+    )
+
+
+def _worker_loop() -> None:
+    pruned_at = 0.0
+    while True:
+        _WAKE.wait(WEBHOOK_INBOX_POLL_SECONDS)
+        _WAKE.clear()
+        try:
+            drain_inbox()
+            if time.monotonic() - pruned_at > 3600:
+                _prune_done()
+                pruned_at = time.monotonic()
+        except Exception as exc:
+            print(f"Webhook inbox worker error: {exc}")
+            time.sleep(WEBHOOK_INBOX_POLL_SECONDS)
+
+
+def start_workers() -> None:
+    if not WEBHOOK_INBOX_ENABLED:
+        return
+    with _WORKERS_LOCK:
+        _WORKERS[:] = [worker for worker in _WORKERS if worker.is_alive()]
+        while len(_WORKERS) < WEBHOOK_INBOX_WORKERS:
+            worker = threading.Thread(
+                target=_worker_loop,
+                name=f"webhook-inbox-{len(_WORKERS) + 1}",
+                daemon=True,
+            )
+            worker.start()
+            _WORKERS.append(worker)
+
+
+def webhook_inbox_stats() -> Dict[str, Any]:
+    depth: Dict[str, int] = {"pending": 0, "processing": 0, "dead": 0, "done": 0}
+    oldest_pending_age = None
+    try:
+        conn = _connect()
+        for status, count in conn.execute("SELECT status, COUNT(*) FROM inbox GROUP BY status"):
+            depth[str(status)] = int(count)
+        oldest = conn.execute("SELECT MIN(received_at) FROM inbox WHERE status IN ('pending', 'processing')").fetchone()[0]
+        if oldest is not None:
+            oldest_pending_age = round(time.time() - float(oldest), 3)
+    except Exception as exc:
+        print(f"Webhook inbox stats skipped: {exc}")
+
+    with _STATS_LOCK:
+        counters = dict(_STATS)
+        lags = sorted(_LAGS)
+    lag: Dict[str, Any] = {"samples": len(lags)}
+    if lags:
+        lag["p50_ms"] = round(lags[len(lags) // 2] * 1000, 3)
+        lag["p95_ms"] = round(lags[min(len(lags) - 1, int(len(lags) * 0.95))] * 1000, 3)
+        lag["max_ms"] = round(lags[-1] * 1000, 3)
+
+    return {
+        "enabled": WEBHOOK_INBOX_ENABLED,
+        "workers": sum(1 for worker in _WORKERS if worker.is_alive()),
+        "handlers": sorted(_HANDLERS),
+        "queue_depth": depth,
+        "oldest_unprocessed_age_seconds": oldest_pending_age,
+        "processing_lag": lag,
+        **counters,
+    }
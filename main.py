@@ -63,12 +63,13 @@ def _sync_events_store_from_db_if_available() -> None:
     try:
         from app.db import SessionLocal  # type: ignore
         from app.models.event import Event  # type: ignore
-        from app.store import _EVENTS, save_store  # type: ignore
+        from app.store import _EVENTS, save_records  # type: ignore
 
         db = SessionLocal()
         try:
             rows = db.query(Event).all()
             synced = 0
+            synced_ids = []
             for ev in rows:
                 organizer_name = (
                     getattr(ev, "organizer_name", None)
@@ -123,8 +124,10 @@ def _sync_events_store_from_db_if_available() -> None:
                     "updated_at": getattr(ev, "updated_at", None).isoformat() if getattr(ev, "updated_at", None) else None,
                 }
                 synced += 1
+                synced_ids.append(int(ev.id))
 
-            save_store()
+            if synced_ids:
+                save_records("events", *synced_ids)
             logger.info("Synced %s events from DB into JSON store", synced)
         finally:
             db.close()
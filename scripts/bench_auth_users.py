@@ -0,0 +1,94 @@
+# scripts/bench_auth_users.py
+#
+# Register and login latency of the auth user directory as it grows. Password
+# hashing is switched to the plain fallback so the numbers show directory and
+# persistence cost only; "full rewrite" is what every write used to cost.
+#
+#   python scripts/bench_auth_users.py [--sizes 1000,10000,100000]
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="bench_auth_")
+os.environ.setdefault("AUTH_USERS_JOURNAL_COMPACT_BYTES", str(1 << 40))
+
+from app.routers import auth  # noqa: E402
+
+auth._PWD = None
+PASSWORD = "Bench-pass1!"
+
+
+def _populate(count: int) -> None:
+    auth._USERS.clear()
+    auth._rebuild_indexes()
+    auth._NEXT_ID = 1
+    for user_id in range(1, count + 1):
+        auth._add_user(
+            user_id=user_id,
+            email=f"user{user_id}@example.com",
+            password=PASSWORD,
+            role="vendor",
+            persist=False,
+        )
+    auth._persist_users()
+
+
+def _time_calls(fn, repeat: int) -> list:
+    samples = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _summary(samples: list) -> str:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"median {statistics.median(ordered):8.3f} ms   p95 {p95:8.3f} ms"
+
+
+def run(sizes, repeat: int, full_repeat: int) -> None:
+    for count in sizes:
+        _populate(count)
+
+        def register(i: int, count: int = count) -> None:
+            auth.admin_create_user(email=f"new{count}-{i}@example.com", password=PASSWORD, role="vendor")
+
+        def login(i: int, count: int = count) -> None:
+            auth.login(auth.LoginRequest(email=f"user{1 + i % count}@example.com", password=PASSWORD))
+
+        def verify(i: int, count: int = count) -> None:
+            user = auth._USERS[auth._USERS_BY_EMAIL[f"new{count}-{i}@example.com"]]
+            auth.verify_email_json(str(user["email_verification_token"]))
+
+        def full_rewrite(i: int) -> None:
+            auth._persist_users()
+
+        print(f"{count:>7} users")
+        print(f"  register          x{repeat:<4} {_summary(_time_calls(register, repeat))}")
+        print(f"  login             x{repeat:<4} {_summary(_time_calls(login, repeat))}")
+        print(f"  verify-email      x{repeat:<4} {_summary(_time_calls(verify, repeat))}")
+        print(f"  full rewrite      x{full_repeat:<4} {_summary(_time_calls(full_rewrite, full_repeat))}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="1000,10000,100000")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--full-repeat", type=int, default=3)
+    args = parser.parse_args()
+    sizes = [int(part) for part in args.sizes.split(",") if part.strip()]
+    print(f"DATA_DIR={os.environ['DATA_DIR']}")
+    run(sizes, args.repeat, args.full_repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# scripts/bench_booth_index.py
+#
+# Booth price/category resolution on a 500-booth map: the linear scan over
+# every booth (what _find_event_booth_price_cents used to do) against the
+# compiled BoothIndex that is now reused per event until its map changes.
+#
+#   python scripts/bench_booth_index.py [--booths 500] [--apps 200]
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="bench_booths_")
+os.environ.setdefault("STORE_WRITE_BEHIND", "0")
+
+from app import store  # noqa: E402
+from app.routers import applications  # noqa: E402
+
+EVENT_ID = 1
+CATEGORIES = ["Food", "Crafts", "Jewelry", "Art", "Apparel"]
+
+
+def _diagram(booth_count: int) -> dict:
+    booths = []
+    for i in range(1, booth_count + 1):
+        booths.append(
+            {
+                "id": f"booth_{i:04x}_canvas",
+                "label": f"Booth {i}",
+                "number": str(i),
+                "category": CATEGORIES[i % len(CATEGORIES)],
+                "price": 50 + (i % 7) * 25,
+                "meta": {"row": i // 20},
+            }
+        )
+    return {"diagram": {"elements": booths, "meta": {}}, "version": 3}
+
+
+def _apps(count: int, booth_count: int) -> list:
+    return [
+        {
+            "id": i,
+            "event_id": EVENT_ID,
+            "booth_id": f"Booth {booth_count - (i * 37) % booth_count}",
+            "booth_category": CATEGORIES[i % len(CATEGORIES)],
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def _linear_price(app: dict) -> int | None:
+    booths = applications._extract_booths_from_diagram(applications._get_diagram_for_event(app))
+    candidates = applications._human_booth_candidates_from_app(app)
+    for booth in booths:
+        if candidates & applications._booth_match_values(booth):
+            cents = applications._booth_price_cents_from_record_for_save(booth)
+            if cents:
+                return cents
+    return None
+
+
+def _time(fn, apps: list, repeat: int) -> list:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for app in apps:
+            fn(app)
+        samples.append((time.perf_counter() - started) * 1000 / len(apps))
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--booths", type=int, default=500)
+    parser.add_argument("--apps", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # Resolve from the legacy store only; no database needed.
+    applications._db_session_or_none = lambda: None
+    store._EVENTS[EVENT_ID] = {"id": EVENT_ID, "title": "Bench Market"}
+    store._DIAGRAMS[EVENT_ID] = _diagram(args.booths)
+    apps = _apps(args.apps, args.booths)
+
+    for app in apps:
+        assert _linear_price(app) == applications._find_event_booth_price_cents(app)
+
+    linear = _time(_linear_price, apps, args.repeat)
+    indexed = _time(applications._find_event_booth_price_cents, apps, args.repeat)
+    category = _time(applications._find_event_booth_category, apps, args.repeat)
+    print(f"{args.booths} booths, {args.apps} applications, per-application lookup")
+    print(f"  linear scan price       median {statistics.median(linear):8.4f} ms")
+    print(f"  BoothIndex price        median {statistics.median(indexed):8.4f} ms")
+    print(f"  BoothIndex category     median {statistics.median(category):8.4f} ms")
+    print(f"  speedup                 {statistics.median(linear) / statistics.median(indexed):8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
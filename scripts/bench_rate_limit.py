@@ -0,0 +1,65 @@
+# scripts/bench_rate_limit.py
+#
+# Per-request overhead of RateLimitMiddleware over a bare ASGI app, with the
+# in-process backend and the shared SQLite backend, spread across many client
+# keys so the LRU table is exercised.
+#
+#   python scripts/bench_rate_limit.py [--requests 50000] [--clients 5000]
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from app import rate_limit  # noqa: E402
+
+
+async def _app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+async def _receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def _send(message):
+    return None
+
+
+async def _drive(app, count: int, clients: int) -> float:
+    scopes = [
+        {"type": "http", "path": f"/events/{i % 50}", "headers": [], "client": (f"10.0.{i // 250}.{i % 250}", 1)}
+        for i in range(clients)
+    ]
+    started = time.perf_counter()
+    for i in range(count):
+        await app(scopes[i % clients], _receive, _send)
+    return (time.perf_counter() - started) / count * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50_000)
+    parser.add_argument("--clients", type=int, default=5_000)
+    args = parser.parse_args()
+
+    sqlite_path = Path(tempfile.mkdtemp(prefix="bench_rate_limit_")) / "rate_limit.sqlite3"
+    variants = [
+        ("bare app", _app),
+        ("memory backend", rate_limit.RateLimitMiddleware(_app, per_minute=10**6, backend=rate_limit.MemoryBackend())),
+        ("sqlite backend", rate_limit.RateLimitMiddleware(_app, per_minute=10**6, backend=rate_limit.SQLiteBackend(sqlite_path))),
+    ]
+    baseline = None
+    for label, app in variants:
+        per_request = asyncio.run(_drive(app, args.requests, args.clients))
+        baseline = per_request if baseline is None else baseline
+        print(f"  {label:<16} {per_request:8.2f} us/request   overhead {per_request - baseline:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# scripts/bench_store_journal.py
+#
+# Per-write latency of the JSON store at 10k and 100k applications: a full
+# save_store(), a single dirty-shard rewrite (journal off) and one journal
+# append through save_records().
+#
+#   python scripts/bench_store_journal.py [--sizes 10000,100000]
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="bench_store_")
+os.environ.setdefault("STORE_JOURNAL_COMPACT_BYTES", str(1 << 40))
+os.environ.setdefault("STORE_WRITE_BEHIND", "0")
+
+from app import store  # noqa: E402
+
+
+def _application(app_id: int) -> dict:
+    return {
+        "id": app_id,
+        "event_id": app_id % 250 + 1,
+        "vendor_email": f"vendor{app_id % 5000}@example.com",
+        "vendor_id": f"v-{app_id % 5000}",
+        "status": "submitted",
+        "payment_status": "unpaid",
+        "booth_id": f"B{app_id % 400}",
+        "booth_category": "Food",
+        "notes": "bench " * 10,
+        "documents": {"business_license": {"name": "license.pdf"}},
+    }
+
+
+def _populate(count: int) -> None:
+    store._APPLICATIONS.clear()
+    for app_id in range(1, count + 1):
+        store._APPLICATIONS[app_id] = _application(app_id)
+
+
+def _time_calls(fn, repeat: int) -> list:
+    samples = []
+    for i in range(repeat):
+        started = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def _summary(samples: list) -> str:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return f"median {statistics.median(ordered):8.2f} ms   p95 {p95:8.2f} ms"
+
+
+def run(sizes, full_repeat: int, journal_repeat: int) -> None:
+    for count in sizes:
+        _populate(count)
+
+        def full_write(i: int, count: int = count) -> None:
+            store._APPLICATIONS[1 + i % count]["notes"] = f"full {i}"
+            store.STORE_JOURNAL_ENABLED = False
+            try:
+                store.save_store()
+            finally:
+                store.STORE_JOURNAL_ENABLED = True
+
+        def shard_write(i: int, count: int = count) -> None:
+            app_id = 1 + i % count
+            store._APPLICATIONS[app_id]["notes"] = f"shard {i}"
+            store.STORE_JOURNAL_ENABLED = False
+            try:
+                store.save_records("applications", app_id)
+            finally:
+                store.STORE_JOURNAL_ENABLED = True
+
+        def journal_write(i: int, count: int = count) -> None:
+            app_id = 1 + i % count
+            store._APPLICATIONS[app_id]["notes"] = f"journal {i}"
+            store.save_records("applications", app_id)
+
+        full = _time_calls(full_write, full_repeat)
+        shard = _time_calls(shard_write, full_repeat)
+        journal = _time_calls(journal_write, journal_repeat)
+        print(f"{count:>7} applications")
+        print(f"  save_store()           x{full_repeat:<4} {_summary(full)}")
+        print(f"  shard rewrite          x{full_repeat:<4} {_summary(shard)}")
+        print(f"  save_records() journal x{journal_repeat:<4} {_summary(journal)}")
+
+        started = time.perf_counter()
+        store.compact_store(force=True)
+        print(f"  compaction                   {(time.perf_counter() - started) * 1000:8.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--full-repeat", type=int, default=5)
+    parser.add_argument("--journal-repeat", type=int, default=500)
+    args = parser.parse_args()
+    sizes = [int(part) for part in args.sizes.split(",") if part.strip()]
+    print(f"DATA_DIR={os.environ['DATA_DIR']}")
+    run(sizes, args.full_repeat, args.journal_repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+# scripts/load_test_checkins.py
+#
+# Gate load test for QR check-in: one event with a few hundred approved
+# vendors (Postgres applications plus legacy store records), scanned in a
+# shuffled mix of first scans and duplicate re-scans by application id,
+# vendor id and email. Runs the same scan stream with the event-day roster
+# disabled and enabled against a throwaway SQLite database and reports scan
+# latency and sustainable scans per minute.
+#
+#   python scripts/load_test_checkins.py [--vendors 400] [--legacy 100] [--scans 3000] [--rate 600]
+#
+# --rate paces the stream at that many scans per minute (0 = back to back)
+# and reports how many scans fell behind schedule.
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+_TMP = Path(tempfile.mkdtemp(prefix="load_test_checkins_"))
+os.environ["DATA_DIR"] = str(_TMP)
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP / 'checkins.sqlite3'}"
+os.environ.setdefault("STORE_WRITE_BEHIND", "0")
+
+from app import store  # noqa: E402
+from app.db import Base, SessionLocal, engine  # noqa: E402
+from app.models import booth, diagram  # noqa: E402,F401
+from app.models.application import Application  # noqa: E402
+from app.models.event import Event  # noqa: E402
+from app.models.event_checkin import EventCheckIn  # noqa: E402
+from app.routers import checkins  # noqa: E402
+
+EVENT_ID = 1
+
+
+def _seed(vendors: int, legacy: int) -> list:
+    Base.metadata.create_all(engine, tables=[Event.__table__, Application.__table__, EventCheckIn.__table__])
+    db = SessionLocal()
+    db.add(Event(id=EVENT_ID, title="Gate load test", published=True, archived=False))
+    # Other events' applications make the per-event filters do real work.
+    for i in range(1, vendors * 3 + 1):
+        db.add(
+            Application(
+                id=i,
+                event_id=EVENT_ID if i <= vendors else EVENT_ID + 1,
+                user_id=10_000 + i,
+                vendor_email=f"vendor{i}@example.com",
+                vendor_name=f"Vendor {i}",
+                booth_id=f"B{i}",
+                status="approved",
+                payment_status="paid",
+            )
+        )
+    if vendors:
+        db.add(Event(id=EVENT_ID + 1, title="Other event", published=True, archived=False))
+    db.commit()
+    db.close()
+
+    for i in range(1, legacy + 1):
+        key = 1_700_000_000_000 + i
+        store._APPLICATIONS[key] = {
+            "id": key,
+            "event_id": EVENT_ID,
+            "vendor_email": f"legacy{i}@example.com",
+            "vendor_name": f"Legacy vendor {i}",
+            "booth_id": f"L{i}",
+            "status": "approved",
+            "payment_status": "paid",
+        }
+    store.save_store()
+
+    passes = []
+    for i in range(1, vendors + 1):
+        passes.append(random.choice([
+            {"application_id": i},
+            {"vendor_id": 10_000 + i},
+            {"vendor_id": f"vendor{i}@example.com"},
+        ]))
+    for i in range(1, legacy + 1):
+        passes.append(random.choice([
+            {"application_id": 1_700_000_000_000 + i},
+            {"vendor_id": f"legacy{i}@example.com"},
+        ]))
+    return passes
+
+
+def _scan_stream(passes: list, scans: int) -> list:
+    # Every pass is scanned once; the rest are re-scans of passes already seen.
+    order = passes[:]
+    random.shuffle(order)
+    stream = order[:scans]
+    while len(stream) < scans:
+        stream.append(random.choice(order[: max(1, len(stream))]))
+    return stream
+
+
+def _run(stream: list, rate: float, roster_ttl: float) -> dict:
+    checkins.CHECKIN_ROSTER_TTL = roster_ttl
+    checkins.invalidate_checkin_roster()
+    db = SessionLocal()
+    db.query(EventCheckIn).delete()
+    db.commit()
+
+    interval = 60.0 / rate if rate > 0 else 0.0
+    latencies = []
+    behind = 0
+    started = time.perf_counter()
+    for n, scan in enumerate(stream):
+        if interval:
+            due = started + n * interval
+            now = time.perf_counter()
+            if now < due:
+                time.sleep(due - now)
+            elif now - due > interval:
+                behind += 1
+        t0 = time.perf_counter()
+        result = checkins.global_check_in({"event_id": EVENT_ID, **scan}, db=db)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        assert result["ok"]
+    elapsed = time.perf_counter() - started
+    checked_in = db.query(EventCheckIn).filter(EventCheckIn.event_id == EVENT_ID).count()
+    db.close()
+
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "max": latencies[-1],
+        "capacity": 60_000 / statistics.mean(latencies),
+        "elapsed": elapsed,
+        "behind": behind,
+        "checked_in": checked_in,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vendors", type=int, default=400)
+    parser.add_argument("--legacy", type=int, default=100)
+    parser.add_argument("--scans", type=int, default=3000)
+    parser.add_argument("--rate", type=float, default=0, help="scans per minute; 0 runs back to back")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    passes = _seed(args.vendors, args.legacy)
+    stream = _scan_stream(passes, args.scans)
+    print(
+        f"{len(passes)} passes ({args.vendors} Postgres, {args.legacy} legacy), "
+        f"{len(stream)} scans, rate={'max' if not args.rate else f'{args.rate:g}/min'}"
+    )
+    for label, ttl in (("roster off", 0.0), ("roster on", 300.0)):
+        r = _run(stream, args.rate, ttl)
+        print(
+            f"  {label:<11} p50 {r['p50']:6.2f} ms  p95 {r['p95']:6.2f} ms  max {r['max']:7.2f} ms  "
+            f"capacity {r['capacity']:9.0f} scans/min  behind {r['behind']:4d}  "
+            f"checked in {r['checked_in']}  ({r['elapsed']:.1f}s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
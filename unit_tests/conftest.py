@@ -0,0 +1,135 @@
+# unit_tests/conftest.py
+# In-process tests for app/ modules: no server, no database. Kept out of
+# tests/ so tests/conftest.py (which starts uvicorn) does not apply.
+#   pytest -q unit_tests
+
+from __future__ import annotations
+
+import os
+import tempfile
+
+# app.store creates DATA_DIR on import; keep it away from /data.
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="vendorconnect-unit-"))
+
+import pytest  # noqa: E402
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import sessionmaker  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app import email_outbox, store, webhook_inbox  # noqa: E402
+from app.db import Base  # noqa: E402
+from app.models import booth, diagram  # noqa: E402,F401
+from app.models.application import Application  # noqa: E402
+from app.models.event import Event  # noqa: E402
+from app.models.event_checkin import CheckInSyncReceipt, EventCheckIn  # noqa: E402
+from app.models.profile import EventAlert, Profile  # noqa: E402
+from app.routers import auth  # noqa: E402
+from app.store_sqlite import SQLiteStore  # noqa: E402
+
+
+def _point_store_at(monkeypatch, tmp_path) -> None:
+    store._close_journal()
+    monkeypatch.setattr(store, "STORE_WRITE_BEHIND", False)
+    monkeypatch.setattr(store, "_DATA_PATH", tmp_path / "_data_store.json")
+    monkeypatch.setattr(store, "_SNAPSHOT_DIR", tmp_path / "_data_store")
+    monkeypatch.setattr(store, "_SNAPSHOT_META_PATH", tmp_path / "_data_store" / "meta.json")
+    monkeypatch.setattr(store, "_JOURNAL_PATH", tmp_path / "_data_store.journal")
+    monkeypatch.setattr(store, "_JOURNAL_ROTATED_PATH", tmp_path / "_data_store.journal.old")
+
+
+@pytest.fixture
+def tmp_store(monkeypatch, tmp_path):
+    """An empty, journaled file store under tmp_path."""
+    _point_store_at(monkeypatch, tmp_path)
+    monkeypatch.setattr(store, "STORE_JOURNAL_ENABLED", True)
+    monkeypatch.setattr(store, "PAYMENT_LEDGER_RECONCILE_INTERVAL", 0)
+    store.load_store()
+    for table in store._COLLECTIONS.values():
+        table.clear()
+    yield store
+    store._close_journal()
+
+
+@pytest.fixture
+def sqlite_store(monkeypatch, tmp_path):
+    """Back the store with SQLite under tmp_path; yields a second worker's handle."""
+    _point_store_at(monkeypatch, tmp_path)
+    for table in store._COLLECTIONS.values():
+        table.clear()
+    backend = SQLiteStore(tmp_path / "store.sqlite3", store._COLLECTIONS)
+    monkeypatch.setattr(store, "_BACKEND", backend)
+    store.load_store()
+    other = SQLiteStore(tmp_path / "store.sqlite3", store._COLLECTIONS)
+    yield other
+    other.close()
+    backend.close()
+    store._close_journal()
+
+
+@pytest.fixture
+def tmp_users(monkeypatch, tmp_path):
+    """Empty auth users persisted under tmp_path, with a cold principal cache."""
+    monkeypatch.setattr(auth, "_AUTH_USERS_PATH", tmp_path / "_auth_users.json")
+    monkeypatch.setattr(auth, "_AUTH_USERS_JOURNAL_PATH", tmp_path / "_auth_users.journal")
+    monkeypatch.setattr(auth, "_NEXT_ID", auth._NEXT_ID)
+    saved = dict(auth._USERS)
+    auth._USERS.clear()
+    auth._rebuild_indexes()
+    auth.invalidate_principal_cache()
+    yield auth
+    auth.invalidate_principal_cache()
+    auth._USERS.clear()
+    auth._USERS.update(saved)
+    auth._rebuild_indexes()
+
+
+@pytest.fixture
+def checkin_db(tmp_path):
+    """A SQLite session with the event, application and check-in tables."""
+    engine = create_engine(f"sqlite:///{tmp_path / 'checkins.sqlite3'}")
+    tables = [Event.__table__, Application.__table__, EventCheckIn.__table__, CheckInSyncReceipt.__table__]
+    Base.metadata.create_all(engine, tables=tables)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def alerts_db():
+    """An in-memory SQLite session with the event, profile and event alert tables."""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine, tables=[Event.__table__, Profile.__table__, EventAlert.__table__])
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+@pytest.fixture
+def tmp_outbox(monkeypatch, tmp_path):
+    """Call with a transport to get an enabled outbox under tmp_path, without workers."""
+    monkeypatch.setattr(email_outbox, "_OUTBOX_PATH", tmp_path / "_email_outbox.sqlite3")
+    monkeypatch.setattr(email_outbox, "EMAIL_OUTBOX_ENABLED", True)
+    monkeypatch.setattr(email_outbox, "start_workers", lambda: None)
+
+    def use(transport):
+        email_outbox.set_transport(transport)
+        return email_outbox
+
+    yield use
+    email_outbox.set_transport(None)
+
+
+@pytest.fixture
+def tmp_inbox(monkeypatch, tmp_path):
+    """Call with a handler to get an enabled inbox under tmp_path that routes source "test" to it."""
+    monkeypatch.setattr(webhook_inbox, "_INBOX_PATH", tmp_path / "_webhook_inbox.sqlite3")
+    monkeypatch.setattr(webhook_inbox, "WEBHOOK_INBOX_ENABLED", True)
+    monkeypatch.setattr(webhook_inbox, "start_workers", lambda: None)
+
+    def use(handler):
+        monkeypatch.setattr(webhook_inbox, "_HANDLERS", {"test": handler})
+        return webhook_inbox
+
+    return use
@@ -0,0 +1,114 @@
+import re
+import threading
+
+import pytest
+from sqlalchemy import event as sa_event
+from sqlalchemy.orm import sessionmaker
+
+from app import db as app_db
+from app import store
+from app.db import Base
+from app.models.diagram import Diagram
+from app.models.event import Event
+from app.routers import applications, auth
+
+VENDOR_EMAIL = "tacos@example.com"
+
+
+@pytest.fixture
+def resolution_db(tmp_store, checkin_db, monkeypatch):
+    engine = checkin_db.get_bind()
+    Base.metadata.create_all(engine, tables=[Diagram.__table__])
+    monkeypatch.setattr(app_db, "SessionLocal", sessionmaker(bind=engine))
+    monkeypatch.setattr(applications, "APPLICATION_RESOLUTION_CACHE_TTL", 0.0)
+    applications.invalidate_event_resolution()
+    for event_id in (1, 2):
+        checkin_db.add(Event(id=event_id, title=f"Market {event_id}", published=True, archived=False))
+        booths = [{"id": f"b{n}", "label": f"A{n}", "category": "Food", "price": 100 + n} for n in range(1, 4)]
+        checkin_db.add(Diagram(event_id=event_id, diagram={"elements": booths}, version=1))
+    for app_id in range(1, 7):
+        store._APPLICATIONS[app_id] = {
+            "id": app_id, "event_id": 1 + app_id % 2, "booth_id": f"b{1 + app_id % 3}",
+            "vendor_email": VENDOR_EMAIL, "status": "submitted",
+        }
+    checkin_db.commit()
+    store.save_records("applications", *store._APPLICATIONS)
+    yield checkin_db
+    applications.invalidate_event_resolution()
+
+
+@pytest.fixture
+def queries(resolution_db):
+    """Count statements per table while the test runs."""
+    counts = {"events": 0, "diagrams": 0}
+
+    def count(conn, cursor, statement, *args):
+        for table in counts:
+            if re.search(rf"\bFROM {table}\b", statement):
+                counts[table] += 1
+
+    engine = resolution_db.get_bind()
+    sa_event.listen(engine, "before_cursor_execute", count)
+    yield counts
+    sa_event.remove(engine, "before_cursor_execute", count)
+
+
+def _latest_price(app):
+    diagram = applications._get_diagram_for_event(app)
+    return diagram["diagram"]["elements"][0]["price"]
+
+
+def _bump_price(db, event_id, price):
+    row = db.query(Diagram).filter(Diagram.event_id == event_id).one()
+    row.diagram = {"elements": [{**row.diagram["elements"][0], "price": price}]}
+    db.commit()
+
+
+def test_organizer_list_loads_its_event_and_diagram_once(queries):
+    listed = applications.organizer_list_applications("1")
+
+    assert len(listed["applications"]) == 3
+    assert queries == {"events": 1, "diagrams": 1}
+
+
+def test_vendor_list_batches_events_and_diagrams(queries, tmp_users):
+    token = auth._create_access_token(email=VENDOR_EMAIL, role="vendor", is_active=True, user_id=9)
+
+    listed = applications.list_vendor_applications(f"Bearer {token}")
+
+    assert len(listed) == 6
+    assert queries == {"events": 1, "diagrams": 1}
+
+
+def test_process_cache_serves_the_new_diagram_after_invalidation(resolution_db, monkeypatch):
+    monkeypatch.setattr(applications, "APPLICATION_RESOLUTION_CACHE_TTL", 60.0)
+    app = store._APPLICATIONS[2]
+    assert _latest_price(app) == 101
+
+    _bump_price(resolution_db, 1, 250)
+    assert _latest_price(app) == 101
+
+    applications.invalidate_event_resolution(1)
+    assert _latest_price(app) == 250
+
+
+def test_scope_does_not_outlive_its_request(resolution_db):
+    app = store._APPLICATIONS[2]
+    seen_in_thread = []
+
+    with applications._resolution_scope():
+        assert _latest_price(app) == 101
+        _bump_price(resolution_db, 1, 250)
+        assert _latest_price(app) == 101
+        # Work started elsewhere mid-request gets no scope of its own.
+        thread = threading.Thread(target=lambda: seen_in_thread.append(applications._RESOLUTION_SCOPE.get()))
+        thread.start()
+        thread.join()
+
+    assert seen_in_thread == [None]
+    assert applications._RESOLUTION_SCOPE.get() is None
+    assert _latest_price(app) == 250
+
+    with pytest.raises(RuntimeError), applications._resolution_scope():
+        raise RuntimeError
+    assert applications._RESOLUTION_SCOPE.get() is None
@@ -0,0 +1,37 @@
+import copy
+
+import pytest
+
+
+def _seed(auth):
+    for user_id in (1, 2, 3):
+        auth._add_user(user_id=user_id, email=f"user{user_id}@example.com", password="pw", role="vendor")
+    auth._persist_users()
+    auth._USERS[1]["full_name"] = "Renamed"
+    auth._USERS.pop(2)
+    auth._persist_users(1, 2)
+    auth._add_user(user_id=4, email="user4@example.com", password="pw", role="vendor")
+
+
+# Compaction writes the snapshot, then unlinks the journal; a crash can land
+# before the snapshot is replaced or between the two steps.
+@pytest.mark.parametrize("snapshot_replaced", [False, True], ids=["before-snapshot", "before-unlink"])
+def test_replay_after_crash_mid_compaction(tmp_users, snapshot_replaced):
+    auth = tmp_users
+    _seed(auth)
+    expected = copy.deepcopy(auth._USERS)
+    journal = auth._AUTH_USERS_JOURNAL_PATH.read_bytes()
+
+    if snapshot_replaced:
+        auth._write_users_snapshot()
+        assert not auth._AUTH_USERS_JOURNAL_PATH.exists()
+    # The journal outlived the crash, ending in a torn write.
+    auth._AUTH_USERS_JOURNAL_PATH.write_bytes(journal + b'{"op":"put","user":{"id":5,')
+
+    auth._USERS.clear()
+    auth._NEXT_ID = 1
+    auth._load_users()
+
+    assert auth._USERS == expected
+    assert auth._USERS_BY_EMAIL == {f"user{uid}@example.com": uid for uid in (1, 3, 4)}
+    assert auth._NEXT_ID == 5
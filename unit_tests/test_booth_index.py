@@ -0,0 +1,42 @@
+import copy
+
+from app import store
+from app.routers import applications
+
+EVENT_ID = 1
+
+
+def _diagram(price, revision=None):
+    diagram = {"diagram": {"elements": [{"id": "b1", "label": "Booth 1", "category": "Food", "price": price}]}, "version": 3}
+    if revision is not None:
+        diagram["revision"] = revision
+    return diagram
+
+
+def test_booth_index_follows_the_server_side_revision(tmp_store, monkeypatch):
+    monkeypatch.setattr(applications, "_db_session_or_none", lambda: None)
+    applications.invalidate_event_resolution()
+    app = {"id": 1, "event_id": EVENT_ID, "booth_id": "Booth 1"}
+
+    # Every request loads fresh dicts; the same revision reuses the index.
+    rows = {"diagram": _diagram(150, revision=(7, "2026-05-01 10:00"))}
+    monkeypatch.setattr(applications, "_get_diagram_from_postgres", lambda eid: copy.deepcopy(rows["diagram"]))
+    assert applications._find_event_booth_price_cents(app) == 15000
+    index = applications._BOOTH_INDEXES[EVENT_ID]
+    assert applications._find_event_booth_price_cents(app) == 15000
+    assert applications._BOOTH_INDEXES[EVENT_ID] is index
+
+    # Same client version, new server revision.
+    rows["diagram"] = _diagram(175, revision=(7, "2026-05-01 10:05"))
+    assert applications._find_event_booth_price_cents(app) == 17500
+    assert len(applications._BOOTH_INDEXES) == 1
+
+    # Store-only maps follow the diagrams collection.
+    monkeypatch.setattr(applications, "_get_diagram_from_postgres", lambda eid: None)
+    store._DIAGRAMS[EVENT_ID] = _diagram(200)
+    store.save_records("diagrams", EVENT_ID)
+    assert applications._find_event_booth_price_cents(app) == 20000
+    store._DIAGRAMS[EVENT_ID]["diagram"]["elements"][0]["price"] = 225
+    store.save_records("diagrams", EVENT_ID)
+    assert applications._find_event_booth_price_cents(app) == 22500
+    applications.invalidate_event_resolution()
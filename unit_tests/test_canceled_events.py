@@ -0,0 +1,25 @@
+from app import store
+from app.routers import events
+
+
+def test_canceled_ids_are_rescanned_only_when_events_change(tmp_store, monkeypatch):
+    scans = []
+    is_canceled = events._event_is_canceled
+    monkeypatch.setattr(events, "_event_is_canceled", lambda flags: scans.append(1) or is_canceled(flags))
+
+    store._EVENTS.update({
+        1: {"id": 1, "published": True},
+        2: {"id": 2, "published": True, "canceled": True},
+        # Canceled and archived: the listing's archived filter covers it.
+        3: {"id": 3, "archived": True, "status": "canceled"},
+    })
+    store.save_records("events", 1, 2, 3)
+
+    assert events._canceled_store_event_ids() == (2,)
+    assert events._canceled_store_event_ids() == (2,)
+    assert len(scans) == 2
+
+    store._EVENTS[1]["status"] = "cancelled"
+    store._EVENTS[2].update(canceled=False)
+    store.save_records("events", 1, 2)
+    assert events._canceled_store_event_ids() == (1,)
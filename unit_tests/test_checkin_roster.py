@@ -0,0 +1,97 @@
+from datetime import UTC, datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app import store
+from app.models.application import Application
+from app.models.event import Event
+from app.routers import checkins
+
+EVENT_ID = 1
+
+
+@pytest.fixture
+def db(tmp_store, checkin_db, monkeypatch):
+    monkeypatch.setattr(checkins, "CHECKIN_ROSTER_TTL", 300.0)
+    checkins.invalidate_checkin_roster()
+    session = checkin_db
+    session.add_all([
+        Event(id=EVENT_ID, title="Night market", published=True, archived=False),
+        Event(id=EVENT_ID + 1, title="Other", published=True, archived=False),
+    ])
+    for app_id, user_id, email in [
+        (1, 101, "one@example.com"),
+        (2, 102, "shared@example.com"),
+        (3, 103, "Shared@Example.com"),
+        # A user id equal to another application's id.
+        (4, 2, "four@example.com"),
+        (5, 105, None),
+    ]:
+        session.add(Application(id=app_id, event_id=EVENT_ID, user_id=user_id, vendor_email=email, status="approved"))
+    session.add(Application(id=6, event_id=EVENT_ID + 1, user_id=106, vendor_email="six@example.com", status="approved"))
+    session.commit()
+
+    for key, app in {
+        1_700_000_000_001: {"vendor_email": "legacy1@example.com", "vendor_id": "v-1"},
+        1_700_000_000_002: {"vendor_email": "legacy2@example.com", "status": "draft"},
+    }.items():
+        store._APPLICATIONS[key] = {"id": key, "event_id": EVENT_ID, "status": "approved", **app}
+    store.save_records("applications", *store._APPLICATIONS)
+    yield session
+    checkins.invalidate_checkin_roster()
+
+
+def _uncached(db, **probe):
+    try:
+        return checkins._find_application_uncached(db, EVENT_ID, **probe)
+    except HTTPException:
+        return None
+
+
+def _key(app):
+    return None if app is None else checkins._safe_str(checkins._application_id(app))
+
+
+PROBES = [
+    {"application_id": 1},
+    {"application_id": "3"},
+    {"application_id": 6},
+    {"application_id": 99},
+    {"application_id": "shared@example.com"},
+    {"vendor_id": 101},
+    {"vendor_id": 2},
+    {"vendor_id": "105"},
+    {"vendor_id": "SHARED@example.com"},
+    {"vendor_id": "six@example.com"},
+    {"application_id": 102, "vendor_id": 103},
+    {"application_id": 1_700_000_000_001},
+    {"vendor_id": "legacy2@example.com"},
+    {"vendor_id": "v-1"},
+    {"application_id": "nobody@example.com"},
+]
+
+
+@pytest.mark.parametrize("probe", PROBES, ids=[str(probe) for probe in PROBES])
+def test_roster_find_matches_uncached_lookup(db, probe):
+    roster = checkins._event_roster(db, EVENT_ID)
+
+    assert _key(roster.find(**probe)) == _key(_uncached(db, **probe))
+
+
+def test_roster_reloads_when_applications_change(db):
+    roster = checkins._event_roster(db, EVENT_ID)
+    assert roster.find(vendor_id=101)["status"] == "approved"
+
+    app = db.get(Application, 1)
+    app.status = "rejected"
+    app.updated_at = datetime.now(UTC) + timedelta(minutes=1)
+    db.add(Application(id=7, event_id=EVENT_ID, user_id=107, vendor_email="seven@example.com", status="approved"))
+    db.commit()
+
+    roster = checkins._event_roster(db, EVENT_ID)
+    assert roster.find(vendor_id=101)["status"] == "rejected"
+    assert _key(roster.find(vendor_id="seven@example.com")) == "7"
+
+    loaded_at = roster.db_loaded_at
+    assert checkins._event_roster(db, EVENT_ID).db_loaded_at == loaded_at
@@ -0,0 +1,41 @@
+from app.routers import checkins
+
+
+def _row(app_id, checked_in=False):
+    return {"application_id": app_id, "checked_in": checked_in, "ready_for_checkin": True}
+
+
+def test_since_cursor_returns_changed_and_removed_rows_only():
+    stats = checkins.CheckinStats(1)
+    for app_id in (1, 2, 3):
+        stats._set_row(f"app:{app_id}", _row(app_id))
+        stats.order.append(f"app:{app_id}")
+
+    full = stats.payload()
+    assert full["full"] and full["total"] == 3
+    assert full["vendors"] is full["rows"]
+
+    stats._set_row("app:2", _row(2, checked_in=True))
+    stats._set_row("app:3", _row(3))  # unchanged, keeps its sequence
+    del stats.rows["app:1"]
+    stats.order.remove("app:1")
+    stats._touch("app:1")
+
+    delta = stats.payload(since=full["cursor"])
+    assert not delta["full"]
+    assert [row["row_key"] for row in delta["rows"]] == ["app:2"]
+    assert delta["removed"] == ["app:1"]
+    assert "vendors" not in delta
+    assert stats.payload(since=delta["cursor"])["rows"] == []
+
+
+def test_unknown_cursor_and_slim_mode_return_the_whole_roster():
+    stats = checkins.CheckinStats(1)
+    stats._set_row("app:1", _row(1, checked_in=True))
+    stats.order.append("app:1")
+
+    for since in ("stale-epoch.1", f"{stats.epoch}.99", "garbage"):
+        assert stats.payload(since=since)["full"]
+    slim = stats.payload(slim=True)
+    assert slim["checked_in"] == 1 and len(slim["rows"]) == 1
+    assert "applications" not in slim
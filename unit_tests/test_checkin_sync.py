@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+import jwt
+import pytest
+from fastapi import HTTPException
+
+from app.models.application import Application
+from app.models.event import Event
+from app.routers import checkins
+from app.utils import qr_tokens
+
+
+def test_scan_time_parsing_and_future_clamp():
+    now = datetime(2026, 5, 1, 12, 0, 0)
+
+    assert checkins._parse_scan_time("2026-05-01T11:30:00Z", now) == datetime(2026, 5, 1, 11, 30)
+    assert checkins._parse_scan_time("2026-05-01T13:30:00+02:00", now) == datetime(2026, 5, 1, 11, 30)
+    assert checkins._parse_scan_time(1_777_636_800_000, now) == checkins._parse_scan_time(1_777_636_800, now)
+    assert checkins._parse_scan_time("2026-05-01T13:00:00Z", now) == now
+    assert checkins._parse_scan_time("not a time", now) == now
+    assert checkins._parse_scan_time(None, now) == now
+
+
+def test_derived_idempotency_key_is_stable_per_device():
+    scan = {"application_id": 7, "scanned_at": "2026-05-01T11:30:00Z"}
+
+    assert checkins._scan_idempotency_key({"idempotency_key": "abc"}, "gate-1") == "abc"
+    assert checkins._scan_idempotency_key(scan, "gate-1") == checkins._scan_idempotency_key(dict(scan), "gate-1")
+    assert checkins._scan_idempotency_key(scan, "gate-1") != checkins._scan_idempotency_key(scan, "gate-2")
+
+
+def test_pass_expiry_is_judged_at_scan_time():
+    exp = datetime.utcnow() - timedelta(hours=1)
+    token = jwt.encode({"event_id": 1, "application_id": 2, "exp": exp}, qr_tokens.SECRET, algorithm=qr_tokens.ALGO)
+
+    with pytest.raises(jwt.ExpiredSignatureError):
+        qr_tokens.verify_qr_token(token)
+    assert qr_tokens.verify_qr_token(token, at=exp - timedelta(minutes=5))["application_id"] == 2
+    with pytest.raises(jwt.ExpiredSignatureError):
+        qr_tokens.verify_qr_token(token, at=exp)
+
+
+def test_bundle_and_sync_are_for_the_event_organizer_only(checkin_db, tmp_store):
+    checkin_db.add(Event(id=1, title="Night market", organizer_email="org@example.com", published=True, archived=False))
+    checkin_db.add(Application(id=1, event_id=1, user_id=101, vendor_email="v@example.com", status="approved"))
+    checkin_db.commit()
+    stranger = {"email": "other@example.com", "role": "organizer"}
+    organizer = {"email": "Org@Example.com", "role": "organizer"}
+    scans = {"device_id": "gate-1", "scans": [{"application_id": 1, "scanned_at": "2026-05-01T11:30:00Z"}]}
+
+    for call in (
+        lambda user: checkins.checkin_roster_bundle(1, db=checkin_db, user=user),
+        lambda user: checkins.sync_checkin_scans(1, scans, db=checkin_db, user=user),
+    ):
+        with pytest.raises(HTTPException) as denied:
+            call(stranger)
+        assert denied.value.status_code == 403
+
+    assert checkins.checkin_roster_bundle(1, db=checkin_db, user=organizer)["passes"][0]["application_id"] == 1
+    assert checkins.sync_checkin_scans(1, scans, db=checkin_db, user={"role": "admin"})["results"][0]["ok"]
@@ -0,0 +1,66 @@
+from app import email_outbox as outbox
+
+
+class _FakeTransport:
+    def __init__(self, fail_with=None, reject=None):
+        self.batches = []
+        self.fail_with = fail_with
+        self.reject = reject or set()
+
+    def send_batch(self, messages):
+        if self.fail_with is not None:
+            error, self.fail_with = self.fail_with, None
+            raise error
+        if any(message["to"][0] in self.reject for message in messages):
+            raise outbox.TransportError("422 invalid recipient", retryable=False)
+        self.batches.append([message["to"][0] for message in messages])
+
+
+def _enqueue(*recipients):
+    return [
+        outbox.enqueue_email(outbox.build_message(to_email=to, subject="Hello", html="<p>Hi</p>"))
+        for to in recipients
+    ]
+
+
+def test_enqueued_messages_are_sent_as_one_batch(tmp_outbox):
+    transport = _FakeTransport()
+    tmp_outbox(transport)
+
+    ids = _enqueue("a@example.com", "b@example.com", "c@example.com")
+    assert all(isinstance(outbox_id, int) for outbox_id in ids)
+    assert transport.batches == []
+
+    assert outbox.drain_outbox() == 3
+    assert transport.batches == [["a@example.com", "b@example.com", "c@example.com"]]
+    stats = outbox.email_outbox_stats()
+    assert stats["queue_depth"]["pending"] == 0
+    assert stats["send_latency"]["samples"] >= 1
+
+
+def test_retryable_failure_backs_off_then_sends(tmp_outbox):
+    transport = _FakeTransport(fail_with=outbox.TransportError("503 unavailable"))
+    tmp_outbox(transport)
+
+    (outbox_id,) = _enqueue("a@example.com")
+    outbox.drain_outbox()
+    status, attempts, next_attempt_at = outbox._connect().execute(
+        "SELECT status, attempts, next_attempt_at FROM outbox WHERE id = ?", (outbox_id,)
+    ).fetchone()
+    assert (status, attempts) == ("pending", 1)
+    assert outbox.drain_outbox() == 0
+
+    outbox._connect().execute("UPDATE outbox SET next_attempt_at = 0 WHERE id = ?", (outbox_id,))
+    assert outbox.drain_outbox() == 1
+    assert transport.batches == [["a@example.com"]]
+
+
+def test_rejected_batch_isolates_the_bad_message(tmp_outbox):
+    transport = _FakeTransport(reject={"bad@example.com"})
+    tmp_outbox(transport)
+
+    _enqueue("a@example.com", "bad@example.com", "c@example.com")
+    outbox.drain_outbox()
+
+    assert transport.batches == [["a@example.com"], ["c@example.com"]]
+    assert outbox.email_outbox_stats()["queue_depth"]["dead"] == 1
@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import BackgroundTasks
+
+from app.models.event import Event
+from app.models.profile import EventAlert, Profile
+from app.routers import events
+from app.routers import vendor_notifications as vn
+
+ORGANIZER = {"email": "host@example.com", "role": "organizer"}
+VENDOR_EMAIL = "tacos@example.com"
+OLD = datetime(2020, 1, 1)
+SOON = (datetime.now() + timedelta(days=30)).isoformat()
+FOOD = vn._category_slug("Food")
+
+
+@pytest.fixture
+def match_db(tmp_store, alerts_db, monkeypatch):
+    monkeypatch.setattr(vn, "EVENT_MATCH_CURSOR_LAG_SECONDS", 0.0)
+    for table in (vn._EVENT_MATCH_INDEX, vn._EVENT_MATCH_ENTRIES, vn._EVENT_MATCH_DIRTY, vn._VENDOR_MATCH_STATE):
+        table.clear()
+    vn.invalidate_event_matches()
+    yield alerts_db
+    vn.invalidate_event_matches()
+
+
+def _event(db, event_id, needs, updated_at):
+    db.add(Event(
+        id=event_id, title=f"Market {event_id}", city="Austin", state="TX", published=True, archived=False,
+        start_date=datetime.fromisoformat(SOON), organizer_email=ORGANIZER["email"], updated_at=updated_at,
+    ))
+    db.commit()
+    events._persist_event_needs(event_id, needs)
+
+
+def _vendor(db, categories):
+    profile = Profile(
+        role="vendor", email=VENDOR_EMAIL, categories=categories, data={},
+        subscription_plan="pro_vendor", subscription_status="active",
+    )
+    db.add(profile)
+    db.commit()
+    return profile
+
+
+def _match(db, profile):
+    return vn._create_missing_alerts_for_vendor(db, profile, {"email": VENDOR_EMAIL, "role": "vendor"})
+
+
+def _alerts(db):
+    return sorted((alert.event_id, alert.category) for alert in db.query(EventAlert))
+
+
+def test_category_only_patch_reaches_vendors(match_db):
+    # Event 2 holds the watermark ahead of event 1's untouched row.
+    _event(match_db, 1, ["Food"], OLD)
+    _event(match_db, 2, ["Music"], OLD + timedelta(days=1))
+    profile = _vendor(match_db, ["Food", "Crafts"])
+    assert _match(match_db, profile) == 1
+
+    events.organizer_patch_event(1, BackgroundTasks(), {"vendor_categories_needed": ["Food", "Crafts"]}, ORGANIZER, match_db)
+
+    assert match_db.get(Event, 1).updated_at == OLD
+    assert _match(match_db, profile) == 1
+    assert _alerts(match_db) == [(1, "Crafts"), (1, "Food")]
+
+
+def test_unpublished_and_archived_events_leave_the_index(match_db):
+    _event(match_db, 1, ["Food"], OLD)
+    _event(match_db, 2, ["Food"], OLD)
+    vn._refresh_event_match_index(match_db)
+    assert set(vn._EVENT_MATCH_INDEX[FOOD]) == {1, 2}
+
+    match_db.get(Event, 1).published = False
+    match_db.get(Event, 2).archived = True
+    match_db.commit()
+    vn._refresh_event_match_index(match_db)
+
+    assert FOOD not in vn._EVENT_MATCH_INDEX
+    assert not vn._EVENT_MATCH_ENTRIES
+
+
+def test_unchanged_event_keeps_its_generation(match_db):
+    _event(match_db, 1, ["Food"], OLD)
+    vn._refresh_event_match_index(match_db)
+    generation = vn._EVENT_MATCH_ENTRIES[1]["generation"]
+
+    events._persist_event_needs(1, ["Food"])
+    vn._refresh_event_match_index(match_db)
+    assert vn._EVENT_MATCH_ENTRIES[1]["generation"] == generation
+
+    events._persist_event_needs(1, ["Food", "Crafts"])
+    vn._refresh_event_match_index(match_db)
+    assert vn._EVENT_MATCH_ENTRIES[1]["generation"] > generation
+
+
+def test_vendor_watermark_limits_rematching_to_new_generations(match_db):
+    _event(match_db, 1, ["Food"], OLD)
+    profile = _vendor(match_db, ["Food"])
+    assert _match(match_db, profile) == 1
+    assert vn._VENDOR_MATCH_STATE[VENDOR_EMAIL] == (frozenset({FOOD}), vn._EVENT_MATCH_GENERATION)
+
+    # Past the vendor's watermark, so a dismissed alert is not re-created...
+    match_db.query(EventAlert).delete()
+    match_db.commit()
+    _event(match_db, 2, ["Food"], OLD)
+    assert _match(match_db, profile) == 1
+    assert _alerts(match_db) == [(2, "Food")]
+
+    # ...until the vendor's categories change and the watermark resets.
+    profile.categories = ["Food", "Crafts"]
+    match_db.commit()
+    assert _match(match_db, profile) == 1
+    assert _alerts(match_db) == [(1, "Food"), (2, "Food")]
+
+
+@pytest.mark.parametrize("lag, indexed", [(0.0, False), (60.0, True)])
+def test_rows_committed_behind_the_watermark_are_reread_within_the_lag(match_db, monkeypatch, lag, indexed):
+    _event(match_db, 1, ["Food"], OLD + timedelta(minutes=10))
+    vn._refresh_event_match_index(match_db)
+    assert vn._EVENT_MATCH_WATERMARK == OLD + timedelta(minutes=10)
+
+    # A transaction that started earlier commits after the refresh.
+    match_db.add(Event(id=2, title="Late", published=True, archived=False, updated_at=OLD + timedelta(minutes=9)))
+    match_db.commit()
+    events._EVENTS[2] = {"id": 2, "vendor_categories_needed": ["Food"]}
+    monkeypatch.setattr(vn, "EVENT_MATCH_CURSOR_LAG_SECONDS", lag)
+    vn._refresh_event_match_index(match_db)
+
+    assert (2 in vn._EVENT_MATCH_ENTRIES) is indexed
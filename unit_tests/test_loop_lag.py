@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+from app import loop_lag
+
+
+def _block(seconds):
+    time.sleep(seconds)
+
+
+def test_monitor_reports_the_blocking_call_and_request():
+    async def scenario():
+        monitor = loop_lag.LoopLagMonitor(interval_ms=10, threshold_ms=50)
+        monitor.start()
+        monitor.request_started(1, "POST", "/check-in")
+        await asyncio.sleep(0.05)
+        _block(0.3)
+        await asyncio.sleep(0.05)
+        monitor.request_finished(1)
+        await monitor.stop()
+        return monitor.snapshot()
+
+    stats = asyncio.run(scenario())
+
+    assert stats["stalls"] == 1
+    report = stats["recent"][0]
+    assert report["lag_ms"] >= 250
+    assert report["requests"][0]["path"] == "/check-in"
+    assert any("_block" in frame for frame in report["stack"])
+    assert stats["inflight_requests"] == 0
+
+
+def test_short_awaits_are_not_reported():
+    async def scenario():
+        monitor = loop_lag.LoopLagMonitor(interval_ms=10, threshold_ms=100)
+        monitor.start()
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+        await monitor.stop()
+        return monitor.snapshot()
+
+    stats = asyncio.run(scenario())
+    assert stats["ticks"] > 0
+    assert stats["stalls"] == 0
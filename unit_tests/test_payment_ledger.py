@@ -0,0 +1,90 @@
+import random
+
+from app import store
+from app.payment_ledger import PaymentLedger, as_totals
+
+
+def _payment(pid, event_id, amount, *, email="org@example.com", organizer_id=None, day="2026-03-01", payout="unpaid"):
+    return {
+        "id": pid,
+        "event_id": event_id,
+        "status": "paid",
+        "amount": amount,
+        "platform_fee": round(amount * 0.1, 2),
+        "organizer_payout": round(amount * 0.9, 2),
+        "organizer_email": email,
+        "organizer_id": organizer_id,
+        "payout_status": payout,
+        "paid_at": f"{day}T12:00:00+00:00",
+    }
+
+
+def test_organizer_totals_count_owned_and_named_payments_once():
+    ledger = PaymentLedger()
+    events = {1: {"organizer_email": "org@example.com"}, 2: {}, 3: {}}
+    ledger.apply(1, _payment(1, 1, 100), events)
+    ledger.apply(2, _payment(2, 2, 50, email="org@example.com", organizer_id="7"), events)
+    ledger.apply(3, _payment(3, 3, 20, email="", organizer_id="7", day="2026-04-02"), events)
+    ledger.apply(4, _payment(4, 3, 999, email="other@example.com"), events)
+
+    per_event = ledger.organizer_totals(email="ORG@example.com", organizer_id=7, event_ids=[1])
+    assert {k: as_totals(v)["gross_sales"] for k, v in per_event.items()} == {1: 100.0, 2: 50.0, 3: 20.0}
+    assert sorted(ledger.organizer_payment_keys(email="org@example.com", organizer_id="7", event_ids=[1])) == ["1", "2", "3"]
+
+    march = ledger.organizer_totals(email="org@example.com", organizer_id="7", event_ids=[1], end="2026-03-31")
+    assert set(march) == {1, 2}
+    months = ledger.rollup(email="org@example.com", organizer_id="7", event_ids=[1], period="month")
+    assert [(p, as_totals(v)["gross_sales"]) for p, v in months] == [("2026-03", 150.0), ("2026-04", 20.0)]
+
+    ledger.apply(1, dict(_payment(1, 1, 100), payout_status="paid"), events)
+    ledger.apply(4, None, events)
+    totals = as_totals(ledger.totals())
+    assert (totals["payments"], totals["payouts_paid"], totals["paid_count"]) == (3, 90.0, 1)
+    assert totals["gross_sales"] == 170.0
+
+
+def test_store_saves_keep_ledger_equal_to_a_rebuild(tmp_store):
+    rng = random.Random(5)
+    for event_id in range(1, 6):
+        store._EVENTS[event_id] = {"id": event_id, "organizer_email": f"org{event_id % 2}@example.com"}
+    store.save_store("events")
+    store.payment_ledger()
+
+    for step in range(300):
+        pid = rng.randint(1, 40)
+        action = rng.random()
+        if action < 0.5:
+            store._PAYMENTS[pid] = _payment(
+                pid,
+                rng.randint(1, 5),
+                rng.choice([10, 25.5, 80]),
+                email=rng.choice(["", "org1@example.com"]),
+                day=f"2026-0{rng.randint(1, 3)}-1{rng.randint(0, 9)}",
+            )
+        elif action < 0.7 and pid in store._PAYMENTS:
+            store._PAYMENTS[pid]["payout_status"] = "paid"
+        elif action < 0.8 and pid in store._PAYMENTS:
+            store._PAYMENTS[pid]["status"] = "refunded"
+        elif action < 0.9:
+            store._PAYMENTS.pop(pid, None)
+        else:
+            event_id = rng.randint(1, 5)
+            store._EVENTS[event_id]["organizer_email"] = f"org{step % 3}@example.com"
+            store.save_records("events", event_id)
+            continue
+        store.save_records("payments", pid)
+
+    report = store.reconcile_payment_ledger()
+    assert report["mismatches"] == 0 and not report["repaired"]
+
+
+def test_reconcile_repairs_unsaved_drift(tmp_store):
+    store._PAYMENTS[1] = _payment(1, 1, 40)
+    store.save_records("payments", 1)
+    assert as_totals(store.payment_ledger().totals())["gross_sales"] == 40.0
+
+    store._PAYMENTS[1]["amount"] = 60
+    report = store.reconcile_payment_ledger()
+    assert report["mismatches"] > 0 and report["repaired"]
+    assert as_totals(store.payment_ledger().totals())["gross_sales"] == 60.0
+    assert store.reconcile_payment_ledger()["mismatches"] == 0
@@ -0,0 +1,93 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.routers import auth, billing, verifications
+
+EMAIL = "vendor@example.com"
+
+
+@pytest.fixture
+def principal(tmp_store, tmp_users, monkeypatch):
+    """A vendor with a warm principal cache entry; call it to resolve the bearer again."""
+    monkeypatch.setattr(auth, "AUTH_PRINCIPAL_CACHE_TTL", 60.0)
+    user = auth._add_user(user_id=1, email=EMAIL, password="pw", role="vendor")
+    token = auth._create_access_token(email=EMAIL, role="vendor", is_active=True, user_id=1)
+    creds = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    def resolve():
+        return auth.get_current_user(creds)
+
+    assert resolve()["plan"] == "starter"
+    assert _cached(EMAIL)
+    return SimpleNamespace(user=user, resolve=resolve)
+
+
+def _cached(email):
+    return [key for key in auth._PRINCIPAL_CACHE if key[0] == email]
+
+
+def _stripe(subscription=None, event=None):
+    return SimpleNamespace(
+        api_key="sk_test",
+        Subscription=SimpleNamespace(modify=lambda sid, **kw: SimpleNamespace(**{**vars(subscription), **kw})),
+        Event=SimpleNamespace(construct_from=lambda payload, key: event),
+    )
+
+
+def _subscription(**fields):
+    return SimpleNamespace(
+        id="sub_1", customer="cus_1", status="active", cancel_at_period_end=False,
+        current_period_end=1_900_000_000, metadata={"email": EMAIL, "plan": "pro_vendor"}, **fields,
+    )
+
+
+def test_cached_principal_expires_after_the_ttl(principal, monkeypatch):
+    now = auth.time.monotonic()
+    principal.user["full_name"] = "Renamed"
+
+    assert principal.resolve()["full_name"] is None
+    monkeypatch.setattr(auth.time, "monotonic", lambda: now + 61)
+    assert principal.resolve()["full_name"] == "Renamed"
+
+
+def test_billing_webhook_drops_the_subscriber(principal, monkeypatch):
+    event = SimpleNamespace(type="customer.subscription.updated", data=SimpleNamespace(object=_subscription()))
+    monkeypatch.setattr(billing, "_require_stripe", lambda: _stripe(event=event))
+
+    billing._process_billing_event({"id": "evt_1"})
+
+    assert not _cached(EMAIL)
+    assert principal.resolve()["plan"] == "pro_vendor"
+
+
+def test_subscription_cancel_and_resume_drop_the_subscriber(principal, monkeypatch):
+    principal.user.update(stripe_subscription_id="sub_1", plan="pro_vendor", subscription_status="active")
+    auth.invalidate_principal_cache(EMAIL)
+    monkeypatch.setattr(billing, "_require_stripe", lambda: _stripe(subscription=_subscription()))
+
+    billing.cancel_subscription(user=principal.resolve())
+    assert not _cached(EMAIL)
+    assert principal.resolve()["cancel_at_period_end"] is True
+
+    billing.resume_subscription(user=principal.resolve())
+    assert not _cached(EMAIL)
+    assert principal.resolve()["cancel_at_period_end"] is False
+
+
+def test_admin_force_premium_drops_the_vendor(principal):
+    auth.debug_force_premium(EMAIL)
+
+    assert not _cached(EMAIL)
+    assert principal.resolve()["plan"] == "pro_vendor"
+
+
+def test_verification_review_drops_the_vendor(principal, tmp_store):
+    tmp_store._VERIFICATIONS[1] = {"id": 1, "email": EMAIL, "role": "vendor", "status": "pending"}
+    tmp_store.save_records("verifications", 1)
+
+    verifications.review_verification(1, {"status": "verified"})
+
+    assert not _cached(EMAIL)
+
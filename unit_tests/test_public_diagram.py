@@ -0,0 +1,117 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event as sa_event
+
+from app import response_cache, store
+from app.db import Base
+from app.models.diagram import Diagram
+from app.models.event import Event
+from app.models.profile import Profile
+from app.routers import events
+
+EVENT_ID = 1
+_HOLD_STATUSES = {"approved", "accepted", "confirmed", "submitted", "under_review", "pending"}
+
+
+def _nested_loop_app(event_apps, booth_tokens):
+    # The per-booth scan _public_booth_assignments replaced.
+    for app in event_apps:
+        if booth_tokens.intersection(events._public_application_booth_tokens(app)):
+            status = str(app.get("status") or "").strip().lower()
+            payment_status = events._coerce_payment_status(app.get("payment_status") or app.get("paymentStatus"))
+            if status in _HOLD_STATUSES or payment_status in {"paid", "pending"}:
+                return app
+    return None
+
+
+def _request(if_none_match=None):
+    headers = {"if-none-match": if_none_match} if if_none_match else {}
+    params = SimpleNamespace(multi_items=lambda: [])
+    return SimpleNamespace(url=SimpleNamespace(path=f"/public/events/{EVENT_ID}/diagram"), query_params=params, headers=headers)
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    monkeypatch.setattr(response_cache, "RESPONSE_CACHE_ENABLED", True)
+    monkeypatch.setattr(response_cache, "RESPONSE_CACHE_TTL", 30.0)
+    response_cache.clear()
+    yield
+    response_cache.clear()
+
+
+def test_assignment_map_matches_the_nested_loop():
+    rng = random.Random(16)
+    statuses = ["approved", "pending", "rejected", "draft", "withdrawn", "submitted"]
+    payments = ["paid", "pending", "unpaid", "", "refunded"]
+    booth_keys = ["booth_id", "requested_booth_id", "assigned_booth_id", "booth_label"]
+    apps = [
+        {
+            "id": i,
+            rng.choice(booth_keys): f"B{rng.randint(1, 12)}",
+            "status": rng.choice(statuses),
+            "payment_status": rng.choice(payments),
+        }
+        for i in range(60)
+    ]
+    assignments = events._public_booth_assignments(apps)
+
+    for number in range(1, 15):
+        booth = {"id": f"b{number}", "label": f"B{number}"}
+        tokens = events._public_booth_match_tokens(booth, f"b{number}", f"B{number}")
+        assert events._public_assigned_app(assignments, tokens) is _nested_loop_app(apps, tokens)
+
+
+def test_earliest_eligible_application_holds_the_booth():
+    apps = [
+        {"id": 1, "booth_id": "A1", "status": "rejected"},
+        {"id": 2, "booth_label": "a1", "status": "draft", "payment_status": "pending"},
+        {"id": 3, "booth_id": "A1", "status": "approved"},
+    ]
+    assignments = events._public_booth_assignments(apps)
+
+    assert events._public_assigned_app(assignments, {"a1"})["id"] == 2
+    assert events._public_assigned_app(assignments, {"b7", "a1"})["id"] == 2
+    assert events._public_assigned_app(assignments, {"b7"}) is None
+
+
+def test_public_diagram_loads_profiles_once_and_answers_304(tmp_store, checkin_db, fresh_cache):
+    engine = checkin_db.get_bind()
+    Base.metadata.create_all(engine, tables=[Diagram.__table__, Profile.__table__])
+    checkin_db.add(Event(id=EVENT_ID, title="Night market", published=True, archived=False))
+    booths = [{"id": f"b{n}", "label": f"A{n}", "x": n * 10, "y": 0} for n in range(1, 5)]
+    checkin_db.add(Diagram(event_id=EVENT_ID, diagram={"booths": booths}, version=1))
+    for n in range(1, 4):
+        checkin_db.add(Profile(role="vendor", email=f"v{n}@example.com", business_name=f"Vendor {n}", data={}))
+        store._APPLICATIONS[n] = {
+            "id": n, "event_id": EVENT_ID, "booth_id": f"b{n}", "status": "approved", "vendor_email": f"v{n}@example.com",
+        }
+    checkin_db.commit()
+    store.save_records("applications", 1, 2, 3)
+
+    profile_queries = []
+
+    def count(conn, cursor, statement, *args):
+        if "FROM profiles" in statement:
+            profile_queries.append(statement)
+
+    sa_event.listen(engine, "before_cursor_execute", count)
+    first = events.public_event_diagram(EVENT_ID, _request(), db=checkin_db)
+    assert first.status_code == 200
+    assert len(profile_queries) == 1
+    assert b'"vendor_name":"Vendor 2"' in first.body
+
+    etag = first.headers["etag"]
+    again = events.public_event_diagram(EVENT_ID, _request(if_none_match=etag), db=checkin_db)
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+    assert len(profile_queries) == 1
+
+    store._APPLICATIONS[2]["status"] = "withdrawn"
+    store.save_records("applications", 2)
+    changed = events.public_event_diagram(EVENT_ID, _request(if_none_match=etag), db=checkin_db)
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert b'"vendor_name":"Vendor 2"' not in changed.body
+    sa_event.remove(engine, "before_cursor_execute", count)
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+from app import rate_limit
+
+
+async def _ok_app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def _request(middleware, path="/events", client="10.0.0.1", method="GET"):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "headers": [], "client": (client, 1234)}
+    asyncio.run(middleware(scope, receive, send))
+    start = messages[0]
+    return start["status"], dict(start["headers"])
+
+
+def test_burst_is_allowed_then_limited_per_client():
+    middleware = rate_limit.RateLimitMiddleware(
+        _ok_app, per_minute=3, burst=3, backend=rate_limit.MemoryBackend(), route_costs=[]
+    )
+
+    statuses = [_request(middleware)[0] for _ in range(4)]
+    assert statuses == [200, 200, 200, 429]
+
+    status, headers = _request(middleware)
+    assert status == 429
+    assert int(headers[b"retry-after"]) >= 1
+    assert _request(middleware, client="10.0.0.2")[0] == 200
+
+
+def test_route_cost_weights_spend_more_of_the_bucket():
+    middleware = rate_limit.RateLimitMiddleware(
+        _ok_app, per_minute=10, burst=10, backend=rate_limit.MemoryBackend(), route_costs=[("/vendor/ai/", 5)]
+    )
+
+    assert _request(middleware, "/vendor/ai/event-fit/1")[0] == 200
+    status, headers = _request(middleware, "/vendor/ai/event-fit/1")
+    assert status == 200
+    assert headers[b"x-ratelimit-remaining"] == b"0"
+    assert _request(middleware, "/events")[0] == 429
+
+
+def test_memory_backend_evicts_least_recent_keys():
+    backend = rate_limit.MemoryBackend(max_keys=2)
+    for key in ("a", "b", "c"):
+        backend.acquire(key, 0.0, 1, 1.0, 5.0)
+    assert len(backend) == 2
+    assert list(backend._tats) == ["b", "c"]
+
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = tmp_path / "rate_limit.sqlite3"
+    first = rate_limit.SQLiteBackend(path)
+    second = rate_limit.SQLiteBackend(path)
+
+    assert first.acquire("ip:1", 100.0, 1, 1.0, 2.0)[0]
+    assert second.acquire("ip:1", 100.0, 1, 1.0, 2.0)[0]
+    assert not first.acquire("ip:1", 100.0, 1, 1.0, 2.0)[0]
+
+
+def test_preflight_requests_spend_no_tokens():
+    middleware = rate_limit.RateLimitMiddleware(
+        _ok_app, per_minute=1, burst=1, backend=rate_limit.MemoryBackend(), route_costs=[]
+    )
+
+    assert [_request(middleware, method="OPTIONS")[0] for _ in range(3)] == [200, 200, 200]
+    assert _request(middleware)[0] == 200
+    assert _request(middleware)[0] == 429
+
+
+def test_shared_backend_runs_off_the_event_loop_thread(tmp_path):
+    threads = []
+    backend = rate_limit.SQLiteBackend(tmp_path / "rate_limit.sqlite3")
+    acquire = backend.acquire
+    backend.acquire = lambda *args: threads.append(threading.get_ident()) or acquire(*args)
+    middleware = rate_limit.RateLimitMiddleware(_ok_app, per_minute=5, burst=5, backend=backend, route_costs=[])
+
+    assert _request(middleware)[0] == 200
+    assert threads and threads[0] != threading.get_ident()
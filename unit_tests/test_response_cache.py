@@ -0,0 +1,90 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app import response_cache
+
+
+class _QueryParams:
+    def __init__(self, items):
+        self._items = list(items)
+
+    def multi_items(self):
+        return list(self._items)
+
+
+def _request(path="/public/events", params=(), if_none_match=None):
+    headers = {"if-none-match": if_none_match} if if_none_match else {}
+    return SimpleNamespace(url=SimpleNamespace(path=path), query_params=_QueryParams(params), headers=headers)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_cache(monkeypatch):
+    monkeypatch.setattr(response_cache, "RESPONSE_CACHE_ENABLED", True)
+    monkeypatch.setattr(response_cache, "RESPONSE_CACHE_TTL", 30.0)
+    response_cache.clear()
+    for key in response_cache._STATS:
+        response_cache._STATS[key] = 0
+    yield
+    response_cache.clear()
+
+
+def test_second_request_is_served_from_cache_and_revalidates():
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {"events": [1, 2]}
+
+    first = response_cache.cached_json(_request(params=[("limit", "24")]), build, tags=("events",))
+    second = response_cache.cached_json(_request(params=[("limit", "24")]), build, tags=("events",))
+    assert len(calls) == 1
+    assert first.body == second.body == b'{"events":[1,2]}'
+    etag = first.headers["etag"]
+
+    not_modified = response_cache.cached_json(
+        _request(params=[("limit", "24")], if_none_match=f'W/{etag}'), build, tags=("events",)
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.headers["etag"] == etag
+
+    stats = response_cache.response_cache_stats()
+    assert (stats["hits"], stats["misses"], stats["not_modified"]) == (2, 1, 1)
+
+
+def test_invalidation_by_tag_and_version_mismatch_rebuild():
+    payloads = iter([{"n": 1}, {"n": 2}, {"n": 3}, {"n": 4}])
+
+    def build():
+        return next(payloads)
+
+    request = _request("/public/events/7")
+    assert response_cache.cached_json(request, build, tags=("event:7",), version=1).body == b'{"n":1}'
+    response_cache.cached_json(_request("/vendors/public"), build, tags=("vendors",))
+
+    assert response_cache.invalidate_event(7) == 1
+    assert response_cache.cached_json(request, build, tags=("event:7",), version=1).body == b'{"n":3}'
+    assert response_cache.cached_json(request, build, tags=("event:7",), version=2).body == b'{"n":4}'
+
+    stats = response_cache.response_cache_stats()
+    assert stats["invalidated_entries"] == 1
+    assert stats["entries"] == 2
+
+
+def test_response_built_during_invalidation_is_not_stored():
+    def build():
+        response_cache.invalidate("wall:3")
+        return {"posts": []}
+
+    response_cache.cached_json(_request("/events/3/wall"), build, tags=("wall:3",))
+    assert response_cache.response_cache_stats()["entries"] == 0
+
+
+def test_lru_evicts_oldest_entries(monkeypatch):
+    monkeypatch.setattr(response_cache, "RESPONSE_CACHE_MAX_ENTRIES", 2)
+    for offset in ("0", "24", "48"):
+        response_cache.cached_json(_request(params=[("offset", offset)]), lambda: {}, tags=("events",))
+
+    stats = response_cache.response_cache_stats()
+    assert (stats["entries"], stats["evictions"]) == (2, 1)
+    assert set(response_cache._KEYS_BY_TAG["events"]) == set(response_cache._ENTRIES)
@@ -0,0 +1,87 @@
+from app import store
+
+
+def test_application_indexes_follow_saves_and_deletes(tmp_store):
+    store._APPLICATIONS[1] = {"id": 1, "vendor_email": "A@Example.com", "event_id": 5}
+    store._APPLICATIONS[2] = {"id": 2, "vendor_email": "b@example.com", "vendor_id": "V-2", "event_id": "5"}
+    store._APPLICATIONS[3] = {"id": 3, "vendor_email": "a@example.com", "eventId": 7}
+    store.save_records("applications", 1, 2, 3)
+
+    assert list(store.applications_for_vendor("a@example.com")) == [1, 3]
+    assert list(store.applications_for_vendor(vendor_id="v-2")) == [2]
+    assert list(store.applications_for_event(5)) == [1, 2]
+    assert list(store.applications_for_vendor_event("a@example.com", "7")) == [3]
+
+    store._APPLICATIONS[1]["event_id"] = 7
+    store.save_records("applications", 1)
+    assert list(store.applications_for_event("5")) == [2]
+    assert list(store.applications_for_event(7)) == [1, 3]
+
+    store._APPLICATIONS.pop(3)
+    store.save_records("applications", "3")
+    assert list(store.applications_for_vendor("a@example.com")) == [1]
+
+    store.load_store()
+    assert list(store.applications_for_event(7)) == [1]
+
+
+def test_unsaved_insert_triggers_index_rebuild(tmp_store):
+    store._APPLICATIONS[4] = {"id": 4, "vendor_email": "c@example.com", "event_id": 9, "status": "draft"}
+    assert store.find_existing_application("c@example.com", 9)["id"] == 4
+
+
+def test_get_application_resolves_key_and_id_forms(tmp_store):
+    store._APPLICATIONS[10] = {"id": "10", "vendor_email": "a@example.com"}
+    store._APPLICATIONS[11] = {"id": "legacy-11", "vendor_email": "b@example.com"}
+    store.save_records("applications", 10, 11)
+
+    assert store.get_application(10) is store._APPLICATIONS[10]
+    assert store.get_application("10") is store._APPLICATIONS[10]
+    assert store.get_application("legacy-11") is store._APPLICATIONS[11]
+    assert store.get_application("12") is None
+
+    store._APPLICATIONS[11]["id"] = "renamed-11"
+    store.save_records("applications", 11)
+    assert store.get_application("legacy-11") is None
+    assert store.get_application("renamed-11") is store._APPLICATIONS[11]
+
+
+def test_application_generation_changes_only_for_touched_event(tmp_store):
+    store._APPLICATIONS[1] = {"id": 1, "event_id": 5, "payment_status": "unpaid"}
+    store._APPLICATIONS[2] = {"id": 2, "event_id": 6, "payment_status": "unpaid"}
+    store.save_records("applications", 1, 2)
+    five = store.application_generation(5)
+    six = store.application_generation("6")
+
+    store._APPLICATIONS[1]["payment_status"] = "paid"
+    store.save_records("applications", 1)
+    assert store.application_generation(5) != five
+    assert store.application_generation(6) == six
+
+    store._APPLICATIONS[1]["event_id"] = 6
+    store.save_records("applications", 1)
+    assert store.application_generation(6) != six
+
+
+def test_full_save_defers_reindex_to_the_next_lookup(tmp_store, monkeypatch):
+    store._APPLICATIONS[1] = {"id": 1, "vendor_email": "a@example.com", "event_id": 5}
+    store.save_records("applications", 1)
+    assert list(store.applications_for_event(5)) == [1]
+
+    rebuilds = []
+    rebuild = store._rebuild_application_indexes
+    monkeypatch.setattr(store, "_rebuild_application_indexes", lambda: rebuilds.append(1) or rebuild())
+
+    store._APPLICATIONS[1]["event_id"] = 6
+    store.save_store()
+    store.save_store("applications")
+    assert rebuilds == []
+
+    assert list(store.applications_for_event(6)) == [1]
+    assert list(store.applications_for_event(5)) == []
+    assert rebuilds == [1]
+
+    store._APPLICATIONS[1]["vendor_email"] = "b@example.com"
+    store.save_records("applications", 1)
+    assert list(store.applications_for_vendor("b@example.com")) == [1]
+    assert rebuilds == [1]
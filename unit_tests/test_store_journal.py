@@ -0,0 +1,126 @@
+import json
+
+import pytest
+
+from app import store
+
+
+def test_save_records_replays_puts_and_deletes(tmp_store):
+    store._APPLICATIONS[1] = {"id": 1, "vendor_email": "a@example.com", "status": "draft"}
+    store._APPLICATIONS[2] = {"id": 2, "vendor_email": "b@example.com", "status": "draft"}
+    store.save_records("applications", 1, 2)
+    store.save_store()
+
+    store._APPLICATIONS[2]["status"] = "approved"
+    store.save_records("applications", 2)
+    store._APPLICATIONS.pop(1)
+    store.save_records("applications", 1)
+
+    applications = store._APPLICATIONS
+    store.load_store()
+
+    assert store._APPLICATIONS is applications
+    assert list(store._APPLICATIONS) == [2]
+    assert store._APPLICATIONS[2]["status"] == "approved"
+
+
+def test_compaction_folds_journal_into_snapshot(tmp_store):
+    store.upsert_vendor("Vendor@Example.com", {"business_name": "Tacos"})
+    assert store._JOURNAL_PATH.exists()
+
+    assert store.compact_store(force=True)
+    assert not store._JOURNAL_PATH.exists()
+    assert not store._JOURNAL_ROTATED_PATH.exists()
+
+    store._VENDORS.clear()
+    store.load_store()
+    assert store._VENDORS["vendor@example.com"]["business_name"] == "Tacos"
+
+
+def test_save_store_rewrites_only_dirty_shards(tmp_store, tmp_path):
+    for app_id in range(1, 41):
+        store._APPLICATIONS[app_id] = {"id": app_id, "status": "draft"}
+    store.save_store()
+
+    shard_files = sorted((tmp_path / "_data_store").glob("applications.*.json"))
+    before = {path: path.stat().st_mtime_ns for path in shard_files}
+    events_file = tmp_path / "_data_store" / "events.json"
+    events_mtime = events_file.stat().st_mtime_ns
+
+    store._APPLICATIONS[7]["status"] = "approved"
+    store.save_records("applications", 7)
+    store.compact_store(force=True)
+
+    changed = [path for path in shard_files if path.stat().st_mtime_ns != before[path]]
+    assert [path.name for path in changed] == [store._shard_path("applications", store._shard_of("applications", 7)).name]
+    assert events_file.stat().st_mtime_ns == events_mtime
+
+
+def test_legacy_single_file_store_is_imported(tmp_store, tmp_path):
+    legacy = {
+        "events": {"3": {"id": 3, "title": "Night Market"}},
+        "applications": {"9": {"id": 9, "event_id": 3}},
+        "next": {"event_id": 4, "application_id": 10},
+    }
+    (tmp_path / "_data_store.json").write_text(json.dumps(legacy), encoding="utf-8")
+    store.load_store()
+
+    assert store._EVENTS[3]["title"] == "Night Market"
+    assert store._APPLICATIONS[9]["event_id"] == 3
+
+    store.compact_store(force=True)
+    store._EVENTS.clear()
+    (tmp_path / "_data_store.json").unlink()
+    store.load_store()
+    assert store._EVENTS[3]["title"] == "Night Market"
+
+
+def test_write_behind_coalesces_saves_until_flush(tmp_store, monkeypatch):
+    monkeypatch.setattr(store, "STORE_WRITE_BEHIND", True)
+    monkeypatch.setattr(store, "STORE_FLUSH_MAX_DELAY_MS", 60_000)
+    monkeypatch.setattr(store, "STORE_FLUSH_MAX_PENDING", 1_000)
+    before = store.store_write_stats()
+
+    for i in range(10):
+        store._APPLICATIONS[1] = {"id": 1, "status": f"step-{i}"}
+        store.save_records("applications", 1)
+    assert store.store_write_stats()["pending_saves"] == 10
+
+    store.flush(sync=True)
+    after = store.store_write_stats()
+    assert after["pending_saves"] == 0
+    assert after["physical_writes"] - before["physical_writes"] == 1
+    assert after["coalesced_saves"] - before["coalesced_saves"] == 9
+    assert store._JOURNAL_PATH.read_text(encoding="utf-8").count("\n") == 1
+
+    store._APPLICATIONS.clear()
+    store.load_store()
+    assert store._APPLICATIONS[1]["status"] == "step-9"
+
+
+def test_failed_journal_write_keeps_the_queue(tmp_store, monkeypatch):
+    store._APPLICATIONS[1] = {"id": 1, "status": "draft"}
+    store.save_records("applications", 1)
+    journal = store._JOURNAL_PATH.read_bytes()
+
+    fsync = store.os.fsync
+    failures = [OSError(28, "No space left on device")]
+
+    def disk_full_once(fd):
+        if failures:
+            raise failures.pop()
+        fsync(fd)
+
+    monkeypatch.setattr(store.os, "fsync", disk_full_once)
+    store._APPLICATIONS[1]["status"] = "approved"
+    with pytest.raises(OSError):
+        store.save_records("applications", 1)
+    assert store.store_write_stats()["pending_saves"] == 1
+    assert store._JOURNAL_PATH.read_bytes() == journal
+
+    store.flush(sync=True)
+    assert store.store_write_stats()["pending_saves"] == 0
+
+    store._APPLICATIONS.clear()
+    store.load_store()
+    assert store._APPLICATIONS[1]["status"] == "approved"
@@ -0,0 +1,74 @@
+import json
+
+import pytest
+
+from app import store
+
+
+@pytest.fixture
+def seeded_store(tmp_store):
+    store._PAYMENTS[1] = {"id": 1, "status": "paid", "amount": 10}
+    store._PAYMENTS[2] = {"id": 2, "status": "pending", "amount": 20}
+    store.save_store()
+    return store
+
+
+def _count_loads(monkeypatch):
+    loads = []
+    load_files = store._load_files
+    monkeypatch.setattr(store, "_load_files", lambda: loads.append(1) or load_files())
+    return loads
+
+
+def test_snapshot_is_cached_read_only_and_skips_disk(seeded_store, monkeypatch):
+    loads = _count_loads(monkeypatch)
+
+    first = store.get_store_snapshot()
+    assert store.get_store_snapshot() is first
+    assert first.generation == store.store_generation()
+    assert first["payments"]["1"]["amount"] == 10
+    assert loads == []
+
+    with pytest.raises(TypeError):
+        first["payments"]["3"] = {}
+    with pytest.raises(TypeError):
+        first["payments"]["1"]["status"] = "refunded"
+    assert json.loads(json.dumps(first["payments"]))["2"]["status"] == "pending"
+
+
+def test_saving_one_record_copies_only_that_record(seeded_store, monkeypatch):
+    before = store.get_store_snapshot()
+
+    store._PAYMENTS[2]["status"] = "paid"
+    store.save_records("payments", 2)
+    store._PAYMENTS.pop(1)
+    store.save_records("payments", 1)
+    after = store.get_store_snapshot()
+
+    assert after is not before and after.generation > before.generation
+    assert after["events"] is before["events"]
+    assert list(after["payments"]) == ["2"]
+    assert after["payments"]["2"]["status"] == "paid"
+    # The earlier snapshot still shows the store as it was.
+    assert before["payments"]["1"]["amount"] == 10
+    assert before["payments"]["2"]["status"] == "pending"
+
+
+def test_reload_only_when_files_change_on_disk(seeded_store, monkeypatch):
+    loads = _count_loads(monkeypatch)
+
+    store._PAYMENTS[1]["payout_status"] = "paid"
+    store.save_records("payments", 1)
+    assert store.reload_store_if_changed() is False
+    assert loads == []
+
+    # Another process appends to the journal.
+    entry = {"s": store._JOURNAL_SEQ + 1, "c": "payments", "k": "3", "op": "put", "v": {"id": 3, "amount": 5}}
+    with open(store._JOURNAL_PATH, "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+    snapshot = store.get_store_snapshot()
+    assert loads == [1]
+    assert snapshot["payments"]["3"]["amount"] == 5
+    assert snapshot["payments"]["1"]["payout_status"] == "paid"
+    assert store.reload_store_if_changed() is False
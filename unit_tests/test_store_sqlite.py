@@ -0,0 +1,88 @@
+import json
+
+import pytest
+
+from app import store
+
+
+def test_sync_pulls_other_workers_writes_and_deletes(sqlite_store):
+    other = sqlite_store
+    store._EVENTS[1] = {"id": 1, "title": "Ours"}
+    store.save_records("events", 1)
+
+    other.write("events", [("2", json.dumps({"id": 2, "title": "Theirs"})), ("1", None)])
+    other.write("applications", [("5", json.dumps({"id": 5, "event_id": 2}))])
+    generation = store.application_generation(2)
+
+    assert store.sync() == 3
+    assert store._EVENTS == {2: {"id": 2, "title": "Theirs"}}
+    assert list(store.applications_for_event(2)) == [5]
+    assert store.application_generation(2) != generation
+    assert store.sync() == 0
+
+
+def test_save_store_writes_changed_rows_without_clobbering_unseen_ones(sqlite_store):
+    other = sqlite_store
+    for event_id in (1, 2):
+        store._EVENTS[event_id] = {"id": event_id}
+    store.save_store("events")
+    other.write("events", [("3", json.dumps({"id": 3}))])
+
+    store._EVENTS[2]["title"] = "Renamed"
+    del store._EVENTS[1]
+    store.save_store("events")
+
+    records, _ = other.load()
+    assert {key: json.loads(value) for key, value in records["events"]} == {
+        "2": {"id": 2, "title": "Renamed"},
+        "3": {"id": 3},
+    }
+
+
+@pytest.fixture
+def legacy_file(tmp_path):
+    legacy = {"applications": {"9": {"id": 9}}, "next": {"application_id": 10}}
+    (tmp_path / "_data_store.json").write_text(json.dumps(legacy), encoding="utf-8")
+
+
+def test_id_counters_are_shared_and_seeded_from_the_file_store(legacy_file, sqlite_store):
+    other = sqlite_store
+
+    assert store._APPLICATIONS[9] == {"id": 9}
+    assert store.next_application_id() == 10
+    assert other.next_id("application_id") == 11
+    assert store.next_application_id() == 12
+
+
+def test_delete_markers_are_compacted_once_every_worker_has_read_them(sqlite_store, monkeypatch):
+    other = sqlite_store
+    monkeypatch.setattr(store, "_BACKEND_MARK_MIN_INTERVAL", 0)
+    store._EVENTS.update({1: {"id": 1}, 2: {"id": 2}})
+    store.save_records("events", 1, 2)
+    other.mark_seen(other.counters())
+
+    del store._EVENTS[1]
+    store.save_records("events", 1)
+    # This worker reports its position (past its own delete) on its next sync.
+    store.sync()
+    # The other worker has not read the delete yet.
+    assert other.compact() == 0
+    assert store.store_write_stats()["tombstones"] == 1
+
+    other.mark_seen(other.counters())
+    assert other.compact() == 1
+    assert store.store_write_stats()["tombstones"] == 0
+
+
+def test_worker_that_missed_compacted_deletes_reloads_the_collection(sqlite_store):
+    other = sqlite_store
+    store._EVENTS.update({1: {"id": 1}, 2: {"id": 2}})
+    store.save_records("events", 1, 2)
+
+    other.write("events", [("1", None), ("3", json.dumps({"id": 3}))])
+    # This worker is treated as gone, so its position holds nothing back.
+    assert other.compact(reader_ttl=0) == 1
+
+    assert store.sync() == 2
+    assert store._EVENTS == {2: {"id": 2}, 3: {"id": 3}}
+    assert store.sync() == 0
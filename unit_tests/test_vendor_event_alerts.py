@@ -0,0 +1,114 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import BackgroundTasks
+from sqlalchemy.orm import sessionmaker
+
+from app import db as app_db
+from app.models.event import Event
+from app.models.profile import EventAlert, Profile
+from app.routers import events
+
+ORGANIZER = {"email": "host@example.com", "role": "organizer"}
+OLD = datetime(2020, 1, 1)
+
+
+@pytest.fixture
+def fanout_db(tmp_store, alerts_db, monkeypatch):
+    # The fan-out job opens its own session, so share the in-memory engine with it.
+    monkeypatch.setattr(app_db, "SessionLocal", sessionmaker(bind=alerts_db.get_bind()))
+    monkeypatch.setattr(events, "VENDOR_CATEGORY_CURSOR_LAG_SECONDS", 0.0)
+    monkeypatch.setattr(events, "_VENDOR_CATEGORY_WATERMARK", None)
+    alerts_db.add(Event(id=1, title="Night Market", city="Austin", state="TX", published=False, archived=False,
+                        organizer_email=ORGANIZER["email"]))
+    alerts_db.add_all([
+        _profile("both@example.com", ["Food", "Crafts"], visibility_tier="premium"),
+        _profile("paid@example.com", ["Crafts"], subscription_plan="pro_vendor", subscription_status="active"),
+        _profile("lapsed@example.com", ["Food"], subscription_plan="pro_vendor", subscription_status="canceled"),
+        _profile("music@example.com", ["Music"], featured=True),
+    ])
+    alerts_db.commit()
+    events._REQUIREMENTS[1] = {"requirements": {"categories": ["Food", "Crafts"]}}
+    yield alerts_db
+    events._VENDOR_CATEGORY_INDEX.clear()
+    events._VENDOR_CATEGORY_PROFILES.clear()
+
+
+def _profile(email, categories, updated_at=OLD, **fields):
+    return Profile(role="vendor", email=email, categories=categories, data={}, updated_at=updated_at, **fields)
+
+
+def _publish(db):
+    tasks = BackgroundTasks()
+    published = events.organizer_publish_event(1, tasks, ORGANIZER, db)
+    return published, tasks
+
+
+def _alerts(db):
+    return sorted((alert.vendor_email, alert.category) for alert in db.query(EventAlert))
+
+
+EXPECTED = [("both@example.com", "Crafts"), ("both@example.com", "Food"), ("paid@example.com", "Crafts")]
+
+
+def test_publish_alerts_each_matching_premium_vendor_once_per_category(fanout_db):
+    events.warm_vendor_category_index().join()
+    published, tasks = _publish(fanout_db)
+    assert published["alerts_queued"] == 3
+    assert _alerts(fanout_db) == []
+
+    asyncio.run(tasks())
+    assert _alerts(fanout_db) == EXPECTED
+
+    # Publishing again re-queues the same candidates; ON CONFLICT keeps one row each.
+    fanout_db.get(Event, 1).published = False
+    fanout_db.commit()
+    published, tasks = _publish(fanout_db)
+    assert published["alerts_queued"] == 3
+    asyncio.run(tasks())
+    assert _alerts(fanout_db) == EXPECTED
+
+
+def test_insert_skips_rows_already_present(fanout_db):
+    row = {
+        "vendor_email": "both@example.com", "event_id": 1, "category": "Food",
+        "alert_type": "new_matching_event", "message": "New Food opportunity", "read": False, "data": {},
+    }
+    events._insert_event_alert_rows(fanout_db, [row])
+    events._insert_event_alert_rows(fanout_db, [row, {**row, "category": "Crafts"}])
+    fanout_db.commit()
+
+    assert _alerts(fanout_db) == [("both@example.com", "Crafts"), ("both@example.com", "Food")]
+
+
+def test_publish_request_does_not_refresh_the_index(fanout_db, monkeypatch):
+    refreshes = []
+    refresh = events._refresh_vendor_category_index
+    monkeypatch.setattr(events, "_refresh_vendor_category_index", lambda db: refreshes.append(1) or refresh(db))
+
+    # Cold index: nothing counted yet, but the job still builds it and delivers.
+    published, tasks = _publish(fanout_db)
+    assert published["alerts_queued"] == 0
+    assert refreshes == []
+
+    asyncio.run(tasks())
+    assert refreshes == [1]
+    assert _alerts(fanout_db) == EXPECTED
+
+
+@pytest.mark.parametrize("lag, indexed", [(0.0, False), (60.0, True)])
+def test_profiles_committed_behind_the_watermark_are_reread_within_the_lag(fanout_db, monkeypatch, lag, indexed):
+    fanout_db.add(_profile("latest@example.com", ["Music"], updated_at=OLD + timedelta(minutes=10), featured=True))
+    fanout_db.commit()
+    events._refresh_vendor_category_index(fanout_db)
+    assert events._VENDOR_CATEGORY_WATERMARK == OLD + timedelta(minutes=10)
+
+    # A transaction that started earlier commits after the refresh.
+    late = _profile("late@example.com", ["Food"], updated_at=OLD + timedelta(minutes=9), featured=True)
+    fanout_db.add(late)
+    fanout_db.commit()
+    monkeypatch.setattr(events, "VENDOR_CATEGORY_CURSOR_LAG_SECONDS", lag)
+    events._refresh_vendor_category_index(fanout_db)
+
+    assert (late.id in events._VENDOR_CATEGORY_PROFILES) is indexed
@@ -0,0 +1,107 @@
+import json
+
+from app import webhook_inbox as inbox
+
+
+def _event(event_id, object_id, event_type="checkout.session.completed", **obj):
+    return json.dumps(
+        {"id": event_id, "type": event_type, "data": {"object": {"id": object_id, **obj}}}
+    ).encode("utf-8")
+
+
+def _status(event_id):
+    return inbox._connect().execute(
+        "SELECT status, attempts FROM inbox WHERE event_id = ?", (event_id,)
+    ).fetchone()
+
+
+def test_duplicate_deliveries_are_stored_and_processed_once(tmp_inbox):
+    seen = []
+    tmp_inbox(lambda event: seen.append(event["id"]) or {"ok": True})
+
+    first = inbox.ingest("test", _event("evt_1", "cs_1"))
+    again = inbox.ingest("test", _event("evt_1", "cs_1"))
+    assert (first["queued"], again["duplicate"]) == (True, True)
+
+    assert inbox.drain_inbox() == 1
+    assert seen == ["evt_1"]
+    stats = inbox.webhook_inbox_stats()
+    assert stats["queue_depth"]["done"] == 1
+    assert stats["processing_lag"]["samples"] >= 1
+
+
+def test_events_for_one_object_wait_for_earlier_ones(tmp_inbox):
+    seen = []
+    fail = {"evt_a1"}
+
+    def handler(event):
+        if event["id"] in fail:
+            fail.discard(event["id"])
+            raise RuntimeError("Stripe unavailable")
+        seen.append(event["id"])
+
+    tmp_inbox(handler)
+    inbox.ingest("test", _event("evt_a1", "sub_a", "customer.subscription.created"))
+    inbox.ingest("test", _event("evt_b1", "cs_b"))
+    inbox.ingest("test", _event("evt_a2", "cs_a", subscription="sub_a"))
+
+    inbox.drain_inbox()
+    # evt_a1 failed and is backing off; evt_a2 is for the same subscription.
+    assert seen == ["evt_b1"]
+    assert _status("evt_a1") == ("pending", 1)
+    assert _status("evt_a2") == ("pending", 0)
+
+    inbox._connect().execute("UPDATE inbox SET next_attempt_at = 0")
+    inbox.drain_inbox()
+    assert seen == ["evt_b1", "evt_a1", "evt_a2"]
+
+
+def test_dead_events_unblock_the_object_and_can_be_replayed(tmp_inbox, monkeypatch):
+    monkeypatch.setattr(inbox, "WEBHOOK_INBOX_MAX_ATTEMPTS", 1)
+    broken = {"evt_1"}
+    seen = []
+
+    def handler(event):
+        if event["id"] in broken:
+            raise KeyError("metadata")
+        seen.append(event["id"])
+
+    tmp_inbox(handler)
+    inbox.ingest("test", _event("evt_1", "cs_1"))
+    inbox.ingest("test", _event("evt_2", "cs_1"))
+
+    inbox.drain_inbox()
+    assert _status("evt_1") == ("dead", 1)
+    assert seen == ["evt_2"]
+    assert [row["event_id"] for row in inbox.list_events(status="dead")] == ["evt_1"]
+
+    broken.clear()
+    assert inbox.replay(status="dead") == 1
+    inbox.drain_inbox()
+    assert _status("evt_1") == ("done", 0)
+    assert seen == ["evt_2", "evt_1"]
+
+
+def test_store_is_refreshed_before_each_handler(tmp_inbox, monkeypatch):
+    calls = []
+    tmp_inbox(lambda event: calls.append(("handle", event["id"])))
+    monkeypatch.setattr(inbox, "reload_store_if_changed", lambda: calls.append(("sync",)) or False)
+
+    inbox.ingest("test", _event("evt_1", "cs_1"))
+    inbox.ingest("test", _event("evt_2", "cs_2"))
+    inbox.drain_inbox()
+    assert calls == [("sync",), ("handle", "evt_1"), ("sync",), ("handle", "evt_2")]
+
+
+def test_failed_store_refresh_is_retried_like_a_handler_error(tmp_inbox, monkeypatch):
+    seen = []
+    tmp_inbox(lambda event: seen.append(event["id"]))
+
+    def refresh():
+        raise OSError("database is locked")
+
+    monkeypatch.setattr(inbox, "reload_store_if_changed", refresh)
+    inbox.ingest("test", _event("evt_1", "cs_1"))
+    inbox.drain_inbox()
+    assert seen == []
+    assert _status("evt_1") == ("pending", 1)